@@ -20,6 +20,7 @@ from agent.schema import Request
 from core.app_state import Appstate
 
 from tools.tools import single_tools
+from prefect_agent.shared.tracing import TraceContextMiddleware, configure_tracing, span
 
 from chat_data import get_chat_history, save_chat_history
 
@@ -31,6 +32,7 @@ from os import getenv
 async def lifespan(app: FastAPI):
     load_dotenv()
     setup_logger()
+    configure_tracing("agent")
     logger = get_logger("Service")
     genai.configure(api_key=getenv("GOOGLE_API_KEY")) # Do i Need this line ???
     GEMINI_MODELS = (
@@ -59,6 +61,7 @@ async def lifespan(app: FastAPI):
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(TraceContextMiddleware)
 
 
 async def run_query(user_id: str, session_id: str, query: str) -> str:
@@ -86,7 +89,8 @@ import traceback
 @app.post("/query", response_model=FinalResponseEvent)
 async def query(req: Request):
     try:
-        res = await run_query(req.user_id, req.session_id, req.query)
+        with span("agent.query", user_id=req.user_id, session_id=req.session_id):
+            res = await run_query(req.user_id, req.session_id, req.query)
         with open("response/print.log", "w") as f:
             traceback.print_exc(file=f)
         with open("response/ctx.txt", "w") as f:
@@ -24,6 +24,9 @@ class BaseMilvusClient(ABC, Generic[OutputT]):
             await self.client.close()
         self.client = None
 
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.__aclose__()
+
     @staticmethod
     def _flatten_hits(search_result) -> Iterable:
         if isinstance(search_result, list) and search_result and isinstance(search_result[0], list):
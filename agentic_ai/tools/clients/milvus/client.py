@@ -2,6 +2,7 @@ from .base import BaseMilvusClient
 from .schema import VisualImageMilvusResponse,VisualImageFilterCondition, CaptionImageMilvusResponse, CaptionImageFilterCondition, SegmentCaptionMilvusResponse, SegmentCaptionFilterCondition
 from typing import cast
 from pymilvus import AsyncMilvusClient,AnnSearchRequest,WeightedRanker
+from prefect_agent.shared import tracing
 
 
 class VisualImageMilvusClient(BaseMilvusClient[VisualImageMilvusResponse]):
@@ -45,15 +46,16 @@ class VisualImageMilvusClient(BaseMilvusClient[VisualImageMilvusResponse]):
         search_params['metric_type'] = metric_type
         search_params['params']= param
 
-        res = await client.search( 
-            collection_name=self.collection,
-            data=query_embedding,
-            anns_field=self.ann_field,
-            limit=top_k,
-            output_fields=output_fields,
-            filter=filter_expr.to_expr(),
-            search_params=search_params
-        )
+        with tracing.span("milvus.search", collection=self.collection, top_k=top_k, queries=len(query_embedding)):
+            res = await client.search( 
+                collection_name=self.collection,
+                data=query_embedding,
+                anns_field=self.ann_field,
+                limit=top_k,
+                output_fields=output_fields,
+                filter=filter_expr.to_expr(),
+                search_params=search_params
+            )
         return self._from_hit_to_response(res)
 
 
@@ -82,7 +84,7 @@ class CaptionImageMilvusClient(BaseMilvusClient[CaptionImageMilvusResponse]):
                     caption_minio_url=str(fields['caption_minio_url']),
                     score=float(hit.score),
                     image_minio_url=str(fields['image_minio_url']),
-                    user_bucket=str(fields['userr_bucket'])
+                    user_bucket=str(fields['user_bucket'])
                 )
         except Exception as e:
             missing = e.args[0]
@@ -103,15 +105,16 @@ class CaptionImageMilvusClient(BaseMilvusClient[CaptionImageMilvusResponse]):
         search_params['metric_type'] = metric_type
         search_params['params']= param
 
-        res = await client.search( 
-            collection_name=self.collection,
-            data=query_embedding,
-            anns_field=self.ann_field,
-            limit=top_k,
-            output_fields=output_fields,
-            filter=filter_expr.to_expr(),
-            search_params=search_params
-        )
+        with tracing.span("milvus.search", collection=self.collection, top_k=top_k, queries=len(query_embedding)):
+            res = await client.search( 
+                collection_name=self.collection,
+                data=query_embedding,
+                anns_field=self.ann_field,
+                limit=top_k,
+                output_fields=output_fields,
+                filter=filter_expr.to_expr(),
+                search_params=search_params
+            )
         return self._from_hit_to_response(res)
 
     
@@ -160,13 +163,14 @@ class SegmentCaptionImageMilvusClient(BaseMilvusClient[SegmentCaptionMilvusRespo
         search_params['metric_type'] = metric_type
         search_params['params']= param
 
-        res = await client.search( 
-            collection_name=self.collection,
-            data=query_embedding,
-            anns_field=self.ann_field,
-            limit=top_k,
-            output_fields=output_fields,
-            filter=filter_expr.to_expr(),
-            search_params=search_params
-        )
+        with tracing.span("milvus.search", collection=self.collection, top_k=top_k, queries=len(query_embedding)):
+            res = await client.search( 
+                collection_name=self.collection,
+                data=query_embedding,
+                anns_field=self.ann_field,
+                limit=top_k,
+                output_fields=output_fields,
+                filter=filter_expr.to_expr(),
+                search_params=search_params
+            )
         return self._from_hit_to_response(res)
\ No newline at end of file
@@ -3,12 +3,16 @@ import urllib3
 from urllib3.util import Timeout
 from minio import Minio
 from minio.error import S3Error
-from typing import Dict, Any
+from datetime import timedelta
+from typing import Dict, Any, Iterator
 import json
+import os
+import tempfile
 
 
 import logging
 
+DEFAULT_CHUNK_SIZE = 1024 * 1024
 
 class StorageError(RuntimeError):
     """Raised when MinIO storage operations fail."""
@@ -58,6 +62,76 @@ class StorageClient:
             self.logger.info(f"Bucket: {bucket} has no {object_name}")
             return None
 
+    def get_range(self, bucket: str, object_name: str, offset: int, length: int) -> bytes | None:
+        """`length` bytes starting at `offset` (an HTTP range request); None if the object is missing."""
+        self._ensure_bucket(bucket)
+        try:
+            response = self.client.get_object(bucket, object_name, offset=offset, length=length)
+            try:
+                return response.read()
+            finally:
+                response.close()
+                response.release_conn()
+        except S3Error as exc:
+            self.logger.info(f"Bucket: {bucket} has no {object_name}")
+            return None
+
+    def iter_object(
+        self,
+        bucket: str,
+        object_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        *,
+        offset: int = 0,
+        length: int = 0,
+    ) -> Iterator[bytes]:
+        """Stream an object (or `length` bytes from `offset`) in `chunk_size` pieces."""
+        self._ensure_bucket(bucket)
+        try:
+            response = self.client.get_object(bucket, object_name, offset=offset, length=length)
+        except S3Error as exc:
+            raise StorageError(f"Failed to fetch object {bucket}/{object_name}: {exc}") from exc
+        try:
+            while chunk := response.read(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def download_to_path(
+        self,
+        bucket: str,
+        object_name: str,
+        path: str | os.PathLike[str],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> str:
+        """Stream an object to a temp file next to `path`, then rename it into place."""
+        path = os.fspath(path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".download-", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in self.iter_object(bucket, object_name, chunk_size):
+                    fh.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    def get_presigned_url(
+        self,
+        bucket: str,
+        object_name: str,
+        *,
+        expires_seconds: timedelta = timedelta(seconds=3600),
+    ) -> str:
+        self._ensure_bucket(bucket)
+        try:
+            return self.client.presigned_get_object(bucket, object_name, expires=expires_seconds)
+        except S3Error as exc:
+            raise StorageError(f"Failed to presign object {bucket}/{object_name}: {exc}") from exc
+
     def read_json(self, bucket: str, object_name: str) -> Dict[str, Any] | None:
         raw = self.get_object(bucket, object_name)
         if raw is None:
@@ -32,7 +32,7 @@ async def get_images_from_visual_query(
     external_client: Annotated[ExternalEncodeClient, "External client (auto-provided)"],
     postgres_client: Annotated[PostgresClient, "Postgre client (auto-provided)"],
     minio_client: Annotated[StorageClient, "Storage Client (auto-provided)"],
-    output_fields: list[str] = ['id', 'related_video_name', 'related_video_id', 'segment_index', 'minio_url', 'user_bucket']
+    output_fields: list[str] = ['id', 'related_video_id', 'frame_index', 'timestamp', 'minio_url', 'user_bucket']
 ) ->  list[tuple[float, ImageObjectInterface]]:
     """
     Retrieve visually similar images based on a **visual query**.
@@ -67,18 +67,21 @@ async def get_images_from_visual_query(
 
     result: list[tuple[float, ImageObjectInterface]] = []
     for resp in milvus_response:
-        postgre_resp = await postgres_client.get_children_artifact(
-            artifact_id=resp.identification,  filter_artifact_type=[ImageCaptionArtifact.__name__]
-        )        
-        caption_artifact = postgre_resp[0]
-        s3_caption_url = caption_artifact.minio_url
-
-        bucket_name, object_name = extract_s3_minio_url(s3_caption_url)
-        caption_object = cast(dict, minio_client.read_json(
-            bucket=bucket_name, object_name=object_name
-        ))
+        # The caption hangs off the image, which is the embedding's parent.
+        caption = ""
+        embedding_artifact = await postgres_client.get_artifact(resp.identification)
+        if embedding_artifact is not None and embedding_artifact.parent_artifact_id:
+            postgre_resp = await postgres_client.get_children_artifact(
+                artifact_id=embedding_artifact.parent_artifact_id,  filter_artifact_type=[ImageCaptionArtifact.__name__]
+            )
+            if postgre_resp:
+                s3_caption_url = postgre_resp[0].minio_url
 
-        caption = caption_object['caption']
+                bucket_name, object_name = extract_s3_minio_url(s3_caption_url)
+                caption_object = minio_client.read_json(
+                    bucket=bucket_name, object_name=object_name
+                ) or {}
+                caption = caption_object.get('caption', "")
 
         image = ImageObjectInterface(
             related_video_id=resp.related_video_id,
@@ -110,7 +113,7 @@ async def get_images_from_caption_query(
     external_client: Annotated[ExternalEncodeClient, "External encoding client for generating caption embeddings (auto-provided)."],
     postgres_client: Annotated[PostgresClient, "Postgres client for retrieving related artifact metadata (auto-provided)."],
     minio_client: Annotated[StorageClient, "Storage Client for reading caption data stored in MinIO (auto-provided)."],
-    output_fields: list[str] = ['id', 'related_video_name', 'related_video_id', 'segment_index', 'minio_url', 'user_bucket']
+    output_fields: list[str] = ['id', 'related_video_id', 'frame_index', 'timestamp', 'caption', 'caption_minio_url', 'image_minio_url', 'user_bucket']
 ) -> list[tuple[float, ImageObjectInterface]]:
     """
     Retrieve images semantically related to a **caption-based query**.
@@ -167,7 +170,7 @@ async def get_segments_from_event_query(
     external_client: Annotated[ExternalEncodeClient, "External encoding client for generating event embeddings from natural language queries (auto-provided)."],
     postgres_client: Annotated[PostgresClient, "Postgres client for retrieving related event or segment metadata (auto-provided)."],
     minio_client: Annotated[StorageClient, "Storage Client for reading event-level metadata stored in MinIO (auto-provided)."],
-    output_fields: list[str] = ['id', 'related_video_name', 'related_video_id', 'segment_index', 'segment_minio_url', 'user_bucket', 'caption', 'start_time', 'end_time']
+    output_fields: list[str] = ['id', 'related_video_id', 'start_frame', 'end_frame', 'segment_caption_minio_url', 'user_bucket', 'caption', 'start_time', 'end_time']
 ) -> list[tuple[float, SegmentObjectInterface]]:
     
 
@@ -6,6 +6,9 @@ import asyncio
 from datetime import datetime
 import base64
 import mimetypes
+import os
+import shutil
+import tempfile
 from typing import Tuple, cast
 from agentic_ai.tools.schema.artifact import VideoObject, ImageObjectInterface, SegmentObjectInterface
 from typing import Annotated
@@ -220,6 +223,27 @@ def read_image(image_interface: ImageObjectInterfaceter, minio_client: StorageCl
     return base64_str, mime_type
 
 
+async def _cut_clip(source_url: str, start_time: str, end_time: str, extension: str) -> bytes:
+    """Stream-copy `start_time`..`end_time` of `source_url` with ffmpeg and return the clip bytes."""
+    suffix = extension if extension.startswith(".") else f".{extension}"
+    fd, clip_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            "-ss", start_time, "-to", end_time, "-i", source_url,
+            "-c", "copy", clip_path,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr.decode(errors='replace').strip()}")
+        with open(clip_path, "rb") as fh:
+            return fh.read()
+    finally:
+        os.remove(clip_path)
+
+
 async def read_segment(
     segment_interface: SegmentObjectInterface, 
     minio_client: StorageClient, 
@@ -227,6 +251,10 @@ async def read_segment(
 ) -> Tuple[str, bytes]:
     """
     Fetch a video segment and return its extension and bytes.
+
+    ffmpeg reads the video from a presigned URL and seeks with HTTP range
+    requests, so only the segment (and the container index) is downloaded.
+    Without ffmpeg on PATH the whole video is returned, as before.
     """
 
     video_artifact = await postgre_client.get_artifact(artifact_id=segment_interface.related_video_id)
@@ -240,12 +268,14 @@ async def read_segment(
     video_url = video_artifact.minio_url
     bucket_video, object_video_name = extract_s3_minio_url(video_url)
 
-    loop = asyncio.get_event_loop()
-    video_bytes = await loop.run_in_executor(
-        None,
-        lambda: minio_client.get_object(bucket=bucket_video, object_name=object_video_name)
-    )
-    video_bytes = cast(bytes, video_bytes)
+    if shutil.which("ffmpeg") is not None:
+        source_url = await asyncio.to_thread(minio_client.get_presigned_url, bucket_video, object_video_name)
+        clip = await _cut_clip(source_url, segment_interface.start_time, segment_interface.end_time, extension)
+        return extension, clip
+
+    video_bytes = await asyncio.to_thread(minio_client.get_object, bucket_video, object_video_name)
+    if video_bytes is None:
+        raise ValueError(f"Video object {video_url} does not exist.")
     return extension, video_bytes
 
 
@@ -1,10 +1,13 @@
 from email.mime import image
+import json
 from beanie import PydanticObjectId
 from fastapi import HTTPException
 from fastapi.security import HTTPBearer
+import httpx
 import jwt
 import socketio
 
+from app.core.config import settings
 from app.schema.user import ALGORITHM, SECRET_KEY
 
 sio = socketio.AsyncServer(
@@ -34,6 +37,22 @@ def optional_verify_token(credentials=security):
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+def parse_full_response_to_blocks(full_response: list[dict]) -> list[TextBlock | ImageBlock | VideoBlock]:
+    """Merge streamed chunks into message blocks: consecutive text chunks become one TextBlock."""
+    blocks: list[TextBlock | ImageBlock | VideoBlock] = []
+    for item in full_response:
+        chunk, msg_type = item["chunk"], item["msg_type"]
+        if msg_type == "image":
+            blocks.append(ImageBlock(image_urls=chunk if isinstance(chunk, list) else [chunk]))
+        elif msg_type == "video":
+            blocks.append(VideoBlock(video_urls=chunk if isinstance(chunk, list) else [chunk]))
+        elif blocks and isinstance(blocks[-1], TextBlock):
+            blocks[-1].text_content += str(chunk)
+        else:
+            blocks.append(TextBlock(text_content=str(chunk)))
+    return blocks
+
+
 @sio.on("stream_chat")
 async def handle_stream_chat(socket_id, data: dict):
     try:
@@ -42,6 +61,7 @@ async def handle_stream_chat(socket_id, data: dict):
         session_id = data.get("sessionId", None)
         user_id = data.get("userId")  # could be None for guest
         message = data.get("text")
+        video_ids = data.get("videos", [])
 
         user_message = SessionMessage(
             session_id=None,
@@ -69,7 +89,7 @@ async def handle_stream_chat(socket_id, data: dict):
         # send data to agent, agent stream back
         try:
             # request agent
-            ai_url = "http://100.113.186.28:4141/api/agent/stream"
+            ai_url = settings.AGENT_STREAM_URL
             payload = {
                 "session_id": str(session_id),
                 "text": message,
@@ -107,7 +127,7 @@ async def handle_stream_chat(socket_id, data: dict):
                         except Exception as e:
                             print("⚠️ parse error:", e, line)
             # update the db
-            blocks = parseFullResponseToBlocks(full_response)
+            blocks = parse_full_response_to_blocks(full_response)
 
             ai_message = SessionMessage(
                 session_id=PydanticObjectId(session_id),
@@ -115,6 +135,11 @@ async def handle_stream_chat(socket_id, data: dict):
                 blocks=blocks,
             )
             await app_state.chat_service.add_message(session_id, "ai", ai_message)
+
+            # notify finish
+            await sio.emit(
+                "stream_end", {"timestamp": ai_message.timestamp.isoformat()}, to=socket_id
+            )
         except Exception as e:
             await sio.emit(
                 "error", {"message": "agent unreachable: " + str(e)}, to=socket_id
@@ -30,6 +30,9 @@ class AppSettings(BaseSettings):
 
 
     # LLM settings
+    AGENT_STREAM_URL: str = Field(
+        "http://100.113.186.28:4141/api/agent/stream", description="Agent endpoint the chat socket streams answers from"
+    )
 
     # GOOGLE AUTH CLIENT settings
     GOOGLE_OAUTH_CLIENT_ID: str = Field(..., description="Google OAuth Client ID")
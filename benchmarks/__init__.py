@@ -0,0 +1,33 @@
+"""Benchmarks for the ingestion pipeline and the agent's retrieval tools; see each package's README."""
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+INGESTION_ROOT = REPO_ROOT / "ingestion"
+
+
+def prepare_environment(workdir: Path) -> None:
+    """Placeholder settings and import roots for the ingestion, service and agent code, before any of it is imported."""
+    # Orchestrator and service settings are read from the environment at import time; none of these are contacted.
+    placeholders = {
+        "MINIO_HOST": "127.0.0.1", "MINIO_PORT": "9000", "MINIO_USER": "benchmark", "MINIO_PASSWORD": "benchmark",
+        "POSTGRE_DATABASE_URL": f"sqlite+aiosqlite:///{workdir / 'tracker.db'}",
+        "SERVICE_NAME": "benchmark", "PORT": "0", "CPU_FALLBACK": "true",
+        "CHUNKFORMER_MODEL_PATH": "-", "AUTOSHOT_MODEL_PATH": "-",
+        "BEIT3_MODEL_CHECKPOINT": "-", "BEIT3_TOKENIZER_CHECKPOINT": "-",
+        "OPEN_CLIP_MODEL_NAME": "-", "OPEN_CLIP_PRETRAINED": "-",
+    }
+    for name, value in placeholders.items():
+        os.environ.setdefault(name, value)
+    # A private Prefect home keeps task caches and results from leaking between runs.
+    os.environ["PREFECT_HOME"] = str(workdir / "prefect")
+    os.environ.setdefault("PREFECT_LOGGING_LEVEL", "WARNING")
+    os.environ.setdefault("PREFECT_SERVER_ALLOW_EPHEMERAL_MODE", "true")
+    # The agent imports `ingestion.*` from the repository root; ingestion and the services import their own top-level packages.
+    # The MinIO / Milvus stand-ins live with the ingestion tests.
+    sys.path[:0] = [
+        str(REPO_ROOT), str(INGESTION_ROOT), str(INGESTION_ROOT / "prefect_agent"), str(INGESTION_ROOT / "test"),
+    ]
@@ -0,0 +1,114 @@
+"""
+Socket.IO chat streaming load test for the backend, with the agent stubbed.
+
+    python -m benchmarks.chat --users 50 --messages 5 --tokens 120
+    python -m benchmarks.chat --backend-url http://localhost:8000 --backend-pid 4242
+    python -m benchmarks.chat --users 100 --max-ttft-p95-ms 800 --max-drop-rate 0
+
+By default the backend is started here (`uvicorn main:app_with_sockets`)
+against `--mongo-uri` and the MinIO in the environment, with
+`AGENT_STREAM_URL` pointed at the stub. With `--backend-url`, the running
+backend must already have `AGENT_STREAM_URL` set to
+`http://127.0.0.1:<--stub-port>/api/agent/stream`. Exits 1 when a
+`--max-*` gate is exceeded.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from benchmarks import prepare_environment
+
+
+def _gate(report: dict[str, Any], args: argparse.Namespace) -> list[str]:
+    violations = []
+    ttft = report["time_to_first_token_ms"].get("p95")
+    if args.max_ttft_p95_ms is not None and (ttft is None or ttft > args.max_ttft_p95_ms):
+        violations.append(f"time_to_first_token_ms.p95={ttft} > {args.max_ttft_p95_ms}")
+    if args.max_drop_rate is not None and report["events"]["drop_rate"] > args.max_drop_rate:
+        violations.append(f"events.drop_rate={report['events']['drop_rate']} > {args.max_drop_rate}")
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        violations.append(f"error_rate={report['error_rate']} > {args.max_error_rate}")
+    cpu = report["backend"].get("cpu_ms_per_message")
+    if args.max_cpu_ms_per_message is not None and cpu is not None and cpu > args.max_cpu_ms_per_message:
+        violations.append(f"backend.cpu_ms_per_message={cpu} > {args.max_cpu_ms_per_message}")
+    writes = (report["mongo"] or {}).get("writes_per_message")
+    if args.max_writes_per_message is not None and writes is not None and writes > args.max_writes_per_message:
+        violations.append(f"mongo.writes_per_message={writes} > {args.max_writes_per_message}")
+    if report["connect_errors"]:
+        violations.append(f"{len(report['connect_errors'])} users failed to connect")
+    return violations
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.chat", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent Socket.IO clients")
+    parser.add_argument("--messages", type=int, default=5, help="Messages each user sends, one after another")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Seconds a user waits between messages")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a message's stream_end")
+    stream = parser.add_argument_group("stub agent stream")
+    stream.add_argument("--tokens", type=int, default=60, help="Text chunks per answer")
+    stream.add_argument("--first-token-ms", type=float, default=300.0)
+    stream.add_argument("--token-interval-ms", type=float, default=20.0)
+    stream.add_argument("--jitter", type=float, default=0.2, help="Relative +/- jitter on every delay")
+    stream.add_argument("--image-every", type=int, default=0, help="An image chunk after every N text chunks")
+    stream.add_argument("--words-per-token", type=int, default=1)
+    backend = parser.add_argument_group("backend")
+    backend.add_argument("--backend-url", help="Use a running backend instead of starting one")
+    backend.add_argument("--backend-pid", type=int, help="With --backend-url: its PID, for CPU accounting")
+    backend.add_argument("--stub-port", type=int, default=0, help="Serve the stub agent here (0: any free port)")
+    backend.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    backend.add_argument("--mongo-db", default="chat_bench", help="Dropped and recreated when the backend is started here")
+    backend.add_argument("--minio-endpoint", default="localhost:9000")
+    gate = parser.add_argument_group("regression gate")
+    gate.add_argument("--max-ttft-p95-ms", type=float)
+    gate.add_argument("--max-drop-rate", type=float)
+    gate.add_argument("--max-error-rate", type=float)
+    gate.add_argument("--max-cpu-ms-per-message", type=float)
+    gate.add_argument("--max-writes-per-message", type=float)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, help="Keep the backend log here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="chat-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    prepare_environment(workdir)
+
+    from .harness import ChatLoadOptions, run_chat_load
+    from .stub_agent import StreamShape
+
+    options = ChatLoadOptions(
+        users=args.users, messages_per_user=args.messages, think_time_seconds=args.think_time,
+        timeout_seconds=args.timeout,
+        shape=StreamShape(
+            tokens=args.tokens, first_token_ms=args.first_token_ms, token_interval_ms=args.token_interval_ms,
+            jitter=args.jitter, image_every=args.image_every, words_per_token=args.words_per_token,
+        ),
+        backend_url=args.backend_url, backend_pid=args.backend_pid, stub_port=args.stub_port,
+        mongo_uri=args.mongo_uri, mongo_db=args.mongo_db, minio_endpoint=args.minio_endpoint, seed=args.seed,
+    )
+    try:
+        report = asyncio.run(run_chat_load(options, workdir))
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    violations = _gate(report, args)
+    report["gate"] = {"passed": not violations, "violations": violations}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
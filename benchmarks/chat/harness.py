@@ -0,0 +1,230 @@
+"""
+Runs N fake users against the backend's Socket.IO chat, with the agent
+replaced by `stub_agent`, and gathers the client-side timings, the backend
+process's CPU and the MongoDB writes the run caused.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+import psutil
+
+from benchmarks import REPO_ROOT
+from benchmarks.ingestion.services import HOST, LocalServices
+
+from .stub_agent import StreamShape, stub_agent_app
+from .users import FakeUser, MessageTrace
+
+BACKEND_ROOT = REPO_ROOT / "backend"
+
+
+@dataclass
+class ChatLoadOptions:
+    users: int = 20
+    messages_per_user: int = 5
+    think_time_seconds: float = 0.5
+    timeout_seconds: float = 60.0
+    shape: StreamShape = field(default_factory=StreamShape)
+    # None: start the backend here (needs MongoDB and MinIO); else a running backend already pointed at the stub.
+    backend_url: str | None = None
+    backend_pid: int | None = None
+    # 0 picks a free port; a running backend needs a fixed one in its AGENT_STREAM_URL.
+    stub_port: int = 0
+    mongo_uri: str = "mongodb://localhost:27017"
+    mongo_db: str = "chat_bench"
+    minio_endpoint: str = "localhost:9000"
+    seed: int = 0
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    values = np.asarray(samples)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+class _MongoWrites:
+    """Server-wide insert/update/delete opcounters; the benchmark assumes nothing else writes meanwhile."""
+
+    def __init__(self, uri: str):
+        try:
+            from pymongo import MongoClient
+        except ImportError:
+            self._client = None
+            return
+        self._client = MongoClient(uri, serverSelectionTimeoutMS=3000)
+
+    def read(self) -> dict[str, int] | None:
+        if self._client is None:
+            return None
+        counters = self._client.admin.command("serverStatus")["opcounters"]
+        return {op: int(counters[op]) for op in ("insert", "update", "delete", "query")}
+
+    def drop(self, db_name: str) -> None:
+        if self._client is not None:
+            self._client.drop_database(db_name)
+
+
+class _BackendProcess:
+    """`uvicorn main:app_with_sockets` from backend/, with the agent URL pointed at the stub."""
+
+    def __init__(self, options: ChatLoadOptions, agent_url: str, log_path: Path):
+        self.port = LocalServices().reserve("backend")
+        self.url = f"http://{HOST}:{self.port}"
+        env = {
+            **os.environ,
+            "AGENT_STREAM_URL": agent_url,
+            "MONGO_URI": options.mongo_uri,
+            "MONGO_DB": options.mongo_db,
+            "MINIO_PUBLIC_ENDPOINT": options.minio_endpoint,
+            "GOOGLE_OAUTH_CLIENT_ID": os.environ.get("GOOGLE_OAUTH_CLIENT_ID", "benchmark"),
+            "GOOGLE_OAUTH_CLIENT_SECRET": os.environ.get("GOOGLE_OAUTH_CLIENT_SECRET", "benchmark"),
+        }
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = log_path.open("wb")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app_with_sockets", "--host", HOST, "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=BACKEND_ROOT, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+
+    async def wait_ready(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"Backend exited with {self.process.returncode}; see {self._log.name}")
+                try:
+                    if (await client.get(f"{self.url}/health", timeout=2)).status_code == 200:
+                        return
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise RuntimeError(f"Backend did not become healthy in {timeout}s; see {self._log.name}")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+
+def _cpu_seconds(process: psutil.Process | None) -> float | None:
+    if process is None:
+        return None
+    times = process.cpu_times()
+    return times.user + times.system
+
+
+def summarize(traces: list[MessageTrace], expected_chunks: int) -> dict[str, Any]:
+    """Client-side view of a run: latencies in milliseconds, drops against the stub's chunk count."""
+    finished = [t for t in traces if t.ended is not None and t.error is None]
+    errors: dict[str, int] = {}
+    for trace in traces:
+        if trace.error:
+            key = "timeout" if trace.error == "timeout" else trace.error.split(":")[0]
+            errors[key] = errors.get(key, 0) + 1
+    dropped = sum(t.dropped(expected_chunks) for t in traces)
+    return {
+        "messages": len(traces),
+        "completed": len(finished),
+        "errors": errors,
+        "error_rate": round(1 - len(finished) / len(traces), 4) if traces else 0.0,
+        "ack_ms": _percentiles([(t.acked - t.sent) * 1000 for t in traces if t.acked is not None]),
+        "time_to_first_token_ms": _percentiles([(t.first_chunk - t.sent) * 1000 for t in traces if t.first_chunk is not None]),
+        "inter_chunk_ms": _percentiles([gap for t in traces for gap in t.gaps_ms]),
+        "stream_total_ms": _percentiles([(t.ended - t.sent) * 1000 for t in finished]),
+        "events": {
+            "expected": expected_chunks * len(traces),
+            "received": sum(len(t.seen) for t in traces),
+            "dropped": dropped,
+            "duplicated": sum(t.duplicates for t in traces),
+            "out_of_order": sum(t.out_of_order for t in traces),
+            "drop_rate": round(dropped / (expected_chunks * len(traces)), 6) if traces and expected_chunks else 0.0,
+        },
+    }
+
+
+async def run_chat_load(options: ChatLoadOptions, workdir: Path) -> dict[str, Any]:
+    services = LocalServices()
+    stub_port = services.reserve("agent", options.stub_port)
+    agent = services.mount("agent", stub_agent_app(options.shape, seed=options.seed))
+    services.start()
+    agent_url = f"http://{HOST}:{stub_port}/api/agent/stream"
+
+    mongo = _MongoWrites(options.mongo_uri)
+    backend: _BackendProcess | None = None
+    try:
+        if options.backend_url is None:
+            mongo.drop(options.mongo_db)
+            backend = _BackendProcess(options, agent_url, workdir / "logs" / "backend.log")
+            await backend.wait_ready()
+            backend_url, pid = backend.url, backend.process.pid
+        else:
+            backend_url, pid = options.backend_url, options.backend_pid
+        process = psutil.Process(pid) if pid else None
+
+        users = [FakeUser(i, backend_url, options.messages_per_user, options.think_time_seconds,
+                          options.timeout_seconds) for i in range(options.users)]
+        start = asyncio.Event()
+        runs = [asyncio.create_task(user.run(start)) for user in users]
+        # Connect everyone first so the handshakes are not part of the measured window.
+        while any(user.client.connected is False and user.connect_error is None for user in users):
+            await asyncio.sleep(0.05)
+            if all(run.done() for run in runs):
+                break
+
+        writes_before, cpu_before = mongo.read(), _cpu_seconds(process)
+        started = time.perf_counter()
+        start.set()
+        await asyncio.gather(*runs)
+        wall = time.perf_counter() - started
+        writes_after, cpu_after = mongo.read(), _cpu_seconds(process)
+    finally:
+        if backend is not None:
+            backend.stop()
+        services.stop()
+
+    traces = [trace for user in users for trace in user.traces]
+    report = summarize(traces, options.shape.chunks)
+    messages = max(len(traces), 1)
+    backend_report: dict[str, Any] = {"url": backend_url, "pid": pid}
+    if cpu_before is not None and cpu_after is not None:
+        cpu = cpu_after - cpu_before
+        backend_report.update(cpu_seconds=round(cpu, 3), cpu_cores_avg=round(cpu / wall, 3),
+                              cpu_ms_per_message=round(cpu * 1000 / messages, 3))
+    mongo_report: dict[str, Any] | None = None
+    if writes_before is not None and writes_after is not None:
+        delta = {op: writes_after[op] - writes_before[op] for op in writes_after}
+        writes = delta["insert"] + delta["update"] + delta["delete"]
+        mongo_report = {**delta, "writes_per_message": round(writes / messages, 3)}
+    return {
+        "users": options.users,
+        "messages_per_user": options.messages_per_user,
+        "stream": {**vars(options.shape), "chunks_per_message": options.shape.chunks},
+        "wall_seconds": round(wall, 3),
+        "messages_per_second": round(len(traces) / wall, 2) if wall > 0 else None,
+        "connect_errors": [user.connect_error for user in users if user.connect_error],
+        "stray_events": sum(user.stray_events for user in users),
+        **report,
+        "backend": backend_report,
+        "mongo": mongo_report,
+        "agent_url": agent_url,
+        "agent_streams": agent.state.requests["POST /api/agent/stream"],
+    }
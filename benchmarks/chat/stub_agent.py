@@ -0,0 +1,74 @@
+"""
+Stand-in for the agent's `/api/agent/stream`, in the line protocol
+`backend/app/api/socket.py` reads: `data: {"chunk": ..., "msg_type": ...}`
+per line, then `[DONE]`.
+
+Every text chunk starts with its sequence number (`#0007 `) so the fake
+users can tell dropped, duplicated and reordered events apart; media
+chunks carry it in the URL.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+_SEQ = re.compile(r"#(\d+)")
+
+
+@dataclass
+class StreamShape:
+    tokens: int = 60
+    first_token_ms: float = 300.0
+    token_interval_ms: float = 20.0
+    jitter: float = 0.2
+    # One image chunk after every this many text chunks; 0 for text only.
+    image_every: int = 0
+    words_per_token: int = 1
+
+    @property
+    def chunks(self) -> int:
+        """Events a user should receive per message."""
+        return self.tokens + (self.tokens // self.image_every if self.image_every else 0)
+
+
+def chunk_sequence(chunk: str | list[str]) -> int | None:
+    """Sequence number a stub chunk was stamped with, or None if the event did not come from the stub."""
+    text = chunk[0] if isinstance(chunk, list) and chunk else chunk
+    match = _SEQ.search(text) if isinstance(text, str) else None
+    return int(match.group(1)) if match else None
+
+
+def stub_agent_app(shape: StreamShape, seed: int = 0) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+
+    def pause(ms: float) -> float:
+        return max(ms * (1 + rng.uniform(-shape.jitter, shape.jitter)), 0.0) / 1000
+
+    async def lines() -> AsyncIterator[str]:
+        await asyncio.sleep(pause(shape.first_token_ms))
+        seq = 0
+        for token in range(shape.tokens):
+            if token:
+                await asyncio.sleep(pause(shape.token_interval_ms))
+            words = " ".join("lorem" for _ in range(shape.words_per_token))
+            yield "data: " + json.dumps({"chunk": f"#{seq:04d} {words} ", "msg_type": "text"}) + "\n"
+            seq += 1
+            if shape.image_every and (token + 1) % shape.image_every == 0:
+                yield "data: " + json.dumps({"chunk": [f"https://bench.invalid/frames/#{seq:04d}.webp"],
+                                             "msg_type": "image"}) + "\n"
+                seq += 1
+        yield "[DONE]\n"
+
+    @app.post("/api/agent/stream")
+    async def stream() -> StreamingResponse:
+        return StreamingResponse(lines(), media_type="text/event-stream")
+
+    return app
@@ -0,0 +1,121 @@
+"""
+Fake chat users: python-socketio clients that send `stream_chat` the way
+the frontend does and time what comes back.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import socketio
+
+from .stub_agent import chunk_sequence
+
+
+@dataclass
+class MessageTrace:
+    """Everything one user saw for one message, in `time.perf_counter()` seconds."""
+    sent: float
+    acked: float | None = None
+    first_chunk: float | None = None
+    last_chunk: float | None = None
+    ended: float | None = None
+    error: str | None = None
+    gaps_ms: list[float] = field(default_factory=list)
+    seen: set[int] = field(default_factory=set)
+    duplicates: int = 0
+    out_of_order: int = 0
+    _last_seq: int = -1
+
+    def on_chunk(self, chunk: Any, now: float) -> None:
+        if self.first_chunk is None:
+            self.first_chunk = now
+        else:
+            self.gaps_ms.append((now - self.last_chunk) * 1000)  # type: ignore[operator]
+        self.last_chunk = now
+        seq = chunk_sequence(chunk)
+        if seq is None:
+            return
+        if seq in self.seen:
+            self.duplicates += 1
+        elif seq < self._last_seq:
+            self.out_of_order += 1
+        self.seen.add(seq)
+        self._last_seq = max(self._last_seq, seq)
+
+    def dropped(self, expected: int) -> int:
+        return max(expected - len(self.seen), 0)
+
+
+class FakeUser:
+    def __init__(self, index: int, url: str, messages: int, think_time_seconds: float, timeout_seconds: float):
+        self.index = index
+        self.url = url
+        self.messages = messages
+        self.think_time_seconds = think_time_seconds
+        self.timeout_seconds = timeout_seconds
+        # A stable ObjectId-shaped id, since the backend stores it as the session owner.
+        self.user_id = f"{index + 1:024x}"
+        self.session_id: str | None = None
+        self.traces: list[MessageTrace] = []
+        self.stray_events = 0
+        self.connect_error: str | None = None
+        self._current: MessageTrace | None = None
+        self._done = asyncio.Event()
+        self.client = socketio.AsyncClient(reconnection=False)
+        self._register()
+
+    def _register(self) -> None:
+        @self.client.on("message_received")
+        async def on_received(data: dict) -> None:
+            if self._current is not None and self._current.acked is None:
+                self._current.acked = time.perf_counter()
+            self.session_id = data.get("session_id") or self.session_id
+
+        @self.client.on("stream_chunk")
+        async def on_chunk(data: dict) -> None:
+            if self._current is None or self._current.ended is not None:
+                self.stray_events += 1
+                return
+            self._current.on_chunk(data.get("chunk"), time.perf_counter())
+
+        @self.client.on("stream_end")
+        async def on_end(data: dict) -> None:
+            if self._current is not None:
+                self._current.ended = time.perf_counter()
+            self._done.set()
+
+        @self.client.on("error")
+        async def on_error(data: dict) -> None:
+            if self._current is not None:
+                self._current.error = str(data.get("message", data))[:200]
+            self._done.set()
+
+    async def run(self, start: asyncio.Event) -> None:
+        try:
+            await self.client.connect(self.url, transports=["websocket"], wait_timeout=self.timeout_seconds)
+        except Exception as exc:
+            self.connect_error = f"{type(exc).__name__}: {exc}"[:200]
+            return
+        await start.wait()
+        try:
+            for number in range(self.messages):
+                trace = MessageTrace(sent=time.perf_counter())
+                self._current = trace
+                self._done.clear()
+                await self.client.emit("stream_chat", {
+                    "userId": self.user_id, "sessionId": self.session_id,
+                    "text": f"benchmark user {self.index} message {number}: find the red car",
+                })
+                try:
+                    await asyncio.wait_for(self._done.wait(), self.timeout_seconds)
+                except asyncio.TimeoutError:
+                    trace.error = trace.error or "timeout"
+                self.traces.append(trace)
+                self._current = None
+                if number + 1 < self.messages and self.think_time_seconds:
+                    await asyncio.sleep(self.think_time_seconds)
+        finally:
+            await self.client.disconnect()
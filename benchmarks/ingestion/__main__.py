@@ -0,0 +1,65 @@
+"""
+Hermetic ingestion benchmark.
+
+    python -m benchmarks.ingestion --videos 4 --seconds 20 --output report.json
+
+Runs `video_processing_flow` end to end on synthetic videos against local
+stand-ins (see README.md) and prints / writes a JSON report with per-stage
+wall time, artifacts/s, peak RSS and request counts.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import prepare_environment
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ingestion", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of each synthetic video")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Added latency per fake LLM completion")
+    parser.add_argument("--no-caption-cache", action="store_true", help="Disable the perceptual caption cache")
+    parser.add_argument("--rerun", action="store_true", help="Run the flow a second time to measure the all-checkpointed path")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--workdir", type=Path, help="Keep objects, tracker DB and logs here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="ingestion-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    prepare_environment(workdir)
+
+    from .harness import BenchmarkOptions, IngestionBenchmark
+
+    options = BenchmarkOptions(
+        videos=args.videos, seconds=args.seconds, fps=args.fps, width=args.width, height=args.height,
+        seed=args.seed, llm_latency_ms=args.llm_latency_ms, rerun=args.rerun,
+        caption_cache=not args.no_caption_cache, log_level=args.log_level.upper(),
+    )
+    try:
+        report = asyncio.run(IngestionBenchmark(options, workdir).run())
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Deterministic stand-ins for the model services' upstreams.
+
+The handlers below register with the services' own `shared.registry`, so
+the real service apps (router, BaseService, metrics) serve them exactly
+as they would serve the GPU models. They take the production model names
+(each service only offers the names it knows), and the real handler
+modules are never imported, so nothing else claims them. Outputs depend
+only on their inputs: the same synthetic corpus yields the same artifacts
+on every run.
+
+The LLM service keeps its real `openrouter_api` handler; `fake_openrouter_app`
+answers its chat-completions calls instead of openrouter.ai.
+`fake_consul_app` answers the catalog/health lookups the orchestrator's
+clients make before every request.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import struct
+from collections import Counter
+from pathlib import Path
+from typing import Any, Literal
+from urllib.parse import urlparse
+
+import cv2
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from shared.registry import BaseModelHandler, register_model
+from shared.schema import ModelInfo
+from service_asr.core.schema import ASRInferenceRequest, ASRInferenceResponse, ASRResult, TimestampedToken
+from service_autoshot.schema import AutoShotRequest, AutoShotResponse
+from service_image_embedding.schema import ImageEmbeddingRequest, ImageEmbeddingResponse
+from service_text_embedding.schema import TextEmbeddingRequest, TextEmbeddingResponse
+
+SHOT_FRAMES = 48
+IMAGE_DIM = 512
+TEXT_DIM = 768
+_WORDS = ("xin", "chào", "các", "bạn", "hôm", "nay", "chúng", "ta", "nói", "về", "video", "tổng", "hợp")
+
+# Where the handlers read s3://bucket/key from; set by the harness to the local object store root.
+object_root: Path | None = None
+# Texts with a planted embedding (the retrieval benchmark's queries); anything else is hashed.
+query_vectors: dict[str, list[float]] = {}
+
+
+def _local_path(s3_url: str) -> str:
+    if object_root is None:
+        raise RuntimeError("benchmark object root not configured")
+    parsed = urlparse(s3_url)
+    return str(object_root / parsed.netloc / parsed.path.lstrip("/"))
+
+
+def _probe(video_path: str) -> tuple[int, float]:
+    capture = cv2.VideoCapture(video_path)
+    try:
+        return int(capture.get(cv2.CAP_PROP_FRAME_COUNT)), float(capture.get(cv2.CAP_PROP_FPS) or 25.0)
+    finally:
+        capture.release()
+
+
+def embed(payload: bytes | str, dim: int) -> list[float]:
+    """Unit vector seeded by the payload's digest."""
+    data = payload.encode() if isinstance(payload, str) else payload
+    seed = hashlib.sha256(data).digest()
+    values: list[float] = []
+    counter = 0
+    while len(values) < dim:
+        block = hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+        values.extend(v / 2**31 - 1.0 for v in struct.unpack("<8I", block))
+        counter += 1
+    norm = sum(v * v for v in values[:dim]) ** 0.5 or 1.0
+    return [v / norm for v in values[:dim]]
+
+
+def _timecode(seconds: float) -> str:
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+
+
+class _FakeHandler(BaseModelHandler[Any, Any]):
+    model_type = "benchmark"
+
+    async def load_model_impl(self, device: Literal["cpu", "cuda"]) -> None:
+        pass
+
+    async def unload_model_impl(self) -> None:
+        pass
+
+    def get_model_info(self) -> ModelInfo:
+        return ModelInfo(model_name=self.model_name, model_type=self.model_type)
+
+
+@register_model("autoshot")
+class FakeAutoshotHandler(_FakeHandler):
+    """Cuts every video into fixed `SHOT_FRAMES`-frame shots."""
+    model_type = "autoshot"
+
+    async def preprocess_input(self, input_data: AutoShotRequest) -> str:
+        return _local_path(input_data.s3_minio_url)
+
+    async def run_inference(self, preprocessed_data: str) -> list[tuple[int, int]]:
+        frames, _ = await asyncio.to_thread(_probe, preprocessed_data)
+        return [(start, min(start + SHOT_FRAMES, frames) - 1) for start in range(0, frames, SHOT_FRAMES)]
+
+    async def postprocess_output(self, output_data: list[tuple[int, int]], original_input_data: AutoShotRequest) -> AutoShotResponse:
+        return AutoShotResponse(
+            metadata=original_input_data.metadata, scenes=output_data, total_scenes=len(output_data)
+        )
+
+
+@register_model("chunkformer")
+class FakeASRHandler(_FakeHandler):
+    """One word every half second, drawn from a fixed vocabulary by position."""
+    model_type = "asr"
+
+    async def preprocess_input(self, input_data: ASRInferenceRequest) -> str:
+        return _local_path(input_data.video_minio_url or "")
+
+    async def run_inference(self, preprocessed_data: str) -> list[TimestampedToken]:
+        frames, fps = await asyncio.to_thread(_probe, preprocessed_data)
+        step = max(int(fps / 2), 1)
+        return [
+            TimestampedToken(
+                text=_WORDS[i % len(_WORDS)], start=_timecode(frame / fps), end=_timecode((frame + step) / fps),
+                start_frame=f"{frame:08d}", end_frame=f"{frame + step:08d}",
+            )
+            for i, frame in enumerate(range(0, max(frames - step, 0), step))
+        ]
+
+    async def postprocess_output(self, output_data: list[TimestampedToken], original_input_data: ASRInferenceRequest) -> ASRInferenceResponse:
+        duration = output_data[-1].end if output_data else "00:00:00.000"
+        hours, minutes, seconds = duration.split(":")
+        return ASRInferenceResponse(
+            video_minio_url=original_input_data.video_minio_url or "",
+            metadata=original_input_data.metadata,
+            result=ASRResult(
+                tokens=output_data, processing_time_seconds=0.0,
+                audio_duration_seconds=int(hours) * 3600 + int(minutes) * 60 + float(seconds),
+            ),
+        )
+
+
+@register_model("open_clip")
+class FakeImageEmbeddingHandler(_FakeHandler):
+    model_type = "image_embedding"
+
+    async def preprocess_input(self, input_data: ImageEmbeddingRequest) -> ImageEmbeddingRequest:
+        return input_data
+
+    async def run_inference(self, preprocessed_data: ImageEmbeddingRequest) -> tuple[list | None, list | None]:
+        images = [embed(base64.b64decode(image), IMAGE_DIM) for image in preprocessed_data.image_base64 or []]
+        texts = [query_vectors.get(text) or embed(text, IMAGE_DIM) for text in preprocessed_data.text_input or []]
+        return images or None, texts or None
+
+    async def postprocess_output(self, output_data: tuple[list | None, list | None], original_input_data: ImageEmbeddingRequest) -> ImageEmbeddingResponse:
+        images, texts = output_data
+        return ImageEmbeddingResponse(image_embeddings=images, text_embeddings=texts, metadata=original_input_data.metadata)
+
+
+@register_model("sentence_embedding")
+class FakeTextEmbeddingHandler(_FakeHandler):
+    model_type = "text_embedding"
+
+    async def preprocess_input(self, input_data: TextEmbeddingRequest) -> list[str]:
+        return input_data.texts
+
+    async def run_inference(self, preprocessed_data: list[str]) -> list[list[float]]:
+        return [query_vectors.get(text) or embed(text, TEXT_DIM) for text in preprocessed_data]
+
+    async def postprocess_output(self, output_data: list[list[float]], original_input_data: TextEmbeddingRequest) -> TextEmbeddingResponse:
+        return TextEmbeddingResponse(embeddings=output_data, texts=original_input_data.texts, metadata=original_input_data.metadata)
+
+
+def fake_openrouter_app(latency_seconds: float = 0.0) -> FastAPI:
+    """
+    OpenAI-style chat completions. Batched caption prompts (the ones asking
+    for a `[{"index": ..}]` array) get one caption per attached image.
+    """
+    app = FastAPI()
+
+    @app.post("/api/v1/chat/completions")
+    async def completions(request: Request) -> JSONResponse:
+        body = await request.json()
+        content = body["messages"][0]["content"]
+        prompt = "".join(part.get("text", "") for part in content if part.get("type") == "text")
+        images = [part["image_url"]["url"] for part in content if part.get("type") == "image_url"]
+        digest = hashlib.sha256((prompt + "".join(images)).encode()).hexdigest()
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+        if re.search(r'"index"', prompt) and len(images) > 1:
+            answer = json.dumps([
+                {"index": i, "caption": f"Khung hình {i} tổng hợp {hashlib.sha256(url.encode()).hexdigest()[:12]}"}
+                for i, url in enumerate(images)
+            ], ensure_ascii=False)
+        else:
+            answer = f"Cảnh tổng hợp {digest[:12]} với {len(images)} hình ảnh."
+        return JSONResponse({
+            "id": f"bench-{digest[:16]}",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4 + 85 * len(images), "completion_tokens": len(answer) // 4},
+        })
+
+    return app
+
+
+def fake_consul_app(services: dict[str, tuple[str, int]]) -> FastAPI:
+    """Catalog and health endpoints for `services`: name -> (address, port), always passing."""
+    app = FastAPI()
+    app.state.lookups = Counter()
+    headers = {"X-Consul-Index": "1"}
+
+    @app.get("/v1/catalog/service/{name}")
+    async def catalog_service(name: str) -> JSONResponse:
+        app.state.lookups[name] += 1
+        if name not in services:
+            return JSONResponse([], headers=headers)
+        address, port = services[name]
+        return JSONResponse([{
+            "ServiceID": f"{name}-bench", "ServiceName": name, "ServiceAddress": address, "Address": address,
+            "ServicePort": port, "ServiceTags": ["benchmark"], "ServiceMeta": {},
+        }], headers=headers)
+
+    @app.get("/v1/health/checks/{service_id}")
+    async def health_checks(service_id: str) -> JSONResponse:
+        return JSONResponse([{"ServiceID": service_id, "Status": "passing"}], headers=headers)
+
+    return app
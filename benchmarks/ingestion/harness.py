@@ -0,0 +1,352 @@
+"""
+Stands up the ingestion stack on local stand-ins and runs `video_processing_flow`.
+
+Imported by `__main__` after the environment and `sys.path` are prepared;
+everything below is the production code path except the model upstreams,
+object storage, the Milvus driver and Consul.
+"""
+from __future__ import annotations
+
+import asyncio
+import platform
+import resource
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import psutil
+from loguru import logger
+
+import core.clients.base as client_base
+from core.app_state import AppState
+from core.artifact.persist import ArtifactPersistentVisitor
+from core.clients.asr_client import ASRClient
+from core.clients.autoshot_client import AutoshotClient
+from core.clients.base import ClientConfig, MilvusCollectionConfig
+from core.clients.image_embed_client import ImageEmbeddingClient
+from core.clients.llm_client import LLMClient
+from core.clients.progress_client import ProgressClient
+from core.clients.text_embed_client import TextEmbeddingClient
+from core.config.storage import minio_settings
+from core.management.events import ProgressEventBus
+from core.pipeline.checkpoint import StageCheckpointStore
+from core.pipeline.tracker import ArtifactMetadata, ArtifactTracker
+from core.storage import StorageClient
+from flow.video_processing import video_processing_flow
+from task.asr_task.main import ASRProcessingTask, ASRSettings
+from task.autoshot_task.main import AutoshotProcessingTask, AutoshotSettings
+from task.image_embedding.main import ImageEmbeddingSettings, ImageEmbeddingTask
+from task.image_processing.main import ImageProcessingSettings, ImageProcessingTask
+from task.llm_image_caption.main import ImageCaptionLLMTask, ImageCaptionSettings
+from task.llm_segment_caption.main import LLMCaptionSettings, SegmentCaptionLLMTask
+from task.milvus_persist_task.main import (
+    ImageEmbeddingMilvusTask,
+    MilvusIndexSettings,
+    TextImageCaptionMilvusTask,
+    TextSegmentCaptionMilvusTask,
+)
+from task.text_embedding.main import (
+    TextCaptionSegmentEmbeddingTask,
+    TextEmbeddingSettings,
+    TextImageCaptionEmbeddingTask,
+)
+from task.video_proc.config import VideoIngestionSettings
+from task.video_proc.main import VideoIngestionTask
+
+from shared.config import LogConfig, LogLevel
+from service_asr.core.api import router as asr_router
+from service_asr.core.config import ASRServiceConfig
+from service_asr.core.service import ASRService
+from service_autoshot.core.api import router as autoshot_router
+from service_autoshot.core.config import AutoshotConfig
+from service_autoshot.core.service import AutoshotService
+from service_image_embedding.core.api import router as image_embedding_router
+from service_image_embedding.core.config import ImageEmbeddingConfig
+from service_image_embedding.core.service import ImageEmbeddingService
+from service_llm.core.api import router as llm_router
+from service_llm.core.config import LLMServiceConfig
+from service_llm.core.service import LLMService
+from service_llm.model import openrouter as _  # noqa: F401  registers openrouter_api
+from service_text_embedding.core.api import router as text_embedding_router
+from service_text_embedding.core.config import TextEmbeddingConfig
+from service_text_embedding.core.service import TextEmbeddingService
+from local_backends import InMemoryMilvus, LocalObjectStore
+
+from . import fakes
+from .services import HOST, LocalServices, service_app
+from .synthetic import write_corpus
+
+USER_BUCKET = "bench-user"
+
+
+@dataclass
+class BenchmarkOptions:
+    videos: int = 4
+    seconds: float = 20.0
+    fps: int = 25
+    width: int = 320
+    height: int = 180
+    seed: int = 0
+    llm_latency_ms: float = 0.0
+    rerun: bool = False
+    caption_cache: bool = True
+    log_level: str = "WARNING"
+
+
+@dataclass
+class StageTiming:
+    started: float | None = None
+    finished: float | None = None
+    calls: int = 0
+    outputs: int = 0
+
+    def observe(self, started: float, finished: float) -> None:
+        self.started = started if self.started is None else min(self.started, started)
+        self.finished = finished if self.finished is None else max(self.finished, finished)
+        self.calls += 1
+
+    def report(self) -> dict[str, Any]:
+        wall = (self.finished - self.started) if self.started is not None and self.finished is not None else 0.0
+        return {
+            "wall_seconds": round(wall, 4),
+            "calls": self.calls,
+            "artifacts": self.outputs,
+            "artifacts_per_second": round(self.outputs / wall, 2) if wall > 0 else None,
+        }
+
+
+def _time_method(obj: Any, name: str, timings: dict[str, StageTiming], count: Callable[[Any], int]) -> None:
+    """Replace `obj.<name>` with a wrapper that extends the current run's span for `obj.name`."""
+    original = getattr(obj, name)
+
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        timing = timings.setdefault(obj.name, StageTiming())
+        start = time.perf_counter()
+        try:
+            result = await original(*args, **kwargs)
+        finally:
+            timing.observe(start, time.perf_counter())
+        timing.outputs += count(result)
+        return result
+
+    setattr(obj, name, timed)
+
+
+def _diff(after: dict[str, Any], before: dict[str, Any]) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for key, value in after.items():
+        if isinstance(value, dict):
+            out[key] = _diff(value, before.get(key, {}))
+        else:
+            out[key] = value - before.get(key, 0)
+    return {k: v for k, v in out.items() if v}
+
+
+class IngestionBenchmark:
+    def __init__(self, options: BenchmarkOptions, workdir: Path):
+        self.options = options
+        self.workdir = workdir
+        self.services = LocalServices()
+        self.store = LocalObjectStore(workdir / "objects")
+        self.timings: dict[str, StageTiming] = {}
+        self.persisted: Counter[str] = Counter()
+        self._persisted_lock = threading.Lock()
+        self.tracker: ArtifactTracker | None = None
+        self.progress_client: ProgressClient | None = None
+
+    def _record(self, metadata: ArtifactMetadata) -> None:
+        with self._persisted_lock:
+            self.persisted[metadata.artifact_type] += 1
+
+    def _start_services(self, client_config: ClientConfig, ports: dict[str, int]) -> None:
+        fakes.object_root = self.store.root
+        log_config = LogConfig(log_level=LogLevel(self.options.log_level), log_format="console",
+                               log_file=str(self.workdir / "logs" / "services.log"))
+        common = dict(host=HOST, cpu_fallback=True, service_version="bench")
+
+        services = {
+            "autoshot": (AutoshotClient, autoshot_router, "/autoshot", lambda name: AutoshotService(
+                AutoshotConfig(service_name=name, port=ports["autoshot"], autoshot_model_path="-", **common), log_config)),
+            "asr": (ASRClient, asr_router, "/asr", lambda name: ASRService(
+                ASRServiceConfig(service_name=name, port=ports["asr"], chunkformer_model_path="-", **common), log_config)),
+            "llm": (LLMClient, llm_router, "/llm", lambda name: LLMService(
+                LLMServiceConfig(
+                    service_name=name, port=ports["llm"], openrouter_api_key="benchmark",
+                    openrouter_model_name="benchmark/fake-vlm",
+                    openrouter_base_url=f"http://{HOST}:{ports['openrouter']}/api/v1/chat/completions", **common,
+                ), log_config)),
+            "image_embedding": (ImageEmbeddingClient, image_embedding_router, "/image-embedding", lambda name: ImageEmbeddingService(
+                ImageEmbeddingConfig(
+                    service_name=name, port=ports["image_embedding"], beit3_model_checkpoint="-",
+                    beit3_tokenizer_checkpoint="-", open_clip_model_name="-", open_clip_pretrained="-", **common,
+                ), log_config)),
+            "text_embedding": (TextEmbeddingClient, text_embedding_router, "/text-embedding", lambda name: TextEmbeddingService(
+                TextEmbeddingConfig(service_name=name, port=ports["text_embedding"], **common), log_config)),
+        }
+        registry: dict[str, tuple[str, int]] = {}
+        for key, (client_cls, router, prefix, build) in services.items():
+            name = client_cls(config=client_config).service_name
+            registry[name] = (HOST, ports[key])
+            self.services.mount(key, service_app(router, prefix, build(name)))
+        self.services.mount("consul", fakes.fake_consul_app(registry))
+        self.services.mount("openrouter", fakes.fake_openrouter_app(self.options.llm_latency_ms / 1000))
+
+        # BaseService replaces the global loguru sinks; keep the orchestrator's output at the requested level.
+        logger.remove()
+        logger.add(sys.stderr, level=self.options.log_level)
+        self.services.start()
+
+    async def setup(self) -> None:
+        ports = {name: self.services.reserve(name) for name in
+                 ("consul", "openrouter", "autoshot", "asr", "llm", "image_embedding", "text_embedding")}
+        client_config = ClientConfig(
+            timeout_seconds=300.0, max_retries=3, retry_min_wait=1.0, retry_max_wait=10.0,
+            consul_host=HOST, consul_port=ports["consul"],
+        )
+        self._start_services(client_config, ports)
+
+        storage = StorageClient(settings=minio_settings)
+        storage.client = self.store  # type: ignore[assignment]
+        client_base.AsyncMilvusClient = InMemoryMilvus  # type: ignore[assignment,misc]
+        InMemoryMilvus.reset()
+
+        self.tracker = ArtifactTracker(database_url=f"sqlite+aiosqlite:///{self.workdir / 'tracker.db'}")
+        await self.tracker.initialize()
+        self.tracker.add_listener(self._record)
+        visitor = ArtifactPersistentVisitor(minio_client=storage, tracker=self.tracker)
+
+        milvus = MilvusIndexSettings(host=HOST, port=19530, user=None, password=None, db_name="benchmark",
+                                     time_out=30.0, ingest_batch_size=100)
+        state = AppState()
+        state.storage_client = storage
+        state.artifact_tracker = self.tracker
+        state.artifact_visitor = visitor
+        state.base_client_config = client_config
+        state.stage_checkpoints = StageCheckpointStore(self.tracker)
+        state.video_ingestion_task = VideoIngestionTask(visitor, VideoIngestionSettings(
+            retries=2, retry_delay_seconds=5, timeout_seconds=300))
+        state.autoshot_task = AutoshotProcessingTask(visitor, AutoshotSettings(model_name="autoshot", device="cpu"))
+        state.asr_task = ASRProcessingTask(visitor, ASRSettings(model_name="chunkformer", device="cpu"))
+        state.image_processing_task = ImageProcessingTask(visitor, ImageProcessingSettings(num_img_per_segment=3))
+        state.segment_caption_llm_task = SegmentCaptionLLMTask(visitor, LLMCaptionSettings(
+            model_name="openrouter_api", device="cpu", image_per_segments=5))
+        state.image_caption_llm_task = ImageCaptionLLMTask(visitor, ImageCaptionSettings(
+            model_name="openrouter_api", device="cpu", cache_enabled=self.options.caption_cache))
+        state.image_embedding_task = ImageEmbeddingTask(visitor, ImageEmbeddingSettings(
+            model_name="open_clip", device="cpu", batch_size=32))
+        text_config = TextEmbeddingSettings(model_name="sentence_embedding", device="cpu", batch_size=16)
+        state.text_image_caption_embedding_task = TextImageCaptionEmbeddingTask(visitor, text_config)
+        state.text_caption_segment_embedding_task = TextCaptionSegmentEmbeddingTask(visitor, text_config)
+        state.image_embedding_milvus_task = ImageEmbeddingMilvusTask(visitor, milvus)
+        state.text_image_caption_milvus_task = TextImageCaptionMilvusTask(visitor, milvus)
+        state.text_segment_caption_milvus_task = TextSegmentCaptionMilvusTask(visitor, milvus)
+        state.image_embedding_milvus_config = MilvusCollectionConfig(
+            collection_name="image_embeddings", dimension=fakes.IMAGE_DIM, metric_type="COSINE", index_type="HNSW")
+        state.text_image_caption_milvus_config = MilvusCollectionConfig(
+            collection_name="text_caption_embeddings", dimension=fakes.TEXT_DIM, metric_type="COSINE", index_type="HNSW")
+        state.text_segment_caption_milvus_config = MilvusCollectionConfig(
+            collection_name="segment_caption_embeddings", dimension=fakes.TEXT_DIM, metric_type="COSINE", index_type="HNSW")
+        self.progress_client = ProgressClient(base_url="", endpoint="", event_bus=ProgressEventBus())
+        self.tracker.add_listener(self.progress_client.record_artifact)
+        state.progress_client = self.progress_client
+
+        for attr in ("autoshot_task", "asr_task", "image_processing_task", "segment_caption_llm_task",
+                     "image_caption_llm_task", "image_embedding_task", "text_image_caption_embedding_task",
+                     "text_caption_segment_embedding_task", "image_embedding_milvus_task",
+                     "text_image_caption_milvus_task", "text_segment_caption_milvus_task"):
+            _time_method(getattr(state, attr), "run", self.timings, len)
+        # The registry stage drives preprocess/execute/postprocess itself instead of `run`.
+        _time_method(state.video_ingestion_task, "preprocess", self.timings, lambda _: 0)
+        _time_method(state.video_ingestion_task, "postprocess", self.timings, lambda _: 1)
+
+    def upload_corpus(self) -> list[tuple[str, str]]:
+        paths = write_corpus(
+            self.workdir / "corpus", self.options.videos, self.options.seconds, seed=self.options.seed,
+            fps=self.options.fps, size=(self.options.width, self.options.height), shot_frames=fakes.SHOT_FRAMES,
+        )
+        storage: StorageClient = AppState().storage_client
+        files = []
+        for path in paths:
+            with path.open("rb") as fh:
+                url = storage.upload_fileobj(USER_BUCKET, f"videos/{path.name}", fh, content_type="video/mp4")
+            files.append((path.stem, url))
+        return files
+
+    @staticmethod
+    def _run_flow_sync(video_files: list[tuple[str, str]], run_id: str) -> Any:
+        # Same shape as the job worker: the flow blocks on Prefect futures, so it gets its own thread and loop.
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(
+                video_processing_flow(video_files=video_files, user_id=USER_BUCKET, run_id=run_id)
+            )
+        finally:
+            loop.close()
+
+    def _counters(self) -> dict[str, Any]:
+        return {
+            "services": self.services.request_counts(),
+            "storage": dict(self.store.calls),
+            "vector_store": InMemoryMilvus.totals()["calls"],
+        }
+
+    async def run_once(self, label: str, video_files: list[tuple[str, str]]) -> dict[str, Any]:
+        self.timings.clear()
+        self.persisted.clear()
+        before = self._counters()
+        started = time.perf_counter()
+        await asyncio.to_thread(self._run_flow_sync, video_files, f"bench-{label}-{uuid.uuid4().hex[:8]}")
+        wall = time.perf_counter() - started
+        requests = _diff(self._counters(), before)
+        total = sum(self.persisted.values())
+        return {
+            "label": label,
+            "wall_seconds": round(wall, 4),
+            "artifacts_persisted": total,
+            "artifacts_per_second": round(total / wall, 2) if wall > 0 else None,
+            "persisted_by_type": dict(self.persisted),
+            "stages": {name: timing.report() for name, timing in self.timings.items()},
+            "requests": requests,
+        }
+
+    async def run(self) -> dict[str, Any]:
+        process = psutil.Process()
+        baseline_rss = process.memory_info().rss
+        await self.setup()
+        try:
+            video_files = self.upload_corpus()
+            runs = [await self.run_once("cold", video_files)]
+            if self.options.rerun:
+                runs.append(await self.run_once("rerun", video_files))
+            vector_rows = InMemoryMilvus.totals()["rows"]
+        finally:
+            await self.teardown()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return {
+            "benchmark": "ingestion",
+            "options": self.options.__dict__,
+            "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                            "cpu_count": psutil.cpu_count()},
+            "runs": runs,
+            "vector_rows": vector_rows,
+            "memory": {
+                "baseline_rss_mb": round(baseline_rss / 2**20, 1),
+                # ru_maxrss is KiB on Linux; services run in-process, so this covers them too.
+                "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+                "peak_children_rss_mb": round(children.ru_maxrss / 1024, 1),
+            },
+        }
+
+    async def teardown(self) -> None:
+        if self.progress_client is not None:
+            await self.progress_client.aclose()
+        if self.tracker is not None:
+            await self.tracker.close()
+        self.services.stop()
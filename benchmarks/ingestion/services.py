@@ -0,0 +1,95 @@
+"""In-process HTTP services on loopback ports, shared by the benchmarks."""
+from __future__ import annotations
+
+import asyncio
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Any
+
+import uvicorn
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import Response
+from shared.profiling import profiling_router
+from shared.tracing import TraceContextMiddleware
+
+HOST = "127.0.0.1"
+
+
+class LocalServices:
+    """Every app on its own loopback port, all served from one background thread (uvicorn skips signal handlers off the main thread)."""
+
+    def __init__(self) -> None:
+        self._sockets: dict[str, socket.socket] = {}
+        self._apps: dict[str, FastAPI] = {}
+        self._servers: list[uvicorn.Server] = []
+        self._thread: threading.Thread | None = None
+
+    def reserve(self, name: str, port: int = 0) -> int:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((HOST, port))
+        self._sockets[name] = sock
+        return sock.getsockname()[1]
+
+    def mount(self, name: str, app: FastAPI) -> FastAPI:
+        app.state.requests = Counter()
+
+        @app.middleware("http")
+        async def count_requests(request: Request, call_next):
+            app.state.requests[f"{request.method} {request.url.path}"] += 1
+            return await call_next(request)
+
+        self._apps[name] = app
+        return app
+
+    def start(self, timeout: float = 15.0) -> None:
+        self._servers = [
+            uvicorn.Server(uvicorn.Config(self._apps[name], log_level="warning", lifespan="off", access_log=False))
+            for name in self._apps
+        ]
+
+        async def serve() -> None:
+            await asyncio.gather(*(
+                server.serve(sockets=[self._sockets[name]]) for name, server in zip(self._apps, self._servers)
+            ))
+
+        self._thread = threading.Thread(target=asyncio.run, args=(serve(),), name="bench-services", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not all(server.started for server in self._servers):
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Benchmark services failed to start")
+            time.sleep(0.02)
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def request_counts(self) -> dict[str, dict[str, int]]:
+        counts = {name: dict(app.state.requests) for name, app in self._apps.items()}
+        counts["consul"]["lookups_by_service"] = dict(self._apps["consul"].state.lookups)  # type: ignore[assignment]
+        return counts
+
+
+def service_app(router: APIRouter, prefix: str, service: Any) -> FastAPI:
+    """A model service's app as its `main.py` builds it, around an already constructed service."""
+    app = FastAPI()
+    app.state.service = service
+    app.include_router(router, prefix=prefix)
+    app.include_router(profiling_router(lambda: service))
+    app.add_middleware(TraceContextMiddleware)
+
+    @app.get("/health")
+    async def health() -> dict[str, str]:
+        return {"status": "healthy", "service": service.service_config.service_name}
+
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        service.update_system_metrics()
+        return Response(content=service.metrics.get_metrics(), media_type=service.metrics.get_content_type())
+
+    return app
@@ -0,0 +1,40 @@
+"""Seeded synthetic videos: a new palette every shot and a moving block, so frame sampling and dedup have work to do."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def write_video(path: Path, seed: int, seconds: float, fps: int = 25, size: tuple[int, int] = (320, 180),
+                shot_frames: int = 48) -> Path:
+    width, height = size
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV cannot write mp4v video to {path}")
+    try:
+        background = rng.integers(0, 255, 3)
+        block = rng.integers(0, 255, 3)
+        for index in range(int(seconds * fps)):
+            if index % shot_frames == 0:
+                background, block = rng.integers(0, 255, 3), rng.integers(0, 255, 3)
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[:] = background
+            x = int((index % shot_frames) / shot_frames * (width - 40))
+            y = int((np.sin(index / 7) + 1) / 2 * (height - 40))
+            frame[y:y + 40, x:x + 40] = block
+            noise = rng.integers(0, 12, (height, width, 1), dtype=np.uint8)
+            writer.write(cv2.add(frame, np.repeat(noise, 3, axis=2)))
+    finally:
+        writer.release()
+    return path
+
+
+def write_corpus(directory: Path, videos: int, seconds: float, seed: int = 0, **kwargs) -> list[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    return [
+        write_video(directory / f"synthetic_{i:03d}.mp4", seed=seed + i, seconds=seconds, **kwargs)
+        for i in range(videos)
+    ]
@@ -0,0 +1,80 @@
+"""
+Retrieval latency and recall benchmark for the agent's search tools.
+
+    python -m benchmarks.retrieval --queries 150 --output retrieval.json
+    python -m benchmarks.retrieval --milvus-uri http://127.0.0.1:19530 --hnsw-m 16 --ef 16 32 64 128
+
+Loads a seeded, labelled corpus, runs the visual, caption and segment
+search tools over it and prints / writes a JSON report with latency
+percentiles, recall@k against exact search and backend round trips per
+call (see README.md).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import prepare_environment
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.retrieval", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--frames-per-video", type=int, default=200)
+    parser.add_argument("--segments-per-video", type=int, default=40)
+    parser.add_argument("--concepts", type=int, default=64, help="Latent labels the vectors are drawn around")
+    parser.add_argument("--queries", type=int, default=150, help="Split evenly across the three tools")
+    parser.add_argument("--videos-per-query", type=int, default=5, help="Videos each search is scoped to")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls per tool before measuring")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--milvus-uri", default="memory",
+                        help="'memory' for the exact in-process store, else a Milvus server URI")
+    parser.add_argument("--index-type", default="HNSW", choices=["FLAT", "IVF_FLAT", "HNSW", "AUTOINDEX"])
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-ef-construction", type=int, default=200)
+    parser.add_argument("--nlist", type=int, default=128)
+    parser.add_argument("--ef", type=int, nargs="+", default=[64], help="HNSW search ef values to sweep")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[16], help="IVF_FLAT nprobe values to sweep")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--workdir", type=Path, help="Keep objects, tracker DB and logs here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    if args.index_type == "HNSW" and min(args.ef) < args.top_k:
+        parser.error("Milvus rejects HNSW searches with ef below top-k")
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="retrieval-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    prepare_environment(workdir)
+
+    from .harness import RetrievalBenchmark, RetrievalOptions
+
+    options = RetrievalOptions(
+        videos=args.videos, frames_per_video=args.frames_per_video, segments_per_video=args.segments_per_video,
+        concepts=args.concepts, queries=args.queries, videos_per_query=args.videos_per_query, top_k=args.top_k,
+        warmup=args.warmup, seed=args.seed, milvus_uri=args.milvus_uri, index_type=args.index_type,
+        hnsw_m=args.hnsw_m, hnsw_ef_construction=args.hnsw_ef_construction, nlist=args.nlist,
+        ef=args.ef, nprobe=args.nprobe, log_level=args.log_level.upper(),
+    )
+    try:
+        report = asyncio.run(RetrievalBenchmark(options, workdir).run())
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Seeded, labelled retrieval corpus with exact ground truth.
+
+Every frame and segment belongs to one of `concepts` latent concepts: its
+vectors are the concept's centroid plus Gaussian noise, in a visual space
+(what image embeddings live in) and a text space (captions). Queries are
+noisier draws from a centroid, scoped to a few videos the way the agent
+scopes its searches. Ground truth is brute-force search over the same
+vectors, so recall@k measures only what the index and the tool layer lose.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Literal
+
+import numpy as np
+
+Tool = Literal["visual", "caption", "segment"]
+
+_SUBJECTS = ("a red car", "a dog", "two people", "a cyclist", "a crowd", "a boat", "a child", "a train",
+             "a chef", "a football player", "a horse", "an old man")
+_ACTIONS = ("crossing", "running along", "waiting at", "standing near", "moving through", "looking at")
+_PLACES = ("a wet street at night", "a sunny beach", "a busy market", "a snowy mountain road",
+           "a kitchen", "a stadium", "a river bank", "a train platform")
+
+
+def concept_phrase(concept: int) -> str:
+    return (f"{_SUBJECTS[concept % len(_SUBJECTS)]} {_ACTIONS[concept // len(_SUBJECTS) % len(_ACTIONS)]} "
+            f"{_PLACES[concept // (len(_SUBJECTS) * len(_ACTIONS)) % len(_PLACES)]}")
+
+
+def _timecode(seconds: float) -> str:
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    return (rows / np.maximum(np.linalg.norm(rows, axis=-1, keepdims=True), 1e-12)).astype(np.float32)
+
+
+@dataclass
+class Collection:
+    """One vector collection: row `i` is `ids[i]`, in `video_ids[i]`, of `concepts[i]`."""
+    ids: list[str]
+    video_ids: np.ndarray
+    concepts: np.ndarray
+    vectors: np.ndarray
+    # Tool output -> row: (video_id, frame_index) for frames, (video_id, start_frame) for segments.
+    keys: dict[tuple[str, int], int] = field(default_factory=dict)
+
+    def exact_top_k(self, query: np.ndarray, video_ids: list[str], k: int) -> list[str]:
+        """Cosine top-k among rows of `video_ids`, the reference a perfect index would return."""
+        rows = np.flatnonzero(np.isin(self.video_ids, video_ids))
+        if rows.size == 0:
+            return []
+        scores = self.vectors[rows] @ query
+        best = rows[np.argsort(-scores, kind="stable")[:k]]
+        return [self.ids[i] for i in best]
+
+
+@dataclass
+class Query:
+    tool: Tool
+    text: str
+    concept: int
+    vector: np.ndarray
+    video_ids: list[str]
+
+
+@dataclass
+class SyntheticCorpus:
+    videos: list[str]
+    fps: float
+    frames: dict[str, list[dict]]
+    segments: dict[str, list[dict]]
+    visual: Collection
+    captions: Collection
+    segment_captions: Collection
+    queries: list[Query]
+
+    def collection(self, tool: Tool) -> Collection:
+        return {"visual": self.visual, "caption": self.captions, "segment": self.segment_captions}[tool]
+
+    @classmethod
+    def generate(
+        cls,
+        videos: int = 20,
+        frames_per_video: int = 200,
+        segments_per_video: int = 40,
+        concepts: int = 64,
+        queries: int = 100,
+        videos_per_query: int = 5,
+        image_dim: int = 512,
+        text_dim: int = 768,
+        item_noise: float = 0.6,
+        query_noise: float = 0.8,
+        fps: float = 25.0,
+        seed: int = 0,
+    ) -> "SyntheticCorpus":
+        rng = np.random.default_rng(seed)
+        visual_centroids = _unit(rng.standard_normal((concepts, image_dim)))
+        text_centroids = _unit(rng.standard_normal((concepts, text_dim)))
+
+        def draw(centroids: np.ndarray, labels: np.ndarray, noise: float) -> np.ndarray:
+            # Noise of expected norm `noise` around a unit centroid: cosine to it is about 1 / sqrt(1 + noise^2).
+            dim = centroids.shape[1]
+            return _unit(centroids[labels] + noise * rng.standard_normal((len(labels), dim)) / np.sqrt(dim))
+
+        video_ids = [f"bench_video_{v:04d}" for v in range(videos)]
+        frames: dict[str, list[dict]] = {}
+        segments: dict[str, list[dict]] = {}
+        frame_rows: list[tuple[str, int, int]] = []
+        segment_rows: list[tuple[str, int, int, int]] = []
+        for video_id in video_ids:
+            # Scenes of a few frames share a concept, as consecutive keyframes do.
+            frame_concepts = np.repeat(rng.integers(0, concepts, frames_per_video // 4 + 1), 4)[:frames_per_video]
+            frames[video_id] = []
+            for i, concept in enumerate(frame_concepts):
+                frame_index = i * 12
+                frames[video_id].append({"frame_index": frame_index, "timestamp": _timecode(frame_index / fps),
+                                         "concept": int(concept),
+                                         "caption": f"{concept_phrase(int(concept))}, shot {i} of {video_id}"})
+                frame_rows.append((video_id, frame_index, int(concept)))
+            span = max(frames_per_video * 12 // max(segments_per_video, 1), 1)
+            segments[video_id] = []
+            for j, concept in enumerate(rng.integers(0, concepts, segments_per_video)):
+                start, end = j * span, (j + 1) * span - 1
+                segments[video_id].append({"start_frame": start, "end_frame": end,
+                                           "start_time": _timecode(start / fps), "end_time": _timecode(end / fps),
+                                           "concept": int(concept),
+                                           "caption": f"Segment where {concept_phrase(int(concept))} ({video_id} #{j})"})
+                segment_rows.append((video_id, start, end, int(concept)))
+
+        frame_labels = np.array([c for _, _, c in frame_rows], dtype=np.int64)
+        frame_videos = np.array([v for v, _, _ in frame_rows])
+        segment_labels = np.array([c for *_, c in segment_rows], dtype=np.int64)
+        segment_videos = np.array([v for v, *_ in segment_rows])
+
+        def frame_collection(prefix: str, vectors: np.ndarray) -> Collection:
+            ids = [f"{prefix}-{v}-{f:08d}" for v, f, _ in frame_rows]
+            return Collection(ids=ids, video_ids=frame_videos, concepts=frame_labels, vectors=vectors,
+                              keys={(v, f): i for i, (v, f, _) in enumerate(frame_rows)})
+
+        visual = frame_collection("img-emb", draw(visual_centroids, frame_labels, item_noise))
+        captions = frame_collection("cap-emb", draw(text_centroids, frame_labels, item_noise))
+        segment_captions = Collection(
+            ids=[f"seg-emb-{v}-{s}-{e}" for v, s, e, _ in segment_rows], video_ids=segment_videos,
+            concepts=segment_labels, vectors=draw(text_centroids, segment_labels, item_noise),
+            keys={(v, s): i for i, (v, s, _, _) in enumerate(segment_rows)},
+        )
+
+        tools: tuple[Tool, ...] = ("visual", "caption", "segment")
+        query_list: list[Query] = []
+        for i in range(queries):
+            tool = tools[i % len(tools)]
+            scope = sorted(rng.choice(video_ids, size=min(videos_per_query, videos), replace=False).tolist())
+            # Ask for a concept that is present in the scope, as a user looking at those videos would.
+            pool = segment_captions if tool == "segment" else visual
+            labels = pool.concepts[np.isin(pool.video_ids, scope)]
+            concept = int(rng.choice(labels)) if labels.size else int(rng.integers(0, concepts))
+            centroids = visual_centroids if tool == "visual" else text_centroids
+            vector = draw(centroids, np.array([concept]), query_noise)[0]
+            query_list.append(Query(tool=tool, text=f"[q{i}] {concept_phrase(concept)}", concept=concept,
+                                    vector=vector, video_ids=scope))
+
+        return cls(videos=video_ids, fps=fps, frames=frames, segments=segments, visual=visual, captions=captions,
+                   segment_captions=segment_captions, queries=query_list)
@@ -0,0 +1,444 @@
+"""
+Loads a `SyntheticCorpus` and runs the agent's search tools against it.
+
+Imported by `__main__` after the environment and `sys.path` are prepared.
+The tools, their Milvus/Postgres/MinIO clients and `ExternalEncodeClient`
+are the production code; the embedding services run their real routers
+and `BaseService` with seeded handlers that answer each benchmark query
+with the vector the corpus drew for it, so what comes back can be scored
+against exact search.
+"""
+from __future__ import annotations
+
+import io
+import json
+import sys
+import time
+from collections import Counter
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlparse
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import event
+
+import core.clients.base as client_base
+from core.clients.base import ClientConfig, MilvusCollectionConfig
+from core.clients.image_embed_client import ImageEmbeddingClient
+from core.clients.milvus_client import (
+    ImageEmbeddingMilvusClient,
+    SegmentCaptionEmbeddingMilvusClient,
+    TextCaptionEmbeddingMilvusClient,
+)
+from core.clients.text_embed_client import TextEmbeddingClient
+from core.config.storage import minio_settings
+from core.pipeline.tracker import ArtifactLineageSchema, ArtifactSchema, ArtifactTracker
+from task.image_embedding.main import ImageEmbeddingSettings
+from task.text_embedding.main import TextEmbeddingSettings
+
+from shared.config import LogConfig, LogLevel
+from service_image_embedding.core.api import router as image_embedding_router
+from service_image_embedding.core.config import ImageEmbeddingConfig
+from service_image_embedding.core.service import ImageEmbeddingService
+from service_text_embedding.core.api import router as text_embedding_router
+from service_text_embedding.core.config import TextEmbeddingConfig
+from service_text_embedding.core.service import TextEmbeddingService
+
+import agentic_ai.tools.clients.milvus.base as agent_milvus_base
+from agentic_ai.tools.clients.external.encode_client import ExternalEncodeClient
+from agentic_ai.tools.clients.milvus.client import (
+    CaptionImageMilvusClient,
+    SegmentCaptionImageMilvusClient,
+    VisualImageMilvusClient,
+)
+from agentic_ai.tools.clients.minio.client import StorageClient
+from agentic_ai.tools.clients.postgre.client import PostgresClient
+from agentic_ai.tools.type import search
+from local_backends import InMemoryMilvus, LocalObjectStore
+
+from benchmarks.ingestion import fakes
+from benchmarks.ingestion.services import HOST, LocalServices, service_app
+
+from .corpus import Collection, Query, SyntheticCorpus, Tool
+
+USER_BUCKET = "bench-user"
+MEMORY_URI = "http://memory:0"
+COLLECTIONS: dict[Tool, str] = {
+    "visual": "bench_image_embeddings",
+    "caption": "bench_caption_embeddings",
+    "segment": "bench_segment_embeddings",
+}
+TOOLS: dict[Tool, Callable[..., Awaitable[list[tuple[float, Any]]]]] = {
+    "visual": search.get_images_from_visual_query,
+    "caption": search.get_images_from_caption_query,
+    "segment": search.get_segments_from_event_query,
+}
+
+
+@dataclass
+class RetrievalOptions:
+    videos: int = 20
+    frames_per_video: int = 200
+    segments_per_video: int = 40
+    concepts: int = 64
+    queries: int = 150
+    videos_per_query: int = 5
+    top_k: int = 10
+    warmup: int = 3
+    seed: int = 0
+    # "memory" for the exact in-process store, else a Milvus server such as http://127.0.0.1:19530.
+    milvus_uri: str = "memory"
+    index_type: str = "HNSW"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    nlist: int = 128
+    ef: list[int] = field(default_factory=lambda: [64])
+    nprobe: list[int] = field(default_factory=lambda: [16])
+    insert_batch_size: int = 1000
+    log_level: str = "WARNING"
+
+    @property
+    def in_memory(self) -> bool:
+        return self.milvus_uri == "memory"
+
+    def search_params(self) -> list[dict[str, int]]:
+        """One entry per setting to sweep: the `param` the tools forward to Milvus."""
+        if self.index_type == "HNSW":
+            return [{"ef": ef} for ef in self.ef]
+        if self.index_type == "IVF_FLAT":
+            return [{"nprobe": nprobe} for nprobe in self.nprobe]
+        return [{}]
+
+
+def _percentiles(samples_ms: list[float]) -> dict[str, float]:
+    if not samples_ms:
+        return {}
+    values = np.asarray(samples_ms)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+    }
+
+
+class _TimedSearch:
+    """Wraps a connected agent client's `AsyncMilvusClient.search` to time the vector round trip alone."""
+
+    def __init__(self, client: Any):
+        self.calls = 0
+        self.samples_ms: list[float] = []
+        original = client.client.search
+
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.calls += 1
+                self.samples_ms.append((time.perf_counter() - start) * 1000)
+
+        client.client.search = timed
+
+
+class RetrievalBenchmark:
+    def __init__(self, options: RetrievalOptions, workdir: Path):
+        self.options = options
+        self.workdir = workdir
+        self.services = LocalServices()
+        self.store = LocalObjectStore(workdir / "objects")
+        self.corpus: SyntheticCorpus | None = None
+        self.sql_statements = 0
+        self._stack = AsyncExitStack()
+        self._clients: dict[Tool, Any] = {}
+        self._searches: dict[Tool, _TimedSearch] = {}
+        self._encoder: ExternalEncodeClient | None = None
+        self._postgres: PostgresClient | None = None
+        self._storage: StorageClient | None = None
+
+    def _start_services(self, client_config: ClientConfig, ports: dict[str, int]) -> None:
+        log_config = LogConfig(log_level=LogLevel(self.options.log_level), log_format="console",
+                               log_file=str(self.workdir / "logs" / "services.log"))
+        common = dict(host=HOST, cpu_fallback=True, service_version="bench")
+        image_name = ImageEmbeddingClient(config=client_config).service_name
+        text_name = TextEmbeddingClient(config=client_config).service_name
+        self.services.mount("image_embedding", service_app(image_embedding_router, "/image-embedding", ImageEmbeddingService(
+            ImageEmbeddingConfig(
+                service_name=image_name, port=ports["image_embedding"], beit3_model_checkpoint="-",
+                beit3_tokenizer_checkpoint="-", open_clip_model_name="-", open_clip_pretrained="-", **common,
+            ), log_config)))
+        self.services.mount("text_embedding", service_app(text_embedding_router, "/text-embedding", TextEmbeddingService(
+            TextEmbeddingConfig(service_name=text_name, port=ports["text_embedding"], **common), log_config)))
+        self.services.mount("consul", fakes.fake_consul_app({
+            image_name: (HOST, ports["image_embedding"]), text_name: (HOST, ports["text_embedding"]),
+        }))
+        self.services.start()
+        # BaseService replaces the global loguru sinks; keep the clients' output at the requested level.
+        logger.remove()
+        logger.add(sys.stderr, level=self.options.log_level)
+
+    async def _seed_lineage(self, corpus: SyntheticCorpus, database_url: str) -> None:
+        """Image -> (embedding, caption) rows and caption objects, which the visual tool walks for each hit."""
+        tracker = ArtifactTracker(database_url=database_url)
+        await tracker.initialize()
+        artifacts: list[ArtifactSchema] = []
+        lineage: list[ArtifactLineageSchema] = []
+        for video_id, frames in corpus.frames.items():
+            for frame in frames:
+                index = frame["frame_index"]
+                image_id = f"img-{video_id}-{index:08d}"
+                caption_key = f"caption/image/{video_id}/{index:08d}.json"
+                children = {
+                    f"img-emb-{video_id}-{index:08d}": ("ImageEmbeddingArtifact", f"embedding/image/{video_id}/{index:08d}.npy"),
+                    f"cap-{video_id}-{index:08d}": ("ImageCaptionArtifact", caption_key),
+                }
+                artifacts.append(ArtifactSchema(
+                    artifact_id=image_id, artifact_type="ImageArtifact", user_id=USER_BUCKET, task_name="benchmark",
+                    minio_url=f"s3://{USER_BUCKET}/images/{video_id}/{index:08d}.webp", parent_artifact_id=video_id,
+                ))
+                for child_id, (artifact_type, key) in children.items():
+                    artifacts.append(ArtifactSchema(
+                        artifact_id=child_id, artifact_type=artifact_type, user_id=USER_BUCKET, task_name="benchmark",
+                        minio_url=f"s3://{USER_BUCKET}/{key}", parent_artifact_id=image_id,
+                    ))
+                    lineage.append(ArtifactLineageSchema(
+                        parent_artifact_id=image_id, child_artifact_id=child_id, transformation_type="benchmark"))
+                self.store.put_object(USER_BUCKET, caption_key, io.BytesIO(json.dumps({"caption": frame["caption"]}).encode()))
+        async with tracker.get_session() as session:
+            session.add_all(artifacts)
+            await session.flush()
+            session.add_all(lineage)
+            await session.commit()
+        await tracker.close()
+
+    def _rows(self, tool: Tool, corpus: SyntheticCorpus) -> list[dict[str, Any]]:
+        """Rows in each ingestion collection's schema, in corpus order."""
+        collection = corpus.collection(tool)
+        rows: list[dict[str, Any]] = []
+        if tool == "segment":
+            for video_id in corpus.videos:
+                for segment in corpus.segments[video_id]:
+                    rows.append({
+                        "related_video_id": video_id, "start_frame": segment["start_frame"],
+                        "end_frame": segment["end_frame"], "start_time": segment["start_time"],
+                        "end_time": segment["end_time"], "caption": segment["caption"],
+                        "segment_caption_minio_url": (f"s3://{USER_BUCKET}/caption/segment/{video_id}/"
+                                                      f"{segment['start_frame']}_{segment['end_frame']}.json"),
+                        "user_bucket": USER_BUCKET,
+                    })
+        else:
+            for video_id in corpus.videos:
+                for frame in corpus.frames[video_id]:
+                    index = frame["frame_index"]
+                    image_url = f"s3://{USER_BUCKET}/images/{video_id}/{index:08d}.webp"
+                    row = {"related_video_id": video_id, "frame_index": index, "timestamp": frame["timestamp"],
+                           "user_bucket": USER_BUCKET}
+                    if tool == "visual":
+                        row["minio_url"] = image_url
+                    else:
+                        row.update(caption=frame["caption"], image_minio_url=image_url,
+                                   caption_minio_url=f"s3://{USER_BUCKET}/caption/image/{video_id}/{index:08d}.json")
+                    rows.append(row)
+        for row, row_id, vector in zip(rows, collection.ids, collection.vectors):
+            row["id"] = row_id
+            row["embedding"] = vector.tolist()
+        return rows
+
+    async def _load_collections(self, corpus: SyntheticCorpus) -> dict[str, float]:
+        """Build each collection through the ingestion Milvus clients, with the index under test."""
+        if self.options.in_memory:
+            host, port = urlparse(MEMORY_URI).hostname, 0
+        else:
+            parsed = urlparse(self.options.milvus_uri)
+            host, port = parsed.hostname, parsed.port or 19530
+        loaders = {
+            "visual": ImageEmbeddingMilvusClient,
+            "caption": TextCaptionEmbeddingMilvusClient,
+            "segment": SegmentCaptionEmbeddingMilvusClient,
+        }
+        seconds: dict[str, float] = {}
+        for tool, loader_cls in loaders.items():
+            config = MilvusCollectionConfig(
+                collection_name=COLLECTIONS[tool], dimension=corpus.collection(tool).vectors.shape[1],
+                metric_type="COSINE", index_type=self.options.index_type, m=self.options.hnsw_m,  # type: ignore[arg-type]
+                ef_construction=self.options.hnsw_ef_construction, nlist=self.options.nlist,
+            )
+            start = time.perf_counter()
+            async with loader_cls(config_collection=config, host=host, port=port) as loader:
+                # A fresh collection, so the index is built with the parameters under test.
+                if await loader.client.has_collection(config.collection_name):
+                    await loader.client.drop_collection(config.collection_name)
+                await loader.create_collection_if_not_exists()
+                rows = self._rows(tool, corpus)
+                for offset in range(0, len(rows), self.options.insert_batch_size):
+                    await loader.insert_vectors(rows[offset:offset + self.options.insert_batch_size])
+                await loader.client.flush(config.collection_name)
+            seconds[tool] = round(time.perf_counter() - start, 3)
+        return seconds
+
+    async def setup(self) -> dict[str, Any]:
+        options = self.options
+        started = time.perf_counter()
+        self.corpus = corpus = SyntheticCorpus.generate(
+            videos=options.videos, frames_per_video=options.frames_per_video,
+            segments_per_video=options.segments_per_video, concepts=options.concepts, queries=options.queries,
+            videos_per_query=options.videos_per_query, image_dim=fakes.IMAGE_DIM, text_dim=fakes.TEXT_DIM,
+            seed=options.seed,
+        )
+        for query in corpus.queries:
+            fakes.query_vectors[query.text] = query.vector.tolist()
+        generated = time.perf_counter() - started
+
+        if options.in_memory:
+            client_base.AsyncMilvusClient = InMemoryMilvus  # type: ignore[assignment,misc]
+            agent_milvus_base.AsyncMilvusClient = InMemoryMilvus  # type: ignore[assignment,misc]
+            InMemoryMilvus.reset()
+        loaded = await self._load_collections(corpus)
+
+        database_url = f"sqlite+aiosqlite:///{self.workdir / 'tracker.db'}"
+        await self._seed_lineage(corpus, database_url)
+        self._postgres = PostgresClient(database_url=database_url)
+
+        @event.listens_for(self._postgres.engine.sync_engine, "before_cursor_execute")
+        def count_statement(*_: Any) -> None:
+            self.sql_statements += 1
+
+        self._storage = StorageClient(settings=minio_settings)
+        self._storage.client = self.store  # type: ignore[assignment]
+
+        ports = {name: self.services.reserve(name) for name in ("consul", "image_embedding", "text_embedding")}
+        client_config = ClientConfig(
+            timeout_seconds=60.0, max_retries=3, retry_min_wait=1.0, retry_max_wait=10.0,
+            consul_host=HOST, consul_port=ports["consul"],
+        )
+        self._start_services(client_config, ports)
+        await self._open_clients(client_config)
+        return {"corpus_seconds": round(generated, 3), "load_seconds": loaded}
+
+    async def _open_clients(self, client_config: ClientConfig) -> None:
+        image_client = await self._stack.enter_async_context(ImageEmbeddingClient(config=client_config))
+        text_client = await self._stack.enter_async_context(TextEmbeddingClient(config=client_config))
+        self._encoder = ExternalEncodeClient(
+            img_text_client=image_client,  # type: ignore[arg-type]
+            img_text_settings=ImageEmbeddingSettings(model_name="open_clip", device="cpu", batch_size=1),  # type: ignore[arg-type]
+            txt_settings=TextEmbeddingSettings(model_name="sentence_embedding", device="cpu", batch_size=1),  # type: ignore[arg-type]
+            txt_client=text_client,  # type: ignore[arg-type]
+        )
+        uri = MEMORY_URI if self.options.in_memory else self.options.milvus_uri
+        client_classes = {
+            "visual": VisualImageMilvusClient,
+            "caption": CaptionImageMilvusClient,
+            "segment": SegmentCaptionImageMilvusClient,
+        }
+        for tool, client_cls in client_classes.items():
+            client = await self._stack.enter_async_context(
+                client_cls(uri=uri, collection_name=COLLECTIONS[tool], ann_field="embedding"))
+            self._clients[tool] = client
+            self._searches[tool] = _TimedSearch(client)
+
+    def _snapshot(self) -> Counter[str]:
+        requests = self.services.request_counts()
+        counts: Counter[str] = Counter()
+        counts["encoder_http"] = sum(requests["image_embedding"].values()) + sum(requests["text_embedding"].values())
+        counts["consul"] = sum(requests["consul"]["lookups_by_service"].values())  # type: ignore[union-attr]
+        counts["milvus"] = sum(search.calls for search in self._searches.values())
+        counts["sql"] = self.sql_statements
+        counts["object_store"] = sum(self.store.calls.values())
+        return counts
+
+    async def _call(self, query: Query, param: dict[str, int]) -> list[tuple[float, Any]]:
+        return await TOOLS[query.tool](
+            query.text,
+            top_k=self.options.top_k,
+            list_video_id=query.video_ids,
+            user_id=USER_BUCKET,
+            metric_type="COSINE",
+            param=param,
+            milvus_client=self._clients[query.tool],
+            external_client=self._encoder,
+            postgres_client=self._postgres,
+            minio_client=self._storage,
+        )
+
+    @staticmethod
+    def _returned_rows(collection: Collection, tool: Tool, results: list[tuple[float, Any]]) -> list[int]:
+        """Corpus rows of the tool's output objects, which carry (video, frame) rather than the Milvus id."""
+        rows = []
+        for _, item in results:
+            frame = item.start_frame_index if tool == "segment" else item.frame_index
+            row = collection.keys.get((item.related_video_id, frame))
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    async def run_tool(self, tool: Tool, param: dict[str, int]) -> dict[str, Any]:
+        """Every query of `tool`, one at a time as the agent issues them, after a few untimed warm-up calls."""
+        assert self.corpus is not None
+        collection = self.corpus.collection(tool)
+        queries = [q for q in self.corpus.queries if q.tool == tool]
+        for query in queries[:self.options.warmup]:
+            await self._call(query, param)
+
+        timed_search = self._searches[tool]
+        search_start = len(timed_search.samples_ms)
+        before = self._snapshot()
+        latencies: list[float] = []
+        recalls: list[float] = []
+        precisions: list[float] = []
+        for query in queries:
+            start = time.perf_counter()
+            results = await self._call(query, param)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            rows = self._returned_rows(collection, tool, results)
+            exact = collection.exact_top_k(query.vector, query.video_ids, self.options.top_k)
+            if exact:
+                recalls.append(len({collection.ids[row] for row in rows} & set(exact)) / len(exact))
+            if rows:
+                precisions.append(float((collection.concepts[rows] == query.concept).mean()))
+        after = self._snapshot()
+
+        calls = len(queries)
+        round_trips = after - before
+        return {
+            "calls": calls,
+            f"recall@{self.options.top_k}": round(float(np.mean(recalls)), 4) if recalls else None,
+            f"label_precision@{self.options.top_k}": round(float(np.mean(precisions)), 4) if precisions else None,
+            "latency_ms": _percentiles(latencies),
+            "milvus_search_ms": _percentiles(timed_search.samples_ms[search_start:]),
+            "round_trips_per_call": {name: round(round_trips[name] / calls, 2) for name in sorted(round_trips)} if calls else {},
+        }
+
+    async def teardown(self) -> None:
+        await self._stack.aclose()
+        if self._postgres is not None:
+            await self._postgres.engine.dispose()
+        self.services.stop()
+
+    async def run(self) -> dict[str, Any]:
+        options = self.options
+        try:
+            setup = await self.setup()
+            sweeps = []
+            for param in options.search_params():
+                sweeps.append({
+                    "search_params": param,
+                    "tools": {tool: await self.run_tool(tool, param) for tool in TOOLS},
+                })
+        finally:
+            await self.teardown()
+        assert self.corpus is not None
+        return {
+            "backend": "in-memory exact" if options.in_memory else options.milvus_uri,
+            "index": {"index_type": options.index_type, "M": options.hnsw_m,
+                      "efConstruction": options.hnsw_ef_construction, "nlist": options.nlist},
+            "corpus": {"videos": options.videos, "frames": len(self.corpus.visual.ids),
+                       "segments": len(self.corpus.segment_captions.ids), "queries": len(self.corpus.queries),
+                       "concepts": options.concepts, "seed": options.seed},
+            "top_k": options.top_k,
+            "setup": setup,
+            "sweeps": sweeps,
+        }
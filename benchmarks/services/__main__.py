@@ -0,0 +1,93 @@
+"""
+Load test for a model service (`BaseService`) on CPU-only dummy models.
+
+    python -m benchmarks.services text_embedding --concurrency 16 --duration 20
+    python -m benchmarks.services image_embedding --mode open --rate 40 --serve
+    python -m benchmarks.services asr --url http://gpu-host:8002 --mode open --rate 0.5
+
+By default the app is driven in-process over ASGI; `--serve` puts it on a
+loopback port in its own thread, and `--url` targets a running service
+(real models) instead. Prints / writes a JSON report with throughput,
+latency histogram, error rate and the service's `/metrics` deltas.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import prepare_environment
+
+SERVICES = ("autoshot", "asr", "image_embedding", "text_embedding")
+
+
+def _weights(text: str) -> dict[str, float]:
+    weights = {}
+    for item in filter(None, text.split(",")):
+        name, _, weight = item.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.services", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", choices=SERVICES)
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Workers (closed loop) or max in flight (open loop)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Open loop: mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to generate load for")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before measuring")
+    parser.add_argument("--mix", default="", help="Reweight the default payloads, e.g. query=1,batch_64=4 (0 drops one)")
+    parser.add_argument("--cost-ms", type=float, help="Dummy model: fixed milliseconds per inference")
+    parser.add_argument("--per-item-ms", type=float, help="Dummy model: milliseconds per text / image")
+    parser.add_argument("--cost-mode", choices=["blocking", "async"],
+                        help="Dummy model: spin the event loop like the real handlers, or sleep like an offloaded device")
+    parser.add_argument("--seed", type=int, default=0)
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--serve", action="store_true", help="Serve the app on a loopback port instead of in-process ASGI")
+    where.add_argument("--url", help="Load a running service instead; dummy model options do not apply")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--workdir", type=Path, help="Keep service logs here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="service-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    prepare_environment(workdir)
+
+    from .harness import run_service_load
+    from .loadgen import LoadProfile
+    from .targets import default_mix
+
+    weights = _weights(args.mix)
+    mix = [p for p in default_mix(args.service) if weights.get(p.name, 1) > 0]
+    for payload in mix:
+        payload.weight = weights.get(payload.name, payload.weight)
+    profile = LoadProfile(
+        mix=mix, concurrency=args.concurrency, mode=args.mode, rate=args.rate, duration_seconds=args.duration,
+        max_requests=args.requests, warmup_requests=args.warmup, seed=args.seed,
+    )
+    try:
+        report = asyncio.run(run_service_load(
+            args.service, profile, workdir, url=args.url, serve=args.serve, log_level=args.log_level.upper(),
+            cost_ms=args.cost_ms, per_item_ms=args.per_item_ms, cost_mode=args.cost_mode,
+        ))
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+CPU-only stand-ins for the model handlers, for load-testing `BaseService`.
+
+Registered under the production model names (`autoshot`, `chunkformer`,
+`open_clip`, `sentence_embedding`) because each service only offers
+those, so importing this module replaces whatever real handler was
+registered in the process. Each inference costs `fixed_ms + per_item_ms *
+items` (items: texts or images in the request, 1 for a video), spent
+either spinning the CPU on the event loop, as the real handlers' synchronous
+model calls do, or in `asyncio.sleep`, as an offloaded accelerator would.
+Outputs are well-formed but meaningless.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import numpy as np
+
+from shared.registry import BaseModelHandler, register_model
+from shared.schema import ModelInfo
+from service_asr.core.schema import ASRInferenceRequest, ASRInferenceResponse, ASRResult, TimestampedToken
+from service_autoshot.schema import AutoShotRequest, AutoShotResponse
+from service_image_embedding.schema import ImageEmbeddingRequest, ImageEmbeddingResponse
+from service_text_embedding.schema import TextEmbeddingRequest, TextEmbeddingResponse
+
+IMAGE_DIM = 512
+TEXT_DIM = 768
+
+
+@dataclass
+class DummyCost:
+    fixed_ms: float = 5.0
+    per_item_ms: float = 1.0
+    mode: Literal["blocking", "async"] = "blocking"
+
+    async def spend(self, items: int) -> None:
+        seconds = (self.fixed_ms + self.per_item_ms * items) / 1000
+        if self.mode == "async":
+            await asyncio.sleep(seconds)
+            return
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+
+
+# Model type -> cost; set before the load starts.
+costs: dict[str, DummyCost] = {
+    "autoshot": DummyCost(fixed_ms=200.0, per_item_ms=0.0),
+    "asr": DummyCost(fixed_ms=500.0, per_item_ms=0.0),
+    "image_embedding": DummyCost(fixed_ms=5.0, per_item_ms=8.0),
+    "text_embedding": DummyCost(fixed_ms=2.0, per_item_ms=1.0),
+}
+
+
+def _vectors(count: int, dim: int) -> list[list[float]]:
+    rows = np.random.default_rng(count).standard_normal((count, dim)).astype(np.float32)
+    return (rows / np.linalg.norm(rows, axis=1, keepdims=True)).tolist()
+
+
+class _DummyHandler(BaseModelHandler[Any, Any]):
+    model_type = "dummy"
+
+    async def load_model_impl(self, device: Literal["cpu", "cuda"]) -> None:
+        pass
+
+    async def unload_model_impl(self) -> None:
+        pass
+
+    def get_model_info(self) -> ModelInfo:
+        return ModelInfo(model_name=self.model_name, model_type=self.model_type)
+
+
+@register_model("autoshot")
+class DummyAutoshotHandler(_DummyHandler):
+    model_type = "autoshot"
+
+    async def preprocess_input(self, input_data: AutoShotRequest) -> str:
+        return input_data.s3_minio_url
+
+    async def run_inference(self, preprocessed_data: str) -> list[tuple[int, int]]:
+        await costs[self.model_type].spend(1)
+        return [(start, start + 47) for start in range(0, 48 * 20, 48)]
+
+    async def postprocess_output(self, output_data: list[tuple[int, int]], original_input_data: AutoShotRequest) -> AutoShotResponse:
+        return AutoShotResponse(metadata=original_input_data.metadata, scenes=output_data, total_scenes=len(output_data))
+
+
+@register_model("chunkformer")
+class DummyASRHandler(_DummyHandler):
+    model_type = "asr"
+
+    async def preprocess_input(self, input_data: ASRInferenceRequest) -> str:
+        return input_data.video_minio_url or ""
+
+    async def run_inference(self, preprocessed_data: str) -> list[TimestampedToken]:
+        await costs[self.model_type].spend(1)
+        return [
+            TimestampedToken(text="dummy", start=f"00:00:{i:02d}.000", end=f"00:00:{i:02d}.500",
+                             start_frame=f"{i * 25:08d}", end_frame=f"{i * 25 + 12:08d}")
+            for i in range(20)
+        ]
+
+    async def postprocess_output(self, output_data: list[TimestampedToken], original_input_data: ASRInferenceRequest) -> ASRInferenceResponse:
+        return ASRInferenceResponse(
+            video_minio_url=original_input_data.video_minio_url or "",
+            metadata=original_input_data.metadata,
+            result=ASRResult(tokens=output_data, processing_time_seconds=0.0, audio_duration_seconds=20.0),
+        )
+
+
+@register_model("open_clip")
+class DummyImageEmbeddingHandler(_DummyHandler):
+    model_type = "image_embedding"
+
+    async def preprocess_input(self, input_data: ImageEmbeddingRequest) -> tuple[int, int]:
+        return len(input_data.image_base64 or []), len(input_data.text_input or [])
+
+    async def run_inference(self, preprocessed_data: tuple[int, int]) -> tuple[list | None, list | None]:
+        images, texts = preprocessed_data
+        await costs[self.model_type].spend(images + texts)
+        return (_vectors(images, IMAGE_DIM) if images else None), (_vectors(texts, IMAGE_DIM) if texts else None)
+
+    async def postprocess_output(self, output_data: tuple[list | None, list | None], original_input_data: ImageEmbeddingRequest) -> ImageEmbeddingResponse:
+        images, texts = output_data
+        return ImageEmbeddingResponse(image_embeddings=images, text_embeddings=texts, metadata=original_input_data.metadata)
+
+
+@register_model("sentence_embedding")
+class DummyTextEmbeddingHandler(_DummyHandler):
+    model_type = "text_embedding"
+
+    async def preprocess_input(self, input_data: TextEmbeddingRequest) -> list[str]:
+        return input_data.texts
+
+    async def run_inference(self, preprocessed_data: list[str]) -> list[list[float]]:
+        await costs[self.model_type].spend(len(preprocessed_data))
+        return _vectors(len(preprocessed_data), TEXT_DIM)
+
+    async def postprocess_output(self, output_data: list[list[float]], original_input_data: TextEmbeddingRequest) -> TextEmbeddingResponse:
+        return TextEmbeddingResponse(embeddings=output_data, texts=original_input_data.texts, metadata=original_input_data.metadata)
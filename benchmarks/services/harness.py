@@ -0,0 +1,63 @@
+"""Wires a target, the dummy models and the load generator together for one run."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from shared.config import LogConfig, LogLevel
+
+from benchmarks.ingestion.services import HOST, LocalServices
+
+from . import dummy
+from .loadgen import LoadGenerator, LoadProfile, make_client
+from .targets import TARGETS
+
+
+async def run_service_load(
+    kind: str,
+    profile: LoadProfile,
+    workdir: Path,
+    url: str | None = None,
+    serve: bool = False,
+    log_level: str = "WARNING",
+    cost_ms: float | None = None,
+    per_item_ms: float | None = None,
+    cost_mode: str | None = None,
+) -> dict[str, Any]:
+    target = TARGETS[kind]
+    services: LocalServices | None = None
+    if url is None:
+        cost = dummy.costs[kind]
+        cost.fixed_ms = cost.fixed_ms if cost_ms is None else cost_ms
+        cost.per_item_ms = cost.per_item_ms if per_item_ms is None else per_item_ms
+        cost.mode = cost.mode if cost_mode is None else cost_mode  # type: ignore[assignment]
+        log_config = LogConfig(log_level=LogLevel(log_level), log_format="console",
+                               log_file=str(workdir / "logs" / f"{kind}.log"))
+        app = target.build_app(log_config)
+        # BaseService replaces the global loguru sinks; the report is the output here.
+        logger.remove()
+        if serve:
+            services = LocalServices()
+            port = services.reserve(kind)
+            services.mount(kind, app)
+            services.start()
+            url = f"http://{HOST}:{port}"
+        client_target: Any = url or app
+    else:
+        client_target = url
+
+    try:
+        async with make_client(client_target, profile.concurrency) as client:
+            await target.load_model(client)
+            report = await LoadGenerator(client, profile).run()
+    finally:
+        if services is not None:
+            services.stop()
+
+    transport = "external" if url and services is None else ("loopback" if services else "asgi")
+    report = {"service": kind, "transport": transport, **report}
+    if transport != "external":
+        report["dummy_cost"] = vars(dummy.costs[kind]).copy()
+    return report
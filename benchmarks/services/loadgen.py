@@ -0,0 +1,225 @@
+"""
+Closed- and open-loop HTTP load against one service.
+
+Closed loop: `concurrency` workers each send a request as soon as the
+previous one answers, which finds the throughput ceiling. Open loop:
+requests arrive as a Poisson process at `rate` per second whatever the
+service does, with at most `concurrency` in flight on the client. Latency
+is measured from the intended send time, so queueing behind a saturated
+service is counted instead of hidden. Payloads are drawn from a weighted
+mix. The service's `/metrics` is scraped before and after the run and the
+report carries the difference.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+import httpx
+import numpy as np
+from prometheus_client.parser import text_string_to_metric_families
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+@dataclass
+class Payload:
+    name: str
+    path: str
+    body: dict[str, Any]
+    weight: float = 1.0
+
+
+@dataclass
+class LoadProfile:
+    mix: list[Payload]
+    concurrency: int = 8
+    mode: Literal["closed", "open"] = "closed"
+    # Open loop only: mean arrivals per second.
+    rate: float = 10.0
+    duration_seconds: float = 10.0
+    # Stop after this many requests even if the duration has not elapsed.
+    max_requests: int | None = None
+    warmup_requests: int = 0
+    seed: int = 0
+
+
+@dataclass
+class LatencyHistogram:
+    buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS
+    samples_ms: list[float] = field(default_factory=list)
+
+    def observe(self, latency_ms: float) -> None:
+        self.samples_ms.append(latency_ms)
+
+    def report(self) -> dict[str, Any]:
+        if not self.samples_ms:
+            return {"count": 0}
+        values = np.asarray(self.samples_ms)
+        # Cumulative-bucket semantics of Prometheus `le`: a sample equal to a bound counts in that bucket.
+        counts = np.bincount(np.searchsorted(self.buckets_ms, values, side="left"), minlength=len(self.buckets_ms) + 1)
+        labels = [f"<={bound:g}" for bound in self.buckets_ms] + ["+Inf"]
+        return {
+            "count": int(values.size),
+            "mean": round(float(values.mean()), 3),
+            **{f"p{q}": round(float(np.percentile(values, q)), 3) for q in (50, 90, 95, 99)},
+            "max": round(float(values.max()), 3),
+            "buckets": {label: int(count) for label, count in zip(labels, counts) if count},
+        }
+
+
+def make_client(target: Any, concurrency: int, timeout_seconds: float = 60.0) -> httpx.AsyncClient:
+    """A client for a base URL, or for an ASGI app served in-process (no sockets, same event loop)."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(timeout_seconds)
+    if isinstance(target, str):
+        return httpx.AsyncClient(base_url=target, limits=limits, timeout=timeout)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=target), base_url="http://service",
+                             limits=limits, timeout=timeout)
+
+
+async def scrape_metrics(client: httpx.AsyncClient) -> dict[str, tuple[str, float]]:
+    """`name{label="value",...}` -> (family type, value) for every sample on `/metrics`; empty if it has none."""
+    try:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    samples: dict[str, tuple[str, float]] = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            labels = ",".join(f'{key}="{value}"' for key, value in sorted(sample.labels.items()))
+            samples[f"{sample.name}{{{labels}}}" if labels else sample.name] = (family.type, sample.value)
+    return samples
+
+
+def metrics_delta(before: dict[str, tuple[str, float]], after: dict[str, tuple[str, float]]) -> dict[str, dict[str, float]]:
+    """Counters and histograms as the change over the run (unchanged ones omitted), gauges as their final value."""
+    counters: dict[str, float] = {}
+    gauges: dict[str, float] = {}
+    for key, (kind, value) in sorted(after.items()):
+        if kind in ("counter", "histogram", "summary"):
+            delta = value - before.get(key, (kind, 0.0))[1]
+            if delta:
+                counters[key] = round(delta, 6)
+        elif kind == "gauge":
+            gauges[key] = value
+    return {"counters": counters, "gauges": gauges}
+
+
+@dataclass
+class _Outcome:
+    payload: str
+    latency_ms: float
+    error: str | None
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, profile: LoadProfile):
+        if not profile.mix:
+            raise ValueError("LoadProfile.mix needs at least one payload")
+        self.client = client
+        self.profile = profile
+        self._rng = random.Random(profile.seed)
+        self._weights = [payload.weight for payload in profile.mix]
+        self._issued = 0
+
+    def _pick(self) -> Payload:
+        return self._rng.choices(self.profile.mix, weights=self._weights)[0]
+
+    def _admit(self, deadline: float) -> bool:
+        limit = self.profile.max_requests
+        if time.perf_counter() >= deadline or (limit is not None and self._issued >= limit):
+            return False
+        self._issued += 1
+        return True
+
+    async def _send(self, payload: Payload, intended: float) -> _Outcome:
+        error: str | None = None
+        try:
+            response = await self.client.post(payload.path, json=payload.body)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except httpx.HTTPError as exc:
+            error = type(exc).__name__
+        return _Outcome(payload.name, (time.perf_counter() - intended) * 1000, error)
+
+    async def _closed_loop(self, deadline: float) -> list[_Outcome]:
+        outcomes: list[_Outcome] = []
+
+        async def worker() -> None:
+            while self._admit(deadline):
+                outcomes.append(await self._send(self._pick(), time.perf_counter()))
+
+        await asyncio.gather(*(worker() for _ in range(self.profile.concurrency)))
+        return outcomes
+
+    async def _open_loop(self, deadline: float) -> list[_Outcome]:
+        in_flight = asyncio.Semaphore(self.profile.concurrency)
+        tasks: list[asyncio.Task[_Outcome]] = []
+
+        async def send(payload: Payload, intended: float) -> _Outcome:
+            async with in_flight:
+                return await self._send(payload, intended)
+
+        next_arrival = time.perf_counter()
+        while True:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._admit(deadline):
+                break
+            tasks.append(asyncio.create_task(send(self._pick(), next_arrival)))
+            next_arrival += self._rng.expovariate(self.profile.rate)
+        return list(await asyncio.gather(*tasks))
+
+    async def run(self) -> dict[str, Any]:
+        profile = self.profile
+        for _ in range(profile.warmup_requests):
+            await self._send(self._pick(), time.perf_counter())
+
+        before = await scrape_metrics(self.client)
+        self._issued = 0
+        started = time.perf_counter()
+        deadline = started + profile.duration_seconds
+        if profile.mode == "open":
+            outcomes = await self._open_loop(deadline)
+        else:
+            outcomes = await self._closed_loop(deadline)
+        wall = time.perf_counter() - started
+        after = await scrape_metrics(self.client)
+
+        latency = LatencyHistogram()
+        by_payload: dict[str, LatencyHistogram] = {}
+        errors: Counter[str] = Counter()
+        payload_errors: Counter[str] = Counter()
+        for outcome in outcomes:
+            latency.observe(outcome.latency_ms)
+            by_payload.setdefault(outcome.payload, LatencyHistogram()).observe(outcome.latency_ms)
+            if outcome.error:
+                errors[outcome.error] += 1
+                payload_errors[outcome.payload] += 1
+
+        total = len(outcomes)
+        failed = sum(errors.values())
+        return {
+            "mode": profile.mode,
+            "concurrency": profile.concurrency,
+            "offered_rate_rps": profile.rate if profile.mode == "open" else None,
+            "wall_seconds": round(wall, 3),
+            "requests": total,
+            "throughput_rps": round(total / wall, 2) if wall > 0 else None,
+            "goodput_rps": round((total - failed) / wall, 2) if wall > 0 else None,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "errors": dict(errors),
+            "latency_ms": latency.report(),
+            "by_payload": {
+                name: {"requests": len(hist.samples_ms), "errors": payload_errors[name], "latency_ms": hist.report()}
+                for name, hist in sorted(by_payload.items())
+            },
+            "service_metrics": metrics_delta(before, after),
+        }
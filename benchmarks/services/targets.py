@@ -0,0 +1,105 @@
+"""
+The four GPU model services as load-test targets: how to build each app
+around its real `BaseService` and router, which model to load, and a
+default payload mix shaped like the orchestrator's traffic.
+"""
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from typing import Callable
+
+import cv2
+import httpx
+import numpy as np
+from fastapi import APIRouter, FastAPI
+
+from shared.config import LogConfig
+from service_asr.core.api import router as asr_router
+from service_asr.core.config import ASRServiceConfig
+from service_asr.core.service import ASRService
+from service_autoshot.core.api import router as autoshot_router
+from service_autoshot.core.config import AutoshotConfig
+from service_autoshot.core.service import AutoshotService
+from service_image_embedding.core.api import router as image_embedding_router
+from service_image_embedding.core.config import ImageEmbeddingConfig
+from service_image_embedding.core.service import ImageEmbeddingService
+from service_text_embedding.core.api import router as text_embedding_router
+from service_text_embedding.core.config import TextEmbeddingConfig
+from service_text_embedding.core.service import TextEmbeddingService
+
+from benchmarks.ingestion.services import HOST, service_app
+
+from .loadgen import Payload
+
+_COMMON = dict(host=HOST, port=0, cpu_fallback=True, service_version="bench")
+_SENTENCES = (
+    "a red car crossing a wet street at night",
+    "two people talking in a busy market",
+    "a dog running along a sunny beach while children play near the water",
+    "the chef slices vegetables in a small kitchen",
+)
+
+
+@dataclass
+class ServiceTarget:
+    kind: str
+    prefix: str
+    model_name: str
+    router: APIRouter
+    build_service: Callable[[LogConfig], object]
+
+    def build_app(self, log_config: LogConfig) -> FastAPI:
+        return service_app(self.router, self.prefix, self.build_service(log_config))
+
+    async def load_model(self, client: httpx.AsyncClient) -> None:
+        response = await client.post(f"{self.prefix}/load", json={"model_name": self.model_name, "device": "cpu"})
+        response.raise_for_status()
+
+    @property
+    def infer_path(self) -> str:
+        return f"{self.prefix}/infer"
+
+
+TARGETS: dict[str, ServiceTarget] = {
+    "autoshot": ServiceTarget("autoshot", "/autoshot", "autoshot", autoshot_router, lambda log: AutoshotService(
+        AutoshotConfig(service_name="autoshot-service", autoshot_model_path="-", **_COMMON), log)),
+    "asr": ServiceTarget("asr", "/asr", "chunkformer", asr_router, lambda log: ASRService(
+        ASRServiceConfig(service_name="asr-service", chunkformer_model_path="-", **_COMMON), log)),
+    "image_embedding": ServiceTarget("image_embedding", "/image-embedding", "open_clip", image_embedding_router,
+        lambda log: ImageEmbeddingService(ImageEmbeddingConfig(
+            service_name="image-embedding-service", beit3_model_checkpoint="-", beit3_tokenizer_checkpoint="-",
+            open_clip_model_name="-", open_clip_pretrained="-", **_COMMON), log)),
+    "text_embedding": ServiceTarget("text_embedding", "/text-embedding", "sentence_embedding", text_embedding_router,
+        lambda log: TextEmbeddingService(TextEmbeddingConfig(service_name="text-embedding-service", **_COMMON), log)),
+}
+
+
+def _jpeg_base64(seed: int, size: int = 224) -> str:
+    pixels = np.random.default_rng(seed).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".jpg", pixels)
+    if not ok:
+        raise RuntimeError("Failed to encode the synthetic benchmark image")
+    return base64.b64encode(encoded.tobytes()).decode("ascii")
+
+
+def default_mix(kind: str) -> list[Payload]:
+    """Request shapes each service sees from the ingestion tasks and the agent, weighted roughly by frequency."""
+    path = TARGETS[kind].infer_path
+    if kind == "text_embedding":
+        return [
+            Payload("query", path, {"texts": [_SENTENCES[0]]}, weight=6),
+            Payload("batch_16", path, {"texts": [_SENTENCES[i % 4] for i in range(16)]}, weight=3),
+            Payload("batch_64", path, {"texts": [_SENTENCES[i % 4] for i in range(64)]}, weight=1),
+        ]
+    if kind == "image_embedding":
+        return [
+            Payload("text_query", path, {"text_input": [_SENTENCES[0]]}, weight=5),
+            Payload("image_1", path, {"image_base64": [_jpeg_base64(0)]}, weight=2),
+            Payload("image_batch_8", path, {"image_base64": [_jpeg_base64(i) for i in range(8)]}, weight=3),
+        ]
+    if kind == "autoshot":
+        return [Payload("video", path, {"s3_minio_url": "s3://bench-user/videos/clip.mp4"})]
+    if kind == "asr":
+        return [Payload("video", path, {"video_minio_url": "s3://bench-user/videos/clip.mp4"})]
+    raise KeyError(f"Unknown service {kind!r}; expected one of {sorted(TARGETS)}")
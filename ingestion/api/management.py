@@ -1,15 +1,20 @@
 from typing import Any, Optional
 from uuid import UUID
-from fastapi import HTTPException, APIRouter, Depends, status, Query
+from fastapi import BackgroundTasks, HTTPException, APIRouter, Depends, Header, Request, status, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from fastapi import WebSocket, WebSocketDisconnect
 import asyncio
 import json
 from core.management.cleanup import ArtifactDeleter, DeletionResult
 from core.management.status import VideoStatusManager, VideoStatusInfo
+from core.management.events import ProgressEventBus, parse_last_event_id
+from core.management.reindex import Reindexer, ReindexPlan
 from core.dependencies.application import (
     get_artifact_deleter,
     get_artifact_tracker,
+    get_event_bus,
+    get_reindexer,
     get_storage_client,
     get_video_status_manager
 )
@@ -119,32 +124,130 @@ async def get_video_status(
     
 
 
+class ReindexRequest(BaseModel):
+    assume_legacy_current: bool = Field(
+        default=False, description="Treat artifacts indexed before provenance was recorded as up to date"
+    )
+    drop_previous: bool = Field(default=False, description="Drop the collection the alias served before the swap")
+
+
+class ReindexStatus(BaseModel):
+    running: bool
+    last_result: dict[str, Any] | None = None
+    last_error: str | None = None
+
+
+@router.get(
+    "/reindex/plan",
+    response_model=ReindexPlan,
+    status_code=status.HTTP_200_OK,
+    summary="Plan a model-version re-index",
+    description="List the stages, videos and collections whose recorded model/config differs from the current one"
+)
+async def plan_reindex(
+    assume_legacy_current: bool = Query(False),
+    reindexer: Reindexer = Depends(get_reindexer)
+) -> ReindexPlan:
+    return await reindexer.plan(assume_legacy_current=assume_legacy_current)
+
+
+@router.post(
+    "/reindex",
+    response_model=ReindexPlan,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Re-index stale artifacts",
+    description="Re-run only the stale stages, rebuild the affected collections as shadows and swap their aliases"
+)
+async def start_reindex(
+    request: ReindexRequest,
+    background_tasks: BackgroundTasks,
+    reindexer: Reindexer = Depends(get_reindexer)
+) -> ReindexPlan:
+    if reindexer.running:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A re-index is already running")
+    plan = await reindexer.plan(assume_legacy_current=request.assume_legacy_current)
+    if plan.blocked_videos:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Some videos have no recorded upstream outputs", "blocked_videos": plan.blocked_videos},
+        )
+    if not plan.is_empty:
+        background_tasks.add_task(reindexer.execute, plan, request.drop_previous)
+    return plan
+
+
+@router.get(
+    "/reindex/status",
+    response_model=ReindexStatus,
+    status_code=status.HTTP_200_OK,
+    summary="Re-index status",
+)
+async def reindex_status(reindexer: Reindexer = Depends(get_reindexer)) -> ReindexStatus:
+    return ReindexStatus(
+        running=reindexer.running, last_result=reindexer.last_result, last_error=reindexer.last_error
+    )
 
 
 
-# @router.websocket("/ws/progress/{video_id}")
-# async def websocket_progress(websocket: WebSocket, video_id: str):
-#     await websocket.accept()
-#     try:
-#         while True:
-#             progress: Optional[VideoProgress] = app.state.progress_tracker.get_progress(video_id)  # type: ignore
-#             if progress:
-#                 data = {
-#                     "video_id": progress.video_id,
-#                     "overall_percentage": progress.overall_percentage,
-#                     "current_stage": progress.current_stage.valutẻe if progress.current_stage else None,
-#                     "status": progress.status,
-#                     "stages": {
-#                         stage.value: {
-#                             "total_items": sp.total_items,
-#                             "completed_items": sp.completed_items,
-#                             "percentage": sp.percentage,
-#                             "details": sp.details,
-#                         }
-#                         for stage, sp in progress.stages.items()
-#                     }
-#                 }
-#                 await websocket.send_text(json.dumps(data))
-#             await asyncio.sleep(1)  # Poll every second
-#     except WebSocketDisconnect:
-#         run_logger.info(f"WebSocket disconnected for video_id: {video_id}")
+
+
+
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+def _sse_response(request: Request, bus: ProgressEventBus, video_id: str | None, last_event_id: int | None) -> StreamingResponse:
+    async def body():
+        async for event in bus.subscribe(video_id, last_event_id, heartbeat=SSE_HEARTBEAT_SECONDS):
+            if await request.is_disconnected():
+                break
+            yield ": keep-alive\n\n" if event is None else event.to_sse()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/events",
+    summary="Stream ingestion progress events (SSE)",
+    description="Server-sent events for every video, or one video with ?video_id=. Resumes after the Last-Event-ID header (or ?last_event_id=) from the in-memory replay buffer."
+)
+async def stream_progress_events(
+    request: Request,
+    video_id: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    bus: ProgressEventBus = Depends(get_event_bus),
+) -> StreamingResponse:
+    return _sse_response(request, bus, video_id, parse_last_event_id(last_event_id_header or last_event_id))
+
+
+@router.get(
+    "/videos/{video_id}/events",
+    summary="Stream progress events for one video (SSE)",
+)
+async def stream_video_progress_events(
+    request: Request,
+    video_id: str,
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    bus: ProgressEventBus = Depends(get_event_bus),
+) -> StreamingResponse:
+    return _sse_response(request, bus, video_id, parse_last_event_id(last_event_id_header or last_event_id))
+
+
+@router.websocket("/ws/progress/{video_id}")
+async def websocket_progress(websocket: WebSocket, video_id: str, last_event_id: Optional[str] = None):
+    bus: ProgressEventBus = websocket.app.state.event_bus
+    await websocket.accept()
+    try:
+        async for event in bus.subscribe(video_id, parse_last_event_id(last_event_id), heartbeat=SSE_HEARTBEAT_SECONDS):
+            # Heartbeats surface a silently dropped client as a failed send.
+            payload = {"event": "heartbeat"} if event is None else event.model_dump(mode='json')
+            await websocket.send_json(payload)
+        # The bus dropped a subscriber that fell behind; the client reconnects with its last id.
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        run_logger.info(f"WebSocket disconnected for video_id: {video_id}")
@@ -1,30 +1,24 @@
-from typing import Any, Optional
-from uuid import uuid4, UUID
+from typing import Optional
 
 from fastapi import (
     APIRouter,
     Depends,
-    File,
-    Form,
     HTTPException,
-    UploadFile,
+    Query,
     status,
-    BackgroundTasks
 )
 from pydantic import BaseModel, Field
 from loguru import logger
 
 
-from core.config.storage import minio_settings
-from core.pipeline.tracker import ArtifactTracker
-from core.storage import StorageClient
-from core.dependencies.application import get_artifact_tracker, get_storage_client
-from flow.video_processing import video_processing_flow
+from core.pipeline.job_queue import IngestionJob, JobQueue, JobWorker
+from core.dependencies.application import get_job_queue, get_job_worker
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
 class UploadResponse(BaseModel):
-    """Response after successful upload."""
+    """Response after the upload is queued."""
+    job_id: str
     run_id: str
     flow_run_id: str
     video_count: int
@@ -38,59 +32,61 @@ class UploadResponse(BaseModel):
 class UploadRequest(BaseModel):
     videos: list[tuple[str,str]] = Field(..., description="list of uploading videos, in the format of (video_id, video_s3_url)")
     user_id: str
+    priority: int = Field(default=0, description="Higher runs first among the same user's queued jobs")
 
 @router.post(
     "/",
     response_model=UploadResponse,
     status_code=status.HTTP_202_ACCEPTED,
-    summary="Upload videos and start processing",
-    description="Upload one or more videos and automatically trigger the Prefect processing pipeline"
+    summary="Upload videos and queue processing",
+    description="Queue one or more videos for the Prefect processing pipeline and return the job id immediately"
 )
 async def upload_videos(
-    background_tasks: BackgroundTasks,
     request_files: UploadRequest,
+    queue: JobQueue = Depends(get_job_queue),
+    worker: JobWorker = Depends(get_job_worker),
 ) -> UploadResponse:
-    
-    
-
-    logger.info(f"Calling video_processing_flow directly")
-    run_id = str(uuid4())
-
     video_files = request_files.videos
-    user_id = request_files.user_id
-
-    def run_flow_sync():
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(
-                video_processing_flow(
-                    video_files=video_files,
-                    user_id=user_id,
-                    run_id=run_id,
-                )
-            )
-            logger.info(f"Flow completed: {result}")
-        except Exception as e:
-            logger.exception(f"Flow failed: {e}")
-        finally:
-            loop.close()
-    
-    background_tasks.add_task(run_flow_sync)
+    job = await queue.enqueue(
+        user_id=request_files.user_id,
+        payload={"videos": [list(video) for video in video_files]},
+        priority=request_files.priority,
+    )
+    worker.notify()
+    logger.info(f"Queued ingestion job {job.job_id} with {len(video_files)} video(s)")
 
     return UploadResponse(
-        run_id=run_id,
-        flow_run_id=run_id,  
+        job_id=job.job_id,
+        run_id=job.job_id,
+        flow_run_id=job.job_id,
         video_count=len(video_files),
-        video_names=[f[1] or "unknown" for f in request_files],
-        status="RUNNING",
-        message=f"Processing started directly for {len(video_files)} video(s)",
-        tracking_url=f"/api/management/videos/{run_id}/status"
+        video_names=[f[1] or "unknown" for f in video_files],
+        status=job.status.value.upper(),
+        message=f"Queued {len(video_files)} video(s) for processing",
+        tracking_url=f"/uploads/jobs/{job.job_id}"
     )
 
 
+@router.get("/jobs/{job_id}", response_model=IngestionJob)
+async def get_job(job_id: str, queue: JobQueue = Depends(get_job_queue)) -> IngestionJob:
+    job = await queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
 
+@router.get("/jobs", response_model=list[IngestionJob])
+async def list_jobs(
+    user_id: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    queue: JobQueue = Depends(get_job_queue),
+) -> list[IngestionJob]:
+    return await queue.list_jobs(user_id=user_id, limit=limit)
 
 
-    
+@router.delete("/jobs/{job_id}", response_model=IngestionJob)
+async def cancel_job(job_id: str, queue: JobQueue = Depends(get_job_queue)) -> IngestionJob:
+    job = await queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
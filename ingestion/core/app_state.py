@@ -15,6 +15,7 @@ class AppState:
     artifact_tracker: Any = None
     artifact_visitor: Any = None
     artifact_deleter: Any = None
+    stage_checkpoints: Any = None
 
     video_ingestion_task: Any = None
     autoshot_task: Any = None
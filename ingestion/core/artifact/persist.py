@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from core.storage import StorageClient
 from core.pipeline.tracker import ArtifactTracker, ArtifactMetadata
-from typing import BinaryIO, TYPE_CHECKING
+from core.metrics import ingestion_metrics
+from typing import BinaryIO, Iterator, TYPE_CHECKING
 from datetime import datetime
 
 if TYPE_CHECKING:
@@ -18,6 +21,11 @@ if TYPE_CHECKING:
         TextCaptionEmbeddingArtifact,
         TextCapSegmentEmbedArtifact,
     )
+
+# video id -> artifact ids known to be committed, set while a checkpointed stage resumes.
+_committed_artifacts: ContextVar[dict[str, set[str]] | None] = ContextVar("committed_artifacts", default=None)
+
+
 class ArtifactPersistentVisitor:
     def __init__(
         self,
@@ -26,22 +34,41 @@ class ArtifactPersistentVisitor:
     ):
         self.minio_client = minio_client
         self.tracker = tracker
-    
+
+    @contextmanager
+    def assume_committed(self, committed: dict[str, set[str]]) -> Iterator[None]:
+        """Answer existence checks for these videos from `committed` instead of the tracker and MinIO."""
+        token = _committed_artifacts.set(committed)
+        try:
+            yield
+        finally:
+            _committed_artifacts.reset(token)
 
     async def _check_exist(self, artifact: "BaseArtifact", bucket_name: str, check_minio:bool=True) -> bool:
+        exists = await self._lookup_exist(artifact, bucket_name, check_minio)
+        ingestion_metrics.track_cache("artifact", exists)
+        return exists
+
+    async def _lookup_exist(self, artifact: "BaseArtifact", bucket_name: str, check_minio:bool=True) -> bool:
+        committed = _committed_artifacts.get()
+        if committed is not None:
+            video_id = getattr(artifact, "related_video_id", None) or getattr(artifact, "video_id", None)
+            if video_id in committed:
+                return any(a in committed[video_id] for a in (artifact.artifact_id, *artifact.legacy_artifact_ids))
         try:
-            object_key = artifact.object_key
-            artifact_id = artifact.artifact_id
-            metadata = await self.tracker.get_artifact(artifact_id)
+            metadata = await self.tracker.get_artifact(artifact.artifact_id)
+            for legacy_id in artifact.legacy_artifact_ids:
+                if metadata:
+                    break
+                # A legacy id may belong to another artifact type that shared it, so only a row of this type counts.
+                metadata = await self.tracker.get_artifact(legacy_id)
+                if metadata and metadata.artifact_type != type(artifact).__name__:
+                    metadata = None
             if not metadata:
                 return False
 
             if check_minio:
-                object_returned = self.minio_client.get_object(
-                    bucket=bucket_name,
-                    object_name=object_key,
-                )
-                return object_returned is not None
+                return await self.minio_client.aio.object_exists(bucket_name, artifact.object_key)
             return True
 
 
@@ -57,6 +84,7 @@ class ArtifactPersistentVisitor:
             minio_url=artifact.video_minio_url,
             user_id=artifact.user_bucket,
             parent_artifact_id=None,
+            related_video_id=artifact.artifact_id,
             task_name=artifact.task_name,
             created_at=datetime.now(),
             artifact_metadata=upload_file
@@ -71,7 +99,7 @@ class ArtifactPersistentVisitor:
     
         object_key = artifact.object_key
 
-        minio_url= self.minio_client.put_json(
+        minio_url= await self.minio_client.aio.put_json(
             bucket=artifact.user_bucket,
             object_name=object_key,
             payload={
@@ -85,6 +113,7 @@ class ArtifactPersistentVisitor:
             minio_url=minio_url,
             user_id=artifact.user_bucket,
             parent_artifact_id=artifact.related_video_id,
+            related_video_id=artifact.related_video_id,
             task_name=artifact.task_name,
             created_at=datetime.now(),
             artifact_metadata={}
@@ -96,7 +125,7 @@ class ArtifactPersistentVisitor:
 
     async def visit_asr(self, artifact: "ASRArtifact", upload_file: dict):
         object_key = artifact.object_key
-        minio_url = self.minio_client.put_json(
+        minio_url = await self.minio_client.aio.put_json(
             bucket=artifact.user_bucket,
             object_name=object_key,
             payload=upload_file
@@ -108,6 +137,7 @@ class ArtifactPersistentVisitor:
             minio_url=minio_url,
             user_id=artifact.user_bucket,
             parent_artifact_id=artifact.related_video_id,
+            related_video_id=artifact.related_video_id,
             task_name=artifact.task_name,
             created_at=datetime.now(),
             artifact_metadata={}
@@ -118,7 +148,7 @@ class ArtifactPersistentVisitor:
     async def visit_image(self, artifact: "ImageArtifact", upload_file: BinaryIO):
 
         object_key = artifact.object_key
-        self.minio_client.upload_fileobj(
+        await self.minio_client.aio.upload_fileobj(
             bucket=artifact.user_bucket,
             object_name=object_key,
             file_obj=upload_file,
@@ -131,9 +161,13 @@ class ArtifactPersistentVisitor:
             artifact_type=artifact.artifact_type,
             minio_url=artifact.minio_url_path,
             parent_artifact_id=artifact.autoshot_artifact_id,
+            related_video_id=artifact.related_video_id,
             task_name='image processing',
             user_id=artifact.user_bucket,
-            artifact_metadata={}
+            artifact_metadata={
+                key: value for key, value in
+                (('represented_frames', artifact.represented_frames), ('signature', artifact.signature)) if value
+            }
         )
         await self.tracker.save_artifact(artifact_metadata)
 
@@ -153,14 +187,15 @@ class ArtifactPersistentVisitor:
             artifact_type=artifact.artifact_type,
             minio_url=artifact.minio_url_path,
             parent_artifact_id=artifact.autoshot_artifact_id,
+            related_video_id=artifact.related_video_id,
             task_name='Segment caption',
             user_id=artifact.user_bucket,
-            artifact_metadata={}
+            artifact_metadata=dict(artifact.provenance)
             
         )
         await self.tracker.save_artifact(artifact_metadata)
 
-        self.minio_client.put_json(
+        await self.minio_client.aio.put_json(
             bucket=artifact.user_bucket,
             object_name=object_key,
             payload=payload
@@ -179,13 +214,14 @@ class ArtifactPersistentVisitor:
             artifact_type=artifact.artifact_type,
             minio_url=artifact.minio_url_path,
             parent_artifact_id=artifact.image_id,
+            related_video_id=artifact.related_video_id,
             task_name='image caption',
             user_id=artifact.user_bucket,
-            artifact_metadata={}
+            artifact_metadata=dict(artifact.provenance)
         )
         await self.tracker.save_artifact(artifact_metadata)
 
-        self.minio_client.put_json(
+        await self.minio_client.aio.put_json(
             bucket=artifact.user_bucket,
             object_name=object_key,
             payload=payload
@@ -194,7 +230,7 @@ class ArtifactPersistentVisitor:
     async def visit_image_embedding(self, artifact: "ImageEmbeddingArtifact", upload_file: BinaryIO):
         object_key = artifact.object_key
 
-        minio_url = self.minio_client.upload_fileobj(
+        minio_url = await self.minio_client.aio.upload_fileobj(
             bucket=artifact.user_bucket,
             object_name=object_key,
             file_obj=upload_file,
@@ -207,16 +243,17 @@ class ArtifactPersistentVisitor:
             artifact_type=artifact.artifact_type,
             minio_url=artifact.minio_url_path,
             parent_artifact_id=artifact.image_id,
+            related_video_id=artifact.related_video_id,
             task_name='image embedding',
             user_id=artifact.user_bucket,
-            artifact_metadata={}
+            artifact_metadata=dict(artifact.provenance)
         )
         await self.tracker.save_artifact(artifact_metadata)
 
 
     async def visit_image_caption_embedding(self, artifact: "TextCaptionEmbeddingArtifact", upload_file: BinaryIO):
         object_key = artifact.object_key
-        minio_url = self.minio_client.upload_fileobj(
+        minio_url = await self.minio_client.aio.upload_fileobj(
             bucket=artifact.user_bucket,
             object_name=object_key,
             file_obj=upload_file,
@@ -229,16 +266,17 @@ class ArtifactPersistentVisitor:
             artifact_type=artifact.artifact_type,
             minio_url=artifact.minio_url_path,
             parent_artifact_id=artifact.caption_id,
+            related_video_id=artifact.related_video_id,
             task_name='image embedding',
             user_id=artifact.user_bucket,
-            artifact_metadata={}
+            artifact_metadata=dict(artifact.provenance)
         )
         await self.tracker.save_artifact(artifact_metadata)
         return minio_url
     
     async def visit_segment_caption_embedding(self, artifact: "TextCapSegmentEmbedArtifact", upload_file: BinaryIO):
         object_key = artifact.object_key
-        minio_url = self.minio_client.upload_fileobj(
+        minio_url = await self.minio_client.aio.upload_fileobj(
             bucket=artifact.user_bucket,
             object_name=object_key,
             file_obj=upload_file,
@@ -251,9 +289,10 @@ class ArtifactPersistentVisitor:
             artifact_type=artifact.artifact_type,
             minio_url=artifact.minio_url_path,
             parent_artifact_id=artifact.segment_cap_id,
+            related_video_id=artifact.related_video_id,
             task_name='image embedding',
             user_id=artifact.user_bucket,
-            artifact_metadata={}            
+            artifact_metadata=dict(artifact.provenance)            
         )
         await self.tracker.save_artifact(artifact_metadata)
         return minio_url
@@ -35,6 +35,11 @@ class BaseArtifact(ABC, BaseModel):
     def artifact_id(self) -> str:
         raise NotImplementedError
 
+    @property
+    def legacy_artifact_ids(self) -> tuple[str, ...]:
+        """Ids this artifact was stored under before its id scheme changed; existence checks still honour them."""
+        return ()
+
 class VideoArtifact(BaseArtifact):
     """
     This will hold the video artifact, This artifact is special, does not follow the BaseArtifact semantic conventional
@@ -61,8 +66,8 @@ class VideoArtifact(BaseArtifact):
         raise NotImplementedError("Video artifact does not have this property")
     
     @property
-    def minio_url_path(self):
-        raise NotImplementedError("Video artifact does not have this property")
+    def minio_url_path(self) -> str:
+        return self.video_minio_url
 
     @property
     def artifact_id(self) -> str:
@@ -147,7 +152,11 @@ class ImageArtifact(BaseArtifact):
     related_video_extension: str
     related_video_fps: float
     timestamp: str
-    
+    segment_index: int | None = None
+    # Near-duplicate frames dropped in favour of this one: [{"frame_index", "timestamp"}, ...]
+    represented_frames: list[dict] = Field(default_factory=list)
+    # Dedup signature of the frame ({"dhash", "histogram"}), kept in the tracker for reruns.
+    signature: dict = Field(default_factory=dict)
 
 
     autoshot_artifact_id: str
@@ -198,6 +207,9 @@ class SegmentCaptionArtifact(BaseArtifact):
     related_video_minio_url: str
     user_bucket: str
 
+    # Model and config that produced it: {"model_name", "model_version", "config_hash"}
+    provenance: dict = Field(default_factory=dict)
+
     def __post_init__(self):
         self.artifact_type = self.__class__.__name__
 
@@ -235,6 +247,8 @@ class ImageCaptionArtifact(BaseArtifact):
     image_id: str
 
 
+    provenance: dict = Field(default_factory=dict)
+
     def __post_init__(self):
         self.artifact_type = self.__class__.__name__
 
@@ -270,6 +284,8 @@ class ImageEmbeddingArtifact(BaseArtifact):
     extension: str
     image_id: str
 
+    provenance: dict = Field(default_factory=dict)
+
     def __post_init__(self):
         self.artifact_type = self.__class__.__name__
 
@@ -290,9 +306,16 @@ class ImageEmbeddingArtifact(BaseArtifact):
 
     @property
     def artifact_id(self) -> str:
-        base_string = f"{self.image_id}:{self.related_video_id}:{self.frame_index}:{self.user_bucket}"
+        # Typed so it does not collide with the caption of the same image.
+        base_string = f"embedding:{self.image_id}:{self.related_video_id}:{self.frame_index}:{self.user_bucket}"
         return hashlib.sha512(base_string.encode("utf-8")).hexdigest()
 
+    @property
+    def legacy_artifact_ids(self) -> tuple[str, ...]:
+        # The untyped id shared with ImageCaptionArtifact; existing tracker rows and Milvus PKs still use it.
+        base_string = f"{self.image_id}:{self.related_video_id}:{self.frame_index}:{self.user_bucket}"
+        return (hashlib.sha512(base_string.encode("utf-8")).hexdigest(),)
+
 class TextCaptionEmbeddingArtifact(BaseArtifact):
     artifact_type: str
     time_stamp: str
@@ -304,6 +327,8 @@ class TextCaptionEmbeddingArtifact(BaseArtifact):
     caption_id: str
     image_minio_url: str
 
+    provenance: dict = Field(default_factory=dict)
+
     def __post_init__(self):
         self.artifact_type = self.__class__.__name__
 
@@ -343,6 +368,8 @@ class TextCapSegmentEmbedArtifact(BaseArtifact):
     user_bucket:str
     segment_cap_id: str
 
+    provenance: dict = Field(default_factory=dict)
+
     def __post_init__(self):
         self.artifact_type = self.__class__.__name__
         
@@ -1,6 +1,10 @@
 from __future__ import annotations
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Generic, Optional, TypeVar, Type, Literal, ClassVar
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, Generic, Optional, TypeVar, Type, Literal, ClassVar
 from urllib.parse import urljoin
 
 import httpx
@@ -14,13 +18,17 @@ from tenacity import (
     retry_if_exception_type
 )
 
+from core.metrics import ingestion_metrics
 from core.pipeline.service_registry import ConsulServiceRegistry
+from prefect_agent.shared import tracing
 from prefect_agent.shared.schema import ModelInfo, LoadModelRequest, UnloadModelRequest
 from pymilvus import (
     AsyncMilvusClient,
+    MilvusClient,
     DataType,
     FieldSchema,
     CollectionSchema,
+    MilvusException,
 )
 
 
@@ -158,7 +166,8 @@ class BaseServiceClient(ABC, Generic[TRequest, TResponse]):
     async def get_service_url(self) -> str | None:
         if self.consul:
             try:
-                service_info = await self.consul.get_healthy_service(self.service_name)
+                with tracing.span("consul.lookup", service=self.service_name):
+                    service_info = await self.consul.get_healthy_service(self.service_name)
                 if service_info:
                     url = f"http://{service_info.address}:{service_info.port}"
                     logger.debug(
@@ -188,13 +197,37 @@ class BaseServiceClient(ABC, Generic[TRequest, TResponse]):
         **kwargs
     ):
         """
-        Make the request with retry logic and response validation
+        Make the request with retry logic and response validation.
+        Each attempt carries the active span in a `traceparent` header.
         """
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with tracing.span(f"client.{self.service_name}", service=self.service_name, method=method, endpoint=endpoint):
+                response = await self._make_request(method, endpoint, request_data, **kwargs)
+            status = "success"
+            return response
+        finally:
+            ingestion_metrics.track_request(self.service_name, endpoint, status, time.perf_counter() - start)
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint:str,
+        request_data: BaseModel | None = None,
+        **kwargs
+    ):
 
         if self.http_client is None:
             raise ClientError("Client not connected. Connect client bro")
 
+        attempts = 0
+
         async def _attempt_request():
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                ingestion_metrics.track_retry(self.service_name, endpoint)
             base_url = await self.get_service_url()
 
             url = urljoin(base_url, endpoint) #type:ignore
@@ -213,8 +246,11 @@ class BaseServiceClient(ABC, Generic[TRequest, TResponse]):
             )
             
             print(f"{url=}")
-            response = await self.http_client.request(method, url, **request_kwargs) #type:ignore
-            response.raise_for_status()
+            with tracing.span("client.attempt", attempt=attempts, url=url) as attempt:
+                request_kwargs['headers'] = tracing.inject(request_kwargs.get('headers'))
+                response = await self.http_client.request(method, url, **request_kwargs) #type:ignore
+                attempt.set_attribute("status_code", response.status_code)
+                response.raise_for_status()
             print(f"Response from make request: {response=}")
 
             response_data = response.json()
@@ -294,14 +330,17 @@ class BaseServiceClient(ABC, Generic[TRequest, TResponse]):
         if self.http_client is None:
             raise ClientError("Client not connected")
         
-        base_url = await self.get_service_url()
-        url = urljoin(base_url, self.unload_endpoint) #type:ignore
-        
-        response = await self.http_client.post(
-            url,
-            json=request.model_dump(mode='json')
-        )
-        response.raise_for_status()
+        with tracing.span(f"client.{self.service_name}", service=self.service_name, method="POST",
+                          endpoint=self.unload_endpoint):
+            base_url = await self.get_service_url()
+            url = urljoin(base_url, self.unload_endpoint) #type:ignore
+
+            response = await self.http_client.post(
+                url,
+                json=request.model_dump(mode='json'),
+                headers=tracing.inject(),
+            )
+            response.raise_for_status()
         
         result = response.json()
         logger.info(f"{self.service_name}_model_unloaded")
@@ -337,6 +376,16 @@ class BaseServiceClient(ABC, Generic[TRequest, TResponse]):
         return response.json()
     
 
+@asynccontextmanager
+async def model_loaded(client: BaseServiceClient, config: Any) -> AsyncIterator[None]:
+    """Keep `config.model_name` loaded on the service for the duration of the block."""
+    await client.load_model(model_name=config.model_name, device=config.device)
+    try:
+        yield
+    finally:
+        await client.unload_model()
+
+
 class BaseMilvusClient(ABC):
 
     def __init__(
@@ -399,6 +448,12 @@ class BaseMilvusClient(ABC):
         if self._client is None:
             raise MilvusClientError("Client not connected. Call connect() first.")
         return self._client
+
+    @contextmanager
+    def _span(self, operation: str, **attributes: Any) -> Iterator[tracing.Span]:
+        with tracing.span(f"milvus.{operation}", collection=self.config.collection_name, **attributes) as span, \
+                ingestion_metrics.timed("milvus", operation):
+            yield span
     
     @abstractmethod
     def get_schema(self) -> CollectionSchema:
@@ -416,45 +471,47 @@ class BaseMilvusClient(ABC):
         Create both collections and index name
         """
 
-        has_collection = await self.client.has_collection(self.config.collection_name)
-        if has_collection:
-            logger.info(
-                'Milvus collection exists'
-            )
-            return
-            
-        schema = self.get_schema()
-        await self.client.create_collection(
-            collection_name=self.config.collection_name,
-            schema=schema,
-            timeout=10
-        )
-        index_params = self.client.prepare_index_params()
-        index_params.add_index(
-            field_name=self.embedding_field,
-            index_type=self.config.index_type,
-            metric_type=self.config.metric_type,
-            params=self.config.index_params
-        )
-        await self.client.create_index(index_params=index_params, collection_name=self.config.collection_name)
-       
-    async def insert_vectors(self, data: list[dict[str, Any]]) -> list[str]:
-        config = self.config
-        try:
+        with self._span("create_collection"):
+            has_collection = await self.client.has_collection(self.config.collection_name)
+            if has_collection:
+                logger.info(
+                    'Milvus collection exists'
+                )
+                return
             
-            result = await self.client.insert(
+            schema = self.get_schema()
+            await self.client.create_collection(
                 collection_name=self.config.collection_name,
-                data=data
+                schema=schema,
+                timeout=10
             )
-            logger.info("Milvus vector inserted")
-            return result.get("ids", [])
-        except Exception as e:
-            logger.exception(
-                "Milvus insertion failed",
-                collection=self.config.collection_name,
-                error=str(e)
+            index_params = self.client.prepare_index_params()
+            index_params.add_index(
+                field_name=self.embedding_field,
+                index_type=self.config.index_type,
+                metric_type=self.config.metric_type,
+                params=self.config.index_params.get("params", {})
             )
-            raise MilvusClientError(f"Failed to insert vectors: {e}") from e
+            await self.client.create_index(index_params=index_params, collection_name=self.config.collection_name)
+       
+    async def insert_vectors(self, data: list[dict[str, Any]]) -> list[str]:
+        with self._span("insert", rows=len(data)):
+            config = self.config
+            try:
+            
+                result = await self.client.insert(
+                    collection_name=self.config.collection_name,
+                    data=data
+                )
+                logger.info("Milvus vector inserted")
+                return result.get("ids", [])
+            except Exception as e:
+                logger.exception(
+                    "Milvus insertion failed",
+                    collection=self.config.collection_name,
+                    error=str(e)
+                )
+                raise MilvusClientError(f"Failed to insert vectors: {e}") from e
     
 
     async def get_collection_stats(self) -> dict[str, Any]:
@@ -471,23 +528,24 @@ class BaseMilvusClient(ABC):
         
     
     async def record_exists(self, filter_expr: str) -> bool:
-        try:
-            await self.ensure_collection_loaded()
-            result = await self.client.query(
-                collection_name=self.config.collection_name,
-                filter=filter_expr, 
-                output_fields=['id'],
-                limit=1
-            )
+        with self._span("query", filter=filter_expr):
+            try:
+                await self.ensure_collection_loaded()
+                result = await self.client.query(
+                    collection_name=self.config.collection_name,
+                    filter=filter_expr, 
+                    output_fields=['id'],
+                    limit=1
+                )
 
-            return len(result) > 0
-        except Exception as e:
-            logger.exception(
-                "Milvus existence check failed",
-                collection=self.config.collection_name,
-                error=str(e)
-            )
-            raise MilvusClientError(f"Failed to check existence: {e}") from e
+                return len(result) > 0
+            except Exception as e:
+                logger.exception(
+                    "Milvus existence check failed",
+                    collection=self.config.collection_name,
+                    error=str(e)
+                )
+                raise MilvusClientError(f"Failed to check existence: {e}") from e
         
 
     async def ensure_collection_loaded(self):
@@ -498,20 +556,72 @@ class BaseMilvusClient(ABC):
 
     
     async def delete_by_filter(self, filter_expr: str) -> int:
-        try:
-            await self.ensure_collection_loaded()
-            result = await self.client.delete(
-                collection_name=self.config.collection_name,
-                filter=filter_expr
-            )
-            return result.get("delete_count", 0)
-        except Exception as e:
-            logger.exception(
-                "Milvus deletion failed",
-                collection=self.config.collection_name,
-                error=str(e)
-            )
-            raise MilvusClientError(f"Failed to delete records: {e}") from e
+        with self._span("delete", filter=filter_expr):
+            try:
+                await self.ensure_collection_loaded()
+                result = await self.client.delete(
+                    collection_name=self.config.collection_name,
+                    filter=filter_expr
+                )
+                return result.get("delete_count", 0)
+            except Exception as e:
+                logger.exception(
+                    "Milvus deletion failed",
+                    collection=self.config.collection_name,
+                    error=str(e)
+                )
+                raise MilvusClientError(f"Failed to delete records: {e}") from e
+
+    async def delete_by_ids(self, ids: list[str], chunk_size: int = 1000) -> int:
+        """Delete rows by primary key, `chunk_size` ids per request."""
+        with self._span("delete", ids=len(ids)):
+            if not ids:
+                return 0
+            try:
+                await self.ensure_collection_loaded()
+                deleted = 0
+                for start in range(0, len(ids), chunk_size):
+                    result = await self.client.delete(
+                        collection_name=self.config.collection_name,
+                        ids=ids[start:start + chunk_size]
+                    )
+                    deleted += result.get("delete_count", 0)
+                return deleted
+            except Exception as e:
+                logger.exception(
+                    "Milvus deletion failed",
+                    collection=self.config.collection_name,
+                    error=str(e)
+                )
+                raise MilvusClientError(f"Failed to delete records: {e}") from e
+
+    async def count_by_filter(
+        self, filter_expr: str, partition_names: list[str] | None = None, consistency_level: str | None = None
+    ) -> int:
+        """
+        Server-side `count(*)` of the rows matching `filter_expr`; no ids are
+        transferred. Pass `consistency_level="Strong"` to include the latest
+        inserts instead of the collection's default (Bounded) view.
+        """
+        with self._span("count", filter=filter_expr):
+            try:
+                await self.ensure_collection_loaded()
+                extra = {"consistency_level": consistency_level} if consistency_level else {}
+                result = await self.client.query(
+                    collection_name=self.config.collection_name,
+                    filter=filter_expr,
+                    output_fields=["count(*)"],
+                    partition_names=partition_names,
+                    **extra,
+                )
+                return int(result[0]["count(*)"]) if result else 0
+            except Exception as e:
+                logger.exception(
+                    "Milvus count failed",
+                    collection=self.config.collection_name,
+                    error=str(e)
+                )
+                raise MilvusClientError(f"Failed to count records: {e}") from e
 
     async def has_user_collection(self) -> bool:
         """Check if the user-scoped collection exists, swallowing errors to bool."""
@@ -519,3 +629,80 @@ class BaseMilvusClient(ABC):
             return await self.client.has_collection(self.config.collection_name)
         except Exception:
             return False
+
+    async def iter_rows(self, filter_expr: str, batch_size: int = 4096) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Every field of the rows matching `filter_expr`, vectors included, in
+        batches of up to `batch_size`. Offset/limit paging stops at 16384
+        rows and the async client has no query iterator, so this drives the
+        sync client's `query_iterator` in a thread.
+        """
+        def _open() -> tuple[MilvusClient, Any]:
+            sync_client = MilvusClient(
+                uri=f"http://{self.host}:{self.port}", user=self.user, password=self.password,
+                db_name=self.db_name, timeout=self.timeout,
+            )
+            return sync_client, sync_client.query_iterator(
+                collection_name=self.config.collection_name, batch_size=batch_size,
+                filter=filter_expr, output_fields=["*"],
+            )
+
+        await self.ensure_collection_loaded()
+        with self._span("fetch_open", filter=filter_expr):
+            try:
+                sync_client, iterator = await asyncio.to_thread(_open)
+            except Exception as e:
+                logger.exception("Milvus fetch failed", collection=self.config.collection_name, error=str(e))
+                raise MilvusClientError(f"Failed to fetch records: {e}") from e
+        try:
+            while True:
+                with self._span("fetch", filter=filter_expr):
+                    try:
+                        batch = await asyncio.to_thread(iterator.next)
+                    except Exception as e:
+                        logger.exception("Milvus fetch failed", collection=self.config.collection_name, error=str(e))
+                        raise MilvusClientError(f"Failed to fetch records: {e}") from e
+                if not batch:
+                    return
+                yield [dict(row) for row in batch]
+        finally:
+            await asyncio.to_thread(iterator.close)
+            await asyncio.to_thread(sync_client.close)
+
+    async def flush(self) -> None:
+        """Seal the collection's growing segments so reads see every insert."""
+        with self._span("flush"):
+            await self.client.flush(self.config.collection_name)
+
+    async def drop_collection_if_exists(self, collection_name: str | None = None) -> None:
+        name = collection_name or self.config.collection_name
+        if await self.client.has_collection(name):
+            await self.client.drop_collection(name)
+
+    async def alias_target(self, alias: str) -> str | None:
+        """Collection `alias` points to, or None when no such alias exists."""
+        try:
+            described = await self.client.describe_alias(alias)
+        except MilvusException:
+            return None
+        return described.get("collection_name") or None
+
+    async def point_alias(self, alias: str) -> str | None:
+        """
+        Point `alias` at this client's collection and return the collection it served before.
+
+        Moving an existing alias is a single atomic `alter_alias`. The first
+        cut-over of a name that is still a plain collection renames that
+        collection to `<alias>__legacy_<timestamp>` and then creates the
+        alias, so searches can miss for the moment in between.
+        """
+        target = self.config.collection_name
+        previous = await self.alias_target(alias)
+        if previous is not None:
+            await self.client.alter_alias(collection_name=target, alias=alias)
+            return previous
+        if await self.client.has_collection(alias):
+            previous = f"{alias}__legacy_{datetime.now():%Y%m%d%H%M%S}"
+            await self.client.rename_collection(old_name=alias, new_name=previous)
+        await self.client.create_alias(collection_name=target, alias=alias)
+        return previous
@@ -6,6 +6,7 @@ from pymilvus import (
 )
 from loguru import logger
 from pydantic import BaseModel
+from typing import Sequence
 from core.clients.base import BaseMilvusClient
 
 
@@ -54,10 +55,12 @@ class ImageEmbeddingMilvusClient(BaseMilvusClient):
         self,
         id_: str,
         related_video_id: str,
-        user_bucket: str
+        user_bucket: str,
+        legacy_ids: Sequence[str] = ()
     ):
+        ids = ", ".join(f'"{i}"' for i in (id_, *legacy_ids))
         filter_expr = (
-            f'id == "{id_}" '
+            f'id in [{ids}] '
             f'and related_video_id == "{related_video_id}" '
             f'and user_bucket == "{user_bucket}"'
         )
@@ -1,10 +1,15 @@
 import httpx
 import asyncio
+import time
+from collections import deque
 from pydantic import BaseModel, Field
 from enum import Enum
 from core.artifact.schema import VideoArtifact, AutoshotArtifact, ASRArtifact, ImageArtifact, SegmentCaptionArtifact, ImageCaptionArtifact, ImageEmbeddingArtifact, TextCapSegmentEmbedArtifact
 from datetime import datetime
-from threading import Lock
+from threading import Condition, Thread
+from core.config.logging import run_logger
+from core.management.events import ProgressEventBus
+from core.pipeline.tracker import ArtifactMetadata
 
 class ProcessingStage(str, Enum):
     VIDEO_INGEST = "video_ingest"              
@@ -30,27 +35,58 @@ class VideoProgress(BaseModel):
     start_time: datetime | None= None
     end_time: datetime | None = None
     errors: str | None = None
+    current_stage: ProcessingStage | None = None
+    stage_counts: dict[ProcessingStage, int] = Field(default_factory=dict, description="Artifacts reported per stage")
+    artifact_counts: dict[str, int] = Field(default_factory=dict, description="Artifacts persisted by the tracker, per artifact type")
 
 
 class ProgressClient:
+    """
+    Per-video progress kept in memory and published by one background sender.
+
+    Task code only bumps counters under a lock and never waits on the network.
+    The sender thread wakes at most every `flush_interval_ms`, posts the latest
+    state of each video that changed over a persistent connection, and so
+    coalesces (drops) the intermediate states it never got to. Start and final
+    states are queued separately and retried until delivered or `max_retries`
+    is exhausted. Every published state is also put on `event_bus` when one
+    is given. With an empty `base_url` and no bus, progress stays in memory.
+    """
+
     def __init__(
         self,
         base_url: str,
-        endpoint: str = '/api/ingestion/service/status/{video_id}'
+        endpoint: str = '/api/ingestion/service/status/{video_id}',
+        flush_interval_ms: int = 500,
+        timeout_seconds: float = 5.0,
+        max_retries: int = 5,
+        transport: httpx.BaseTransport | None = None,
+        event_bus: ProgressEventBus | None = None,
     ):
         self.base_url = base_url
         self.endpoint = endpoint
+        self.flush_interval = flush_interval_ms / 1000
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self._transport = transport
+        self.event_bus = event_bus
         self._progress: dict[str, VideoProgress] = {}
-        self._lock = Lock()
-    
+        self._dirty: set[str] = set()
+        self._must_deliver: deque[VideoProgress] = deque()
+        self._cond = Condition()
+        self._closing = False
+        self._sender: Thread | None = None
+        self.sent = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url) or self.event_bus is not None
+
     async def start_video(
         self, video_id: str,
     ) -> dict:
-        with self._lock:
+        with self._cond:
             # remove old video id
-            if video_id in self._progress:
-                del self._progress[video_id]
-            
             self._progress[video_id] = VideoProgress(
                 video_id=video_id,
                 start_time=datetime.now(),
@@ -58,52 +94,158 @@ class ProgressClient:
                 status=0.0,
                 errors=None
             )
-
-            async with httpx.AsyncClient(base_url=self.base_url) as client:
-                response = await client.post(
-                    self.endpoint.format(video_id=video_id),
-                    json=self._progress[video_id].model_dump(mode='json')
-                )
-                response.raise_for_status()
-
-            return response.json()
+            self._dirty.discard(video_id)
+            snapshot = self._progress[video_id].model_copy(deep=True)
+            self._enqueue_final(snapshot)
+        return snapshot.model_dump(mode='json')
 
     def update_state_progress(
         self,
         video_id: str,
         stage: ProcessingStage,
+        count: int = 1,
     ):
-        with self._lock:
-            if video_id not in self._progress:
+        with self._cond:
+            run_progress = self._progress.get(video_id)
+            if run_progress is None:
                 return
 
-            run_progress = self._progress[video_id]
-            if stage in run_progress.complete_stages:
-                
-                return
-            run_progress.complete_stages.append(stage)
-            total_percentage = len(
-                run_progress.complete_stages
-            ) / len(ProcessingStage) * 100
-            run_progress.status = total_percentage
+            run_progress.stage_counts[stage] = run_progress.stage_counts.get(stage, 0) + count
+            run_progress.current_stage = stage
+            if stage not in run_progress.complete_stages:
+                run_progress.complete_stages.append(stage)
+                run_progress.status = len(run_progress.complete_stages) / len(ProcessingStage) * 100
+            self._mark_dirty(video_id)
 
-    
     async def stream_progress(self, video_id: str) -> dict | None:
-        with self._lock:
+        """Schedule a publish of `video_id` and return its current state without waiting for delivery."""
+        with self._cond:
             progress_video = self._progress.get(video_id)
             if progress_video is None:
                 return None
-            async with httpx.AsyncClient(base_url=self.base_url) as client:
-                response = await client.post(
-                    self.endpoint.format(video_id=video_id),
-                    json=progress_video.model_dump(mode='json')
-                ) 
-                response.raise_for_status()
-        
-            return response.json()
-    
+            self._mark_dirty(video_id)
+            return progress_video.model_dump(mode='json')
+
+    def finish_video(self, video_id: str, errors: str | None = None) -> None:
+        """Mark a video done (or failed) and queue its final state for guaranteed delivery."""
+        with self._cond:
+            run_progress = self._progress.get(video_id)
+            if run_progress is None:
+                return
+            run_progress.end_time = datetime.now()
+            run_progress.errors = errors
+            if errors is None:
+                run_progress.status = 100.0
+            self._dirty.discard(video_id)
+            self._enqueue_final(run_progress.model_copy(deep=True))
+
+    def record_artifact(self, metadata: ArtifactMetadata) -> None:
+        """Tracker listener: count a persisted artifact against its video."""
+        if metadata.related_video_id is None:
+            return
+        with self._cond:
+            run_progress = self._progress.get(metadata.related_video_id)
+            if run_progress is None:
+                return
+            counts = run_progress.artifact_counts
+            counts[metadata.artifact_type] = counts.get(metadata.artifact_type, 0) + 1
+            self._mark_dirty(metadata.related_video_id)
+
+    def get_progress(self, video_id: str) -> VideoProgress | None:
+        with self._cond:
+            progress = self._progress.get(video_id)
+            return progress.model_copy(deep=True) if progress else None
 
     def clear_video_progress_cache(self):
-        self._progress.clear()
+        with self._cond:
+            self._progress.clear()
+            self._dirty.clear()
+
+    def _mark_dirty(self, video_id: str) -> None:
+        if not self.enabled:
+            return
+        self._dirty.add(video_id)
+        self._ensure_sender()
+        self._cond.notify()
+
+    def _enqueue_final(self, snapshot: VideoProgress) -> None:
+        if not self.enabled:
+            return
+        self._must_deliver.append(snapshot)
+        self._ensure_sender()
+        self._cond.notify()
+
+    def _ensure_sender(self) -> None:
+        if self._sender is None or not self._sender.is_alive():
+            self._closing = False
+            self._sender = Thread(target=self._run_sender, name="progress-sender", daemon=True)
+            self._sender.start()
+
+    def _take_batch(self) -> tuple[list[VideoProgress], list[VideoProgress]] | None:
+        with self._cond:
+            while not self._dirty and not self._must_deliver:
+                if self._closing:
+                    return None
+                self._cond.wait()
+            finals = list(self._must_deliver)
+            self._must_deliver.clear()
+            latest = [self._progress[v].model_copy(deep=True) for v in self._dirty if v in self._progress]
+            self._dirty.clear()
+            return finals, latest
+
+    def _run_sender(self) -> None:
+        with httpx.Client(base_url=self.base_url or "http://localhost", timeout=self.timeout_seconds, transport=self._transport) as client:
+            last_flush = 0.0
+            while True:
+                wait = last_flush + self.flush_interval - time.monotonic()
+                if wait > 0 and not self._closing:
+                    with self._cond:
+                        self._cond.wait_for(lambda: self._closing, timeout=wait)
+                batch = self._take_batch()
+                if batch is None:
+                    return
+                last_flush = time.monotonic()
+                finals, latest = batch
+                for snapshot in finals:
+                    self._publish(snapshot, 'final' if snapshot.end_time else 'started')
+                    self._post(client, snapshot, retries=self.max_retries)
+                for snapshot in latest:
+                    self._publish(snapshot, 'progress')
+                    self._post(client, snapshot, retries=0)
+
+    def _publish(self, progress: VideoProgress, event: str) -> None:
+        if self.event_bus is None:
+            return
+        stage = progress.current_stage.value if progress.current_stage else None
+        self.event_bus.publish(progress.video_id, event, stage=stage, data=progress.model_dump(mode='json'))
+
+    def _post(self, client: httpx.Client, progress: VideoProgress, retries: int) -> bool:
+        if not self.base_url:
+            return True
+        for attempt in range(retries + 1):
+            try:
+                response = client.post(
+                    self.endpoint.format(video_id=progress.video_id),
+                    json=progress.model_dump(mode='json')
+                )
+                response.raise_for_status()
+                self.sent += 1
+                return True
+            except httpx.HTTPError as e:
+                if attempt == retries:
+                    run_logger.warning(f"Dropping progress update for {progress.video_id} after {attempt + 1} attempt(s): {e}")
+                    return False
+                time.sleep(min(0.2 * 2 ** attempt, 5.0))
+        return False
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """Flush pending and final states, then stop the sender."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._sender is not None:
+            self._sender.join(timeout)
+            self._sender = None
 
-            
+    async def aclose(self, timeout: float | None = 10.0) -> None:
+        await asyncio.to_thread(self.close, timeout)
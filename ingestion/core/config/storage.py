@@ -20,6 +20,7 @@ class MinioSettings(BaseSettings):
     access_key: str = Field(default="minioadmin", description="MinIO access key")
     secret_key: str = Field(default="minioadmin", description="MinIO secret key")
     secure: bool = Field(default=False, description="Whether to use HTTPS when contacting MinIO")
+    max_concurrency: int = Field(default=16, ge=1, description="Threads serving the async storage calls (concurrent MinIO requests)")
 
     @computed_field
     @property
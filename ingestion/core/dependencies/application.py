@@ -4,6 +4,9 @@ from core.pipeline.tracker import ArtifactTracker
 from core.storage import StorageClient
 from core.management.cleanup import ArtifactDeleter
 from core.management.status import VideoStatusManager
+from core.management.events import ProgressEventBus
+from core.pipeline.job_queue import JobQueue, JobWorker
+from core.management.reindex import Reindexer
 
 @lru_cache(maxsize=1)
 def get_artifact_tracker(request: Request) -> ArtifactTracker:
@@ -23,4 +26,24 @@ def get_artifact_deleter(request: Request) -> ArtifactDeleter:
 
 @lru_cache(maxsize=1)
 def get_video_status_manager(request: Request) -> VideoStatusManager:
-    return request.app.state.video_status
\ No newline at end of file
+    return request.app.state.video_status
+
+
+@lru_cache(maxsize=1)
+def get_event_bus(request: Request) -> ProgressEventBus:
+    return request.app.state.event_bus
+
+
+@lru_cache(maxsize=1)
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
+
+
+@lru_cache(maxsize=1)
+def get_job_worker(request: Request) -> JobWorker:
+    return request.app.state.job_worker
+
+
+@lru_cache(maxsize=1)
+def get_reindexer(request: Request) -> Reindexer:
+    return request.app.state.reindexer
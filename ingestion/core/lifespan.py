@@ -1,5 +1,6 @@
 from __future__ import annotations
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from typing import AsyncIterator
 
@@ -13,11 +14,17 @@ from core.management.status import VideoStatusManager, VideoStatusInfo
 from core.artifact.persist import ArtifactPersistentVisitor
 from core.clients.base import ClientConfig, MilvusCollectionConfig
 from core.clients.progress_client import ProgressClient
+from core.management.events import ProgressEventBus
 from core.config.logging import configure_logging, logger_config
+from prefect_agent.shared.tracing import configure_tracing
 from core.config.storage import minio_settings, postgre_settings, milvus_settings
 from core.pipeline.tracker import ArtifactTracker
 from core.storage import StorageClient
 from core.management.cleanup import ArtifactDeleter
+from core.pipeline.job_queue import IngestionJob, JobQueue, JobWorker, run_job_in_thread
+from core.pipeline.checkpoint import StageCheckpointStore
+from core.management.reindex import Reindexer
+from core.settings import get_settings
 from core.app_state import AppState
 
 # Task imports
@@ -45,12 +52,35 @@ from core.clients.milvus_client import ImageEmbeddingMilvusClient, TextCaptionEm
 
 from core.management.progress import ProgressTracker
 
+
+def _run_flow_sync(job: IngestionJob) -> dict | None:
+    # The flow blocks on Prefect futures, so it gets its own thread and loop.
+    from flow.video_processing import video_processing_flow
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(
+            video_processing_flow(
+                video_files=[tuple(video) for video in job.payload["videos"]],
+                user_id=job.user_id,
+                run_id=job.job_id,
+            )
+        )
+    finally:
+        loop.close()
+
+
+async def run_ingestion_job(job: IngestionJob) -> dict | None:
+    return await run_job_in_thread(job.job_id, _run_flow_sync, job)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     state = AppState() 
 
     logger.info("🚀 Starting Video Processing Orchestration API...")
     configure_logging(logger_config)
+    configure_tracing("ingestion")
     logger.info("✅ Logging configured")
 
     storage_client = StorageClient(settings=minio_settings)
@@ -58,6 +88,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     tracker = ArtifactTracker(database_url=postgre_settings.database_url)
     await tracker.initialize()
+    await tracker.backfill_stage_counters()
     logger.info("✅ Artifact tracker initialized")
 
     visitor = ArtifactPersistentVisitor(
@@ -248,6 +279,9 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     deleter = ArtifactDeleter(tracker=tracker, storage=storage_client, image_client=image_client, text_cap_client=text_client, text_seg_client=seg_client)
     logger.info("✅ Artifact deleter initialized")
+    image_processing_task.frame_deleter = deleter
+    # Finish deletions interrupted by a previous shutdown without holding up startup.
+    resume_deletions = asyncio.create_task(deleter.resume_pending())
     
 
     video_status = VideoStatusManager(
@@ -263,6 +297,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     app.state.video_status = video_status
 
     state.base_client_config = base_client_config
+    state.stage_checkpoints = StageCheckpointStore(tracker)
     state.video_ingestion_task = video_ingestion_task
     state.autoshot_task = autoshot_task
     state.asr_task = asr_task
@@ -282,13 +317,34 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     state.text_image_caption_milvus_config = text_caption_milvus_collection
     state.text_segment_caption_milvus_config = segment_caption_milvus_collection
 
+    event_bus = ProgressEventBus()
     state.progress_client = ProgressClient(
         base_url="",
-        endpoint=""
+        endpoint="",
+        event_bus=event_bus,
     )
-
-    
-    
+    tracker.add_listener(state.progress_client.record_artifact)
+    app.state.event_bus = event_bus
+    app.state.reindexer = Reindexer(tracker, state.stage_checkpoints, state)
+
+    job_settings = get_settings().jobs
+    job_queue = JobQueue(
+        tracker.engine,
+        max_running=job_settings.max_concurrent_flows,
+        max_running_per_user=job_settings.max_running_per_user,
+    )
+    job_worker = JobWorker(
+        job_queue,
+        run_ingestion_job,
+        concurrency=job_settings.max_concurrent_flows,
+        poll_interval=job_settings.poll_interval_seconds,
+        heartbeat_seconds=job_settings.heartbeat_seconds,
+        stale_after_seconds=job_settings.stale_after_seconds,
+    )
+    await job_worker.start()
+    app.state.job_queue = job_queue
+    app.state.job_worker = job_worker
+    logger.info("✅ Ingestion job worker started")
 
 
     logger.info("✅ All components initialized and stored in app state")
@@ -297,6 +353,9 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     yield
     logger.info("🛑 Shutting down application...")
+    resume_deletions.cancel()
+    await job_worker.stop()
+    await state.progress_client.aclose()
     await tracker.close()
     logger.info("✅ Tracker closed")
     logger.info("👋 Application shutdown complete")
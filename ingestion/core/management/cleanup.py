@@ -1,316 +1,313 @@
+import asyncio
+from dataclasses import dataclass, field
 from typing import Any
-from urllib.parse import urlparse
 
 from pydantic import BaseModel, Field
 from sqlalchemy import select, delete
 from loguru import logger
-from core.clients.base import BaseMilvusClient, MilvusCollectionConfig
-from core.clients import milvus_client as _milvus_clients  
-from core.pipeline.tracker import ArtifactTracker, ArtifactSchema, ArtifactLineageSchema
-from core.storage import StorageClient, StorageError
+from core.clients.base import BaseMilvusClient
+from core.pipeline.tracker import ArtifactTracker, ArtifactSchema, ArtifactLineageSchema, DeletionTombstoneSchema
+from core.pipeline.checkpoint import StageCheckpointSchema
+from core.storage import StorageClient
 from task.common.util import parse_s3_url
 from core.app_state import AppState
 from core.clients.milvus_client import ImageEmbeddingMilvusClient, TextCaptionEmbeddingMilvusClient, SegmentCaptionEmbeddingMilvusClient
+
+WHOLE_VIDEO = "*"
+# Scope of a deletion rooted at chosen artifacts rather than a whole stage.
+SELECTED_ARTIFACTS = "artifacts"
+SQL_CHUNK_SIZE = 1000
+
+
 class DeletionResult(BaseModel):
     """Result of a deletion operation."""
     success: bool
     video_id: str
     metadata: dict[str, Any]
 
+
+@dataclass
+class DeletionPlan:
+    """Everything a deletion touches, collected up front from one lineage query."""
+    video_id: str
+    scope: str
+    artifact_ids: list[str] = field(default_factory=list)
+    objects: dict[str, list[str]] = field(default_factory=dict)
+    milvus_ids: dict[str, list[str]] = field(default_factory=dict)
+
+    def to_json(self) -> dict[str, Any]:
+        return {"artifact_ids": self.artifact_ids, "objects": self.objects, "milvus_ids": self.milvus_ids}
+
+    @classmethod
+    def from_json(cls, video_id: str, scope: str, data: dict[str, Any]) -> "DeletionPlan":
+        return cls(video_id, scope, data["artifact_ids"], data["objects"], data["milvus_ids"])
+
+
 class ArtifactDeleter:
+    """
+    Plans and executes bulk deletions.
+
+    A plan (artifact ids, MinIO keys per bucket, Milvus ids per collection) is
+    collected with one recursive lineage query and saved as a tombstone. MinIO
+    objects are removed with batched DeleteObjects and Milvus rows by id chunks
+    (or by `related_video_id` for a whole video), concurrently; the tracker rows
+    go in one transaction. The tombstone is dropped only when every step
+    succeeded, so `resume_pending` can finish an interrupted or failed delete.
+    """
+
+    # Which Milvus collection holds each artifact type, keyed like `_milvus_clients`.
+    MILVUS_ARTIFACT_TYPES: dict[str, str] = {
+        "ImageEmbeddingArtifact": "image_embedding",
+        "TextCaptionEmbeddingArtifact": "text_caption_embedding",
+        "TextCapSegmentEmbedArtifact": "segment_caption_embedding",
+    }
+
     def __init__(
-            self, 
-            tracker: ArtifactTracker, 
-            storage: StorageClient, 
+            self,
+            tracker: ArtifactTracker,
+            storage: StorageClient,
             image_client: ImageEmbeddingMilvusClient,
             text_cap_client: TextCaptionEmbeddingMilvusClient,
-            text_seg_client: SegmentCaptionEmbeddingMilvusClient,):
-        
+            text_seg_client: SegmentCaptionEmbeddingMilvusClient,
+            object_batch_size: int = 1000,
+            milvus_chunk_size: int = 1000,):
+
         self.tracker = tracker
         self.storage = storage
         self.image_client = image_client
         self.text_cap_client = text_cap_client
         self.text_seg_client =  text_seg_client
+        self.object_batch_size = object_batch_size
+        self.milvus_chunk_size = milvus_chunk_size
         self._state = AppState()
 
+    def _milvus_clients(self) -> dict[str, BaseMilvusClient]:
+        return {
+            "image_embedding": self.image_client,
+            "text_caption_embedding": self.text_cap_client,
+            "segment_caption_embedding": self.text_seg_client,
+        }
+
     async def get_all_descendants(
         self,
         session: Any,
         parent_id: str,
-        visited: set[str] | None = None
     ) -> set[str]:
-        if visited is None:
-            visited = set()
-        
-        if parent_id in visited:
-            return visited
-        
-        visited.add(parent_id)
-
-        query = select(ArtifactSchema.artifact_id).where(
-            ArtifactSchema.parent_artifact_id == parent_id
-        )
-        result = await session.execute(query)
-        child_ids = {row[0] for row in result.all()}
-
-        for child_id in child_ids:
-            descendants = await self.get_all_descendants(
-                session, child_id, visited
-            )
-            visited.update(descendants)
-        
-        return visited
+        tree = ArtifactTracker.descendants_cte([parent_id])
+        result = await session.execute(select(tree.c.artifact_id))
+        return {row[0] for row in result.all()}
+
+    async def plan(self, video_id: str, artifact_type: str = WHOLE_VIDEO, root_ids: list[str] | None = None) -> DeletionPlan | None:
+        """Collect what deleting `video_id` (or one stage of it, or `root_ids`, with descendants) touches; None if the video is unknown."""
+        async with self.tracker.get_session() as session:
+            if await session.get(ArtifactSchema, video_id) is None:
+                return None
+            if root_ids is not None:
+                roots: Any = root_ids
+            elif artifact_type == WHOLE_VIDEO:
+                roots = [video_id]
+            else:
+                video_tree = ArtifactTracker.descendants_cte([video_id], name="video_tree")
+                roots = (
+                    select(ArtifactSchema.artifact_id)
+                    .join(video_tree, ArtifactSchema.artifact_id == video_tree.c.artifact_id)
+                    .where(ArtifactSchema.artifact_type == artifact_type)
+                )
+            tree = ArtifactTracker.descendants_cte(roots)
+            rows = (await session.execute(
+                select(ArtifactSchema.artifact_id, ArtifactSchema.artifact_type, ArtifactSchema.minio_url)
+                .join(tree, ArtifactSchema.artifact_id == tree.c.artifact_id)
+            )).all()
+
+        plan = DeletionPlan(video_id=video_id, scope=artifact_type)
+        for artifact_id, row_type, minio_url in rows:
+            plan.artifact_ids.append(artifact_id)
+            bucket, object_key = parse_s3_url(minio_url)
+            if bucket and object_key:
+                plan.objects.setdefault(bucket, []).append(object_key)
+            collection = self.MILVUS_ARTIFACT_TYPES.get(row_type)
+            if collection:
+                plan.milvus_ids.setdefault(collection, []).append(artifact_id)
+        return plan
 
     async def delete_by_related_video_id(self, related_video_id: str):
-        clients: list[tuple[str, BaseMilvusClient ]] = [
-              ("image_embedding", self.image_client),
-              ("text_caption_embedding", self.text_cap_client),
-              ("segment_caption_embedding", self.text_seg_client),
-        ]
+        return await self._delete_vectors(DeletionPlan(video_id=related_video_id, scope=WHOLE_VIDEO))
+
+    async def _delete_vectors(self, plan: DeletionPlan) -> dict[str, Any]:
         errors: list[str] = []
         per_collection: dict[str, int] = {}
-        total = 0
 
-        for collection_name, client in clients:
+        async def _delete(collection_name: str, client: BaseMilvusClient) -> None:
             try:
+                if client._client is None:
+                    await client.connect()
                 if not await client.has_user_collection():
                     per_collection[collection_name] = 0
-                    continue
-
-                filter_expr = (
-                    f'related_video_id == "{related_video_id}"'
-                )
-                deleted = await client.delete_by_filter(filter_expr)
-                per_collection[collection_name] = deleted
-                total += deleted
-
+                    return
+                if plan.scope == WHOLE_VIDEO:
+                    # One server-side delete also catches vectors whose tracker rows are already gone.
+                    per_collection[collection_name] = await client.delete_by_filter(
+                        f'related_video_id == "{plan.video_id}"'
+                    )
+                else:
+                    per_collection[collection_name] = await client.delete_by_ids(
+                        plan.milvus_ids.get(collection_name, []), chunk_size=self.milvus_chunk_size
+                    )
             except Exception as e:
-                err = f"{client.__name__}: {e}"
+                err = f"{collection_name}: {e}"
                 logger.exception("milvus_dynamic_delete_error", error=str(e))
                 errors.append(err)
-        
-        status_dict = {
+
+        await asyncio.gather(*(_delete(name, client) for name, client in self._milvus_clients().items()))
+        return {
             'success': len(errors) == 0,
-            'related_video_id': related_video_id,
+            'related_video_id': plan.video_id,
             'per_collection_deleted': per_collection,
-            'total_deleted': total,
+            'total_deleted': sum(per_collection.values()),
             'errors': errors
         }
-        return status_dict
-
-    
-    async def delete_video_cascade(self, video_id: str) -> DeletionResult:
-        errors: list[str] = []
-        deleted_artifacts = 0
-        deleted_lineage = 0
-        deleted_minio = 0
-
-        try:
-            async with self.tracker.get_session() as session:
-                # Verify video exists
-                video_query = select(ArtifactSchema).where(
-                    ArtifactSchema.artifact_id == video_id
-                )
-                video_result = await session.execute(video_query)
-                video_artifact = video_result.scalar_one_or_none()
-                
-                if not video_artifact:
-                    raise RuntimeError(
-                        f"Video not found: {video_id}"
-                    )
-
-                all_artifact_ids = await self.get_all_descendants(
-                    session, video_id
-                )
-
-                all_artifact_ids.add(video_id)
-                logger.info(
-                    f"Found {len(all_artifact_ids)} artifacts to delete for video {video_id}"
-                )
 
-                artifacts_query = select(ArtifactSchema).where(
-                    ArtifactSchema.artifact_id.in_(all_artifact_ids)
-                )
-                artifacts_result = await session.execute(artifacts_query)
-                artifacts = artifacts_result.scalars().all()
-
-                for artifact in artifacts:
-                    try:
-                        bucket, object_key = parse_s3_url(artifact.minio_url)
-                        
-                        if self.storage.object_exists(bucket, object_key):
-                            self.storage.client.remove_object(bucket, object_key)
-                            deleted_minio += 1
-                            logger.debug(f"Deleted MinIO object: {artifact.minio_url}")
-                    except StorageError as e:
-                        error_msg = f"Failed to delete MinIO object {artifact.minio_url}: {e}"
-                        logger.warning(error_msg)
-                        errors.append(error_msg)
-                    except Exception as e:
-                        error_msg = f"Unexpected error deleting {artifact.minio_url}: {e}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
-                
-                lineage_delete = delete(ArtifactLineageSchema).where(
-                    (ArtifactLineageSchema.parent_artifact_id.in_(all_artifact_ids)) |
-                    (ArtifactLineageSchema.child_artifact_id.in_(all_artifact_ids))
-                )
-                lineage_result = await session.execute(lineage_delete)
-                deleted_lineage = lineage_result.rowcount or 0
-
-                artifacts_delete = delete(ArtifactSchema).where(
-                    ArtifactSchema.artifact_id.in_(all_artifact_ids)
+    async def _delete_objects(self, plan: DeletionPlan) -> tuple[int, list[str]]:
+        async def _bucket(bucket: str, keys: list[str]) -> list[str]:
+            try:
+                return await asyncio.to_thread(self.storage.remove_objects, bucket, keys, self.object_batch_size)
+            except Exception as e:
+                return [f"{bucket}: {e}"]
+
+        results = await asyncio.gather(*(_bucket(bucket, keys) for bucket, keys in plan.objects.items()))
+        errors = [error for bucket_errors in results for error in bucket_errors]
+        requested = sum(len(set(keys)) for keys in plan.objects.values())
+        return requested - len(errors), errors
+
+    async def _delete_rows(self, plan: DeletionPlan, tombstone_id: str, drop_tombstone: bool) -> tuple[int, int]:
+        deleted_lineage = deleted_artifacts = 0
+        async with self.tracker.get_session() as session:
+            for start in range(0, len(plan.artifact_ids), SQL_CHUNK_SIZE):
+                chunk = plan.artifact_ids[start:start + SQL_CHUNK_SIZE]
+                lineage_result = await session.execute(delete(ArtifactLineageSchema).where(
+                    (ArtifactLineageSchema.parent_artifact_id.in_(chunk)) |
+                    (ArtifactLineageSchema.child_artifact_id.in_(chunk))
+                ))
+                deleted_lineage += lineage_result.rowcount or 0
+            for start in range(0, len(plan.artifact_ids), SQL_CHUNK_SIZE):
+                chunk = plan.artifact_ids[start:start + SQL_CHUNK_SIZE]
+                artifacts_result = await session.execute(
+                    delete(ArtifactSchema).where(ArtifactSchema.artifact_id.in_(chunk))
                 )
-                artifacts_result = await session.execute(artifacts_delete)
-                deleted_artifacts = artifacts_result.rowcount or 0
-
-                await session.commit()
+                deleted_artifacts += artifacts_result.rowcount or 0
+            # Recorded stage outputs may point at what was just deleted. A selected-artifact delete runs inside
+            # an ingestion, whose running checkpoints must survive; downstream stages see their inputs change.
+            if plan.scope != SELECTED_ARTIFACTS:
+                await session.execute(delete(StageCheckpointSchema).where(StageCheckpointSchema.video_id == plan.video_id))
+            if drop_tombstone:
+                await session.execute(delete(DeletionTombstoneSchema).where(DeletionTombstoneSchema.id == tombstone_id))
+            await session.commit()
+        await self.tracker.refresh_stage_counters(plan.video_id)
+        return deleted_lineage, deleted_artifacts
 
+    async def _write_tombstone(self, plan: DeletionPlan) -> str:
+        async with self.tracker.get_session() as session:
+            tombstone = DeletionTombstoneSchema(video_id=plan.video_id, scope=plan.scope, plan=plan.to_json())
+            session.add(tombstone)
+            await session.commit()
+            return tombstone.id
 
-                meta_status = await self.delete_by_related_video_id(related_video_id=video_id)
-                logger.info(
-                    f"Successfully deleted video {video_id}: "
-                    f"{deleted_artifacts} artifacts, "
-                    f"{deleted_lineage} lineage records, "
-                    f"{deleted_minio} MinIO objects"
-                    f"and milvus info: {meta_status}"
-                )
+    async def execute(self, plan: DeletionPlan, tombstone_id: str) -> DeletionResult:
+        (deleted_minio, object_errors), meta_status = await asyncio.gather(
+            self._delete_objects(plan), self._delete_vectors(plan)
+        )
+        errors = object_errors + meta_status['errors']
+        deleted_lineage, deleted_artifacts = await self._delete_rows(plan, tombstone_id, drop_tombstone=not errors)
+        logger.info(
+            f"Deleted {plan.scope} of video {plan.video_id}: "
+            f"{deleted_artifacts} artifacts, {deleted_lineage} lineage records, "
+            f"{deleted_minio} MinIO objects and milvus info: {meta_status}"
+        )
+        if errors:
+            logger.warning(f"Deletion of video {plan.video_id} left a tombstone for retry: {len(errors)} error(s)")
+        return DeletionResult(
+            success=len(errors) == 0,
+            video_id=plan.video_id,
+            metadata={
+                'deleted_artifacts': deleted_artifacts,
+                'deleted_lineage': deleted_lineage,
+                'deleted_minio_objects': deleted_minio,
+                'milvus_delete': meta_status,
+                'errors': errors,
+            }
+        )
 
-                return_metadata = {
-                    'deleted_artifacts': deleted_artifacts,
-                    'deleted_lineage': deleted_lineage,
-                    'deleted_minio_objects': deleted_minio,
-                    'milvus_delete': meta_status,
-                    'errors': errors
-                }
-
-                return DeletionResult(
-                    success=len(errors) == 0,
-                    video_id=video_id,
-                    metadata=return_metadata
-                )
-            
+    async def _delete(self, video_id: str, scope: str) -> DeletionResult:
+        pending = await self._pending_tombstone(video_id, scope)
+        if pending is not None:
+            tombstone_id, plan = pending
+            logger.info(f"Resuming interrupted deletion of {scope} for video {video_id}")
+            return await self.execute(plan, tombstone_id)
+
+        plan = await self.plan(video_id, scope)
+        if plan is None:
+            raise RuntimeError(f"Video not found: {video_id}")
+        if not plan.artifact_ids:
+            logger.info(f"No artifacts of type '{scope}' found for video {video_id}")
+            return DeletionResult(success=True, video_id=video_id, metadata={
+                'deleted_artifacts': 0, 'deleted_lineage': 0, 'deleted_minio_objects': 0, 'errors': []
+            })
+        logger.info(f"Found {len(plan.artifact_ids)} artifacts to delete for video {video_id}")
+        return await self.execute(plan, await self._write_tombstone(plan))
+
+    async def delete_artifacts(self, video_id: str, artifact_ids: list[str]) -> DeletionResult:
+        """Delete these artifacts of `video_id` and everything derived from them, e.g. frames a rerun now drops."""
+        plan = await self.plan(video_id, SELECTED_ARTIFACTS, root_ids=artifact_ids)
+        if plan is None:
+            raise RuntimeError(f"Video not found: {video_id}")
+        if not plan.artifact_ids:
+            return DeletionResult(success=True, video_id=video_id, metadata={
+                'deleted_artifacts': 0, 'deleted_lineage': 0, 'deleted_minio_objects': 0, 'errors': []
+            })
+        return await self.execute(plan, await self._write_tombstone(plan))
+
+    async def _pending_tombstone(self, video_id: str, scope: str) -> tuple[str, DeletionPlan] | None:
+        async with self.tracker.get_session() as session:
+            tombstone = (await session.execute(
+                select(DeletionTombstoneSchema)
+                .where(DeletionTombstoneSchema.video_id == video_id, DeletionTombstoneSchema.scope == scope)
+                .order_by(DeletionTombstoneSchema.created_at)
+                .limit(1)
+            )).scalar_one_or_none()
+        if tombstone is None:
+            return None
+        return tombstone.id, DeletionPlan.from_json(tombstone.video_id, tombstone.scope, tombstone.plan)
+
+    async def resume_pending(self) -> list[DeletionResult]:
+        """Finish every deletion whose tombstone is still present (e.g. after a crash)."""
+        async with self.tracker.get_session() as session:
+            tombstones = (await session.execute(
+                select(DeletionTombstoneSchema).order_by(DeletionTombstoneSchema.created_at)
+            )).scalars().all()
+        results = []
+        for tombstone in tombstones:
+            plan = DeletionPlan.from_json(tombstone.video_id, tombstone.scope, tombstone.plan)
+            results.append(await self.execute(plan, tombstone.id))
+        return results
 
+    async def delete_video_cascade(self, video_id: str) -> DeletionResult:
+        try:
+            return await self._delete(video_id, WHOLE_VIDEO)
         except Exception as e:
             logger.exception(f"Failed to delete video {video_id}: {e}")
             raise RuntimeError(
                 f"Deletion failed: {str(e)}"
             )
-    
 
     async def delete_stage_artifacts(
         self,
-        video_id: str, 
+        video_id: str,
         artifact_type: str
     )->DeletionResult:
-        errors: list[str] = []
-        deleted_artifacts = 0
-        deleted_lineage = 0
-        deleted_minio = 0
-
         try:
-            async with self.tracker.get_session() as session:
-                video_query = select(ArtifactSchema).where(
-                ArtifactSchema.artifact_id == video_id
-            )
-            video_result = await session.execute(video_query)
-            video_artifact = video_result.scalar_one_or_none()
-            
-            if not video_artifact:
-                raise RuntimeError(f"Video not found: {video_id}")
-
-            all_descendants = await self.get_all_descendants(session, video_id)
-            all_descendants.add(video_id)
-
-            stage_query = select(ArtifactSchema).where(
-                ArtifactSchema.artifact_id.in_(all_descendants),
-                ArtifactSchema.artifact_type == artifact_type
-            )
-            stage_result = await session.execute(stage_query)
-            stage_artifacts = stage_result.scalars().all()
-
-            if not stage_artifacts:
-                logger.info(
-                    f"No artifacts of type '{artifact_type}' found for video {video_id}"
-                )
-                return_metadata = {
-                    'deleted_artifacts': 0,
-                    'deleted_lineage': 0,
-                    'deleted_minio_objects': 0,
-                    'errors':[]
-                }
-                return DeletionResult(
-                    success=True,
-                    video_id=video_id,
-                    metadata=return_metadata
-                )
-            
-
-            artifacts_to_delete = set()
-            for artifact in stage_artifacts:
-                descendants = await self.get_all_descendants(
-                    session, artifact.artifact_id
-                )
-                artifacts_to_delete.update(descendants)
-                artifacts_to_delete.add(artifact.artifact_id)
-            
-            artifacts_query = select(ArtifactSchema).where(
-                ArtifactSchema.artifact_id.in_(artifacts_to_delete)
-            )
-            artifacts_result = await session.execute(artifacts_query)
-            artifacts = artifacts_result.scalars().all()
-
-            for artifact in artifacts:
-                try:
-                    bucket, object_key = parse_s3_url(artifact.minio_url)
-                    
-                    if self.storage.object_exists(bucket, object_key):
-                        self.storage.client.remove_object(bucket, object_key)
-                        deleted_minio += 1
-                        logger.debug(f"Deleted MinIO object: {artifact.minio_url}")
-                except StorageError as e:
-                    error_msg = f"Failed to delete MinIO object {artifact.minio_url}: {e}"
-                    logger.warning(error_msg)
-                    errors.append(error_msg)
-                except Exception as e:
-                    error_msg = f"Unexpected error deleting {artifact.minio_url}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-
-            lineage_delete = delete(ArtifactLineageSchema).where(
-                (ArtifactLineageSchema.parent_artifact_id.in_(artifacts_to_delete)) |
-                (ArtifactLineageSchema.child_artifact_id.in_(artifacts_to_delete))
-            )
-            lineage_result = await session.execute(lineage_delete)
-            deleted_lineage = lineage_result.rowcount or 0
-
-            artifacts_delete = delete(ArtifactSchema).where(
-                ArtifactSchema.artifact_id.in_(artifacts_to_delete)
-            )
-            artifacts_result = await session.execute(artifacts_delete)
-            deleted_artifacts = artifacts_result.rowcount or 0
-
-            await session.commit()
-            meta_status = await self.delete_by_related_video_id(related_video_id=video_id)
-            return_metadata = {
-                    'deleted_artifacts': deleted_artifacts,
-                    'deleted_lineage': deleted_lineage,
-                    'deleted_minio_objects': deleted_minio,
-                    'milvus_delete': meta_status,
-                    'errors': errors
-                }
-
-            return DeletionResult(
-                success=len(errors) == 0,
-                video_id=video_id,
-                metadata=return_metadata
-            )
+            return await self._delete(video_id, artifact_type)
         except Exception as e:
             logger.exception(
                 f"Failed to delete stage '{artifact_type}' for video {video_id}: {e}"
             )
             raise RuntimeError(f"Deletion failed: {str(e)}")
-
-
-
-
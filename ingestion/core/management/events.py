@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from typing import Any, AsyncIterator
+
+from pydantic import BaseModel, Field
+
+
+class ProgressEvent(BaseModel):
+    id: int = Field(..., description="Monotonic event id, used as the SSE id / Last-Event-ID")
+    video_id: str
+    event: str = Field(..., description="'started', 'progress', 'final' or 'reset'")
+    stage: str | None = None
+    data: dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    def to_sse(self) -> str:
+        payload = self.model_dump(mode='json')
+        return f"id: {self.id}\nevent: {self.event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    video_id: str | None
+    closed: bool = field(default=False)
+
+
+def parse_last_event_id(value: str | None) -> int | None:
+    if value is None or not value.strip().isdigit():
+        return None
+    return int(value.strip())
+
+
+class ProgressEventBus:
+    """
+    In-process pub/sub for ingestion progress with a bounded replay buffer.
+
+    `publish` may be called from any thread (Prefect tasks run on their own
+    loops); each subscriber gets events on its own loop. The last `capacity`
+    events are kept so a reconnecting client can resume from its
+    Last-Event-ID. A subscriber that falls `queue_size` events behind is
+    disconnected rather than slowing publishers; it resumes by reconnecting.
+    """
+
+    def __init__(self, capacity: int = 2048, queue_size: int = 256):
+        self.capacity = capacity
+        self.queue_size = queue_size
+        self._buffer: deque[ProgressEvent] = deque(maxlen=capacity)
+        self._subscribers: set[_Subscriber] = set()
+        self._next_id = 1
+        self._lock = Lock()
+
+    def publish(self, video_id: str, event: str, stage: str | None = None, data: dict[str, Any] | None = None) -> ProgressEvent:
+        with self._lock:
+            item = ProgressEvent(id=self._next_id, video_id=video_id, event=event, stage=stage, data=data or {})
+            self._next_id += 1
+            self._buffer.append(item)
+            targets = [s for s in self._subscribers if s.video_id in (None, video_id)]
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._offer, subscriber, item)
+            except RuntimeError:
+                # The subscriber's loop is gone.
+                self._drop(subscriber)
+        return item
+
+    def replay(self, after_id: int, video_id: str | None = None) -> list[ProgressEvent]:
+        with self._lock:
+            return self._replay_locked(after_id, video_id)
+
+    def _replay_locked(self, after_id: int, video_id: str | None) -> list[ProgressEvent]:
+        return [e for e in self._buffer if e.id > after_id and video_id in (None, e.video_id)]
+
+    def _offer(self, subscriber: _Subscriber, item: ProgressEvent) -> None:
+        if subscriber.closed:
+            return
+        if subscriber.queue.qsize() >= self.queue_size:
+            subscriber.closed = True
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+            return
+        subscriber.queue.put_nowait(item)
+
+    def _drop(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    async def subscribe(
+        self,
+        video_id: str | None = None,
+        last_event_id: int | None = None,
+        heartbeat: float | None = None,
+    ) -> AsyncIterator[ProgressEvent | None]:
+        """
+        Yield events for `video_id` (all videos if None), first replaying
+        buffered events after `last_event_id`. Yields None every `heartbeat`
+        seconds of silence so callers can keep the connection alive.
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop(), asyncio.Queue(self.queue_size + 1), video_id)
+        with self._lock:
+            # Registering under the publish lock means no event falls between backlog and live.
+            oldest = self._buffer[0].id if self._buffer else self._next_id
+            stale = last_event_id is not None and not (oldest - 1 <= last_event_id < self._next_id)
+            backlog = [] if last_event_id is None else self._replay_locked(0 if stale else last_event_id, video_id)
+            self._subscribers.add(subscriber)
+        try:
+            if stale:
+                # Resume point is outside the buffer: tell the client to refetch full state.
+                yield ProgressEvent(id=max(oldest - 1, 0), video_id=video_id or "", event="reset",
+                                    data={"oldest_available_id": oldest})
+            for item in backlog:
+                yield item
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is None:
+                    return
+                yield item
+        finally:
+            self._drop(subscriber)
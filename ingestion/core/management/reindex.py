@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable
+
+from loguru import logger
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, insert, inspect as sa_inspect, select
+
+from core.clients.base import BaseMilvusClient, BaseServiceClient, model_loaded
+from core.clients.image_embed_client import ImageEmbeddingClient
+from core.clients.llm_client import LLMClient
+from core.clients.milvus_client import (
+    ImageEmbeddingMilvusClient,
+    SegmentCaptionEmbeddingMilvusClient,
+    TextCaptionEmbeddingMilvusClient,
+)
+from core.clients.text_embed_client import TextEmbeddingClient
+from core.pipeline.checkpoint import StageCheckpointSchema, StageCheckpointStore, StageFingerprint, load_outputs, video_id_of
+from core.pipeline.tracker import ArtifactLineageSchema, ArtifactSchema, ArtifactTracker
+from task.llm_segment_caption.main import ShotASRInput
+
+SQL_CHUNK_SIZE = 1000
+
+
+@dataclass
+class _ForgottenRows:
+    """Tracker and checkpoint rows a re-index drops or overwrites, kept until it succeeds."""
+    videos: list[str] = field(default_factory=list)
+    stages: list[str] = field(default_factory=list)
+    artifacts: list[dict[str, Any]] = field(default_factory=list)
+    lineage: list[dict[str, Any]] = field(default_factory=list)
+    checkpoints: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _row_dict(row: Any) -> dict[str, Any]:
+    return {attr.key: getattr(row, attr.key) for attr in sa_inspect(row).mapper.column_attrs}
+
+
+@dataclass(frozen=True)
+class ReindexCollection:
+    """A Milvus collection, served under `config.collection_name` as an alias once re-indexed."""
+    task_attr: str
+    config_attr: str
+    client_cls: type[BaseMilvusClient]
+
+
+@dataclass(frozen=True)
+class ReindexStage:
+    """A model-backed stage whose artifacts record provenance."""
+    artifact_type: str
+    task_attr: str
+    client_cls: type[BaseServiceClient]
+    inputs: tuple[str, ...]
+    build_input: Callable[[list[list[Any]]], Any] = lambda outputs: outputs[0]
+    collection: ReindexCollection | None = None
+
+
+SEGMENT_COLLECTION = ReindexCollection(
+    "text_segment_caption_milvus_task", "text_segment_caption_milvus_config", SegmentCaptionEmbeddingMilvusClient
+)
+TEXT_CAPTION_COLLECTION = ReindexCollection(
+    "text_image_caption_milvus_task", "text_image_caption_milvus_config", TextCaptionEmbeddingMilvusClient
+)
+IMAGE_COLLECTION = ReindexCollection(
+    "image_embedding_milvus_task", "image_embedding_milvus_config", ImageEmbeddingMilvusClient
+)
+
+# Upstream stages first, so a stage's inputs are re-run before it.
+REINDEX_STAGES: tuple[ReindexStage, ...] = (
+    ReindexStage(
+        "SegmentCaptionArtifact", "segment_caption_llm_task", LLMClient, ("asr_task", "autoshot_task"),
+        build_input=lambda outputs: ShotASRInput(list_asrs=outputs[0], lists_autoshots=outputs[1]),
+    ),
+    ReindexStage(
+        "TextCapSegmentEmbedArtifact", "text_caption_segment_embedding_task", TextEmbeddingClient,
+        ("segment_caption_llm_task",), collection=SEGMENT_COLLECTION,
+    ),
+    ReindexStage("ImageCaptionArtifact", "image_caption_llm_task", LLMClient, ("image_processing_task",)),
+    ReindexStage(
+        "TextCaptionEmbeddingArtifact", "text_image_caption_embedding_task", TextEmbeddingClient,
+        ("image_caption_llm_task",), collection=TEXT_CAPTION_COLLECTION,
+    ),
+    ReindexStage(
+        "ImageEmbeddingArtifact", "image_embedding_task", ImageEmbeddingClient,
+        ("image_processing_task",), collection=IMAGE_COLLECTION,
+    ),
+)
+
+
+class StageReindexPlan(BaseModel):
+    artifact_type: str
+    stale_artifacts: int = Field(..., description="Artifacts whose recorded model/config differs from the current one")
+    videos: list[str] = Field(..., description="Videos this stage re-runs for, including those whose inputs are re-run")
+
+
+class ReindexPlan(BaseModel):
+    stages: list[StageReindexPlan]
+    collections: list[str] = Field(..., description="Collections rebuilt into a shadow and swapped in by alias")
+    blocked_videos: dict[str, list[str]] = Field(
+        default_factory=dict,
+        description="Video -> upstream stages with no recorded outputs; re-run the flow for these first",
+    )
+    stale_ids: list[str] = Field(default_factory=list, exclude=True)
+    collection_videos: dict[str, list[str]] = Field(default_factory=dict, exclude=True)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.stages
+
+
+class ReindexBlockedError(Exception):
+    pass
+
+
+class Reindexer:
+    """
+    Re-embeds only what a model or config change made stale.
+
+    `plan` compares the provenance recorded on every caption and embedding
+    artifact with the current task configs and marks the stale ones, plus
+    everything derived from them. `execute` forgets those artifacts, re-runs
+    the affected stages for the affected videos only (inputs come from the
+    upstream stages' checkpoints), fills a shadow Milvus collection from the
+    new embeddings plus the untouched videos' rows, and moves the live alias
+    to it.
+    """
+
+    def __init__(self, tracker: ArtifactTracker, checkpoints: StageCheckpointStore, state: Any):
+        self.tracker = tracker
+        self.checkpoints = checkpoints
+        self.state = state
+        self.running = False
+        self.last_result: dict[str, Any] | None = None
+        self.last_error: str | None = None
+
+    def _task(self, attr: str) -> Any:
+        return getattr(self.state, attr)
+
+    async def _artifacts_by_video(self, artifact_types: list[str]) -> list[tuple[str, str, str, dict | None]]:
+        """(video id, artifact id, type, metadata) of every artifact of these types, in one recursive query."""
+        roots = select(
+            ArtifactSchema.artifact_id.label("artifact_id"), ArtifactSchema.artifact_id.label("video_id")
+        ).where(ArtifactSchema.artifact_type == "VideoArtifact")
+        tree = roots.cte("video_tree", recursive=True)
+        tree = tree.union(
+            select(ArtifactLineageSchema.child_artifact_id, tree.c.video_id).join(
+                tree, ArtifactLineageSchema.parent_artifact_id == tree.c.artifact_id
+            )
+        )
+        query = (
+            select(tree.c.video_id, ArtifactSchema.artifact_id, ArtifactSchema.artifact_type, ArtifactSchema.artifact_metadata)
+            .join(tree, ArtifactSchema.artifact_id == tree.c.artifact_id)
+            .where(ArtifactSchema.artifact_type.in_(artifact_types))
+        )
+        async with self.tracker.get_session() as session:
+            return [tuple(row) for row in (await session.execute(query)).all()]  # type: ignore[misc]
+
+    async def plan(self, assume_legacy_current: bool = False) -> ReindexPlan:
+        """
+        Diff recorded provenance against the current configs.
+
+        Artifacts written before provenance was recorded count as stale
+        unless `assume_legacy_current` is set.
+        """
+        fingerprints = {
+            stage.artifact_type: StageFingerprint.of(self._task(stage.task_attr).config) for stage in REINDEX_STAGES
+        }
+        rows = await self._artifacts_by_video(list(fingerprints))
+
+        stale: dict[str, dict[str, list[str]]] = defaultdict(lambda: defaultdict(list))
+        videos_with: dict[str, set[str]] = defaultdict(set)
+        for video_id, artifact_id, artifact_type, metadata in rows:
+            videos_with[artifact_type].add(video_id)
+            if assume_legacy_current and not (metadata or {}).get("config_hash"):
+                continue
+            if not fingerprints[artifact_type].matches(metadata):
+                stale[artifact_type][video_id].append(artifact_id)
+
+        rerun: dict[str, set[str]] = {}
+        for stage in REINDEX_STAGES:
+            videos = set(stale[stage.artifact_type])
+            for upstream in REINDEX_STAGES:
+                if upstream.task_attr in stage.inputs:
+                    videos |= rerun.get(upstream.artifact_type, set())
+            if videos:
+                rerun[stage.artifact_type] = videos
+
+        blocked: dict[str, set[str]] = defaultdict(set)
+        rerun_attrs = {stage.task_attr: rerun.get(stage.artifact_type, set()) for stage in REINDEX_STAGES}
+        for stage in REINDEX_STAGES:
+            videos = sorted(rerun.get(stage.artifact_type, set()))
+            for input_attr in stage.inputs:
+                needed = [v for v in videos if v not in rerun_attrs.get(input_attr, set())]
+                manifest = await self.checkpoints.load(self._task(input_attr).name, needed)
+                for video_id in needed:
+                    checkpoint = manifest.get(video_id)
+                    if checkpoint is None or checkpoint.outputs is None:
+                        blocked[video_id].add(self._task(input_attr).name)
+
+        stages = [
+            StageReindexPlan(
+                artifact_type=stage.artifact_type,
+                stale_artifacts=sum(len(ids) for ids in stale[stage.artifact_type].values()),
+                videos=sorted(rerun[stage.artifact_type]),
+            )
+            for stage in REINDEX_STAGES if stage.artifact_type in rerun
+        ]
+        collections = {
+            stage.collection.config_attr: sorted(videos_with[stage.artifact_type] | rerun[stage.artifact_type])
+            for stage in REINDEX_STAGES if stage.collection is not None and stage.artifact_type in rerun
+        }
+        return ReindexPlan(
+            stages=stages,
+            collections=[getattr(self.state, attr).collection_name for attr in collections],
+            blocked_videos={video_id: sorted(names) for video_id, names in blocked.items()},
+            stale_ids=[artifact_id for by_video in stale.values() for ids in by_video.values() for artifact_id in ids],
+            collection_videos=collections,
+        )
+
+    async def _forget(self, artifact_ids: list[str], videos: list[str], stages: list[str]) -> "_ForgottenRows":
+        """
+        Drop tracker rows of these artifacts and everything derived from them;
+        objects are overwritten by the re-run. Returns the dropped rows, and
+        the checkpoints of `stages` for `videos` that the re-run replaces, so
+        a failed re-index can put them back (`_restore`).
+        """
+        forgotten = _ForgottenRows(videos=videos, stages=stages)
+        async with self.tracker.get_session() as session:
+            if videos and stages:
+                forgotten.checkpoints = [_row_dict(row) for row in (await session.execute(select(StageCheckpointSchema).where(
+                    StageCheckpointSchema.video_id.in_(videos), StageCheckpointSchema.stage.in_(stages)
+                ))).scalars()]
+            if not artifact_ids:
+                return forgotten
+            ids: list[str] = []
+            for start in range(0, len(artifact_ids), SQL_CHUNK_SIZE):
+                tree = self.tracker.descendants_cte(artifact_ids[start:start + SQL_CHUNK_SIZE])
+                ids.extend(artifact_id for (artifact_id,) in (await session.execute(select(tree.c.artifact_id))).all())
+            ids = list(dict.fromkeys(ids))
+            for start in range(0, len(ids), SQL_CHUNK_SIZE):
+                chunk = ids[start:start + SQL_CHUNK_SIZE]
+                touches = ArtifactLineageSchema.parent_artifact_id.in_(chunk) | ArtifactLineageSchema.child_artifact_id.in_(chunk)
+                forgotten.artifacts.extend(_row_dict(row) for row in (await session.execute(
+                    select(ArtifactSchema).where(ArtifactSchema.artifact_id.in_(chunk))
+                )).scalars())
+                forgotten.lineage.extend(_row_dict(row) for row in (await session.execute(
+                    select(ArtifactLineageSchema).where(touches)
+                )).scalars())
+                await session.execute(delete(ArtifactLineageSchema).where(touches))
+                await session.execute(delete(ArtifactSchema).where(ArtifactSchema.artifact_id.in_(chunk)))
+            await session.commit()
+        forgotten.lineage = list({row["id"]: row for row in forgotten.lineage}.values())
+        await self._refresh_counters(videos)
+        return forgotten
+
+    async def _refresh_counters(self, videos: list[str]) -> None:
+        # Rows are dropped and re-inserted below the tracker's API, which keeps the per-video counters.
+        for video_id in videos:
+            await self.tracker.refresh_stage_counters(video_id)
+
+    async def _restore(self, forgotten: "_ForgottenRows", produced: dict[str, dict[str, list]]) -> None:
+        """Undo a failed re-index: drop what the re-run wrote and put the forgotten rows back."""
+        ids = {row["artifact_id"] for row in forgotten.artifacts}
+        ids |= {output.artifact_id for by_video in produced.values() for outputs in by_video.values() for output in outputs}
+        ids_list = list(ids)
+        async with self.tracker.get_session() as session:
+            for start in range(0, len(ids_list), SQL_CHUNK_SIZE):
+                chunk = ids_list[start:start + SQL_CHUNK_SIZE]
+                await session.execute(delete(ArtifactLineageSchema).where(
+                    ArtifactLineageSchema.parent_artifact_id.in_(chunk) | ArtifactLineageSchema.child_artifact_id.in_(chunk)
+                ))
+                await session.execute(delete(ArtifactSchema).where(ArtifactSchema.artifact_id.in_(chunk)))
+            for start in range(0, len(forgotten.artifacts), SQL_CHUNK_SIZE):
+                await session.execute(insert(ArtifactSchema).values(forgotten.artifacts[start:start + SQL_CHUNK_SIZE]))
+            for start in range(0, len(forgotten.lineage), SQL_CHUNK_SIZE):
+                await session.execute(insert(ArtifactLineageSchema).values(forgotten.lineage[start:start + SQL_CHUNK_SIZE]))
+            # Checkpoints the re-run completed would otherwise restore outputs that are no longer tracked.
+            if forgotten.videos and forgotten.stages:
+                await session.execute(delete(StageCheckpointSchema).where(
+                    StageCheckpointSchema.video_id.in_(forgotten.videos), StageCheckpointSchema.stage.in_(forgotten.stages)
+                ))
+            if forgotten.checkpoints:
+                await session.execute(insert(StageCheckpointSchema).values(forgotten.checkpoints))
+            await session.commit()
+        await self._refresh_counters(forgotten.videos)
+        logger.warning(f"Re-index: restored {len(forgotten.artifacts)} tracker row(s) after a failed run")
+
+    async def _stage_inputs(self, stage: ReindexStage, videos: list[str], produced: dict[str, dict[str, list]]) -> Any:
+        per_input: list[list[Any]] = []
+        for input_attr in stage.inputs:
+            fresh = produced.get(input_attr, {})
+            manifest = await self.checkpoints.load(self._task(input_attr).name, [v for v in videos if v not in fresh])
+            outputs: list[Any] = []
+            for video_id in videos:
+                if video_id in fresh:
+                    outputs.extend(fresh[video_id])
+                else:
+                    outputs.extend(load_outputs(manifest[video_id].outputs or []))
+            per_input.append(outputs)
+        return stage.build_input(per_input)
+
+    async def _run_stage(self, stage: ReindexStage, videos: list[str], produced: dict[str, dict[str, list]]) -> None:
+        task = self._task(stage.task_attr)
+        await self.checkpoints.invalidate(videos, [task.name])
+        input_data = await self._stage_inputs(stage, videos, produced)
+        async with stage.client_cls(config=self.state.base_client_config) as client:  # type: ignore[call-arg]
+            outputs = await task.run(
+                input_data, client, checkpoints=self.checkpoints,
+                prepare=lambda: model_loaded(client, task.config),
+            )
+        by_video: dict[str, list] = defaultdict(list)
+        for output in outputs:
+            by_video[video_id_of(output) or ""].append(output)
+        produced[stage.task_attr] = dict(by_video)
+        logger.info(f"Re-index: {task.name} re-ran for {len(videos)} video(s), {len(outputs)} artifact(s)")
+
+    def _milvus_client(self, collection: ReindexCollection, collection_name: str | None = None) -> BaseMilvusClient:
+        settings = self._task(collection.task_attr).config
+        config = getattr(self.state, collection.config_attr)
+        if collection_name is not None:
+            config = config.model_copy(update={"collection_name": collection_name})
+        return collection.client_cls(
+            config_collection=config, host=settings.host, port=settings.port, user=settings.user,
+            password=settings.password, db_name=settings.db_name, timeout=settings.time_out,
+        )
+
+    async def build_shadow(
+        self,
+        task: Any,
+        live: BaseMilvusClient,
+        shadow: BaseMilvusClient,
+        embeddings: list[Any],
+        copy_videos: list[str],
+    ) -> dict[str, Any]:
+        """Fill `shadow` with `embeddings` plus the live rows of `copy_videos` and verify its row count."""
+        await shadow.drop_collection_if_exists()
+        await shadow.create_collection_if_not_exists()
+        inserted = len(await task.run(embeddings, shadow))
+
+        copied = 0
+        for video_id in copy_videos:
+            async for rows in live.iter_rows(f'related_video_id == "{video_id}"', batch_size=task.config.ingest_batch_size):
+                await shadow.insert_vectors(rows)
+                copied += len(rows)
+
+        # Seal the inserts and count with Strong consistency, so the check sees every row written above.
+        await shadow.flush()
+        actual = await shadow.count_by_filter('id != ""', consistency_level="Strong")
+        if actual != inserted + copied:
+            raise RuntimeError(
+                f"Shadow {shadow.config.collection_name} holds {actual} rows, expected {inserted + copied}; alias not moved"
+            )
+        return {"alias": live.config.collection_name, "collection": shadow.config.collection_name,
+                "inserted": inserted, "copied": copied}
+
+    async def swap_alias(self, shadow: BaseMilvusClient, alias: str, drop_previous: bool = False) -> str | None:
+        """Serve `alias` from `shadow`; returns the collection it served before."""
+        previous = await shadow.point_alias(alias)
+        if drop_previous and previous:
+            await shadow.drop_collection_if_exists(previous)
+        logger.info(f"Re-index: {alias} now serves {shadow.config.collection_name}")
+        return previous
+
+    async def execute(self, plan: ReindexPlan, drop_previous: bool = False) -> dict[str, Any]:
+        if plan.blocked_videos:
+            raise ReindexBlockedError(
+                f"{len(plan.blocked_videos)} video(s) have no recorded upstream outputs; re-run their flow first"
+            )
+        if self.running:
+            raise RuntimeError("A re-index is already running")
+        self.running, self.last_error = True, None
+        try:
+            return await self._execute(plan, drop_previous)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.exception(f"Re-index failed: {e}")
+            raise
+        finally:
+            self.running = False
+
+    async def _execute(self, plan: ReindexPlan, drop_previous: bool) -> dict[str, Any]:
+        started = datetime.now()
+        planned = {stage.artifact_type: stage.videos for stage in plan.stages}
+        videos = sorted({video_id for stage_videos in planned.values() for video_id in stage_videos})
+        stages = [self._task(stage.task_attr).name for stage in REINDEX_STAGES if stage.artifact_type in planned]
+        forgotten = await self._forget(plan.stale_ids, videos, stages)
+
+        produced: dict[str, dict[str, list]] = {}
+        shadows: list[tuple[ReindexCollection, dict[str, Any]]] = []
+        try:
+            for stage in REINDEX_STAGES:
+                if stage.artifact_type in planned:
+                    await self._run_stage(stage, planned[stage.artifact_type], produced)
+
+            # Every shadow is built and verified before any alias moves, so a failure leaves search untouched.
+            for stage in REINDEX_STAGES:
+                collection = stage.collection
+                if collection is None or collection.config_attr not in plan.collection_videos:
+                    continue
+                fresh = produced.get(stage.task_attr, {})
+                embeddings = [e for outputs in fresh.values() for e in outputs]
+                copy_videos = [v for v in plan.collection_videos[collection.config_attr] if v not in fresh]
+                fingerprint = StageFingerprint.of(self._task(stage.task_attr).config)
+                alias = getattr(self.state, collection.config_attr).collection_name
+                shadow_name = f"{alias}__{fingerprint.config_hash[:8]}_{started:%Y%m%d%H%M%S}"
+                async with self._milvus_client(collection) as live, self._milvus_client(collection, shadow_name) as shadow:
+                    shadows.append((collection, await self.build_shadow(
+                        self._task(collection.task_attr), live, shadow, embeddings, copy_videos
+                    )))
+        except Exception:
+            await self._restore(forgotten, produced)
+            raise
+
+        swaps = []
+        for collection, built in shadows:
+            async with self._milvus_client(collection, built["collection"]) as shadow:
+                built["previous"] = await self.swap_alias(shadow, built["alias"], drop_previous)
+            swaps.append(built)
+        await self._refresh_counters(videos)
+
+        self.last_result = {
+            "started_at": started.isoformat(), "finished_at": datetime.now().isoformat(),
+            "forgotten_artifacts": len(forgotten.artifacts), "stages": [stage.artifact_type for stage in plan.stages],
+            "swaps": swaps,
+        }
+        return self.last_result
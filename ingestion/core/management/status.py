@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from enum import Enum
 from typing import Any, Optional, Type
@@ -46,34 +47,15 @@ class VideoStatusManager:
         self,
         session: AsyncSession,
         parent_id: str,
-        visited: dict[str, ArtifactSchema] | None = None,
     ) -> dict[str, ArtifactSchema]:
         """
         Returns a dict mapping artifact_id -> ArtifactSchema object
-        for the root and all descendants.
+        for the root and all descendants, fetched with one recursive query.
         """
-        if visited is None:
-            visited = {}
-
-        if parent_id in visited:
-            return visited
-
-        parent = await session.get(ArtifactSchema, parent_id)
-        if not parent:
-            return visited  
-
-        visited[parent_id] = parent
-
-        query = select(ArtifactSchema).where(
-            ArtifactSchema.parent_artifact_id == parent_id
-        )
+        tree = ArtifactTracker.descendants_cte([parent_id])
+        query = select(ArtifactSchema).join(tree, ArtifactSchema.artifact_id == tree.c.artifact_id)
         result = await session.execute(query)
-        children = result.scalars().all()
-
-        for child in children:
-            await self.get_all_descendants(session, child.artifact_id, visited)
-
-        return visited
+        return {artifact.artifact_id: artifact for artifact in result.scalars().all()}
 
     
     async def milvus_record_info(self, related_video_id: str):
@@ -84,27 +66,22 @@ class VideoStatusManager:
         ]
         errors: list[str] = []
         per_collection: dict[str, int] = {}
-        for collection_name, client in clients:
+        filter_expr = f'related_video_id == "{related_video_id}"'
+
+        async def _count(collection_name: str, client: BaseMilvusClient) -> None:
             try:
+                if client._client is None:
+                    await client.connect()
                 if not await client.has_user_collection():
                     per_collection[collection_name] = 0
-                    continue
-
-                filter_expr = (
-                    f'related_video_id == "{related_video_id}"'
-                )
-                deleted = await client.client.query(
-                    collection_name=collection_name,
-                    filter=filter_expr,
-                    output_fields=['id']
-                )
-                per_collection[collection_name] = len(deleted) if deleted else 0
-                
-
+                    return
+                per_collection[collection_name] = await client.count_by_filter(filter_expr)
             except Exception as e:
-                err = f"{client.__name__}: {e}"
-                logger.exception("milvus_dynamic_delete_error", error=str(e))
+                err = f"{collection_name}: {e}"
+                logger.exception("milvus_count_error", error=str(e))
                 errors.append(err)
+
+        await asyncio.gather(*(_count(name, client) for name, client in clients))
         
         status_dict = {
             'success': len(errors) == 0,
@@ -116,56 +93,35 @@ class VideoStatusManager:
     
     async def get_video_status(self, video_id: str) -> Optional[VideoStatusInfo]:
         async with self.tracker.get_session() as session:
-            video_query = select(ArtifactSchema).where(
-                ArtifactSchema.artifact_id == video_id
-            )
-            result = await session.execute(video_query)
-            video_artifact = result.scalar_one_or_none()
-
+            video_artifact = await session.get(ArtifactSchema, video_id)
             if not video_artifact:
                 return None
-            
-
-            descendent_dict = await self.get_all_descendants(parent_id=video_id, session=session)
-            descendent_results = list(descendent_dict.values()) 
-            _, video_name = parse_s3_url(video_artifact.minio_url)
-            artifact_counts = {}
-            for artifact in descendent_results:
-                artifact_type = artifact.artifact_type
-                artifact_counts[artifact_type] = artifact_counts.get(artifact_type, 0) + 1
-            
-            completed_stages = []
-
-            STAGES: list[Type[BaseArtifact]] = [
-                AutoshotArtifact, ASRArtifact, ImageArtifact, SegmentCaptionArtifact, ImageCaptionArtifact, ImageEmbeddingArtifact, TextCaptionEmbeddingArtifact, TextCapSegmentEmbedArtifact
-            ]
-            for stage in STAGES:
-                if artifact_counts.get(stage.__name__, 0) > 0:
-                    completed_stages.append(stage.__name__)
-            
-            total_stages = len(STAGES)
-            completed_count = len(completed_stages)
-            progress = (completed_count / total_stages) * 100
-
-            latest_update = video_artifact.created_at
-            for artifact in descendent_results:
-                if artifact.created_at > latest_update:
-                    latest_update = artifact.created_at
-            
-
-            milvus_status = await self.milvus_record_info(related_video_id=video_id)
-
-            
-            return VideoStatusInfo(
-                video_id=video_artifact.artifact_id,
-                video_name=video_name,
-                stages_completed=completed_stages,
-                progress_percentage=round(progress, 2),
-                metadata={
-                    "artifact_counts": artifact_counts,
-                    "minio_url": video_artifact.minio_url,
-                    'milvus_info': milvus_status
-                }
-            )
-            
-        
+
+        # Maintained on save; videos ingested before counters existed are backfilled at startup.
+        counters = await self.tracker.get_stage_counters(video_id)
+
+        _, video_name = parse_s3_url(video_artifact.minio_url)
+        artifact_counts = {artifact_type: count for artifact_type, (count, _) in counters.items()}
+
+        STAGES: list[Type[BaseArtifact]] = [
+            AutoshotArtifact, ASRArtifact, ImageArtifact, SegmentCaptionArtifact, ImageCaptionArtifact, ImageEmbeddingArtifact, TextCaptionEmbeddingArtifact, TextCapSegmentEmbedArtifact
+        ]
+        completed_stages = [stage.__name__ for stage in STAGES if artifact_counts.get(stage.__name__, 0) > 0]
+        progress = (len(completed_stages) / len(STAGES)) * 100
+
+        latest_update = max([video_artifact.created_at, *(updated for _, updated in counters.values())])
+
+        milvus_status = await self.milvus_record_info(related_video_id=video_id)
+
+        return VideoStatusInfo(
+            video_id=video_artifact.artifact_id,
+            video_name=video_name,
+            stages_completed=completed_stages,
+            progress_percentage=round(progress, 2),
+            metadata={
+                "artifact_counts": artifact_counts,
+                "minio_url": video_artifact.minio_url,
+                "last_updated": latest_update.isoformat(),
+                'milvus_info': milvus_status
+            }
+        )
@@ -0,0 +1,236 @@
+"""
+Prometheus metrics for the ingestion orchestrator, served on `/metrics`.
+
+The model services have `shared.metrics.ServiceMetrics`; this is the
+orchestrator side: job queue depth, per-stage throughput, service client
+retries, MinIO / Postgres / Milvus latency and cache hit rates. Everything
+goes into one process-wide registry (`ingestion_metrics`), which the
+API handlers and the flow thread both write to.
+
+Series are labeled by stage, service, backend and operation. A `video_id`
+label makes one series per video forever, so per-video stage outputs are
+only recorded with `METRICS_VIDEO_LABELS=true`; the per-video view
+otherwise comes from the traces (`prefect_agent/shared/tracing.py`).
+"""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    GCCollector,
+    Histogram,
+    PlatformCollector,
+    ProcessCollector,
+    generate_latest,
+)
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_REQUEST_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+_STAGE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+class MetricsConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", env_prefix="METRICS_", extra="ignore")
+
+    video_labels: bool = False
+
+
+class _Timer:
+    """Observes the elapsed time into a histogram child; counts an error when the block raises."""
+
+    __slots__ = ("_histogram", "_errors", "_start")
+
+    def __init__(self, histogram: Any, errors: Any):
+        self._histogram = histogram
+        self._errors = errors
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+        if exc_type is not None:
+            self._errors.inc()
+
+
+class IngestionMetrics:
+
+    def __init__(self, registry: CollectorRegistry | None = None, video_labels: bool | None = None):
+        self.registry = registry or CollectorRegistry()
+        self.video_labels = MetricsConfig().video_labels if video_labels is None else video_labels
+        # Bound label children, so a hot-path timer skips `labels()` after the first call.
+        self._children: dict[tuple[str, str], tuple[Any, Any]] = {}
+
+        if registry is None:
+            try:
+                ProcessCollector(registry=self.registry)
+                PlatformCollector(registry=self.registry)
+                GCCollector(registry=self.registry)
+            except Exception:
+                pass
+
+        self.queue_jobs = Gauge(
+            "ingestion_queue_jobs",
+            "Ingestion jobs in the queue by status, refreshed on scrape",
+            ["status"],
+            registry=self.registry,
+        )
+
+        self.worker_running_jobs = Gauge(
+            "ingestion_worker_running_jobs",
+            "Jobs this process is running",
+            registry=self.registry,
+        )
+
+        self.jobs_total = Counter(
+            "ingestion_jobs_total",
+            "Ingestion jobs finished by this process",
+            ["status"],
+            registry=self.registry,
+        )
+
+        self.stage_duration = Histogram(
+            "ingestion_stage_duration_seconds",
+            "Wall time of one run of a pipeline stage",
+            ["stage"],
+            buckets=_STAGE_BUCKETS,
+            registry=self.registry,
+        )
+
+        self.stage_runs = Counter(
+            "ingestion_stage_runs_total",
+            "Pipeline stage runs",
+            ["stage", "status"],
+            registry=self.registry,
+        )
+
+        self.stage_outputs = Counter(
+            "ingestion_stage_outputs_total",
+            "Outputs produced by a pipeline stage",
+            ["stage"],
+            registry=self.registry,
+        )
+
+        self.stage_videos = Counter(
+            "ingestion_stage_videos_total",
+            "Videos through a pipeline stage, processed or restored from a checkpoint",
+            ["stage", "outcome"],
+            registry=self.registry,
+        )
+
+        self.video_stage_outputs = Counter(
+            "ingestion_video_stage_outputs_total",
+            "Outputs produced per video and stage (only with METRICS_VIDEO_LABELS)",
+            ["stage", "video_id"],
+            registry=self.registry,
+        )
+
+        self.client_requests = Counter(
+            "ingestion_client_requests_total",
+            "Requests to the model services",
+            ["service", "endpoint", "status"],
+            registry=self.registry,
+        )
+
+        self.client_duration = Histogram(
+            "ingestion_client_request_duration_seconds",
+            "Model service request duration including retries",
+            ["service", "endpoint"],
+            buckets=_REQUEST_BUCKETS,
+            registry=self.registry,
+        )
+
+        self.client_retries = Counter(
+            "ingestion_client_retries_total",
+            "Model service request attempts after the first",
+            ["service", "endpoint"],
+            registry=self.registry,
+        )
+
+        self.backend_duration = Histogram(
+            "ingestion_backend_operation_duration_seconds",
+            "MinIO, Postgres and Milvus operation latency",
+            ["backend", "operation"],
+            buckets=_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+
+        self.backend_errors = Counter(
+            "ingestion_backend_operation_errors_total",
+            "MinIO, Postgres and Milvus operations that raised",
+            ["backend", "operation"],
+            registry=self.registry,
+        )
+
+        self.cache_lookups = Counter(
+            "ingestion_cache_lookups_total",
+            "Cache lookups: caption cache, stage checkpoints and existing artifacts",
+            ["cache", "result"],
+            registry=self.registry,
+        )
+
+    def timed(self, backend: str, operation: str) -> _Timer:
+        """`with ingestion_metrics.timed("minio", "get_object"):` records latency and errors."""
+        key = (backend, operation)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                self.backend_duration.labels(backend=backend, operation=operation),
+                self.backend_errors.labels(backend=backend, operation=operation),
+            )
+        return _Timer(*children)
+
+    def track_request(self, service: str, endpoint: str, status: str, duration_seconds: float) -> None:
+        self.client_requests.labels(service=service, endpoint=endpoint, status=status).inc()
+        self.client_duration.labels(service=service, endpoint=endpoint).observe(duration_seconds)
+
+    def track_retry(self, service: str, endpoint: str) -> None:
+        self.client_retries.labels(service=service, endpoint=endpoint).inc()
+
+    def track_stage(
+        self,
+        stage: str,
+        duration_seconds: float,
+        status: str,
+        outputs_per_video: dict[str, int],
+        outputs: int,
+        restored: int = 0,
+    ) -> None:
+        self.stage_duration.labels(stage=stage).observe(duration_seconds)
+        self.stage_runs.labels(stage=stage, status=status).inc()
+        self.stage_outputs.labels(stage=stage).inc(outputs)
+        if outputs_per_video:
+            self.stage_videos.labels(stage=stage, outcome="processed").inc(len(outputs_per_video))
+        if restored:
+            self.stage_videos.labels(stage=stage, outcome="restored").inc(restored)
+        if self.video_labels:
+            for video_id, count in outputs_per_video.items():
+                self.video_stage_outputs.labels(stage=stage, video_id=video_id).inc(count)
+
+    def track_cache(self, cache: str, hit: bool, count: int = 1) -> None:
+        if count:
+            self.cache_lookups.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+    def update_queue(self, counts: dict[str, int]) -> None:
+        for status, count in counts.items():
+            self.queue_jobs.labels(status=status).set(count)
+
+    def get_metrics(self) -> bytes:
+        return generate_latest(self.registry)
+
+    def get_content_type(self) -> str:
+        return CONTENT_TYPE_LATEST
+
+
+ingestion_metrics = IngestionMetrics()
+
+
+__all__ = ["IngestionMetrics", "MetricsConfig", "ingestion_metrics"]
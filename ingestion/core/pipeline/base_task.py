@@ -1,10 +1,17 @@
 from __future__ import annotations
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Any, TypeVar, Generic, AsyncIterator, Sequence
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, AsyncContextManager, Callable, Iterator, TypeVar, Generic, AsyncIterator, Sequence
 from loguru import logger
 from pydantic import BaseModel, Field
 from core.artifact.persist import ArtifactPersistentVisitor
 from core.clients.base import BaseServiceClient, BaseMilvusClient
+from core.metrics import ingestion_metrics
+from core.pipeline.checkpoint import StageCheckpointStore, StageFingerprint, load_outputs, video_id_of
+from prefect_agent.shared import tracing
 
 
 
@@ -12,10 +19,33 @@ InputTask = TypeVar('InputTask', bound=BaseModel | Sequence[BaseModel])
 OuputTask = TypeVar('OuputTask', bound=BaseModel)
 TaskConfig = TypeVar('TaskConfig', bound=BaseModel)
 
+class _StageRecorder:
+    """Outputs per video and when the last one was produced, for the stage metrics and per-video spans."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.outputs = 0
+        self.finished: dict[str, tuple[int, int]] = {}
+        self.restored_ids: list[str] = []
+
+    def __call__(self, output: Any) -> Any:
+        self.outputs += 1
+        video_id = video_id_of(output)
+        if video_id is not None:
+            self.finished[video_id] = (self.finished.get(video_id, (0, 0))[0] + 1, time.time_ns())
+        return output
+
+    def restored(self, outputs: dict[str, list[Any]]) -> None:
+        self.restored_ids.extend(outputs)
+
+
 class BaseTask(Generic[InputTask, OuputTask, TaskConfig], ABC):
     """
     This is the base class for ETL pipeline tasks with lifecycle hooks and artifact tracking.
     """
+    # postprocess calls kept in flight at once; stages that upload each output raise it to overlap storage I/O.
+    postprocess_concurrency: int = 1
+
     def __init__(
         self,
         name: str,
@@ -48,7 +78,177 @@ class BaseTask(Generic[InputTask, OuputTask, TaskConfig], ABC):
         """
         raise NotImplementedError
 
-    
+    def provenance(self) -> dict[str, Any]:
+        """Model name/version and output config hash, recorded on the artifacts this task produces."""
+        return StageFingerprint.of(self.config).provenance(getattr(self.config, "model_name", None))
+
+    def input_video_ids(self, input_data: InputTask) -> list[str]:
+        """Source videos of the input, in order; empty disables checkpointing for the call."""
+        if not isinstance(input_data, list):
+            return []
+        ids = [video_id_of(item) for item in input_data]
+        if any(video_id is None for video_id in ids):
+            return []
+        return list(dict.fromkeys(ids))  # type: ignore[arg-type]
+
+    async def postprocessed(self, results: AsyncIterator[Any]) -> AsyncIterator[OuputTask]:
+        """
+        `postprocess` over `results` in their order, with up to
+        `postprocess_concurrency` calls running while `execute` produces the
+        next results.
+        """
+        if self.postprocess_concurrency <= 1:
+            async for result in results:
+                yield await self.postprocess(result)
+            return
+
+        window: deque[asyncio.Future[OuputTask]] = deque()
+        try:
+            async for result in results:
+                window.append(asyncio.ensure_future(self.postprocess(result)))
+                if len(window) >= self.postprocess_concurrency:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+        finally:
+            for pending in window:
+                pending.cancel()
+            await asyncio.gather(*window, return_exceptions=True)
+
+    def select_inputs(self, input_data: InputTask, video_ids: set[str]) -> InputTask:
+        """The part of the input belonging to `video_ids`."""
+        return [item for item in input_data if video_id_of(item) in video_ids]  # type: ignore[union-attr, return-value]
+
+    def inputs_by_video(self, input_data: InputTask) -> dict[str, list[Any]]:
+        """The input artifacts of each video, which key that video's checkpoint."""
+        grouped: dict[str, list[Any]] = {}
+        for item in input_data:  # type: ignore[union-attr]
+            grouped.setdefault(video_id_of(item), []).append(item)  # type: ignore[arg-type]
+        return grouped
+
+    async def run(
+        self,
+        input_data: InputTask,
+        client: BaseServiceClient | BaseMilvusClient | None = None,
+        checkpoints: StageCheckpointStore | None = None,
+        checkpoint_every: int = 200,
+        prepare: Callable[[], AsyncContextManager[Any]] | None = None,
+    ) -> list[OuputTask]:
+        """
+        preprocess -> execute -> postprocess over the input.
+
+        With `checkpoints`, videos whose stage already completed under the
+        same config and model, from the same input artifacts, are not re-run;
+        their recorded outputs are returned instead. Videos interrupted mid-stage resume with their
+        committed artifacts preloaded, and progress is recorded every
+        `checkpoint_every` outputs. The manifest for every processed video
+        is written in one transaction once the stage ends. `prepare` (e.g.
+        loading the model) is entered only when there is work left.
+        """
+        traced_ids = self.input_video_ids(input_data)
+        video_ids = traced_ids if checkpoints is not None else []
+        with self.traced_stage(traced_ids) as record:
+            if not video_ids:
+                async with prepare() if prepare else nullcontext():
+                    with tracing.span("stage.preprocess"):
+                        preprocessed = await self.preprocess(input_data)
+                    outputs = []
+                    with tracing.span("stage.execute") as execute:
+                        async for output in self.postprocessed(self.execute(preprocessed, client)):
+                            outputs.append(record(output))
+                        execute.set_attribute("outputs", len(outputs))
+                    return outputs
+            assert checkpoints is not None
+
+            stage_fingerprint = StageFingerprint.of(self.config)
+            inputs_by_video = self.inputs_by_video(input_data)
+            fingerprints = {
+                video_id: stage_fingerprint.with_inputs(inputs_by_video.get(video_id, [])) for video_id in video_ids
+            }
+            with tracing.span("stage.checkpoint_load"):
+                manifest = await checkpoints.load(self.name, video_ids)
+            restored: dict[str, list[OuputTask]] = {
+                video_id: load_outputs(checkpoint.outputs or [])  # type: ignore[misc]
+                for video_id, checkpoint in manifest.items()
+                if checkpoint.is_complete_for(fingerprints[video_id])
+            }
+            pending = [video_id for video_id in video_ids if video_id not in restored]
+            if restored:
+                logger.info(f"{self.name}: skipping {len(restored)} completed video(s)")
+            record.restored(restored)
+            ingestion_metrics.track_cache("stage_checkpoint", True, len(restored))
+            ingestion_metrics.track_cache("stage_checkpoint", False, len(pending))
+
+            produced: dict[str, list[OuputTask]] = {video_id: [] for video_id in pending}
+            if pending:
+                resumed = [video_id for video_id in pending if video_id in manifest]
+                committed = await checkpoints.committed_artifact_ids(resumed) if resumed else {}
+                if resumed:
+                    logger.info(f"{self.name}: resuming {len(resumed)} partially processed video(s)")
+                # Mark new videos as started so a crash before the first progress record still resumes cheaply.
+                await checkpoints.record_progress(
+                    self.name, {video_id: 0 for video_id in pending if video_id not in manifest}, fingerprints
+                )
+
+                since_checkpoint = 0
+                async with prepare() if prepare else nullcontext():
+                    with self.visitor.assume_committed(committed):
+                        with tracing.span("stage.preprocess"):
+                            preprocessed = await self.preprocess(self.select_inputs(input_data, set(pending)))
+                        with tracing.span("stage.execute") as execute:
+                            async for output in self.postprocessed(self.execute(preprocessed, client)):
+                                record(output)
+                                produced.setdefault(video_id_of(output) or "", []).append(output)
+                                since_checkpoint += 1
+                                if since_checkpoint >= checkpoint_every:
+                                    since_checkpoint = 0
+                                    await checkpoints.record_progress(
+                                        self.name, {v: len(outs) for v, outs in produced.items() if v in pending}, fingerprints
+                                    )
+                            execute.set_attribute("outputs", sum(len(outs) for outs in produced.values()))
+                with tracing.span("stage.checkpoint_complete"):
+                    await checkpoints.complete(
+                        self.name, {v: outs for v, outs in produced.items() if v in pending}, fingerprints
+                    )
+
+            ordered = [output for video_id in video_ids for output in (restored.get(video_id) or produced.get(video_id, []))]
+            return ordered + produced.get("", [])
+
+    @contextmanager
+    def traced_stage(self, video_ids: list[str]) -> Iterator[_StageRecorder]:
+        """
+        Span for one run of this stage. With one input video it lives in that
+        video's trace. Otherwise it gets a trace of its own, and when it ends
+        every video it produced for gets a `stage.<name>` span in its own
+        trace, lasting until that video's last output and linked to this one.
+        The run is also recorded in the stage metrics (`core/metrics.py`).
+        """
+        start = time.perf_counter()
+        status = "error"
+        with tracing.span(
+            f"stage.{self.name}", video_id=video_ids[0] if len(video_ids) == 1 else None,
+            task=self.name, videos=len(video_ids),
+        ) as stage:
+            recorder = _StageRecorder(enabled=tracing.tracing_enabled())
+            try:
+                yield recorder
+                status = "success"
+            finally:
+                ingestion_metrics.track_stage(
+                    self.name, time.perf_counter() - start, status,
+                    {video_id: count for video_id, (count, _) in recorder.finished.items()},
+                    recorder.outputs, restored=len(recorder.restored_ids),
+                )
+            stage.set_attribute("restored_videos", len(recorder.restored_ids) or None)
+        if not recorder.enabled or len(video_ids) == 1:
+            return
+        for video_id, (count, last_ns) in recorder.finished.items():
+            tracing.emit(f"stage.{self.name}", stage.start_ns, last_ns, video_id=video_id, links=[stage.context],
+                         task=self.name, outputs=count)
+        for video_id in recorder.restored_ids:
+            tracing.emit(f"stage.{self.name}", stage.start_ns, stage.start_ns, video_id=video_id,
+                         links=[stage.context], task=self.name, restored=True)
+
     # @staticmethod
     # @abstractmethod
     # async def on_failure_batch(state: State, task_run: TaskRun, parameters: dict[str, Any]) -> None:
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Iterable, Mapping, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import JSON, DateTime, Integer, String, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.artifact import schema as artifact_schema
+from core.pipeline.tracker import ArtifactSchema, ArtifactTracker, Base
+
+RUNNING = "running"
+COMPLETED = "completed"
+
+# Settings that change how a stage runs but not what it produces; left out of the config hash.
+RUNTIME_CONFIG_FIELDS = frozenset({
+    "device", "batch_size", "max_concurrency", "caption_batch_size",
+    "cache_enabled", "cache_max_distance", "cache_database_url",
+    "host", "port", "user", "password", "time_out", "ingest_batch_size",
+})
+
+
+class StageCheckpointSchema(Base):
+    """One row per (video, stage): how far the stage got and, once completed, what it produced."""
+    __tablename__ = "stage_checkpoint_application"
+
+    video_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    stage: Mapped[str] = mapped_column(String(128), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    artifact_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    config_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    model_version: Mapped[Optional[str]] = mapped_column(String(256), nullable=True)
+    input_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    outputs: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+
+def input_digest(items: Iterable[Any]) -> str:
+    """Order-independent digest of the artifacts a stage was given for one video."""
+    keys = sorted(
+        getattr(item, "artifact_id", None) or json.dumps(item.model_dump(mode="json"), sort_keys=True)
+        for item in items
+    )
+    return hashlib.sha256("\n".join(keys).encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class StageFingerprint:
+    """
+    What a stage's output for a video depends on: its output config, its
+    model and, per video, the input artifacts it was given. The input part
+    makes a downstream stage re-run when an upstream stage produced
+    different artifacts; artifacts record only the config and model part.
+    """
+    config_hash: str
+    model_version: str | None
+    input_hash: str | None = None
+
+    @classmethod
+    def of(cls, config: BaseModel) -> "StageFingerprint":
+        output_config = config.model_dump(mode="json", exclude=set(RUNTIME_CONFIG_FIELDS))
+        digest = hashlib.sha256(json.dumps(output_config, sort_keys=True).encode()).hexdigest()
+        model_version = getattr(config, "model_version", None) or getattr(config, "model_name", None)
+        return cls(config_hash=digest, model_version=model_version)
+
+    def with_inputs(self, items: Iterable[Any]) -> "StageFingerprint":
+        return replace(self, input_hash=input_digest(items))
+
+    def provenance(self, model_name: str | None = None) -> dict[str, Any]:
+        """What an artifact records about the model and config that produced it."""
+        return {"model_name": model_name, "model_version": self.model_version, "config_hash": self.config_hash}
+
+    def matches(self, provenance: dict[str, Any] | None) -> bool:
+        provenance = provenance or {}
+        return (provenance.get("config_hash"), provenance.get("model_version")) == (self.config_hash, self.model_version)
+
+
+@dataclass
+class StageCheckpoint:
+    video_id: str
+    stage: str
+    status: str
+    artifact_count: int
+    fingerprint: StageFingerprint
+    outputs: list[dict[str, Any]] | None = None
+
+    def is_complete_for(self, fingerprint: StageFingerprint) -> bool:
+        return self.status == COMPLETED and self.fingerprint == fingerprint and self.outputs is not None
+
+
+def video_id_of(item: Any) -> str | None:
+    """The source video of an artifact (a video artifact is its own source)."""
+    if isinstance(item, artifact_schema.VideoArtifact):
+        return item.artifact_id
+    return getattr(item, "related_video_id", None)
+
+
+def dump_outputs(outputs: Iterable[BaseModel]) -> list[dict[str, Any]]:
+    return [{"type": type(output).__name__, "data": output.model_dump(mode="json")} for output in outputs]
+
+
+def load_outputs(dumped: list[dict[str, Any]]) -> list[BaseModel]:
+    return [getattr(artifact_schema, entry["type"]).model_validate(entry["data"]) for entry in dumped]
+
+
+def _fingerprint_columns(fingerprint: StageFingerprint | Mapping[str, StageFingerprint], video_id: str) -> dict[str, Any]:
+    """`fingerprint` is either shared by all videos or given per video."""
+    if isinstance(fingerprint, Mapping):
+        fingerprint = fingerprint[video_id]
+    return dict(config_hash=fingerprint.config_hash, model_version=fingerprint.model_version,
+                input_hash=fingerprint.input_hash)
+
+
+class StageCheckpointStore:
+    """
+    Per-video stage manifest on the tracker database.
+
+    A stage that completed for a video with the same config hash, model
+    version and input artifacts is skipped outright on restart and its recorded outputs are fed
+    downstream. A stage that was interrupted resumes with the video's
+    committed artifact ids preloaded in one lineage query, so existence
+    checks for work already done cost nothing.
+    """
+
+    def __init__(self, tracker: ArtifactTracker):
+        self.tracker = tracker
+
+    async def load(self, stage: str, video_ids: list[str]) -> dict[str, StageCheckpoint]:
+        if not video_ids:
+            return {}
+        query = select(StageCheckpointSchema).where(
+            StageCheckpointSchema.stage == stage, StageCheckpointSchema.video_id.in_(video_ids)
+        )
+        async with self.tracker.get_session() as session:
+            rows = (await session.execute(query)).scalars().all()
+        return {
+            row.video_id: StageCheckpoint(
+                video_id=row.video_id, stage=row.stage, status=row.status, artifact_count=row.artifact_count,
+                fingerprint=StageFingerprint(row.config_hash, row.model_version, row.input_hash), outputs=row.outputs,
+            )
+            for row in rows
+        }
+
+    async def committed_artifact_ids(self, video_ids: list[str]) -> dict[str, set[str]]:
+        """
+        video id -> ids of the committed artifacts to treat as existing. One
+        lineage query covers all videos; artifact ids are unique across
+        videos, so every video shares the resulting set.
+        """
+        if not video_ids:
+            return {}
+        tree = self.tracker.descendants_cte(video_ids)
+        async with self.tracker.get_session() as session:
+            rows = await session.execute(
+                select(ArtifactSchema.artifact_id).join(tree, ArtifactSchema.artifact_id == tree.c.artifact_id)
+            )
+        committed = {artifact_id for (artifact_id,) in rows.all()}
+        return {video_id: committed for video_id in video_ids}
+
+    def _upsert(self, rows: list[dict[str, Any]]):
+        dialect = postgresql if self.tracker.engine.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(StageCheckpointSchema).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[StageCheckpointSchema.video_id, StageCheckpointSchema.stage],
+            set_={
+                column: getattr(stmt.excluded, column)
+                for column in ("status", "artifact_count", "config_hash", "model_version", "input_hash", "outputs", "updated_at")
+            },
+        )
+
+    async def record_progress(
+        self, stage: str, counts: dict[str, int], fingerprint: StageFingerprint | Mapping[str, StageFingerprint]
+    ) -> None:
+        """Mark the stage running for each video with the number of artifacts committed so far."""
+        if not counts:
+            return
+        now = datetime.now()
+        rows = [
+            dict(video_id=video_id, stage=stage, status=RUNNING, artifact_count=count,
+                 **_fingerprint_columns(fingerprint, video_id), outputs=None, updated_at=now)
+            for video_id, count in counts.items()
+        ]
+        async with self.tracker.get_session() as session:
+            await session.execute(self._upsert(rows))
+            await session.commit()
+
+    async def complete(
+        self, stage: str, outputs: dict[str, list[BaseModel]], fingerprint: StageFingerprint | Mapping[str, StageFingerprint]
+    ) -> None:
+        """Record the stage as completed for every video in `outputs`, in one transaction."""
+        if not outputs:
+            return
+        now = datetime.now()
+        rows = [
+            dict(video_id=video_id, stage=stage, status=COMPLETED, artifact_count=len(produced),
+                 **_fingerprint_columns(fingerprint, video_id), outputs=dump_outputs(produced), updated_at=now)
+            for video_id, produced in outputs.items()
+        ]
+        async with self.tracker.get_session() as session:
+            await session.execute(self._upsert(rows))
+            await session.commit()
+
+    async def invalidate(self, video_ids: list[str], stages: list[str] | None = None) -> None:
+        """Forget the checkpoints of `stages` (all stages by default) for these videos."""
+        if not video_ids:
+            return
+        query = delete(StageCheckpointSchema).where(StageCheckpointSchema.video_id.in_(video_ids))
+        if stages is not None:
+            query = query.where(StageCheckpointSchema.stage.in_(stages))
+        async with self.tracker.get_session() as session:
+            await session.execute(query)
+            await session.commit()
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import suppress
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+from uuid import uuid4
+
+from pydantic import BaseModel
+from sqlalchemy import JSON, Boolean, DateTime, Index, Integer, String, Text, false, func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.config.logging import run_logger
+from core.metrics import ingestion_metrics
+from core.pipeline.tracker import Base
+
+
+R = TypeVar("R")
+
+# Key of the Postgres advisory lock that serializes admission in `JobQueue.claim`.
+ADMISSION_LOCK_KEY = 0x696E6A6F62  # "injob"
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its cancellation was requested (see `raise_if_cancelled`)."""
+
+
+_cancel_requested: set[str] = set()
+_cancel_lock = threading.Lock()
+
+
+def request_cancel(job_id: str) -> None:
+    with _cancel_lock:
+        _cancel_requested.add(job_id)
+
+
+def clear_cancel(job_id: str) -> None:
+    with _cancel_lock:
+        _cancel_requested.discard(job_id)
+
+
+def raise_if_cancelled(job_id: str) -> None:
+    """Stop a job's blocking work at a safe point (e.g. between flow stages) once it was cancelled."""
+    if job_id in _cancel_requested:
+        raise JobCancelled(job_id)
+
+
+async def run_job_in_thread(job_id: str, func: Callable[..., R], *args: Any) -> R:
+    """
+    Run a job's blocking work in a thread. A thread cannot be interrupted,
+    so when the job is cancelled the work is asked to stop at its next
+    `raise_if_cancelled` check and this keeps waiting until the thread has
+    exited; only then does the job release its worker slot.
+    """
+    work = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(work)
+    except asyncio.CancelledError:
+        request_cancel(job_id)
+        with suppress(Exception):
+            await work
+        raise
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class IngestionJobSchema(Base):
+    __tablename__ = "ingestion_job_application"
+
+    job_id: Mapped[str] = mapped_column(String(64), primary_key=True, default=lambda: uuid4().hex)
+    user_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=JobStatus.QUEUED.value)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    worker_id: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_ingestion_job_status_user", "status", "user_id"),
+        Index("ix_ingestion_job_queue_order", "status", "priority", "created_at"),
+    )
+
+
+class IngestionJob(BaseModel):
+    job_id: str
+    user_id: str
+    payload: dict[str, Any]
+    priority: int = 0
+    status: JobStatus
+    cancel_requested: bool = False
+    attempts: int = 0
+    error: str | None = None
+    worker_id: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @classmethod
+    def from_row(cls, row: IngestionJobSchema) -> "IngestionJob":
+        return cls(
+            job_id=row.job_id, user_id=row.user_id, payload=row.payload, priority=row.priority,
+            status=JobStatus(row.status), cancel_requested=row.cancel_requested, attempts=row.attempts,
+            error=row.error, worker_id=row.worker_id, created_at=row.created_at,
+            started_at=row.started_at, finished_at=row.finished_at,
+        )
+
+
+class JobQueue:
+    """
+    Durable ingestion job queue on the tracker database.
+
+    `claim` picks, under `SELECT ... FOR UPDATE SKIP LOCKED`, the queued job
+    whose user has the fewest running jobs (fair share), then the highest
+    priority, then the oldest, and only while fewer than `max_running` jobs
+    run in total. Several workers (processes) can claim concurrently.
+
+    Admission is serialized so both caps hold under concurrent claims: the
+    claiming transaction takes a transaction-scoped advisory lock on
+    Postgres, or SQLite's database write lock, before counting running jobs.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_running: int = 2, max_running_per_user: int | None = None):
+        self.engine = engine
+        self.max_running = max_running
+        self.max_running_per_user = max_running_per_user
+        self._sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def enqueue(self, user_id: str, payload: dict[str, Any], priority: int = 0) -> IngestionJob:
+        async with self._sessionmaker() as session:
+            row = IngestionJobSchema(user_id=user_id, payload=payload, priority=priority, created_at=datetime.now())
+            session.add(row)
+            await session.commit()
+            return IngestionJob.from_row(row)
+
+    async def get(self, job_id: str) -> IngestionJob | None:
+        async with self._sessionmaker() as session:
+            row = await session.get(IngestionJobSchema, job_id)
+            return IngestionJob.from_row(row) if row else None
+
+    async def list_jobs(self, user_id: str | None = None, limit: int = 100) -> list[IngestionJob]:
+        query = select(IngestionJobSchema).order_by(IngestionJobSchema.created_at.desc()).limit(limit)
+        if user_id is not None:
+            query = query.where(IngestionJobSchema.user_id == user_id)
+        async with self._sessionmaker() as session:
+            return [IngestionJob.from_row(row) for row in (await session.execute(query)).scalars().all()]
+
+    async def status_counts(self) -> dict[str, int]:
+        """Number of jobs per status, zero for statuses with none (queue depth for `/metrics`)."""
+        query = select(IngestionJobSchema.status, func.count()).group_by(IngestionJobSchema.status)
+        async with self._sessionmaker() as session:
+            rows = (await session.execute(query)).all()
+        return {status.value: 0 for status in JobStatus} | {status: count for status, count in rows}
+
+    async def claim(self, worker_id: str) -> IngestionJob | None:
+        async with self._sessionmaker() as session, session.begin():
+            if self.engine.dialect.name == "postgresql":
+                await session.execute(select(func.pg_advisory_xact_lock(ADMISSION_LOCK_KEY)))
+            elif self.engine.dialect.name == "sqlite":
+                # pysqlite only opens the transaction at the first write, so take the write lock before counting.
+                await session.execute(
+                    update(IngestionJobSchema).where(false()).values(status=IngestionJobSchema.status)
+                )
+            running_total = await session.scalar(
+                select(func.count()).where(IngestionJobSchema.status == JobStatus.RUNNING.value)
+            )
+            if running_total >= self.max_running:
+                return None
+
+            running = (
+                select(IngestionJobSchema.user_id, func.count().label("n"))
+                .where(IngestionJobSchema.status == JobStatus.RUNNING.value)
+                .group_by(IngestionJobSchema.user_id)
+                .subquery()
+            )
+            user_running = func.coalesce(running.c.n, 0)
+            query = (
+                select(IngestionJobSchema)
+                .outerjoin(running, running.c.user_id == IngestionJobSchema.user_id)
+                .where(IngestionJobSchema.status == JobStatus.QUEUED.value)
+                .order_by(user_running, IngestionJobSchema.priority.desc(), IngestionJobSchema.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True, of=IngestionJobSchema)
+            )
+            if self.max_running_per_user is not None:
+                query = query.where(user_running < self.max_running_per_user)
+
+            row = (await session.execute(query)).scalar_one_or_none()
+            if row is None:
+                return None
+            now = datetime.now()
+            row.status = JobStatus.RUNNING.value
+            row.worker_id = worker_id
+            row.attempts += 1
+            row.started_at = now
+            row.heartbeat_at = now
+            return IngestionJob.from_row(row)
+
+    async def heartbeat(self, job_ids: list[str]) -> set[str]:
+        """Refresh running jobs' heartbeats; returns the ids whose cancellation was requested."""
+        if not job_ids:
+            return set()
+        async with self._sessionmaker() as session, session.begin():
+            await session.execute(
+                update(IngestionJobSchema)
+                .where(IngestionJobSchema.job_id.in_(job_ids), IngestionJobSchema.status == JobStatus.RUNNING.value)
+                .values(heartbeat_at=datetime.now())
+            )
+            rows = await session.execute(
+                select(IngestionJobSchema.job_id)
+                .where(IngestionJobSchema.job_id.in_(job_ids), IngestionJobSchema.cancel_requested.is_(True))
+            )
+            return {job_id for (job_id,) in rows.all()}
+
+    async def finish(self, job_id: str, status: JobStatus, error: str | None = None) -> None:
+        async with self._sessionmaker() as session, session.begin():
+            await session.execute(
+                update(IngestionJobSchema)
+                .where(IngestionJobSchema.job_id == job_id)
+                .values(status=status.value, error=error, finished_at=datetime.now())
+            )
+
+    async def cancel(self, job_id: str) -> IngestionJob | None:
+        """Cancel a queued job now; a running job is flagged and stopped by its worker."""
+        async with self._sessionmaker() as session, session.begin():
+            row = await session.get(IngestionJobSchema, job_id, with_for_update=True)
+            if row is None:
+                return None
+            if row.status == JobStatus.QUEUED.value:
+                row.status = JobStatus.CANCELLED.value
+                row.finished_at = datetime.now()
+            elif row.status == JobStatus.RUNNING.value:
+                row.cancel_requested = True
+            return IngestionJob.from_row(row)
+
+    async def requeue_stale(self, older_than: timedelta) -> int:
+        """Put running jobs whose worker stopped heartbeating back in the queue."""
+        async with self._sessionmaker() as session, session.begin():
+            result = await session.execute(
+                update(IngestionJobSchema)
+                .where(
+                    IngestionJobSchema.status == JobStatus.RUNNING.value,
+                    IngestionJobSchema.heartbeat_at < datetime.now() - older_than,
+                )
+                .values(status=JobStatus.QUEUED.value, worker_id=None)
+            )
+            return result.rowcount or 0
+
+
+class JobWorker:
+    """
+    Claims jobs from a `JobQueue` and runs them with at most `concurrency` in flight.
+
+    Running jobs are heartbeated every `heartbeat_seconds`; a job whose
+    cancellation was requested is flagged (`raise_if_cancelled`) and has its
+    task cancelled. On start and on every heartbeat, jobs whose heartbeat is
+    older than `stale_after_seconds` (their worker died) are re-queued. A `runner` that runs blocking work in a thread should
+    keep waiting for that thread after being cancelled, so the job holds its
+    slot until the work has actually stopped (see `run_job_in_thread`).
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        runner: Callable[[IngestionJob], Awaitable[Any]],
+        concurrency: int = 2,
+        poll_interval: float = 2.0,
+        heartbeat_seconds: float = 10.0,
+        stale_after_seconds: float = 300.0,
+        worker_id: str | None = None,
+    ):
+        self.queue = queue
+        self.runner = runner
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after = timedelta(seconds=stale_after_seconds)
+        self.worker_id = worker_id or f"worker-{uuid4().hex[:8]}"
+        self._running: dict[str, asyncio.Task] = {}
+        self._cancelled: set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._loops: list[asyncio.Task] = []
+
+    def notify(self) -> None:
+        """Wake the claim loop early, e.g. right after an enqueue."""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        await self._requeue_stale()
+        self._loops = [asyncio.create_task(self._claim_loop()), asyncio.create_task(self._heartbeat_loop())]
+
+    async def stop(self) -> None:
+        for task in [*self._loops, *self._running.values()]:
+            task.cancel()
+        await asyncio.gather(*self._loops, *self._running.values(), return_exceptions=True)
+
+    async def _claim_loop(self) -> None:
+        while True:
+            claimed = False
+            while len(self._running) < self.concurrency:
+                try:
+                    job = await self.queue.claim(self.worker_id)
+                except Exception as e:
+                    run_logger.warning(f"Job claim failed: {e}")
+                    job = None
+                if job is None:
+                    break
+                claimed = True
+                self._running[job.job_id] = asyncio.create_task(self._run(job))
+                ingestion_metrics.worker_running_jobs.set(len(self._running))
+            if claimed:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                cancel = await self.queue.heartbeat(list(self._running))
+            except Exception as e:
+                run_logger.warning(f"Job heartbeat failed: {e}")
+                continue
+            for job_id in cancel:
+                task = self._running.get(job_id)
+                if task is not None and job_id not in self._cancelled:
+                    self._cancelled.add(job_id)
+                    request_cancel(job_id)
+                    task.cancel()
+            try:
+                await self._requeue_stale()
+            except Exception as e:
+                run_logger.warning(f"Stale job re-queue failed: {e}")
+
+    async def _requeue_stale(self) -> None:
+        requeued = await self.queue.requeue_stale(self.stale_after)
+        if requeued:
+            run_logger.info(f"Re-queued {requeued} stale ingestion job(s)")
+            self._wakeup.set()
+
+    async def _run(self, job: IngestionJob) -> None:
+        run_logger.info(f"Starting ingestion job {job.job_id} for user {job.user_id}")
+        try:
+            await self.runner(job)
+        except asyncio.CancelledError:
+            if job.job_id in self._cancelled:
+                await self.queue.finish(job.job_id, JobStatus.CANCELLED)
+                ingestion_metrics.jobs_total.labels(status=JobStatus.CANCELLED.value).inc()
+                run_logger.info(f"Ingestion job {job.job_id} cancelled")
+            else:
+                # Worker shutdown: leave it running so a restart re-queues it as stale.
+                raise
+        except Exception as e:
+            run_logger.exception(f"Ingestion job {job.job_id} failed: {e}")
+            await self.queue.finish(job.job_id, JobStatus.FAILED, error=str(e))
+            ingestion_metrics.jobs_total.labels(status=JobStatus.FAILED.value).inc()
+        else:
+            await self.queue.finish(job.job_id, JobStatus.SUCCEEDED)
+            ingestion_metrics.jobs_total.labels(status=JobStatus.SUCCEEDED.value).inc()
+            run_logger.info(f"Ingestion job {job.job_id} succeeded")
+        finally:
+            self._running.pop(job.job_id, None)
+            self._cancelled.discard(job.job_id)
+            clear_cancel(job.job_id)
+            ingestion_metrics.worker_running_jobs.set(len(self._running))
+            self._wakeup.set()
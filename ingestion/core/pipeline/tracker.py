@@ -1,16 +1,19 @@
 from __future__ import annotations
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import Column, String, DateTime, JSON, Text, Index, ForeignKey, select, or_
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index, ForeignKey, select, or_, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.pool import NullPool
 
 from core.config.logging import run_logger
+from core.metrics import ingestion_metrics
+from prefect_agent.shared import tracing
 
 Base = declarative_base()
 
@@ -28,6 +31,7 @@ class ArtifactMetadata(BaseModel):
     task_name: str = Field(..., description="The name of the task or workflow step that produced this artifact (e.g., 'autoshot_processing').")
     created_at: datetime = Field(default_factory=datetime.now, description="UTC timestamp when the artifact metadata was created/inserted into the database.")
     artifact_metadata: dict = Field(..., description="related metadata")
+    related_video_id: str | None = Field(None, exclude=True, description="Source video, for progress listeners; not persisted")
 
 
 class ArtifactSchema(Base):
@@ -63,9 +67,36 @@ class ArtifactLineageSchema(Base):
     )
     transformation_type = Column(String(128), nullable=False)
     created_at = Column(DateTime, default=datetime.now)
-    
 
 
+class VideoStageCounterSchema(Base):
+    """Artifacts per (video, artifact type), maintained on save so status reads are O(stages)."""
+    __tablename__ = "video_stage_counter_application"
+
+    video_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    artifact_type: Mapped[str] = mapped_column(String(128), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_updated: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+
+class VideoStageCounterMarkerSchema(Base):
+    """Videos whose stage counters cover all their artifacts; videos saved before counters existed have none until backfilled."""
+    __tablename__ = "video_stage_counter_marker_application"
+
+    video_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    initialized_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+
+class DeletionTombstoneSchema(Base):
+    """A planned deletion; removed once MinIO, Milvus and tracker rows are all gone, so interrupted deletes can resume."""
+    __tablename__ = "deletion_tombstone_application"
+
+    id: Mapped[str] = mapped_column(String(128), primary_key=True, default=lambda: uuid4().hex)
+    video_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
+    scope: Mapped[str] = mapped_column(String(128), nullable=False, doc="'*' for the whole video, else an artifact_type")
+    plan: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
 
 class ArtifactTracker:
     
@@ -79,6 +110,11 @@ class ArtifactTracker:
     ):
         self.database_url = database_url
         self.engine = create_async_engine(database_url, echo=False, pool_pre_ping=True, poolclass=NullPool) 
+        self._listeners: list[Callable[[ArtifactMetadata], None]] = []
+
+    def add_listener(self, listener: Callable[[ArtifactMetadata], None]) -> None:
+        """Call `listener` with the metadata of every artifact saved from now on (must not block)."""
+        self._listeners.append(listener)
         
     def get_session(self) -> AsyncSession:
         sessionmaker = async_sessionmaker(
@@ -94,48 +130,159 @@ class ArtifactTracker:
         run_logger.info("Artifact tracker initialized")
     
     async def save_artifact(self, metadata: ArtifactMetadata) -> str:
-        async with self.get_session() as session:
-            artifact = ArtifactSchema(
-                artifact_id=metadata.artifact_id,
-                artifact_type=metadata.artifact_type,
-                minio_url=metadata.minio_url,
-                parent_artifact_id=metadata.parent_artifact_id,
-                task_name=metadata.task_name,
-                created_at=metadata.created_at,
-                user_id=metadata.user_id,
-            )
-            session.add(artifact)
-            await session.flush()
-
-            if metadata.parent_artifact_id:
-                lineage = ArtifactLineageSchema(
+        with tracing.span("tracker.save_artifact", artifact_type=metadata.artifact_type, related_video_id=metadata.related_video_id), \
+                ingestion_metrics.timed("postgres", "save_artifact"):
+            async with self.get_session() as session:
+                artifact = ArtifactSchema(
+                    artifact_id=metadata.artifact_id,
+                    artifact_type=metadata.artifact_type,
+                    minio_url=metadata.minio_url,
                     parent_artifact_id=metadata.parent_artifact_id,
-                    child_artifact_id=metadata.artifact_id,
-                    transformation_type=metadata.task_name,
+                    task_name=metadata.task_name,
+                    created_at=metadata.created_at,
+                    user_id=metadata.user_id,
+                    artifact_metadata=metadata.artifact_metadata,
                 )
-                session.add(lineage)
+                session.add(artifact)
+                await session.flush()
+
+                if metadata.parent_artifact_id:
+                    lineage = ArtifactLineageSchema(
+                        parent_artifact_id=metadata.parent_artifact_id,
+                        child_artifact_id=metadata.artifact_id,
+                        transformation_type=metadata.task_name,
+                    )
+                    session.add(lineage)
+
+                if metadata.related_video_id:
+                    await session.execute(self._counter_upsert(metadata.related_video_id, metadata.artifact_type, metadata.created_at))
+                if metadata.related_video_id == metadata.artifact_id:
+                    # A video's own row comes first, so its counters are complete from here on.
+                    await session.merge(VideoStageCounterMarkerSchema(video_id=metadata.artifact_id, initialized_at=datetime.now()))
             
-            await session.commit()
-            run_logger.info(f"Saved artifact {metadata.artifact_id}")
+                await session.commit()
+                run_logger.info(f"Saved artifact {metadata.artifact_id}")
+
+                for listener in self._listeners:
+                    try:
+                        listener(metadata)
+                    except Exception as e:
+                        run_logger.warning(f"Artifact listener failed for {metadata.artifact_id}: {e}")
         
-            return metadata.artifact_id
+                return metadata.artifact_id
 
     async def get_artifact(self, artifact_id: str) -> ArtifactMetadata | None:
-        async with self.get_session() as session:
-            result = await session.get(ArtifactSchema, artifact_id)
-            if not result:
-                return None
+        with tracing.span("tracker.get_artifact"), ingestion_metrics.timed("postgres", "get_artifact"):
+            async with self.get_session() as session:
+                result = await session.get(ArtifactSchema, artifact_id)
+                if not result:
+                    return None
             
-            return ArtifactMetadata(
-                artifact_id=result.artifact_id,
-                artifact_type=result.artifact_type,
-                minio_url=result.minio_url,
-                parent_artifact_id=result.parent_artifact_id or None,
-                task_name=result.task_name,
-                created_at=result.created_at,
-                user_id=result.user_id,
-                artifact_metadata=result.artifact_metadata
-            )
+                return self._to_metadata(result)
+
+    async def get_artifacts(self, artifact_ids: list[str]) -> dict[str, ArtifactMetadata]:
+        """artifact_id -> metadata for those of `artifact_ids` that exist, in one query."""
+        if not artifact_ids:
+            return {}
+        with tracing.span("tracker.get_artifacts"), ingestion_metrics.timed("postgres", "get_artifacts"):
+            async with self.get_session() as session:
+                result = await session.execute(select(ArtifactSchema).where(ArtifactSchema.artifact_id.in_(artifact_ids)))
+                return {row.artifact_id: self._to_metadata(row) for row in result.scalars().all()}
+
+    async def update_artifact_metadata(self, artifact_id: str, updates: dict) -> None:
+        """Merge `updates` into the stored metadata of an existing artifact."""
+        with ingestion_metrics.timed("postgres", "update_artifact_metadata"):
+            async with self.get_session() as session:
+                artifact = await session.get(ArtifactSchema, artifact_id)
+                if artifact is None:
+                    return
+                # A new dict, so the JSON column is flagged as changed.
+                artifact.artifact_metadata = {**(artifact.artifact_metadata or {}), **updates}
+                await session.commit()
+
+    @staticmethod
+    def _to_metadata(result: ArtifactSchema) -> ArtifactMetadata:
+        return ArtifactMetadata(
+            artifact_id=result.artifact_id,
+            artifact_type=result.artifact_type,
+            minio_url=result.minio_url,
+            parent_artifact_id=result.parent_artifact_id or None,
+            task_name=result.task_name,
+            created_at=result.created_at,
+            user_id=result.user_id,
+            artifact_metadata=result.artifact_metadata or {}
+        )
     
+    def _counter_upsert(self, video_id: str, artifact_type: str, updated: datetime):
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(VideoStageCounterSchema).values(
+            video_id=video_id, artifact_type=artifact_type, count=1, last_updated=updated
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[VideoStageCounterSchema.video_id, VideoStageCounterSchema.artifact_type],
+            set_={"count": VideoStageCounterSchema.count + 1, "last_updated": stmt.excluded.last_updated},
+        )
+
+    @staticmethod
+    def descendants_cte(root_ids: list[str] | Any, name: str = "lineage_tree"):
+        """Recursive CTE of `root_ids` (a list or a select of ids) and every artifact reachable from them through the lineage table."""
+        roots = select(ArtifactSchema.artifact_id.label("artifact_id")).where(ArtifactSchema.artifact_id.in_(root_ids))
+        tree = roots.cte(name, recursive=True)
+        # UNION (not UNION ALL) de-duplicates, so diamonds and accidental cycles terminate.
+        return tree.union(
+            select(ArtifactLineageSchema.child_artifact_id).join(
+                tree, ArtifactLineageSchema.parent_artifact_id == tree.c.artifact_id
+            )
+        )
+
+    async def count_descendants_by_type(self, root_id: str) -> dict[str, tuple[int, datetime]]:
+        """artifact_type -> (count, latest created_at) for `root_id` and its descendants, in one query."""
+        tree = self.descendants_cte([root_id])
+        query = (
+            select(ArtifactSchema.artifact_type, func.count(), func.max(ArtifactSchema.created_at))
+            .join(tree, ArtifactSchema.artifact_id == tree.c.artifact_id)
+            .group_by(ArtifactSchema.artifact_type)
+        )
+        with ingestion_metrics.timed("postgres", "count_descendants"):
+            async with self.get_session() as session:
+                rows = (await session.execute(query)).all()
+        return {artifact_type: (count, latest) for artifact_type, count, latest in rows}
+
+    async def get_stage_counters(self, video_id: str) -> dict[str, tuple[int, datetime]]:
+        query = select(
+            VideoStageCounterSchema.artifact_type, VideoStageCounterSchema.count, VideoStageCounterSchema.last_updated
+        ).where(VideoStageCounterSchema.video_id == video_id, VideoStageCounterSchema.count > 0)
+        with ingestion_metrics.timed("postgres", "get_stage_counters"):
+            async with self.get_session() as session:
+                rows = (await session.execute(query)).all()
+        return {artifact_type: (count, updated) for artifact_type, count, updated in rows}
+
+    async def refresh_stage_counters(self, video_id: str) -> dict[str, tuple[int, datetime]]:
+        """Recompute a video's counters from the lineage (after deletions, or for videos saved before counters existed)."""
+        counts = await self.count_descendants_by_type(video_id)
+        async with self.get_session() as session:
+            await session.execute(delete(VideoStageCounterSchema).where(VideoStageCounterSchema.video_id == video_id))
+            session.add_all(
+                VideoStageCounterSchema(video_id=video_id, artifact_type=t, count=c, last_updated=latest)
+                for t, (c, latest) in counts.items()
+            )
+            await session.merge(VideoStageCounterMarkerSchema(video_id=video_id, initialized_at=datetime.now()))
+            await session.commit()
+        return counts
+
+    async def backfill_stage_counters(self) -> list[str]:
+        """Recompute the counters of every video without a counter marker (saved before counters existed); returns their ids."""
+        marked = select(VideoStageCounterMarkerSchema.video_id)
+        query = select(ArtifactSchema.artifact_id).where(
+            ArtifactSchema.artifact_type == "VideoArtifact", ArtifactSchema.artifact_id.not_in(marked)
+        )
+        async with self.get_session() as session:
+            video_ids = list((await session.execute(query)).scalars().all())
+        for video_id in video_ids:
+            await self.refresh_stage_counters(video_id)
+        if video_ids:
+            run_logger.info(f"Backfilled stage counters for {len(video_ids)} videos")
+        return video_ids
+
     async def close(self) -> None:
         await self.engine.dispose()
\ No newline at end of file
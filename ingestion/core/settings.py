@@ -58,6 +58,18 @@ class ServiceSettings(BaseSettings):
     retry_backoff_seconds: float = Field(default=5.0, description="Backoff duration between retries")
 
 
+class JobQueueSettings(BaseSettings):
+    """Admission control for the ingestion job queue."""
+
+    model_config = SettingsConfigDict(env_file=".env", env_prefix="JOB_QUEUE_", extra="ignore")
+
+    max_concurrent_flows: int = Field(default=2, ge=1, description="Flows running at once across all workers")
+    max_running_per_user: Optional[int] = Field(default=None, ge=1, description="Optional cap on one user's running flows")
+    poll_interval_seconds: float = Field(default=2.0, gt=0, description="Idle delay between claim attempts")
+    heartbeat_seconds: float = Field(default=10.0, gt=0, description="How often running jobs are heartbeated and checked for cancellation")
+    stale_after_seconds: float = Field(default=300.0, gt=0, description="A running job without heartbeat for this long is re-queued")
+
+
 class AppSettings(BaseModel):
     """Aggregate settings container exposed to the application."""
 
@@ -66,6 +78,7 @@ class AppSettings(BaseModel):
     prefect: PrefectSettings
     upload: UploadSettings
     services: ServiceSettings
+    jobs: JobQueueSettings
 
 
 
@@ -83,6 +96,7 @@ def get_settings() -> AppSettings:
         prefect=PrefectSettings(),
         upload=UploadSettings(),
         services=ServiceSettings(),
+        jobs=JobQueueSettings(),
     )
 
 
@@ -91,6 +105,7 @@ settings = get_settings()
 
 __all__ = [
     "AppSettings",
+    "JobQueueSettings",
     "MinioSettings",
     "PrefectSettings",
     "ServiceSettings",
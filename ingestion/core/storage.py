@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
 import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from io import BytesIO
-from typing import Any, BinaryIO, Dict, Iterable, Optional
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Mapping, Optional, TypeVar
 import socket
 
 import urllib3
@@ -11,9 +18,18 @@ from urllib3.util import Timeout
 
 from loguru import logger
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 
+from prefect_agent.shared import tracing
+
 from core.config.storage import MinioSettings
+from core.metrics import ingestion_metrics
+
+
+T = TypeVar("T")
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
 
 
 class StorageError(RuntimeError):
@@ -36,15 +52,43 @@ class StorageClient:
             secure=settings.secure,
             http_client=self._http_client,
         )
+        self._known_buckets: set[str] = set()
+        self._bucket_lock = threading.Lock()
+        self._aio: AsyncStorageClient | None = None
+
+    @property
+    def aio(self) -> "AsyncStorageClient":
+        """Async view of this client, for use from `async def` code."""
+        if self._aio is None:
+            with self._bucket_lock:
+                if self._aio is None:
+                    self._aio = AsyncStorageClient(self, max_concurrency=self.settings.max_concurrency)
+        return self._aio
 
     def _ensure_bucket(self, bucket: str) -> None:
-        try:
-            if not self.client.bucket_exists(bucket):
-                logger.info(f"Bucket named: {bucket} does not exist, creating")
-                self.client.make_bucket(bucket)
-        except S3Error as exc:
-            logger.error("MinIO bucket check failed for %s: %s", bucket, exc)
-            raise StorageError(f"Failed to ensure bucket {bucket}: {exc}") from exc
+        """Create `bucket` if missing; checked once per bucket for the life of the client."""
+        if bucket in self._known_buckets:
+            return
+        with self._bucket_lock:
+            if bucket in self._known_buckets:
+                return
+            try:
+                if not self.client.bucket_exists(bucket):
+                    logger.info(f"Bucket named: {bucket} does not exist, creating")
+                    self.client.make_bucket(bucket)
+            except S3Error as exc:
+                logger.error("MinIO bucket check failed for %s: %s", bucket, exc)
+                raise StorageError(f"Failed to ensure bucket {bucket}: {exc}") from exc
+            self._known_buckets.add(bucket)
+
+    def _forget_bucket(self, exc: S3Error) -> None:
+        # A bucket removed behind our back is re-created by the next operation.
+        if exc.code == "NoSuchBucket":
+            bucket = getattr(exc, "bucket_name", None)
+            if bucket:
+                self._known_buckets.discard(bucket)
+            else:
+                self._known_buckets.clear()
 
 
 
@@ -59,23 +103,25 @@ class StorageClient:
     ) -> str:
         """Upload a file-like object to the specified bucket and return an s3 URI."""
 
-        self._ensure_bucket(bucket)
-        try:
-            self.client.put_object(
-                bucket_name=bucket,
-                object_name=object_name,
-                data=file_obj,
-                length=-1,
-                part_size=10 * 1024 * 1024,
-                content_type=content_type,
-                metadata=metadata, #type:ignore
-            )
-            uri = f"s3://{bucket}/{object_name}"
-            logger.info("Uploaded object %s", uri)
-            return uri
-        except S3Error as exc:
-            logger.exception("Failed to upload %s to bucket %s", object_name, bucket)
-            raise StorageError(f"Upload failed for {object_name}: {exc}") from exc
+        with tracing.span("storage.upload", bucket=bucket, object_name=object_name), ingestion_metrics.timed("minio", "put_object"):
+            self._ensure_bucket(bucket)
+            try:
+                self.client.put_object(
+                    bucket_name=bucket,
+                    object_name=object_name,
+                    data=file_obj,
+                    length=-1,
+                    part_size=10 * 1024 * 1024,
+                    content_type=content_type,
+                    metadata=metadata, #type:ignore
+                )
+                uri = f"s3://{bucket}/{object_name}"
+                logger.info("Uploaded object %s", uri)
+                return uri
+            except S3Error as exc:
+                self._forget_bucket(exc)
+                logger.exception("Failed to upload %s to bucket %s", object_name, bucket)
+                raise StorageError(f"Upload failed for {object_name}: {exc}") from exc
 
     def put_json(
         self,
@@ -120,18 +166,96 @@ class StorageClient:
             raise StorageError(f"Failed to list objects: {exc}") from exc
 
     def get_object(self, bucket: str, object_name: str) -> bytes | None:
-        self._ensure_bucket(bucket)
+        with tracing.span("storage.get_object", bucket=bucket, object_name=object_name), ingestion_metrics.timed("minio", "get_object"):
+            self._ensure_bucket(bucket)
+            try:
+                response = self.client.get_object(bucket, object_name)
+                try:
+                    data = response.read()
+                    return data
+                finally:
+                    response.close()
+                    response.release_conn()
+            except S3Error as exc:
+                self._forget_bucket(exc)
+                logger.info(f"Bucket: {bucket} has no {object_name}")
+                return None
+    def get_range(self, bucket: str, object_name: str, offset: int, length: int) -> bytes | None:
+        """`length` bytes starting at `offset` (an HTTP range request); None if the object is missing."""
+        with tracing.span("storage.get_range", bucket=bucket, object_name=object_name, offset=offset, length=length), \
+                ingestion_metrics.timed("minio", "get_range"):
+            self._ensure_bucket(bucket)
+            try:
+                response = self.client.get_object(bucket, object_name, offset=offset, length=length)
+                try:
+                    return response.read()
+                finally:
+                    response.close()
+                    response.release_conn()
+            except S3Error as exc:
+                self._forget_bucket(exc)
+                logger.info(f"Bucket: {bucket} has no {object_name}")
+                return None
+
+    def _open(self, bucket: str, object_name: str, offset: int = 0, length: int = 0):
+        with tracing.span("storage.open_object", bucket=bucket, object_name=object_name), \
+                ingestion_metrics.timed("minio", "open_object"):
+            self._ensure_bucket(bucket)
+            try:
+                return self.client.get_object(bucket, object_name, offset=offset, length=length)
+            except S3Error as exc:
+                self._forget_bucket(exc)
+                raise StorageError(f"Failed to fetch object {bucket}/{object_name}: {exc}") from exc
+
+    def iter_object(
+        self,
+        bucket: str,
+        object_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        *,
+        offset: int = 0,
+        length: int = 0,
+    ) -> Iterator[bytes]:
+        """
+        Stream an object (or `length` bytes from `offset`) in `chunk_size`
+        pieces, so memory use does not depend on the object size. The
+        connection is released when the iterator is exhausted or closed.
+        """
+        response = self._open(bucket, object_name, offset, length)
         try:
-            response = self.client.get_object(bucket, object_name)
+            while chunk := response.read(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def download_to_path(
+        self,
+        bucket: str,
+        object_name: str,
+        path: str | os.PathLike[str],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> str:
+        """
+        Stream an object to `path`. Data goes to a temp file in the same
+        directory that is renamed over `path` once complete, so readers
+        never see a partial file.
+        """
+        path = os.fspath(path)
+        with tracing.span("storage.download", bucket=bucket, object_name=object_name), \
+                ingestion_metrics.timed("minio", "download"):
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".download-", suffix=".part")
             try:
-                data = response.read()
-                return data
-            finally:
-                response.close()
-                response.release_conn()
-        except S3Error as exc:
-            logger.info(f"Bucket: {bucket} has no {object_name}")
-            return None
+                with os.fdopen(fd, "wb") as fh:
+                    for chunk in self.iter_object(bucket, object_name, chunk_size):
+                        fh.write(chunk)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            return path
+
     def read_json(self, bucket: str, object_name: str) -> Dict[str, Any] | None:
         raw = self.get_object(bucket, object_name)
         if raw is None:
@@ -142,13 +266,132 @@ class StorageClient:
             raise StorageError(f"Stored object {bucket}/{object_name} is not valid JSON: {exc}") from exc
 
     def object_exists(self, bucket:str, object_name: str) -> bool:
-        self._ensure_bucket(bucket)
-        try:
-            self.client.stat_object(bucket, object_name)
-            return True
-        except S3Error as exc:
-            if exc.code in ("NoSuchKey", "NoSuchObject"):
-                return False
-            raise StorageError(f"Error checking object {bucket}/{object_name}: {exc}") from exc
+        with tracing.span("storage.stat_object", bucket=bucket, object_name=object_name), ingestion_metrics.timed("minio", "stat_object"):
+            self._ensure_bucket(bucket)
+            try:
+                self.client.stat_object(bucket, object_name)
+                return True
+            except S3Error as exc:
+                self._forget_bucket(exc)
+                if exc.code in ("NoSuchKey", "NoSuchObject", "NoSuchBucket"):
+                    return False
+                raise StorageError(f"Error checking object {bucket}/{object_name}: {exc}") from exc
+
+    def remove_objects(self, bucket: str, object_names: Iterable[str], batch_size: int = 1000) -> list[str]:
+        """
+        Bulk delete with S3 DeleteObjects, `batch_size` keys per request.
+        Missing keys count as deleted; returns one message per key that failed.
+        """
+        with tracing.span("storage.remove_objects", bucket=bucket), ingestion_metrics.timed("minio", "remove_objects"):
+            names = list(dict.fromkeys(object_names))
+            errors: list[str] = []
+            for start in range(0, len(names), batch_size):
+                batch = [DeleteObject(name) for name in names[start:start + batch_size]]
+                try:
+                    for error in self.client.remove_objects(bucket, batch):
+                        errors.append(f"{bucket}/{error.name}: {error.code} {error.message}")
+                except S3Error as exc:
+                    if exc.code == "NoSuchBucket":
+                        self._forget_bucket(exc)
+                        return errors
+                    raise StorageError(f"Failed to remove objects from {bucket}: {exc}") from exc
+            return errors
+
+
+class AsyncStorageClient:
+    """
+    Async methods over a `StorageClient`, run on a dedicated pool of
+    `max_concurrency` threads so MinIO I/O never blocks the event loop and
+    at most that many requests are in flight per process. The caller's
+    context (active span) carries into the worker thread.
+
+    `get_many` / `put_many` issue their requests concurrently, limited by
+    `concurrency` (default: the pool size), and return in input order.
+    """
+
+    def __init__(self, storage: StorageClient, max_concurrency: int = 16):
+        self.storage = storage
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="storage")
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def _bounded(self, calls: list[Callable[[], Any]], concurrency: int | None) -> list[Any]:
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+
+        async def one(call: Callable[[], Any]) -> Any:
+            async with semaphore:
+                return await self._run(call)
+
+        return await asyncio.gather(*(one(call) for call in calls))
+
+    async def upload_fileobj(
+        self,
+        bucket: str,
+        object_name: str,
+        file_obj: BinaryIO,
+        *,
+        content_type: str = "application/octet-stream",
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> str:
+        return await self._run(
+            self.storage.upload_fileobj, bucket, object_name, file_obj, content_type=content_type, metadata=metadata
+        )
+
+    async def put_json(self, bucket: str, object_name: str, payload: Dict[str, Any], *, content_type: str = "application/json") -> str:
+        return await self._run(self.storage.put_json, bucket, object_name, payload, content_type=content_type)
+
+    async def get_object(self, bucket: str, object_name: str) -> bytes | None:
+        return await self._run(self.storage.get_object, bucket, object_name)
+
+    async def read_json(self, bucket: str, object_name: str) -> Dict[str, Any] | None:
+        return await self._run(self.storage.read_json, bucket, object_name)
+
+    async def get_range(self, bucket: str, object_name: str, offset: int, length: int) -> bytes | None:
+        return await self._run(self.storage.get_range, bucket, object_name, offset, length)
+
+    async def download_to_path(
+        self, bucket: str, object_name: str, path: str | os.PathLike[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> str:
+        return await self._run(self.storage.download_to_path, bucket, object_name, path, chunk_size=chunk_size)
+
+    async def object_exists(self, bucket: str, object_name: str) -> bool:
+        return await self._run(self.storage.object_exists, bucket, object_name)
+
+    async def remove_objects(self, bucket: str, object_names: Iterable[str], batch_size: int = 1000) -> list[str]:
+        return await self._run(self.storage.remove_objects, bucket, list(object_names), batch_size)
+
+    async def get_many(self, bucket: str, object_names: Iterable[str], *, concurrency: int | None = None) -> list[bytes | None]:
+        """Objects in the order of `object_names`; None for missing ones."""
+        return await self._bounded(
+            [functools.partial(self.storage.get_object, bucket, name) for name in object_names], concurrency
+        )
+
+    async def put_many(
+        self,
+        bucket: str,
+        objects: Mapping[str, bytes | BinaryIO],
+        *,
+        content_type: str = "application/octet-stream",
+        concurrency: int | None = None,
+    ) -> list[str]:
+        """Upload every `object_name -> data` and return their s3 URIs in the same order."""
+        return await self._bounded(
+            [
+                functools.partial(
+                    self.storage.upload_fileobj, bucket, name,
+                    BytesIO(data) if isinstance(data, (bytes, bytearray)) else data, content_type=content_type,
+                )
+                for name, data in objects.items()
+            ],
+            concurrency,
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
 
-__all__ = ["StorageClient", "StorageError"]
+__all__ = ["AsyncStorageClient", "StorageClient", "StorageError"]
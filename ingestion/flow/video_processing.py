@@ -42,6 +42,9 @@ from core.clients.text_embed_client import TextEmbeddingClient
 from core.clients.milvus_client import ImageEmbeddingMilvusClient, TextCaptionEmbeddingMilvusClient, SegmentCaptionEmbeddingMilvusClient
 from core.lifespan import AppState
 from core.clients.progress_client import ProcessingStage
+from core.clients.base import model_loaded
+from core.pipeline.job_queue import raise_if_cancelled
+
 
 @task(
     name='Video registry',
@@ -55,15 +58,10 @@ async def entry_video_ingestion(
     task_instance = AppState().video_ingestion_task
     progress_client = AppState().progress_client
 
-    preprocessed_input = await task_instance.preprocess(input_data=video_uploads)
-    video_artifacts = []
-    async for result in task_instance.execute(preprocessed_input, None):
-        processed = await task_instance.postprocess(result)
-        video_artifacts.append(processed)        
-    
+    video_artifacts = await task_instance.run(video_uploads)
+
     for video_artifact in video_artifacts:
-        response = await progress_client.start_video(video_id=video_artifact.artifact_id)
-        print(response)
+        await progress_client.start_video(video_id=video_artifact.artifact_id)
         
     return video_artifacts
 
@@ -86,30 +84,16 @@ async def autoshot_task(
     async with AutoshotClient(
         config=client_config
     ) as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed = await task_instance.preprocess(videos)
-        run_logger.info(f"Len of preprocessed: {len(preprocessed)}")
-        run_logger.info(f"Preprocessed data: {preprocessed[0]}")
-
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
-        
-        await client.unload_model()
+        results = await task_instance.run(
+            videos, client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        )
     
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.AUTOSHOT_SEGMENTATION
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results
 
 
@@ -127,28 +111,15 @@ async def asr_task(
     progress_client = AppState().progress_client
     
     async with ASRClient(config=client_config) as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed = await task_instance.preprocess(videos)
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            postprocessed_result = await task_instance.postprocess(result)
-            results.append(postprocessed_result)
-        
-
-
-        await client.unload_model()
+        results = await task_instance.run(
+            videos, client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        )
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.ASR_TRANSCRIPTION
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     
     return results
 
@@ -162,25 +133,15 @@ async def image_processing_task(
     autoshots: list[AutoshotArtifact],
 )-> list[ImageArtifact]:
     task_instance = AppState().image_processing_task
-    preprocessed = await task_instance.preprocess(autoshots)
     progress_client = AppState().progress_client
 
-
-    results = []
-    async for result in task_instance.execute(preprocessed, None):
-        processed = await task_instance.postprocess(result)
-        results.append(processed)
-    
+    results = await task_instance.run(autoshots, None, checkpoints=AppState().stage_checkpoints)
 
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.IMAGE_EXTRACTION
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     
     return results
 
@@ -204,27 +165,16 @@ async def segment_caption_task(
         lists_autoshots=autoshots
     )
     async with LLMClient(config=client_config)  as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed_data = await task_instance.preprocess(input_data)
-        results = []
-        async for result in task_instance.execute(preprocessed_data, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
-        
-        await client.unload_model()
+        results = await task_instance.run(
+            input_data, client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        )
 
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.SEGMENT_CAPTIONING
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results
 
 
@@ -240,26 +190,16 @@ async def image_caption_task(
     client_config =  AppState().base_client_config
     progress_client = AppState().progress_client
     async with LLMClient(config=client_config) as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed = await task_instance.preprocess(cast(list[ImageArtifact],images))
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            postprocessed = await task_instance.postprocess(result)
-            results.append(postprocessed)
-        await client.unload_model()
+        results = await task_instance.run(
+            cast(list[ImageArtifact], images), client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        )
     
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.IMAGE_CAPTIONING
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results  
 
 
@@ -276,25 +216,15 @@ async def image_embedding_task(
     progress_client = AppState().progress_client
 
     async with ImageEmbeddingClient(config=client_config) as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed = await task_instance.preprocess(cast(list[ImageArtifact],images))
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            postprocessed = await task_instance.postprocess(result)
-            results.append(postprocessed)
-        await client.unload_model()
+        results = await task_instance.run(
+            cast(list[ImageArtifact], images), client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        )
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.IMAGE_EMBEDDING
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results #type:ignore
 
 
@@ -312,26 +242,16 @@ async def  segment_text_caption_embedding_task(
     progress_client = AppState().progress_client
 
     async with TextEmbeddingClient(config=client_config) as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed = await task_instance.preprocess(segment_captions) #type:ignore
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
-        await client.unload_model()
+        results = await task_instance.run(
+            segment_captions, client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        ) #type:ignore
     
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.TEXT_CAP_SEGMENT_EMBEDDING
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     
     return results  #type:ignore
 
@@ -351,25 +271,15 @@ async def text_image_caption_embedding_task(
     progress_client = AppState().progress_client
 
     async with TextEmbeddingClient(config=client_config) as client:
-        await client.load_model(
-            model_name=task_instance.config.model_name,
-            device=task_instance.config.device,
-        )
-        preprocessed = await task_instance.preprocess(cast(list[ImageCaptionArtifact], captions))
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
-        await client.unload_model()
+        results = await task_instance.run(
+            cast(list[ImageCaptionArtifact], captions), client, checkpoints=AppState().stage_checkpoints,
+            prepare=lambda: model_loaded(client, task_instance.config),
+        )
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.TEXT_CAP_IMAGE_EMBEDDING
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results  #type:ignore
 
 
@@ -397,21 +307,13 @@ async def image_embedding_milvus_persist_task(
         timeout=task_instance.config.time_out
     ) as client:
         print("Before milvus ingestion")
-        preprocessed = await task_instance.preprocess(cast(list[ImageEmbeddingArtifact], image_embeddings))
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
+        results = await task_instance.run(cast(list[ImageEmbeddingArtifact], image_embeddings), client, checkpoints=AppState().stage_checkpoints)
     
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.IMAGE_MILVUS
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results
 
 
@@ -437,21 +339,13 @@ async def text_image_caption_milvus_persist_task(
         db_name=task_instance.config.db_name,
         timeout=task_instance.config.time_out
     ) as client:
-        preprocessed = await task_instance.preprocess(cast(list[TextCaptionEmbeddingArtifact], text_caption_embeddings))
-        results = []
-        async for result in task_instance.execute(preprocessed, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
+        results = await task_instance.run(cast(list[TextCaptionEmbeddingArtifact], text_caption_embeddings), client, checkpoints=AppState().stage_checkpoints)
     
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.TEXT_CAP_IMAGE_MILVUS
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
 
     return results
 
@@ -480,22 +374,13 @@ async def text_segment_caption_milvus_persist_task(
     ) as client:
 
         print("Before milvus")
-        preprocessed = await task_instance.preprocess(cast(list[TextCapSegmentEmbedArtifact], text_segment_embeddings))
-        results = []
-        
-        async for result in task_instance.execute(preprocessed, client):
-            processed = await task_instance.postprocess(result)
-            results.append(processed)
+        results = await task_instance.run(cast(list[TextCapSegmentEmbedArtifact], text_segment_embeddings), client, checkpoints=AppState().stage_checkpoints)
             
     for res in results:
         progress_client.update_state_progress(
             video_id=res.related_video_id,
             stage=ProcessingStage.TEXT_CAP_SEGMENT_MILVUS
         )
-        response = await progress_client.stream_progress(
-            video_id=res.related_video_id
-        )
-        print(response)
     return results
 
 
@@ -550,6 +435,7 @@ async def video_processing_flow(
 )-> dict[str, Any] | None:
     
     run_logger.info(f"Starting video processing flow for run_id={run_id}\n")    
+    videos: list[VideoArtifact] = []
     
     
 
@@ -561,6 +447,7 @@ async def video_processing_flow(
         )
         videos = video_futures.result()
         run_logger.info(f"Ingested {len(videos)} videos")  #type:ignore
+        raise_if_cancelled(run_id)
 
 
         
@@ -581,6 +468,7 @@ async def video_processing_flow(
             f"Completed parallel processing: "
             f"{len(autoshot_artifacts)} autoshots, {len(asr_artifacts)} transcripts" #type:ignore
         )
+        raise_if_cancelled(run_id)
 
         run_logger.info(
             "Stage 3.1: Running LLM Segmentation Caption + Segmentation Caption Embedding"
@@ -628,22 +516,28 @@ async def video_processing_flow(
             f"{len(images)} images → ({len(image_captions)} image captions + {len(image_embeddings)} image embeddings) → {len(text_caption_embeddings)} text caption embeddings"
         )
 
+        raise_if_cancelled(run_id)
         image_embed_milvus_future = image_embedding_milvus_persist_task.submit(
             image_embeddings=image_embeddings
         )
         image_embed_milvus_result = image_embed_milvus_future.result()
 
+        raise_if_cancelled(run_id)
         text_caption_milvus_future = text_image_caption_milvus_persist_task.submit(
             text_caption_embeddings=text_caption_embeddings
         )
         text_caption_milvus_result = text_caption_milvus_future.result()
 
 
+        raise_if_cancelled(run_id)
         segment_caption_milvus_future = text_segment_caption_milvus_persist_task.submit(
             text_segment_embeddings=text_segment_embeddings
         )
         segment_caption_milvus_result = segment_caption_milvus_future.result()
 
+        for video in videos:
+            AppState().progress_client.finish_video(video.artifact_id)
+
         # run_logger.info("Stage 5: Aggregate Results")
         # final_manifest = await aggregate_results_task(
         #     run_id=run_id,
@@ -664,6 +558,8 @@ async def video_processing_flow(
         AppState().progress_client.clear_video_progress_cache()
 
     except Exception as e:
+        for video in videos:
+            AppState().progress_client.finish_video(video.artifact_id, errors=str(e))
         AppState().progress_client.clear_video_progress_cache()
         run_logger.exception(f"Pipeline failed: {str(e)}")
         raise
@@ -1,10 +1,13 @@
 import os
 from typing import Any, Dict
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, Response
 
 from core.lifespan import lifespan
+from core.dependencies.application import get_job_queue
+from core.metrics import ingestion_metrics
+from core.pipeline.job_queue import JobQueue
 from fastapi.middleware.cors import CORSMiddleware
 from core.settings import get_settings
 from loguru import logger
@@ -35,6 +38,19 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+@app.get("/metrics")
+async def metrics(queue: JobQueue = Depends(get_job_queue)) -> Response:
+    try:
+        ingestion_metrics.update_queue(await queue.status_counts())
+    except Exception as e:
+        logger.warning(f"Queue depth unavailable for metrics: {e}")
+    return Response(
+        content=ingestion_metrics.get_metrics(),
+        media_type=ingestion_metrics.get_content_type(),
+    )
+
+
 @app.get("/")
 async def root():
     return {
@@ -45,7 +61,8 @@ async def root():
         "endpoints": {
             "upload": "/api/uploads",
             "management": "/api/management",
-            "health": "/api/uploads/health"
+            "health": "/api/uploads/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from service_asr.core.dependencies import get_service
@@ -42,6 +43,23 @@ async def infer(request: ASRInferenceRequest, service=Depends(get_service)) -> A
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.post("/infer/stream")
+async def infer_stream(request: ASRInferenceRequest, service=Depends(get_service)) -> StreamingResponse:
+    """Stream timestamped tokens as NDJSON, one object per line, while the video is transcribed."""
+    if service.loaded_model is None:
+        raise HTTPException(status_code=400, detail="No model loaded. Load a model before inference.")
+
+    async def ndjson():
+        try:
+            async for token in service.loaded_model.stream_tokens(request):
+                yield token.model_dump_json() + "\n"
+        except Exception as exc:  # pragma: no cover
+            logger.exception("asr_stream_inference_failed", error=str(exc))
+            raise
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.get("/models")
 async def models(service=Depends(get_service)) -> dict[str, object]:
     loaded = service.loaded_model_info.model_dump(mode="json") if service.loaded_model_info else None
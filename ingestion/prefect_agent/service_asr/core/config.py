@@ -16,6 +16,11 @@ class ASRServiceConfig(ServiceConfig):
     default_sample_rate: int = Field(default=16000, ge=8000)
     default_num_extraction_workers: int = Field(default=1, ge=1, le=4)
     default_num_asr_workers: int = Field(default=1, ge=1, le=4)
+    default_streaming: bool = Field(default=False)
+    default_stream_window_duration: int = Field(default=60, ge=1)
+    default_vad: bool = Field(default=False)
+    default_vad_padding_ms: int = Field(default=300, ge=0)
+    default_vad_min_silence_ms: int = Field(default=600, ge=0)
 
 
     log_level: LogLevel = Field(LogLevel.INFO)
@@ -14,6 +14,11 @@ class ASRConfig(BaseModel):
     sample_rate: int = Field(default=16000, ge=1000)
     num_extraction_workers: int = Field(default=2, ge=1, le=8)
     num_asr_workers: int = Field(default=1, ge=1, le=4)
+    streaming: bool = Field(default=False, description="Decode and transcribe in bounded-memory windows")
+    stream_window_duration: int = Field(default=60, ge=1, description="Encoder window in seconds when streaming")
+    vad: bool = Field(default=False, description="Run the encoder only over detected speech spans (opt-in)")
+    vad_padding_ms: int = Field(default=300, ge=0)
+    vad_min_silence_ms: int = Field(default=600, ge=0)
 
 
 
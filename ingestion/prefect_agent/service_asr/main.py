@@ -15,6 +15,8 @@ from service_asr.core.api import router
 from service_asr.core.config import asr_service_config
 from service_asr.core.dependencies import get_service
 from service_asr.core.lifespan import lifespan
+from shared.profiling import profiling_router
+from shared.tracing import TraceContextMiddleware
 
 app = FastAPI(
     title="ASR Service",
@@ -24,6 +26,8 @@ app = FastAPI(
 )
 
 app.include_router(router, prefix="/asr", tags=["asr"])
+app.include_router(profiling_router(get_service))
+app.add_middleware(TraceContextMiddleware)
 
 
 @app.get("/health")
@@ -1,24 +1,108 @@
 import os
+import numpy as np
 import torch
 import yaml
 import cv2
 import time
 import uvicorn
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any
 
-import torchaudio
+import ffmpeg
 import torchaudio.compliance.kaldi as kaldi
-from moviepy import VideoFileClip
 
 from service_asr.model.chunkformer.utils.init_model import init_model
 
 from service_asr.model.chunkformer.utils.checkpoint import load_checkpoint
 from service_asr.model.chunkformer.utils.file_utils import read_symbol_table
-from service_asr.model.chunkformer.utils.ctc_utils import get_output_with_timestamps
+from service_asr.model.chunkformer.utils.ctc_utils import get_output_with_timestamps, StreamingTimestampDecoder
 from service_asr.model.chunkformer.asr_model import ASRModel
+from service_asr.model.audio_extraction import decode_audio, stream_audio
 from service_asr.core.schema import ASRConfig, ASRResult, TimestampedToken
 
+# Kaldi fbank framing at 16 kHz: 25 ms window, 10 ms shift.
+_FBANK_FRAME_LENGTH = 400
+_FBANK_FRAME_SHIFT = 160
+_FBANK_FRAMES_PER_SECOND = 100
+
+
+def _mel_bin_centers(num_bins: int = 80, low_freq: float = 20.0, high_freq: float = 8000.0) -> np.ndarray:
+    """Center frequencies (Hz) of Kaldi's triangular mel bins."""
+    def mel(f):
+        return 1127.0 * np.log(1.0 + f / 700.0)
+
+    edges = np.linspace(mel(low_freq), mel(high_freq), num_bins + 2)
+    return 700.0 * (np.exp(edges[1:-1] / 1127.0) - 1.0)
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """[start, end) index pairs of the True runs of a 1-D boolean mask."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)], axis=1)
+
+
+def detect_speech_spans(
+    feats: torch.Tensor,
+    padding_ms: int = 300,
+    min_silence_ms: int = 600,
+    min_speech_ms: int = 200,
+    align: int = 1,
+) -> list[tuple[int, int]]:
+    """
+    Energy/spectral voice activity detection on 80-dim log-mel fbank frames.
+
+    A frame is voiced when its energy clears an adaptive threshold between the
+    noise floor (10th percentile) and the speech level (95th percentile), and
+    most of its energy falls in the 250-4000 Hz speech band, which rejects
+    broadband noise. Gaps shorter than `min_silence_ms` are bridged, runs
+    shorter than `min_speech_ms` dropped, and the rest padded on both sides.
+
+    Args:
+        feats: [T, 80] fbank frames (10 ms shift).
+        align: Span starts are rounded down to a multiple of this many frames.
+
+    Returns:
+        Sorted, non-overlapping `[start, end)` spans in fbank frames. Audio with
+        too little dynamic range to tell speech from silence is returned whole.
+    """
+    n_frames = feats.shape[0]
+    if n_frames == 0:
+        return []
+
+    to_frames = _FBANK_FRAMES_PER_SECOND / 1000.0
+    feats = feats.float()
+    log_energy = torch.logsumexp(feats, dim=1).cpu().numpy()
+    centers = _mel_bin_centers(feats.shape[1])
+    in_band = torch.from_numpy((centers >= 250.0) & (centers <= 4000.0))
+    band_ratio = np.exp(torch.logsumexp(feats[:, in_band], dim=1).cpu().numpy() - log_energy)
+
+    noise_floor, speech_level = np.percentile(log_energy, [10, 95])
+    # ~13 dB: below this the track is uniformly loud or uniformly quiet.
+    if speech_level - noise_floor < 3.0:
+        return [(0, n_frames)]
+
+    threshold = noise_floor + 0.3 * (speech_level - noise_floor)
+    voiced = (log_energy > threshold) & (band_ratio >= 0.5)
+
+    min_silence = int(min_silence_ms * to_frames)
+    for start, end in _runs(~voiced):
+        if 0 < start and end < n_frames and end - start < min_silence:
+            voiced[start:end] = True
+
+    min_speech = int(min_speech_ms * to_frames)
+    padding = int(padding_ms * to_frames)
+    spans: list[tuple[int, int]] = []
+    for start, end in _runs(voiced):
+        if end - start < min_speech:
+            continue
+        start = max(int(start) - padding, 0) // align * align
+        end = min(int(end) + padding, n_frames)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
 
 class ASRProcessor:
     def __init__(self, model_checkpoint: str, device: str = "cuda"):
@@ -65,7 +149,9 @@ class ASRProcessor:
 
     def time_transform(self, tokens: List[Dict[str, str]], video_path: str) -> List[TimestampedToken]:
         """Convert timestamps to frames and create TimestampedToken objects."""
-        fps = self.extract_fps(video_path)
+        return self._to_timestamped_tokens(tokens, self.extract_fps(video_path))
+
+    def _to_timestamped_tokens(self, tokens: List[Dict[str, str]], fps: float) -> List[TimestampedToken]:
         result = []
         
         for token in tokens:
@@ -83,69 +169,34 @@ class ASRProcessor:
         return result
 
 
-    def load_audio(self, audio_path: Path) -> torch.Tensor:
-        """Load and preprocess audio file without pydub.
+    def extract_audio(
+        self,
+        video_path: Path,
+        sample_rate: int = 16000,
+        start: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> Optional[torch.Tensor]:
+        """Decode the audio track into a [1, T] float tensor, without a temp wav.
 
-        - Loads with torchaudio
-        - Converts to mono, 16 kHz
-        - Scales to int16 range to match prior behavior
+        ffmpeg resamples to mono `sample_rate` s16le and pipes the PCM straight
+        into memory; samples keep the int16 amplitude range expected by the
+        Kaldi fbank frontend. `start`/`duration` (seconds) restrict decoding to
+        a time range. Returns None when the video has no decodable audio.
         """
-        waveform, sr = torchaudio.load(str(audio_path))
-        # ensure 2D [channels, time]
-        if waveform.ndim == 1:
-            waveform = waveform.unsqueeze(0)
-        # convert to mono
-        if waveform.shape[0] > 1:
-            waveform = waveform.mean(dim=0, keepdim=True)
-        # resample if needed
-        if sr != 16000:
-            resampler = torchaudio.transforms.Resample(orig_freq=sr, new_freq=16000)
-            waveform = resampler(waveform)
-        # match previous amplitude scale (int16 to float32)
-        waveform = (waveform * 32768.0).to(torch.float32)
-        return waveform
-
-    def extract_audio(self, video_path: Path, output_path: Path, sample_rate: int = 16000) -> bool:
-        """Extract audio from video file."""
         try:
-            video = VideoFileClip(str(video_path))
-            audio = video.audio
-            
-            if audio is None:
-                return False
-
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            final_wav = output_path.with_suffix('.wav')
-            # Force mono (1 channel) and 16-bit PCM at desired sample rate
-            audio.write_audiofile(
-                str(final_wav),
-                fps=sample_rate,          # this sets audio sample rate
-                codec='pcm_s16le',        # 16-bit PCM
-                ffmpeg_params=['-ac', '1'],  # force mono
-                logger=None
-            )
-            video.close()
-            
-            return True
-        except Exception as e:
-            print(f"Audio extraction failed: {e}")
-            return False
+            pcm = decode_audio(video_path, sample_rate, start=start, duration=duration)
+        except ffmpeg.Error as e:
+            print(f"Audio extraction failed: {e.stderr.decode(errors='ignore') if e.stderr else e}")
+            return None
+        if pcm.size == 0:
+            return None
+        return torch.from_numpy(pcm.astype(np.float32)).unsqueeze(0)
         
 
-    @torch.no_grad()
-    def process_audio(self, audio_path: Path, video_path: str, config: ASRConfig) -> ASRResult:
-        print(f"Extracting asr {audio_path}, {video_path}")
-        """Process audio file with ASR."""
-        start_time = time.time()
-        
-        def get_max_input_context(c: int, r: int, n: int) -> int:
-            return r + max(c, r) * (n - 1)
-
-        waveform = self.load_audio(audio_path)
-        audio_duration = len(waveform[0]) / 16000.0
-        
-        offset = torch.zeros(1, dtype=torch.int, device=self.device)
-        xs = kaldi.fbank(
+    @staticmethod
+    def compute_fbank(waveform: torch.Tensor) -> torch.Tensor:
+        """80-dim Kaldi fbank (25 ms window, 10 ms shift) of a [1, T] 16 kHz waveform."""
+        return kaldi.fbank(
             waveform,
             num_mel_bins=80,
             frame_length=25,
@@ -153,43 +204,84 @@ class ASRProcessor:
             dither=0.0,
             energy_floor=0.0,
             sample_frequency=16000
-        ).unsqueeze(0)
+        )
 
-        subsampling_factor = self.model.encoder.embed.subsampling_factor
-        conv_lorder = self.model.encoder.cnn_module_kernel // 2
-        max_length_limited_context = int((config.total_batch_duration // 0.01)) // 2
-        multiply_n = max_length_limited_context // config.chunk_size // subsampling_factor
+    @classmethod
+    def stream_fbank(cls, blocks: Iterable[np.ndarray | torch.Tensor]) -> Iterator[torch.Tensor]:
+        """Compute fbank frames incrementally over consecutive blocks of 16 kHz samples.
+
+        Each block is prefixed with the samples left over from the previous one
+        (the 15 ms window overhang plus any remainder below one frame shift), so
+        the concatenated output is frame-for-frame identical to `compute_fbank`
+        on the whole signal while only one block is held in memory.
+        """
+        frame_length, frame_shift = _FBANK_FRAME_LENGTH, _FBANK_FRAME_SHIFT
+        carry = torch.zeros(0, dtype=torch.float32)
+        for block in blocks:
+            samples = torch.as_tensor(block).to(torch.float32).reshape(-1)
+            buffer = torch.cat([carry, samples])
+            if buffer.numel() < frame_length:
+                carry = buffer
+                continue
+            n_frames = 1 + (buffer.numel() - frame_length) // frame_shift
+            used = (n_frames - 1) * frame_shift + frame_length
+            yield cls.compute_fbank(buffer[:used].unsqueeze(0))
+            carry = buffer[n_frames * frame_shift:]
+
+    def _encode_blocks(
+        self,
+        feats: Iterable[torch.Tensor],
+        config: ASRConfig,
+        window_duration: int,
+        release_cuda_cache: bool = True,
+    ) -> Iterator[torch.Tensor]:
+        """Run the chunked encoder over a stream of fbank frames and yield CTC hyps per window.
+
+        Frames are buffered until one window (`truncated_context_size` encoder
+        frames) plus its right-context lookahead is available. The attention and
+        convolution caches and the positional offset are carried from one window
+        to the next as left context, and each window's lookahead outputs are
+        dropped so the yielded hyps concatenate into one continuous sequence.
+        """
+        def get_max_input_context(c: int, r: int, n: int) -> int:
+            return r + max(c, r) * (n - 1)
+
+        encoder = self.model.encoder
+        subsampling_factor = encoder.embed.subsampling_factor
+        conv_lorder = encoder.cnn_module_kernel // 2
+        max_length_limited_context = int((window_duration // 0.01)) // 2
+        multiply_n = max(max_length_limited_context // config.chunk_size // subsampling_factor, 1)
         truncated_context_size = config.chunk_size * multiply_n
+        step = truncated_context_size * subsampling_factor
 
         rel_right_context_size = get_max_input_context(
             config.chunk_size, 
             max(config.right_context_size, conv_lorder), 
-            self.model.encoder.num_blocks
+            encoder.num_blocks
         ) * subsampling_factor
+        window_frames = step + 7 + rel_right_context_size
 
-        hyps = []
+        offset = torch.zeros(1, dtype=torch.int, device=self.device)
         att_cache = torch.zeros((
-            self.model.encoder.num_blocks, 
+            encoder.num_blocks, 
             config.left_context_size, 
-            self.model.encoder.attention_heads, 
-            self.model.encoder._output_size * 2 // self.model.encoder.attention_heads
+            encoder.attention_heads, 
+            encoder._output_size * 2 // encoder.attention_heads
         )).to(self.device)
         
         cnn_cache = torch.zeros((
-            self.model.encoder.num_blocks, 
-            self.model.encoder._output_size, 
+            encoder.num_blocks, 
+            encoder._output_size, 
             conv_lorder
         )).to(self.device)
 
-        for idx in range(0, xs.shape[1], truncated_context_size * subsampling_factor):
-            start = max(truncated_context_size * subsampling_factor * idx, 0)
-            end = min(truncated_context_size * subsampling_factor * (idx + 1) + 7, xs.shape[1])
-
-            x = xs[:, start:end + rel_right_context_size]
+        def run_window(x: torch.Tensor, is_last: bool) -> torch.Tensor:
+            nonlocal att_cache, cnn_cache, offset
+            x = x.unsqueeze(0)
             x_len = torch.tensor([x[0].shape[0]], dtype=torch.int).to(self.device)
 
             encoder_outs, encoder_lens, _, att_cache, cnn_cache, offset = \
-                self.model.encoder.forward_parallel_chunk(
+                encoder.forward_parallel_chunk(
                     xs=x,
                     xs_origin_lens=x_len,
                     chunk_size=config.chunk_size,
@@ -202,22 +294,78 @@ class ASRProcessor:
                 )
 
             encoder_outs = encoder_outs.reshape(1, -1, encoder_outs.shape[-1])[:, :encoder_lens]
-            
-            if config.chunk_size * multiply_n * subsampling_factor * idx + rel_right_context_size < xs.shape[1]:
+            if not is_last:
                 encoder_outs = encoder_outs[:, :truncated_context_size]
             
             offset = offset - encoder_lens + encoder_outs.shape[1]
-            hyp = self.model.encoder.ctc_forward(encoder_outs).squeeze(0)
-            hyps.append(hyp)
+            hyp = encoder.ctc_forward(encoder_outs).squeeze(0)
             
-            if self.device.type == "cuda":
+            if release_cuda_cache and self.device.type == "cuda":
                 torch.cuda.empty_cache()
-            
-            if config.chunk_size * multiply_n * subsampling_factor * idx + rel_right_context_size >= xs.shape[1]:
+            return hyp
+
+        pending = torch.zeros((0, 80), dtype=torch.float32)
+        for feat in feats:
+            pending = torch.cat([pending, feat])
+            # A full window with lookahead is buffered, so more audio follows it.
+            while pending.shape[0] >= window_frames:
+                yield run_window(pending[:window_frames], is_last=False)
+                pending = pending[step:]
+
+        # End of stream: the remaining frames are the tail of the signal.
+        while pending.shape[0] > 0:
+            is_last = pending.shape[0] <= rel_right_context_size
+            yield run_window(pending[:window_frames], is_last=is_last)
+            if is_last:
                 break
+            pending = pending[step:]
+
+    def _encode_speech_spans(self, xs: torch.Tensor, config: ASRConfig) -> torch.Tensor:
+        """Encode only the VAD speech spans of `xs` and lay their CTC output on the full timeline.
+
+        Spans start on encoder-frame boundaries, so a span's hyps land at
+        `start // subsampling_factor` and the skipped stretches become blanks:
+        token timestamps come out in original-audio time.
+        """
+        subsampling_factor = self.model.encoder.embed.subsampling_factor
+        spans = detect_speech_spans(
+            xs,
+            padding_ms=config.vad_padding_ms,
+            min_silence_ms=config.vad_min_silence_ms,
+            align=subsampling_factor,
+        )
+        n_out = max(xs.shape[0] // subsampling_factor, 1)
+        hyp = torch.zeros(n_out, dtype=torch.long)
+
+        voiced = 0
+        for start, end in spans:
+            hyps = list(self._encode_blocks([xs[start:end]], config, config.total_batch_duration))
+            if not hyps:
+                continue
+            span_hyp = torch.cat(hyps).cpu()
+            offset = start // subsampling_factor
+            n = max(min(span_hyp.numel(), n_out - offset), 0)
+            hyp[offset:offset + n] = span_hyp[:n]
+            voiced += end - start
+
+        print(f"VAD kept {voiced / _FBANK_FRAMES_PER_SECOND:.1f}s of {xs.shape[0] / _FBANK_FRAMES_PER_SECOND:.1f}s in {len(spans)} spans")
+        return hyp
 
-        hyps = torch.cat(hyps)
-        raw_tokens = get_output_with_timestamps([hyps], self.char_dict)[0]
+    @torch.no_grad()
+    def process_audio(self, waveform: torch.Tensor, video_path: str, config: ASRConfig) -> ASRResult:
+        print(f"Extracting asr {video_path}")
+        """Process a decoded [1, T] waveform with ASR."""
+        start_time = time.time()
+        audio_duration = len(waveform[0]) / 16000.0
+        
+        xs = self.compute_fbank(waveform)
+        if config.vad:
+            hyp = self._encode_speech_spans(xs, config)
+        else:
+            hyps = list(self._encode_blocks([xs], config, config.total_batch_duration))
+            hyp = torch.cat(hyps) if hyps else None
+
+        raw_tokens = get_output_with_timestamps([hyp], self.char_dict)[0] if hyp is not None else []
         tokens = self.time_transform(raw_tokens, video_path)
         
         processing_time = time.time() - start_time
@@ -227,3 +375,48 @@ class ASRProcessor:
             processing_time_seconds=processing_time,
             audio_duration_seconds=audio_duration
         )
+
+    @torch.no_grad()
+    def iter_transcribe(
+        self,
+        blocks: Iterable[np.ndarray | torch.Tensor],
+        config: ASRConfig,
+        fps: float,
+    ) -> Iterator[TimestampedToken]:
+        """Streaming ASR over consecutive blocks of 16 kHz samples.
+
+        fbank and encoder output are computed one `stream_window_duration`
+        window at a time, so peak memory does not depend on the audio length,
+        and tokens are yielded as soon as their trailing silence is decoded.
+        """
+        decoder = StreamingTimestampDecoder(self.char_dict)
+        feats = self.stream_fbank(blocks)
+        for hyp in self._encode_blocks(feats, config, config.stream_window_duration, release_cuda_cache=False):
+            yield from self._to_timestamped_tokens(decoder.feed(hyp), fps)
+        yield from self._to_timestamped_tokens(decoder.flush(), fps)
+
+    def transcribe_stream(self, video_path: Path, config: ASRConfig) -> Iterator[TimestampedToken]:
+        """Decode audio from the ffmpeg pipe and stream timestamped tokens for `video_path`."""
+        fps = self.extract_fps(str(video_path))
+        blocks = stream_audio(video_path, config.sample_rate)
+        return self.iter_transcribe(blocks, config, fps)
+
+    def process_video_streaming(self, video_path: Path, config: ASRConfig) -> ASRResult:
+        """Streaming counterpart of `extract_audio` + `process_audio` with bounded memory."""
+        print(f"Extracting asr (streaming) {video_path}")
+        start_time = time.time()
+        fps = self.extract_fps(str(video_path))
+        n_samples = 0
+
+        def counted_blocks() -> Iterator[np.ndarray]:
+            nonlocal n_samples
+            for block in stream_audio(video_path, config.sample_rate):
+                n_samples += block.size
+                yield block
+
+        tokens = list(self.iter_transcribe(counted_blocks(), config, fps))
+        return ASRResult(
+            tokens=tokens,
+            processing_time_seconds=time.time() - start_time,
+            audio_duration_seconds=n_samples / float(config.sample_rate),
+        )
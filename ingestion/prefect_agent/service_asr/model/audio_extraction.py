@@ -1,26 +1,122 @@
 import os
 from pathlib import Path
-from moviepy import VideoFileClip
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, List, Tuple
+from typing import Iterator, Optional, List, Tuple
+
+import ffmpeg
+import numpy as np
+
+
+def _pcm_stream(
+    video_path: Path | str,
+    sample_rate: int = 16000,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+):
+    """Build the ffmpeg graph that decodes the audio track to mono s16le PCM on stdout.
+
+    `start`/`duration` are passed as input options (`-ss`/`-t`) so ffmpeg seeks
+    before decoding and only the requested time range is read.
+    """
+    input_kwargs: dict[str, float] = {}
+    if start:
+        input_kwargs["ss"] = start
+    if duration is not None:
+        input_kwargs["t"] = duration
+    return (
+        ffmpeg
+        .input(str(video_path), **input_kwargs)
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=sample_rate)
+        .global_args("-nostdin", "-loglevel", "error")
+    )
+
+
+def decode_audio(
+    video_path: Path | str,
+    sample_rate: int = 16000,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Decode the audio track of a video straight into memory.
+
+    Args:
+        video_path: Path (or URL understood by ffmpeg) of the input media.
+        sample_rate: Output sample rate in Hz.
+        start: Optional offset in seconds to start decoding from (`-ss`).
+        duration: Optional length in seconds to decode (`-t`).
+
+    Returns:
+        np.ndarray: 1-D int16 array of mono PCM samples.
+
+    Raises:
+        ffmpeg.Error: If ffmpeg fails, e.g. the file has no audio stream.
+    """
+    out, _ = _pcm_stream(video_path, sample_rate, start, duration).run(
+        capture_stdout=True, capture_stderr=True
+    )
+    return np.frombuffer(out, np.int16)
+
+
+def stream_audio(
+    video_path: Path | str,
+    sample_rate: int = 16000,
+    block_seconds: float = 5.0,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Decode the audio track of a video as a stream of fixed-size PCM blocks.
+
+    Unlike `decode_audio`, the full track is never held in memory: ffmpeg
+    writes to a pipe that is read `block_seconds` at a time, and the last
+    block may be shorter.
+
+    Yields:
+        np.ndarray: 1-D int16 arrays of mono PCM samples.
+
+    Raises:
+        ffmpeg.Error: If ffmpeg exits with a non-zero status.
+    """
+    block_bytes = max(int(block_seconds * sample_rate), 1) * 2
+    process = _pcm_stream(video_path, sample_rate, start, duration).run_async(
+        pipe_stdout=True, pipe_stderr=True
+    )
+    try:
+        pending = b""
+        while True:
+            chunk = process.stdout.read(block_bytes - len(pending))
+            if not chunk:
+                break
+            pending += chunk
+            if len(pending) == block_bytes:
+                yield np.frombuffer(pending, np.int16)
+                pending = b""
+        if len(pending) >= 2:
+            yield np.frombuffer(pending[: len(pending) - len(pending) % 2], np.int16)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise ffmpeg.Error("ffmpeg", b"", stderr)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
 
 
 def extract_audio(video_path: Path, output_path: Path, sample_rate=16000):
-    video = VideoFileClip(str(video_path))
-    audio = video.audio
-    if audio is None:
-        print(f"No audio in {video_path}")
-        return
     output_path.parent.mkdir(parents=True, exist_ok=True)
     final_wav = output_path.with_suffix('.wav')
-    audio.write_audiofile(
-        str(final_wav),
-        fps=sample_rate,
-        codec='pcm_s16le',
-        ffmpeg_params=['-ac', '1'],
-        logger=None,
-    )
+    try:
+        (
+            ffmpeg
+            .input(str(video_path))
+            .output(str(final_wav), acodec="pcm_s16le", ac=1, ar=sample_rate)
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        print(f"No audio in {video_path}: {e.stderr.decode(errors='ignore')}")
 
 async def worker(
     work_queue: asyncio.Queue[tuple[Path, Path, int] | None], 
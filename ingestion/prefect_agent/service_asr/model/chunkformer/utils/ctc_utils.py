@@ -1,4 +1,5 @@
-import math
+import torch
+
 from .common import remove_duplicates_and_blank
 
 def class2str(target, char_dict):
@@ -38,51 +39,127 @@ def get_output(hyps, char_dict):
     return decodes
 
 
+def _timestamp_item(token_ids, start, end, char_dict):
+    return {
+        "decode": class2str(token_ids, char_dict),
+        "start": milliseconds_to_hhmmssms(start * 8 * 10),
+        "end": milliseconds_to_hhmmssms(end * 8 * 10)
+    }
+
+
+def ctc_segments(tokens, offset=0, prev_end=None, final=True, max_silence=20):
+    """Split a greedy CTC sequence into segments separated by `max_silence` blanks.
+
+    Vectorized over the non-blank positions: a segment closes `max_silence`
+    frames after its last token when at least that many blanks follow, the
+    first segment starts `max_silence // 2` frames before its first token and
+    later ones halfway between the previous end and their first token. Tokens
+    are collapsed with `unique_consecutive` within each segment, which matches
+    `remove_duplicates_and_blank` on the segment's non-blank tokens.
+
+    Args:
+        tokens: 1-D tensor of CTC argmax ids (0 is blank).
+        offset: Global frame index of `tokens[0]`.
+        prev_end: Global end frame of the previous segment, if any.
+        final: Whether the sequence ends here; if so, a trailing open segment
+            ends on the last frame, otherwise it is left unconsumed.
+
+    Returns:
+        (segments, consumed): a list of `(start, end, token_ids)` in global
+        frames and the number of leading frames that no longer affect output.
+    """
+    tokens = torch.as_tensor(tokens).cpu().reshape(-1)
+    length = tokens.numel()
+    nz = torch.nonzero(tokens).squeeze(1)
+    if nz.numel() == 0:
+        return [], length
+
+    # Blanks following each non-blank token, up to the next one or the end.
+    gaps = torch.empty_like(nz)
+    gaps[:-1] = nz[1:] - nz[:-1] - 1
+    gaps[-1] = length - 1 - nz[-1]
+    closes = gaps >= max_silence
+
+    last_idx = torch.nonzero(closes).squeeze(1)
+    ends = (nz[last_idx] + max_silence + offset).tolist()
+    last_idx = last_idx.tolist()
+    consumed = ends[-1] - offset + 1 if ends else 0
+    if not closes[-1]:
+        if not final:
+            return _build_segments(tokens, nz, closes, last_idx, ends, offset, prev_end), consumed
+        last_idx.append(nz.numel() - 1)
+        ends.append(offset + length - 1)
+    if final:
+        consumed = length
+    return _build_segments(tokens, nz, closes, last_idx, ends, offset, prev_end), consumed
+
+
+def _build_segments(tokens, nz, closes, last_idx, ends, offset, prev_end):
+    if not last_idx:
+        return []
+    values = tokens[nz]
+    # Segment ids per non-blank token; a new segment begins after each close.
+    seg_ids = torch.cumsum(torch.cat([closes.new_zeros(1), closes[:-1]]).long(), dim=0)
+    collapsed, counts = torch.unique_consecutive(torch.stack([seg_ids, values]), dim=1, return_counts=True)
+    first_pos = torch.cumsum(counts, dim=0) - counts
+    n_per_seg = torch.bincount(collapsed[0], minlength=len(last_idx))[:len(last_idx)].tolist()
+    first_nz = nz[first_pos].tolist()
+    token_ids = collapsed[1].tolist()
+
+    segments = []
+    cursor = 0
+    for end, n in zip(ends, n_per_seg):
+        first = first_nz[cursor] + offset
+        if prev_end is None:
+            start = max(first - 10, 0)
+        else:
+            start = (first + prev_end + 1) // 2
+        segments.append((start, end, token_ids[cursor:cursor + n]))
+        cursor += n
+        prev_end = end
+    return segments
+
+
 def get_output_with_timestamps(hyps, char_dict):
     decodes = []
-    max_silence = 20
     for tokens in hyps: # cost O(input_batch_size | ccu)
-        tokens = tokens.cpu()
-        start = -1
-        end = -1
-        prev_end = -1
-        silence_cum = 0
-        decode_per_time = []
-        decode = []
-        for time_stamp, token in enumerate(tokens):
-            if token == 0:
-                silence_cum += 1
-            else:
-                if (start == -1) and (end == -1):
-                    if prev_end != -1:
-                        start = math.ceil((time_stamp + prev_end)/2)
-                    else:
-                        start = max(time_stamp - int(max_silence/2), 0)
-                silence_cum = 0
-                decode_per_time.append(token)
-                    
-            if (silence_cum == max_silence) and (start != -1):
-                end = time_stamp
-                prev_end = end
-                item = {
-                    "decode": class2str(remove_duplicates_and_blank(decode_per_time), char_dict),
-                    "start": milliseconds_to_hhmmssms(start * 8 * 10),
-                    "end": milliseconds_to_hhmmssms(end * 8 * 10)
-                }
-                decode.append(item)
-                decode_per_time = []
-                start = -1
-                end = -1
-                silence_cum = 0
-            
-
-        if (start != -1) and (end == -1) and (len(decode_per_time) > 0):
-            item = {
-                "decode": class2str(remove_duplicates_and_blank(decode_per_time), char_dict),
-                "start": milliseconds_to_hhmmssms(start * 8 * 10),
-                "end": milliseconds_to_hhmmssms(time_stamp * 8 * 10)
-            }
-            decode.append(item)
-        decodes.append(decode)
-
-    return decodes
\ No newline at end of file
+        segments, _ = ctc_segments(tokens)
+        decodes.append([_timestamp_item(ids, start, end, char_dict) for start, end, ids in segments])
+
+    return decodes
+
+
+class StreamingTimestampDecoder:
+    """Resumable form of `get_output_with_timestamps` for a single hypothesis.
+
+    `feed` consumes the next CTC frames and returns the segments closed by
+    them; `flush` returns the trailing open segment once the stream ends.
+    Feeding any split of a hypothesis and then flushing yields the same
+    segments as `get_output_with_timestamps([hyp], char_dict)[0]`. Only the
+    frames of the still-open segment are buffered between calls.
+    """
+
+    max_silence = 20
+
+    def __init__(self, char_dict):
+        self.char_dict = char_dict
+        self.buffer = torch.zeros(0, dtype=torch.long)
+        self.offset = 0
+        self.prev_end = None
+
+    def _decode(self, final):
+        segments, consumed = ctc_segments(
+            self.buffer, self.offset, self.prev_end, final=final, max_silence=self.max_silence
+        )
+        if segments:
+            self.prev_end = segments[-1][1]
+        self.buffer = self.buffer[consumed:]
+        self.offset += consumed
+        return [_timestamp_item(ids, start, end, self.char_dict) for start, end, ids in segments]
+
+    def feed(self, tokens):
+        self.buffer = torch.cat([self.buffer, torch.as_tensor(tokens).cpu().reshape(-1).long()])
+        return self._decode(final=False)
+
+    def flush(self):
+        return self._decode(final=True)
@@ -1,16 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Literal
+from typing import Any, AsyncIterator, Dict, Literal
 
+import torch
 from loguru import logger
 
 from service_asr.model.asr_core import ASRProcessor
 from service_asr.core.config import ASRServiceConfig
-from service_asr.core.schema import ASRConfig, ASRInferenceRequest, ASRInferenceResponse, ASRResult
+from service_asr.core.schema import ASRConfig, ASRInferenceRequest, ASRInferenceResponse, ASRResult, TimestampedToken
 from shared.registry import BaseModelHandler, register_model
 from shared.schema import ModelInfo
 from service_asr.util import resolve_video_url
@@ -21,7 +21,7 @@ from shared.util import fetch_object_from_s3
 @dataclass(slots=True)
 class _PreparedInput:
     video_path: Path
-    audio_path: Path
+    waveform: torch.Tensor | None
     config: ASRConfig
     delete_video_on_cleanup: bool
 
@@ -70,29 +70,25 @@ class ChunkformerASRHandler(BaseModelHandler[ASRInferenceRequest, ASRInferenceRe
         if not source:
             raise ValueError("No input video provided (expected 'video_minio_url' or 'video_path')")
 
-        delete_video_on_cleanup = False
-        local_video_path: Path
-        logger.info("fetching_video_from_s3", url=source)
-        storage = StorageClient(MinioSettings())
-        local_path_str = await fetch_object_from_s3(source, storage, suffix=".mp4")
-        local_video_path = Path(local_path_str)
+        local_video_path = await self._fetch_video(source)
         delete_video_on_cleanup = True
 
-        if not local_video_path.exists():
-            raise FileNotFoundError(f"Video file not found: {local_video_path}")
-
-        temp_dir = Path(self._service_config.temp_dir)
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        audio_path = temp_dir / f"{uuid.uuid4().hex}"
+        if config.streaming:
+            # Audio is decoded window by window during inference.
+            return _PreparedInput(
+                video_path=local_video_path,
+                waveform=None,
+                config=config,
+                delete_video_on_cleanup=delete_video_on_cleanup,
+            )
 
         logger.info("extracting_audio", video=str(local_video_path))
-        success = await asyncio.to_thread(
+        waveform = await asyncio.to_thread(
             self._processor.extract_audio,
             local_video_path,
-            audio_path,
             config.sample_rate,
         )
-        if not success:
+        if waveform is None:
             if delete_video_on_cleanup and local_video_path.exists():
                 try:
                     local_video_path.unlink()
@@ -102,7 +98,7 @@ class ChunkformerASRHandler(BaseModelHandler[ASRInferenceRequest, ASRInferenceRe
 
         return _PreparedInput(
             video_path=local_video_path,
-            audio_path=audio_path.with_suffix(".wav"),
+            waveform=waveform,
             config=config,
             delete_video_on_cleanup=delete_video_on_cleanup,
         )
@@ -112,23 +108,21 @@ class ChunkformerASRHandler(BaseModelHandler[ASRInferenceRequest, ASRInferenceRe
             raise RuntimeError("Chunkformer model not loaded")
 
         logger.info("running_asr_inference", video=str(preprocessed_data.video_path))
-        try:
+        if preprocessed_data.waveform is None:
             result: ASRResult = await asyncio.to_thread(
+                self._processor.process_video_streaming,
+                preprocessed_data.video_path,
+                preprocessed_data.config,
+            )
+        else:
+            result = await asyncio.to_thread(
                 self._processor.process_audio,
-                preprocessed_data.audio_path,
+                preprocessed_data.waveform,
                 str(preprocessed_data.video_path),
                 preprocessed_data.config,
             )
-        except Exception:
-            if preprocessed_data.audio_path.exists():
-                try:
-                    preprocessed_data.audio_path.unlink()
-                except OSError:
-                    logger.warning("audio_cleanup_failed_on_error", path=str(preprocessed_data.audio_path))
-            raise
         return {
             "result": result,
-            "audio_path": preprocessed_data.audio_path,
             "video_path": preprocessed_data.video_path,
             "delete_video_on_cleanup": preprocessed_data.delete_video_on_cleanup,
         }
@@ -138,13 +132,6 @@ class ChunkformerASRHandler(BaseModelHandler[ASRInferenceRequest, ASRInferenceRe
         output_data: Dict[str, Any],
         original_input_data: ASRInferenceRequest,
     ) -> ASRInferenceResponse:
-        audio_path: Path = output_data["audio_path"]
-        if audio_path.exists():
-            try:
-                audio_path.unlink()
-            except OSError:
-                logger.warning("audio_cleanup_failed", path=str(audio_path))
-
         # Cleanup transient video file if we created one
         try:
             if output_data.get("delete_video_on_cleanup"):
@@ -164,6 +151,41 @@ class ChunkformerASRHandler(BaseModelHandler[ASRInferenceRequest, ASRInferenceRe
             status="success",
         )
 
+    async def stream_tokens(self, input_data: ASRInferenceRequest) -> AsyncIterator[TimestampedToken]:
+        """Transcribe with bounded memory, yielding tokens as soon as each segment closes."""
+        if self._processor is None:
+            raise RuntimeError("Chunkformer model not loaded")
+
+        config = input_data.config or self._default_config()
+        source = input_data.video_minio_url or getattr(input_data, "video_path", None)
+        if not source:
+            raise ValueError("No input video provided (expected 'video_minio_url' or 'video_path')")
+
+        local_video_path = await self._fetch_video(source)
+        try:
+            tokens = await asyncio.to_thread(self._processor.transcribe_stream, local_video_path, config)
+            while True:
+                token = await asyncio.to_thread(next, tokens, None)
+                if token is None:
+                    break
+                yield token
+        finally:
+            try:
+                if local_video_path.exists():
+                    local_video_path.unlink()
+            except OSError:
+                logger.warning("video_cleanup_failed", path=str(local_video_path))
+
+    async def _fetch_video(self, source: str) -> Path:
+        logger.info("fetching_video_from_s3", url=source)
+        storage = StorageClient(MinioSettings())
+        local_path_str = await fetch_object_from_s3(source, storage, suffix=".mp4")
+        local_video_path = Path(local_path_str)
+
+        if not local_video_path.exists():
+            raise FileNotFoundError(f"Video file not found: {local_video_path}")
+        return local_video_path
+
     def _default_config(self) -> ASRConfig:
         cfg = self._service_config
         return ASRConfig(
@@ -174,4 +196,9 @@ class ChunkformerASRHandler(BaseModelHandler[ASRInferenceRequest, ASRInferenceRe
             sample_rate=cfg.default_sample_rate,
             num_extraction_workers=cfg.default_num_extraction_workers,
             num_asr_workers=cfg.default_num_asr_workers,
+            streaming=cfg.default_streaming,
+            stream_window_duration=cfg.default_stream_window_duration,
+            vad=cfg.default_vad,
+            vad_padding_ms=cfg.default_vad_padding_ms,
+            vad_min_silence_ms=cfg.default_vad_min_silence_ms,
         )
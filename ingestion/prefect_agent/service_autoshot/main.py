@@ -15,6 +15,8 @@ from service_autoshot.core.api import router
 from service_autoshot.core.config import autoshot_config
 from service_autoshot.core.dependency import get_service
 from service_autoshot.core.lifespan import lifespan
+from shared.profiling import profiling_router
+from shared.tracing import TraceContextMiddleware
 
 
 app = FastAPI(
@@ -25,6 +27,8 @@ app = FastAPI(
 )
 
 app.include_router(router, prefix="/autoshot", tags=["autoshot"])
+app.include_router(profiling_router(get_service))
+app.add_middleware(TraceContextMiddleware)
 
 
 @app.get("/health")
@@ -16,6 +16,8 @@ from service_image_embedding.core.api import router
 from service_image_embedding.core.config import image_embedding_config
 from service_image_embedding.core.dependencies import get_service
 from service_image_embedding.core.lifespan import lifespan
+from shared.profiling import profiling_router
+from shared.tracing import TraceContextMiddleware
 
 app = FastAPI(
     title="Image Embedding Service",
@@ -25,6 +27,8 @@ app = FastAPI(
 )
 
 app.include_router(router, prefix="/image-embedding", tags=["image-embedding"])
+app.include_router(profiling_router(get_service))
+app.add_middleware(TraceContextMiddleware)
 
 
 @app.get("/health")
@@ -38,6 +38,23 @@ class LLMServiceConfig(ServiceConfig):
         description="X-Title header sent to OpenRouter",
     )
 
+    # Upstream throughput controls shared by all in-flight requests
+    rate_limit_rpm: int | None = Field(
+        default=None,
+        ge=1,
+        description="Provider requests-per-minute budget (unset disables the limit)",
+    )
+    rate_limit_tpm: int | None = Field(
+        default=None,
+        ge=1,
+        description="Provider tokens-per-minute budget (unset disables the limit)",
+    )
+    rate_limit_max_retries: int = Field(default=5, ge=0, description="Retries on HTTP 429 / quota errors")
+    image_token_estimate: int = Field(default=800, ge=0, description="Assumed prompt tokens per image before usage is known")
+    output_token_estimate: int = Field(default=512, ge=0, description="Assumed completion tokens before usage is known")
+    http_timeout_seconds: float = Field(default=60.0, gt=0)
+    http_max_connections: int = Field(default=32, ge=1, description="Pooled upstream connections")
+
     log_level: LogLevel = Field(default=LogLevel.DEBUG)
     log_format: str = Field(default="console")
     log_retention: str = Field(default="30 days")
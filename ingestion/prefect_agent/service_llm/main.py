@@ -16,6 +16,8 @@ from service_llm.core.api import router
 from service_llm.core.config import llm_service_config
 from service_llm.core.dependencies import get_service
 from service_llm.core.lifespan import lifespan
+from shared.profiling import profiling_router
+from shared.tracing import TraceContextMiddleware
 
 app = FastAPI(
     title="LLM Service",
@@ -25,6 +27,8 @@ app = FastAPI(
 )
 
 app.include_router(router, prefix="/llm", tags=["llm"])
+app.include_router(profiling_router(get_service))
+app.add_middleware(TraceContextMiddleware)
 
 
 @app.get("/health")
@@ -8,7 +8,9 @@ from loguru import logger
 from PIL import Image
 
 from service_llm.core.config import LLMServiceConfig
+from service_llm.model.rate_limit import build_rate_limiter, estimate_request_tokens, reported_tokens
 from service_llm.schema import LLMRequest, LLMResponse
+from shared.rate_limit import RateLimitedError, call_with_rate_limit
 from shared.registry import BaseModelHandler, register_model
 from shared.schema import ModelInfo
 import base64
@@ -35,6 +37,8 @@ class GeminiAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
         self._api_key = config.gemini_api_key
         self._model_name = config.gemini_model_name
         self._client = None
+        self._config = config
+        self._limiter = build_rate_limiter(config)
 
     async def load_model_impl(self, device: Literal["cpu", "cuda"]) -> None:  
         if self._client is not None:
@@ -70,12 +74,19 @@ class GeminiAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
         prompt = preprocessed_data["prompt"]
         image_b64 = preprocessed_data["image_b64"]
 
-        def _call_api() -> Dict[str, Any]:
-            images = [_load_image_from_b64(path) for path in image_b64]
-            parts: list[Any] = []
-            parts.extend(images)
-            parts.append(prompt)
-            response = self._client.generate_content(parts)  # type: ignore[union-attr]
+        images = await asyncio.to_thread(lambda: [_load_image_from_b64(path) for path in image_b64 or []])
+        parts: list[Any] = []
+        parts.extend(images)
+        parts.append(prompt)
+
+        async def _call_api() -> Dict[str, Any]:
+            try:
+                response = await self._client.generate_content_async(parts)  # type: ignore[union-attr]
+            except Exception as exc:
+                # google.api_core.exceptions.ResourceExhausted carries code 429.
+                if getattr(exc, "code", None) == 429 or type(exc).__name__ == "ResourceExhausted":
+                    raise RateLimitedError(f"gemini rate limited: {exc}") from exc
+                raise
             answer_text = response.text if response and getattr(response, "text", None) else ""
 
             usage_metadata = getattr(response, "usage_metadata", None)
@@ -83,22 +94,19 @@ class GeminiAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
             completion_tokens = (
                 getattr(usage_metadata, "candidates_token_count", None) if usage_metadata else None
             )
-            print(
-                {
-                    "answer": answer_text,
-                    "input_tokens": prompt_tokens,
-                    "output_tokens": completion_tokens,
-                }
-
-            )
             return {
                 "answer": answer_text,
                 "input_tokens": prompt_tokens,
                 "output_tokens": completion_tokens,
             }
 
-        inference_result = await asyncio.to_thread(_call_api)
-        return inference_result
+        return await call_with_rate_limit(
+            self._limiter,
+            _call_api,
+            estimated_tokens=estimate_request_tokens(self._config, prompt, len(images)),
+            usage=reported_tokens,
+            max_retries=self._config.rate_limit_max_retries,
+        )
 
     async def postprocess_output(
         self,
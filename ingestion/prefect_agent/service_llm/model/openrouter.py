@@ -5,11 +5,13 @@ import json
 from pathlib import Path
 from typing import Any, Dict, Literal
 
-import requests
+import httpx
 from loguru import logger
 from PIL import Image
 from service_llm.core.config import LLMServiceConfig
+from service_llm.model.rate_limit import build_rate_limiter, estimate_request_tokens, reported_tokens
 from service_llm.schema import LLMRequest, LLMResponse
+from shared.rate_limit import RateLimitedError, call_with_rate_limit
 from shared.registry import BaseModelHandler, register_model
 from shared.schema import ModelInfo
 
@@ -22,6 +24,13 @@ from shared.schema import ModelInfo
 #             return base64.b64encode(fh.read()).decode("utf-8")
 
 
+def _parse_retry_after(value: str | None) -> float | None:
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
 @register_model("openrouter_api")
 class OpenRouterAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
     """Handler that routes multimodal prompts to OpenRouter-compatible endpoints."""
@@ -30,24 +39,32 @@ class OpenRouterAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
         super().__init__(model_name, config)
         if not config.openrouter_api_key:
             raise ValueError("OpenRouter handler requires OPENROUTER_API_KEY to be set")
+        self._config = config
         self._api_key = config.openrouter_api_key
         self._model_name = config.openrouter_model_name
         self._endpoint = config.openrouter_base_url
         self._referer = config.openrouter_referer
         self._title = config.openrouter_title or "Capstone LLM Service"
-        self._session: requests.Session = None #type:ignore
+        self._client: httpx.AsyncClient = None #type:ignore
+        self._limiter = build_rate_limiter(config)
 
 
     async def load_model_impl(self, device: Literal["cpu", "cuda"]) -> None:  # noqa: ARG002 device unused
-        if self._session is not None:
+        if self._client is not None:
             return
-        self._session = requests.Session()
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self._config.http_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=self._config.http_max_connections,
+                max_keepalive_connections=self._config.http_max_connections,
+            ),
+        )
         logger.info("openrouter_client_initialized", endpoint=self._endpoint)
 
     async def unload_model_impl(self) -> None:
-        if self._session is not None:
-            self._session.close()
-            self._session = None #type:ignore
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None #type:ignore
 
     def get_model_info(self) -> ModelInfo:
         return ModelInfo(model_name=self._model_name, model_type="openrouter_api")
@@ -60,44 +77,48 @@ class OpenRouterAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
         }
 
     async def run_inference(self, preprocessed_data: Dict[str, Any]) -> Dict[str, Any]:
-        if self._session is None:
+        if self._client is None:
             raise RuntimeError("OpenRouter session not initialized")
 
         prompt = preprocessed_data["prompt"]
-        image_base64 = preprocessed_data["image_base64"]
-
-        def _call_api() -> Dict[str, Any]:
-            content: list[Dict[str, Any]] = []
-            if prompt:
-                content.append({"type": "text", "text": prompt})
-            
-            if image_base64:
-                for img_b64 in image_base64:
-                    content.append({
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
-                    })
-
-            payload = {
-                "model": self._model_name,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": content,
-                    }
-                ],
-                "max_tokens": None,
-            }
-
-            headers = {
-                "Authorization": f"Bearer {self._api_key}",
-                "Content-Type": "application/json",
-                "X-Title": self._title,
-            }
-            if self._referer:
-                headers["HTTP-Referer"] = self._referer
+        image_base64 = preprocessed_data["image_base64"] or []
+
+        content: list[Dict[str, Any]] = []
+        if prompt:
+            content.append({"type": "text", "text": prompt})
+
+        for img_b64 in image_base64:
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
+            })
+
+        payload = {
+            "model": self._model_name,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content,
+                }
+            ],
+            "max_tokens": None,
+        }
 
-            response = self._session.post(self._endpoint, data=json.dumps(payload), headers=headers, timeout=60)
+        headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+            "X-Title": self._title,
+        }
+        if self._referer:
+            headers["HTTP-Referer"] = self._referer
+
+        async def _call_api() -> Dict[str, Any]:
+            response = await self._client.post(self._endpoint, content=json.dumps(payload), headers=headers)
+            if response.status_code == 429:
+                raise RateLimitedError(
+                    "openrouter rate limited",
+                    retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+                )
             if response.status_code >= 400:
                 logger.error(
                     "openrouter_request_failed",
@@ -105,7 +126,7 @@ class OpenRouterAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
                     body=response.text,
                 )
                 response.raise_for_status()
-        
+
             data = response.json()
             choices = data.get("choices", [])
             if not choices:
@@ -128,8 +149,13 @@ class OpenRouterAPIHandler(BaseModelHandler[LLMRequest, LLMResponse]):
                 "output_tokens": completion_tokens,
             }
 
-        response_payload = await asyncio.to_thread(_call_api)
-        return response_payload
+        return await call_with_rate_limit(
+            self._limiter,
+            _call_api,
+            estimated_tokens=estimate_request_tokens(self._config, prompt, len(image_base64)),
+            usage=reported_tokens,
+            max_retries=self._config.rate_limit_max_retries,
+        )
 
     async def postprocess_output(
         self,
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from service_llm.core.config import LLMServiceConfig
+from shared.rate_limit import RateLimiter
+
+
+def build_rate_limiter(config: LLMServiceConfig) -> RateLimiter:
+    return RateLimiter(
+        requests_per_minute=config.rate_limit_rpm,
+        tokens_per_minute=config.rate_limit_tpm,
+    )
+
+
+def estimate_request_tokens(config: LLMServiceConfig, prompt: str, num_images: int) -> int:
+    """Rough pre-flight token cost (~4 characters per token) used to admit a request."""
+    return len(prompt or "") // 4 + num_images * config.image_token_estimate + config.output_token_estimate
+
+
+def reported_tokens(payload: Dict[str, Any]) -> int | None:
+    if payload.get("input_tokens") is None and payload.get("output_tokens") is None:
+        return None
+    return (payload.get("input_tokens") or 0) + (payload.get("output_tokens") or 0)
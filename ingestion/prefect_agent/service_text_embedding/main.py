@@ -21,6 +21,8 @@ from service_text_embedding.core.api import router
 from service_text_embedding.core.config import text_embedding_config
 from service_text_embedding.core.dependencies import get_service
 from service_text_embedding.core.lifespan import lifespan
+from shared.profiling import profiling_router
+from shared.tracing import TraceContextMiddleware
 
 app = FastAPI(
     title="Text Embedding Service",
@@ -30,6 +32,8 @@ app = FastAPI(
 )
 
 app.include_router(router, prefix="/text-embedding", tags=["text-embedding"])
+app.include_router(profiling_router(get_service))
+app.add_middleware(TraceContextMiddleware)
 
 
 @app.get("/health")
@@ -23,6 +23,8 @@ class ServiceConfig(BaseSettings):
     host: str = Field(default="0.0.0.0", description="Service bind address")
     port: int = Field(..., description="Service port")
     cpu_fallback: bool
+    admin_token: str | None = Field(default=None, description="Token for the /admin endpoints; unset disables them")
+    profile_max_seconds: float = Field(default=120.0, description="Longest capture /admin/profile accepts")
 
     
 
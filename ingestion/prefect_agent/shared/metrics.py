@@ -40,6 +40,30 @@ class ServiceMetrics:
             registry=self.registry,
         )
         
+        self.phase_duration = Histogram(
+            "service_infer_phase_duration_seconds",
+            "Duration of one inference phase (preprocess, inference, postprocess)",
+            ["service", "phase"],
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+            registry=self.registry,
+        )
+
+        self.batch_size = Histogram(
+            "service_infer_batch_size",
+            "Items in one inference request",
+            ["service"],
+            buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+            registry=self.registry,
+        )
+
+        self.payload_bytes = Histogram(
+            "service_infer_payload_bytes",
+            "Size of the string and binary fields of one inference request",
+            ["service"],
+            buckets=tuple(float(1 << shift) for shift in range(10, 30, 2)),
+            registry=self.registry,
+        )
+
         self.request_errors = Counter(
             "service_request_errors_total",
             "Total number of request errors",
@@ -116,6 +140,13 @@ class ServiceMetrics:
             endpoint=endpoint,
         ).observe(duration_seconds)
     
+    def time_phase(self, phase: str):
+        return self.phase_duration.labels(service=self.service_name, phase=phase).time()
+
+    def observe_batch(self, batch_size: int, payload_bytes: int) -> None:
+        self.batch_size.labels(service=self.service_name).observe(batch_size)
+        self.payload_bytes.labels(service=self.service_name).observe(payload_bytes)
+    
     def update_cpu_usage(self, usage_percent: float):
         self.cpu_usage.labels(service=self.service_name).set(usage_percent)
     
@@ -0,0 +1,150 @@
+"""
+On-demand profiling of a running model service.
+
+`POST /admin/profile?seconds=N&mode=...` records for N seconds while the
+service keeps serving, then returns the capture as a file:
+
+- `cprofile`: deterministic profile of the event loop thread, as a
+  `.pstats` file (`python -m pstats`, snakeviz). Work a handler pushes to
+  `asyncio.to_thread` shows up only as the wait for it.
+- `torch`: `torch.profiler` CPU (and CUDA, when present) operator trace
+  as Chrome trace JSON (chrome://tracing, Perfetto).
+- `py-spy`: sampled stacks of every thread, native frames included, as
+  speedscope JSON. Needs the `py-spy` binary and ptrace permission
+  (`SYS_PTRACE` in a container).
+
+The endpoint is disabled unless `ADMIN_TOKEN` is set, and then requires it
+in the `X-Admin-Token` header. One capture runs at a time per process.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import math
+import os
+import secrets
+import shutil
+import tempfile
+from typing import Any, Callable, Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+from loguru import logger
+from starlette.background import BackgroundTask
+
+ProfileMode = Literal["cprofile", "torch", "py-spy"]
+
+_SUFFIX: dict[str, tuple[str, str]] = {
+    "cprofile": (".pstats", "application/octet-stream"),
+    "torch": (".trace.json", "application/json"),
+    "py-spy": (".speedscope.json", "application/json"),
+}
+
+_capture_lock = asyncio.Lock()
+
+
+class ProfilingUnavailable(RuntimeError):
+    """The requested profiler is not installed or not permitted here."""
+
+
+async def _cprofile(seconds: float, path: str) -> None:
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as exc:  # another profiler (e.g. a debugger or coverage) owns the hook
+        raise ProfilingUnavailable(str(exc)) from exc
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    profiler.dump_stats(path)
+
+
+async def _torch(seconds: float, path: str) -> None:
+    try:
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+    except ImportError as exc:
+        raise ProfilingUnavailable("torch is not installed in this service") from exc
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with profile(activities=activities, record_shapes=True) as prof:
+        await asyncio.sleep(seconds)
+    prof.export_chrome_trace(path)
+
+
+async def _py_spy(seconds: float, path: str) -> None:
+    executable = shutil.which("py-spy")
+    if executable is None:
+        raise ProfilingUnavailable("py-spy is not on PATH")
+    process = await asyncio.create_subprocess_exec(
+        executable, "record", "--pid", str(os.getpid()), "--duration", str(max(1, math.ceil(seconds))),
+        "--format", "speedscope", "--output", path, "--nonblocking",
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()
+        if "Permission" in message or "ptrace" in message:
+            raise ProfilingUnavailable(f"py-spy cannot attach: {message}")
+        raise RuntimeError(f"py-spy exited with {process.returncode}: {message}")
+
+
+_CAPTURES: dict[str, Callable[[float, str], Any]] = {"cprofile": _cprofile, "torch": _torch, "py-spy": _py_spy}
+
+
+async def capture_profile(mode: ProfileMode, seconds: float, prefix: str = "profile") -> str:
+    """Profile this process for `seconds` and return the path of the capture file (the caller removes it)."""
+    suffix, _ = _SUFFIX[mode]
+    fd, path = tempfile.mkstemp(prefix=f"{prefix}-{mode}-", suffix=suffix)
+    os.close(fd)
+    try:
+        await _CAPTURES[mode](seconds, path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def profiling_router(get_service: Callable[..., Any]) -> APIRouter:
+    """`/admin/profile` for a service app; `get_service` is the app's service dependency."""
+    router = APIRouter(prefix="/admin", tags=["admin"])
+
+    @router.post("/profile")
+    async def profile(
+        seconds: float = Query(10.0, gt=0, description="How long to record"),
+        mode: ProfileMode = Query("cprofile"),
+        x_admin_token: str | None = Header(default=None),
+        service=Depends(get_service),
+    ) -> FileResponse:
+        config = service.service_config
+        if not config.admin_token:
+            raise HTTPException(status_code=404, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+        if x_admin_token is None or not secrets.compare_digest(x_admin_token, config.admin_token):
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+        if seconds > config.profile_max_seconds:
+            raise HTTPException(status_code=400, detail=f"seconds must be at most {config.profile_max_seconds}")
+        if _capture_lock.locked():
+            raise HTTPException(status_code=409, detail="A profile is already being captured")
+
+        async with _capture_lock:
+            logger.info("profile_capture_started", mode=mode, seconds=seconds)
+            try:
+                path = await capture_profile(mode, seconds, prefix=config.service_name)
+            except ProfilingUnavailable as exc:
+                raise HTTPException(status_code=501, detail=str(exc))
+            except Exception as exc:
+                logger.exception("profile_capture_failed", mode=mode, error=str(exc))
+                raise HTTPException(status_code=500, detail=f"Profile capture failed: {exc}")
+        logger.info("profile_capture_finished", mode=mode, path=path)
+
+        return FileResponse(
+            path,
+            media_type=_SUFFIX[mode][1],
+            filename=os.path.basename(path),
+            background=BackgroundTask(os.remove, path),
+        )
+
+    return router
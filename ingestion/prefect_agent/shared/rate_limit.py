@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class RateLimitedError(Exception):
+    """Raised by a provider call when the upstream answered 429 / quota exhausted."""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Continuously refilled bucket holding at most `capacity` units."""
+
+    def __init__(self, capacity: float, per_minute: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = float(capacity)
+        self.refill_per_second = per_minute / 60.0
+        self.available = float(capacity)
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.available -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        """Return (or, if negative, additionally charge) units after the real cost is known."""
+        self._refill()
+        self.available = min(self.capacity, self.available + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter shared by all in-flight calls.
+
+    Callers `acquire` before each upstream request with an estimate of its
+    token cost and `settle` the estimate against the usage reported in the
+    response. A 429 calls `backoff`, which holds every caller back, not only
+    the one that was rejected. Either limit may be None to disable it.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute, clock) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute, clock) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int = 0) -> None:
+        # One waiter at a time keeps admission FIFO and avoids a thundering herd on refill.
+        async with self._lock:
+            while True:
+                wait = self._blocked_until - self._clock()
+                if self._requests is not None:
+                    wait = max(wait, self._requests.wait_time(1))
+                if self._tokens is not None and tokens:
+                    wait = max(wait, self._tokens.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await self._sleep(wait)
+
+            if self._requests is not None:
+                self._requests.consume(1)
+            if self._tokens is not None and tokens:
+                self._tokens.consume(tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        if self._tokens is None or actual_tokens is None:
+            return
+        self._tokens.refund(estimated_tokens - actual_tokens)
+
+    def backoff(self, delay: float) -> None:
+        self._blocked_until = max(self._blocked_until, self._clock() + delay)
+
+
+async def call_with_rate_limit(
+    limiter: RateLimiter,
+    call: Callable[[], Awaitable[T]],
+    estimated_tokens: int = 0,
+    usage: Callable[[T], Optional[int]] = lambda _: None,
+    max_retries: int = 5,
+    min_wait: float = 1.0,
+    max_wait: float = 60.0,
+) -> T:
+    """
+    Run `call` under `limiter`, retrying on `RateLimitedError`.
+
+    The wait honours the provider's Retry-After when given, otherwise it is
+    exponential with jitter, and it is applied to the whole limiter so
+    concurrent callers back off together.
+    """
+    for attempt in range(max_retries + 1):
+        await limiter.acquire(estimated_tokens)
+        try:
+            result = await call()
+        except RateLimitedError as exc:
+            limiter.settle(estimated_tokens, 0)
+            if attempt == max_retries:
+                raise
+            delay = exc.retry_after
+            if delay is None:
+                delay = min(max_wait, min_wait * 2 ** attempt) * (0.5 + random.random() / 2)
+            logger.warning("rate_limited_backoff", attempt=attempt + 1, delay_seconds=round(delay, 3))
+            limiter.backoff(delay)
+            continue
+        limiter.settle(estimated_tokens, usage(result))
+        return result
+    raise AssertionError("unreachable")
@@ -45,6 +45,13 @@ class BaseModelHandler(Generic[InputT, OutputT], ABC):
     async def postprocess_output(self, output_data: Any, original_input_data: InputT) -> OutputT:
         """Convert raw outputs into the service response schema."""
 
+    def batch_size(self, input_data: InputT) -> int:
+        """Items in a request, for the batch-size metric: the first non-empty list field, else 1."""
+        for value in input_data.__dict__.values():
+            if isinstance(value, list) and value:
+                return len(value)
+        return 1
+
 
 MODEL_REGISTRY: Dict[str, Type[BaseModelHandler[Any, Any]]] = {}
 
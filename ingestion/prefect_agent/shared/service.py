@@ -24,11 +24,25 @@ from shared.monitor import (
 )
 from shared.registry import BaseModelHandler, get_model_handler, list_models
 from shared.schema import ModelInfo
+from shared import tracing
 
 InputT = TypeVar("InputT", bound=BaseModel)
 OutputT = TypeVar("OutputT", bound=BaseModel)
 
 
+def payload_bytes(input_data: BaseModel) -> int:
+    """UTF-8 size of a request's string and binary fields (base64 images, texts, URLs), without serializing it."""
+    size = 0
+    for value in input_data.__dict__.values():
+        for item in value if isinstance(value, list) else (value,):
+            if isinstance(item, bytes):
+                size += len(item)
+            elif isinstance(item, str):
+                # isascii() is a flag check, so base64 payloads are not re-encoded.
+                size += len(item) if item.isascii() else len(item.encode("utf-8"))
+    return size
+
+
 class BaseService(Generic[InputT, OutputT], ABC):
 
     def __init__(self, service_config: ServiceConfig, log_config: LogConfig) -> None:
@@ -49,6 +63,7 @@ class BaseService(Generic[InputT, OutputT], ABC):
         self.current_device: Optional[str] = None
 
         self.metrics = ServiceMetrics(service_name=service_config.service_name)
+        tracing.configure_tracing(service_config.service_name)
         
 
         self.active_request = 0
@@ -125,7 +140,8 @@ class BaseService(Generic[InputT, OutputT], ABC):
                 BaseModelHandler[InputT, OutputT],
                 get_model_handler(model_name, self.service_config),
             )
-            await handler.load_model_impl(device)
+            with tracing.span("service.load_model", model=model_name, device=device):
+                await handler.load_model_impl(device)
             self.loaded_model = handler
             self.loaded_model_info = handler.get_model_info()
             self.current_device = device
@@ -203,13 +219,19 @@ class BaseService(Generic[InputT, OutputT], ABC):
             logger.info("preprocessing_input", metadata=metadata)
             handler = self.loaded_model
             self.active_request += 1
-            preprocessed = await handler.preprocess_input(input_data)  
-
-            logger.info("running_inference")
-            result = await handler.run_inference(preprocessed)  
-
-            logger.info("postprocessing_output")
-            output = await handler.postprocess_output(result, input_data)  
+            self.metrics.observe_batch(handler.batch_size(input_data), payload_bytes(input_data))
+            with tracing.span("service.infer", model=getattr(handler, "model_name", None),
+                                  active_requests=self.active_request):
+                with tracing.span("infer.preprocess"), self.metrics.time_phase("preprocess"):
+                    preprocessed = await handler.preprocess_input(input_data)  
+
+                logger.info("running_inference")
+                with tracing.span("infer.inference"), self.metrics.time_phase("inference"):
+                    result = await handler.run_inference(preprocessed)  
+
+                logger.info("postprocessing_output")
+                with tracing.span("infer.postprocess"), self.metrics.time_phase("postprocess"):
+                    output = await handler.postprocess_output(result, input_data)  
 
             duration = time.time() - start_time
             self.metrics.observe_request_duration("infer", duration)
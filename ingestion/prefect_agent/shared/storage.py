@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
 from datetime import timedelta
 from io import BytesIO
-from typing import Any, BinaryIO, Dict, Generator, Optional
+from typing import Any, BinaryIO, Dict, Generator, Iterator, Optional
 from loguru import logger
 from minio import Minio
 from minio.error import S3Error
 from pydantic import BaseModel, Field
 
+from shared import tracing
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
 
 class MinioSettings(BaseModel):
     public_endpoint: str = Field(default="localhost:9000", description="Public endpoint for clients outside Docker")
@@ -64,23 +70,24 @@ class StorageClient:
     ) -> str:
         """Upload a file-like object to the specified bucket and return an S3 URI."""
 
-        self._ensure_bucket(bucket)
-        try:
-            self.client.put_object(
-                bucket_name=bucket,
-                object_name=object_name,
-                data=file_obj,
-                length=-1,
-                part_size=10 * 1024 * 1024,
-                content_type=content_type,
-                metadata=metadata or None,  # type: ignore
-            )
-            uri = f"s3://{bucket}/{object_name}"
-            logger.info(f"Uploaded object {uri}")
-            return uri
-        except S3Error as exc:
-            logger.exception(f"Failed to upload {object_name} to bucket {bucket}: {exc}")
-            raise StorageError(f"Upload failed for {object_name}: {exc}") from exc
+        with tracing.span("storage.upload", bucket=bucket, object_name=object_name):
+            self._ensure_bucket(bucket)
+            try:
+                self.client.put_object(
+                    bucket_name=bucket,
+                    object_name=object_name,
+                    data=file_obj,
+                    length=-1,
+                    part_size=10 * 1024 * 1024,
+                    content_type=content_type,
+                    metadata=metadata or None,  # type: ignore
+                )
+                uri = f"s3://{bucket}/{object_name}"
+                logger.info(f"Uploaded object {uri}")
+                return uri
+            except S3Error as exc:
+                logger.exception(f"Failed to upload {object_name} to bucket {bucket}: {exc}")
+                raise StorageError(f"Upload failed for {object_name}: {exc}") from exc
 
     def put_json(
         self,
@@ -128,19 +135,79 @@ class StorageClient:
             raise StorageError(f"Failed to list objects: {exc}") from exc
 
     def get_object(self, bucket: str, object_name: str) -> bytes:
-        self._ensure_bucket(bucket)
-        try:
-            response = self.client.get_object(bucket, object_name)
+        with tracing.span("storage.get_object", bucket=bucket, object_name=object_name):
+            self._ensure_bucket(bucket)
             try:
-                data = response.read()
-                return data
+                response = self.client.get_object(bucket, object_name)
+                try:
+                    data = response.read()
+                    return data
+                finally:
+                    response.close()
+                    response.release_conn()
+            except S3Error as exc:
+                logger.exception(f"Failed to fetch object {bucket}/{object_name}: {exc}")
+                raise StorageError(f"Failed to fetch object {bucket}/{object_name}: {exc}") from exc
+
+    def get_range(self, bucket: str, object_name: str, offset: int, length: int) -> bytes:
+        """`length` bytes starting at `offset` (an HTTP range request)."""
+        with tracing.span("storage.get_range", bucket=bucket, object_name=object_name, offset=offset, length=length):
+            response = self._open(bucket, object_name, offset, length)
+            try:
+                return response.read()
             finally:
                 response.close()
                 response.release_conn()
+
+    def _open(self, bucket: str, object_name: str, offset: int = 0, length: int = 0):
+        self._ensure_bucket(bucket)
+        try:
+            return self.client.get_object(bucket, object_name, offset=offset, length=length)
         except S3Error as exc:
             logger.exception(f"Failed to fetch object {bucket}/{object_name}: {exc}")
             raise StorageError(f"Failed to fetch object {bucket}/{object_name}: {exc}") from exc
 
+    def iter_object(
+        self,
+        bucket: str,
+        object_name: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        *,
+        offset: int = 0,
+        length: int = 0,
+    ) -> Iterator[bytes]:
+        """Stream an object (or `length` bytes from `offset`) in `chunk_size` pieces."""
+        with tracing.span("storage.open_object", bucket=bucket, object_name=object_name):
+            response = self._open(bucket, object_name, offset, length)
+        try:
+            while chunk := response.read(chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def download_to_path(
+        self,
+        bucket: str,
+        object_name: str,
+        path: str | os.PathLike[str],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> str:
+        """Stream an object to a temp file next to `path`, then rename it into place."""
+        path = os.fspath(path)
+        with tracing.span("storage.download", bucket=bucket, object_name=object_name):
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".download-", suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    for chunk in self.iter_object(bucket, object_name, chunk_size):
+                        fh.write(chunk)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            return path
+
     def read_json(self, bucket: str, object_name: str) -> Dict[str, Any]:
         raw = self.get_object(bucket, object_name)
         try:
@@ -149,11 +216,12 @@ class StorageClient:
             raise StorageError(f"Stored object {bucket}/{object_name} is not valid JSON: {exc}") from exc
 
     def object_exists(self, bucket: str, object_name: str) -> bool:
-        self._ensure_bucket(bucket)
-        try:
-            self.client.stat_object(bucket, object_name)
-            return True
-        except S3Error as exc:
-            if getattr(exc, "code", None) in ("NoSuchKey", "NoSuchObject"):
-                return False
-            raise StorageError(f"Error checking object {bucket}/{object_name}: {exc}") from exc
+        with tracing.span("storage.stat_object", bucket=bucket, object_name=object_name):
+            self._ensure_bucket(bucket)
+            try:
+                self.client.stat_object(bucket, object_name)
+                return True
+            except S3Error as exc:
+                if getattr(exc, "code", None) in ("NoSuchKey", "NoSuchObject"):
+                    return False
+                raise StorageError(f"Error checking object {bucket}/{object_name}: {exc}") from exc
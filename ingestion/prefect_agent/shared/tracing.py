@@ -0,0 +1,413 @@
+"""
+Span tracing shared by the orchestrator, the model services and the agent.
+
+Spans follow the OpenTelemetry data model: a 128-bit trace id, a 64-bit span
+id, a parent, links and attributes. They cross HTTP calls in the W3C
+`traceparent` header. Export is off by default. `TRACE_EXPORTER=otlp_json`
+appends finished spans to `TRACE_FILE` as OTLP/JSON lines, the same format
+the OpenTelemetry Collector's file exporter writes, so any OTLP tooling can
+read them.
+
+A video's trace id is derived from its video_id, so every stage that
+touches a video lands in the same trace, whatever process runs it. Work
+done for several videos at once gets a trace of its own. Each video's span
+for that stage links to it.
+
+    python -m prefect_agent.shared.tracing logs/traces.jsonl <video_id>
+
+prints the video's timeline, including the spans of the batches it took
+part in.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import re
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Literal, Mapping, Sequence
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class TracingConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", env_prefix="TRACE_", extra="ignore")
+
+    exporter: Literal["none", "otlp_json"] = Field("none", description="none, or otlp_json to write TRACE_FILE")
+    file: str = Field("./logs/traces.jsonl", description="OTLP/JSON lines output of the otlp_json exporter")
+    service_name: str = Field("ingestion", description="service.name of spans from processes that do not set one")
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, value: str | None) -> SpanContext | None:
+        match = _TRACEPARENT.match(value.strip().lower()) if value else None
+        return cls(match.group(1), match.group(2)) if match else None
+
+
+def trace_id_for_video(video_id: str) -> str:
+    """The trace every span about `video_id` belongs to."""
+    return hashlib.sha256(f"video:{video_id}".encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None
+    service: str
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    links: list[SpanContext] = field(default_factory=list)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.links:
+            span["links"] = [{"traceId": link.trace_id, "spanId": link.span_id} for link in self.links]
+        return span
+
+
+class _NoopSpan(Span):
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan("noop", SpanContext("0" * 32, "0" * 16), None, "")
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _from_otlp_value(value: dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "arrayValue" in value:
+        return [_from_otlp_value(item) for item in value["arrayValue"].get("values", [])]
+    return next(iter(value.values()), None)
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class NoopExporter(SpanExporter):
+    def export(self, spans: Sequence[Span]) -> None:
+        pass
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """Buffers finished spans and appends them to `path`, one OTLP `ExportTraceServiceRequest` per line."""
+
+    def __init__(self, path: str | Path, flush_every: int = 256):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._buffer: list[Span] = []
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self._buffer.extend(spans)
+            if len(self._buffer) < self.flush_every:
+                return
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        self._write(batch)
+
+    def shutdown(self) -> None:
+        self.flush()
+
+    def _write(self, spans: list[Span]) -> None:
+        if not spans:
+            return
+        by_service: dict[str, list[dict[str, Any]]] = {}
+        for span in spans:
+            by_service.setdefault(span.service, []).append(span.to_otlp())
+        line = json.dumps({"resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "capstone.tracing"}, "spans": otlp_spans}],
+            }
+            for service, otlp_spans in by_service.items()
+        ]}, separators=(",", ":"))
+        with self._lock, self.path.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+
+# The span new spans are children of: a local span, or the remote parent from an incoming `traceparent`.
+_active: ContextVar[SpanContext | None] = ContextVar("active_span", default=None)
+
+
+class Tracer:
+    def __init__(self, service_name: str, exporter: SpanExporter | None = None):
+        self.service_name = service_name
+        self.exporter = exporter or NoopExporter()
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.exporter, NoopExporter)
+
+    def _start(
+        self,
+        name: str,
+        video_id: str | None,
+        parent: SpanContext | None,
+        links: Iterable[SpanContext],
+        attributes: Mapping[str, Any],
+    ) -> Span:
+        parent = parent or _active.get()
+        links = list(links)
+        if video_id is not None:
+            trace_id = trace_id_for_video(video_id)
+            if parent is not None and parent.trace_id != trace_id:
+                # Started from a batch or another video: keep the video's own trace, point back at the caller.
+                links.append(parent)
+                parent = None
+        else:
+            trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        span = Span(name, SpanContext(trace_id, secrets.token_hex(8)), parent.span_id if parent else None,
+                    self.service_name, links=links)
+        span.set_attributes(video_id=video_id, **attributes)
+        return span
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        *,
+        video_id: str | None = None,
+        parent: SpanContext | None = None,
+        links: Iterable[SpanContext] = (),
+        **attributes: Any,
+    ) -> Iterator[Span]:
+        """Time the block as a child of the active span (or in `video_id`'s trace) and make it the active span."""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        span = self._start(name, video_id, parent, links, attributes)
+        token = _active.set(span.context)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"[:500]
+            raise
+        finally:
+            _active.reset(token)
+            span.end_ns = time.time_ns()
+            self.exporter.export([span])
+
+    def emit(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        *,
+        video_id: str | None = None,
+        links: Iterable[SpanContext] = (),
+        **attributes: Any,
+    ) -> None:
+        """Record a span that already happened, e.g. a video's share of a batch."""
+        if not self.enabled:
+            return
+        span = self._start(name, video_id, None, links, attributes)
+        span.start_ns, span.end_ns = start_ns, end_ns
+        self.exporter.export([span])
+
+
+_tracer: Tracer | None = None
+
+
+def configure_tracing(service_name: str | None = None, exporter: SpanExporter | None = None) -> Tracer:
+    """Set the process-wide tracer; without `exporter` it is chosen by TRACE_EXPORTER / TRACE_FILE."""
+    global _tracer
+    config = TracingConfig()  # type: ignore[call-arg]
+    if exporter is None:
+        exporter = OTLPJsonFileExporter(config.file) if config.exporter == "otlp_json" else NoopExporter()
+    if _tracer is not None and _tracer.enabled and _tracer.exporter is not exporter:
+        _tracer.exporter.shutdown()
+    _tracer = Tracer(service_name or config.service_name, exporter)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer or configure_tracing()
+
+
+def span(name: str, **kwargs: Any):
+    return get_tracer().span(name, **kwargs)
+
+
+def emit(name: str, start_ns: int, end_ns: int, **kwargs: Any) -> None:
+    get_tracer().emit(name, start_ns, end_ns, **kwargs)
+
+
+def tracing_enabled() -> bool:
+    return get_tracer().enabled
+
+
+def inject(headers: dict[str, str] | None = None) -> dict[str, str]:
+    """`headers` plus the active span's `traceparent`, for an outgoing HTTP request."""
+    headers = dict(headers or {})
+    active = _active.get()
+    if active is not None and get_tracer().enabled:
+        headers[TRACEPARENT] = active.to_traceparent()
+    return headers
+
+
+def extract(headers: Mapping[str, str]) -> SpanContext | None:
+    return SpanContext.from_traceparent(headers.get(TRACEPARENT))
+
+
+class TraceContextMiddleware:
+    """ASGI middleware: requests carrying `traceparent` run with that remote span as the parent of their spans."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        parent = None
+        if scope["type"] == "http":
+            for key, value in scope.get("headers", ()):
+                if key == TRACEPARENT.encode("latin-1"):
+                    parent = SpanContext.from_traceparent(value.decode("latin-1"))
+                    break
+        if parent is None:
+            await self.app(scope, receive, send)
+            return
+        token = _active.set(parent)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _active.reset(token)
+
+
+def read_spans(path: str | Path) -> list[dict[str, Any]]:
+    """Flatten an OTLP/JSON lines file into one dict per span (times in ms since the epoch)."""
+    spans: list[dict[str, Any]] = []
+    with Path(path).open(encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get("resourceSpans", []):
+                service = next((attr["value"].get("stringValue") for attr in resource["resource"]["attributes"]
+                                if attr["key"] == "service.name"), None)
+                for scope in resource.get("scopeSpans", []):
+                    for raw in scope.get("spans", []):
+                        spans.append({
+                            "service": service,
+                            "name": raw["name"],
+                            "trace_id": raw["traceId"],
+                            "span_id": raw["spanId"],
+                            "parent_id": raw.get("parentSpanId"),
+                            "start_ms": int(raw["startTimeUnixNano"]) / 1e6,
+                            "end_ms": int(raw["endTimeUnixNano"]) / 1e6,
+                            "attributes": {attr["key"]: _from_otlp_value(attr["value"]) for attr in raw.get("attributes", [])},
+                            "links": [link["spanId"] for link in raw.get("links", [])],
+                            "error": raw.get("status", {}).get("message"),
+                        })
+    return spans
+
+
+def video_timeline(spans: list[dict[str, Any]], video_id: str) -> list[dict[str, Any]]:
+    """
+    The spans of `video_id`'s trace, plus the batch spans they link to and
+    everything below those, ordered by start time, each with its depth and
+    duration.
+    """
+    trace_id = trace_id_for_video(video_id)
+    by_id = {span["span_id"]: span for span in spans}
+    children: dict[str, list[dict[str, Any]]] = {}
+    for span in spans:
+        if span["parent_id"]:
+            children.setdefault(span["parent_id"], []).append(span)
+
+    timeline: list[dict[str, Any]] = []
+    seen: set[str] = set()
+
+    def walk(span: dict[str, Any], depth: int) -> None:
+        if span["span_id"] in seen:
+            return
+        seen.add(span["span_id"])
+        timeline.append({**span, "depth": depth, "duration_ms": round(span["end_ms"] - span["start_ms"], 3)})
+        for linked in span["links"]:
+            if linked in by_id:
+                walk(by_id[linked], depth + 1)
+        for child in sorted(children.get(span["span_id"], []), key=lambda s: s["start_ms"]):
+            walk(child, depth + 1)
+
+    roots = [span for span in spans if span["trace_id"] == trace_id
+             and (not span["parent_id"] or span["parent_id"] not in by_id)]
+    for root in sorted(roots, key=lambda s: s["start_ms"]):
+        walk(root, 0)
+    return timeline
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m prefect_agent.shared.tracing <traces.jsonl> <video_id>")
+    rows = video_timeline(read_spans(sys.argv[1]), sys.argv[2])
+    origin = min((row["start_ms"] for row in rows), default=0.0)
+    for row in rows:
+        status = f"  ERROR {row['error']}" if row["error"] else ""
+        print(f"{row['start_ms'] - origin:>10.1f} ms {row['duration_ms']:>10.1f} ms  "
+              f"{'  ' * row['depth']}{row['name']} [{row['service']}]{status}")
@@ -1,3 +1,4 @@
+import os
 import tempfile
 from shared.storage import StorageClient
 from urllib.parse import urlparse
@@ -8,24 +9,19 @@ def parse_s3_url(s3_url: str) -> tuple[str, str]:
     return parsed.netloc, parsed.path.lstrip("/")
 
 async def fetch_object_from_s3(s3_url: str, storage: StorageClient, suffix: str) -> str:
-    """Fetch s3://bucket/path.mp4 to a local temp file asynchronously."""
+    """Stream s3://bucket/path.mp4 to a local temp file asynchronously; memory use is independent of object size."""
     bucket, object_name = parse_s3_url(s3_url)
-    loop = asyncio.get_running_loop()
-    data = await loop.run_in_executor(None, lambda: storage.get_object(bucket, object_name))
-    tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-    tmp.write(data)
-    tmp.flush()
-    tmp.close()
-    return tmp.name
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        return await asyncio.to_thread(storage.download_to_path, bucket, object_name, path)
+    except BaseException:
+        os.remove(path)
+        raise
 
 async def fetch_object_from_s3_bytes(s3_url: str, storage: StorageClient) -> bytes:
     bucket, object_name = parse_s3_url(s3_url)
-    loop = asyncio.get_running_loop()
-
-    data = await loop.run_in_executor(
-        None,
-        lambda: storage.get_object(bucket, object_name)
-    )
+    data = await asyncio.to_thread(storage.get_object, bucket, object_name)
 
     if not isinstance(data, (bytes, bytearray)):
         raise TypeError(f"Expected bytes from storage.get_object, got {type(data)}")
@@ -1,7 +1,20 @@
+import os
 import tempfile
 from core.storage import StorageClient
 from urllib.parse import urlparse
 import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+# In-flight requests per LLM provider; the LLM service's token bucket does the fine-grained pacing.
+LLM_PROVIDER_CONCURRENCY: dict[str, int] = {
+    "openrouter_api": 8,
+    "gemini_api": 4,
+}
+DEFAULT_LLM_CONCURRENCY = 2
 
 
 
@@ -16,27 +29,49 @@ def parse_s3_url(s3_url: str) -> tuple[str, str]:
 
 
 async def fetch_object_from_s3(s3_url: str, storage: StorageClient, suffix: str) -> str:
-    """Fetch s3://bucket/path.mp4 to a local temp file asynchronously."""
+    """Stream s3://bucket/path.mp4 to a local temp file asynchronously; memory use is independent of object size."""
     bucket, object_name = parse_s3_url(s3_url)
-    loop = asyncio.get_running_loop()
-    data = await loop.run_in_executor(None, lambda: storage.get_object(bucket, object_name))
-    tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-    tmp.write(data) #type:ignore
-    tmp.flush()
-    tmp.close()
-    return tmp.name
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        return await storage.aio.download_to_path(bucket, object_name, path)
+    except BaseException:
+        os.remove(path)
+        raise
 
 
 async def fetch_object_from_s3_bytes(s3_url: str, storage: StorageClient) -> bytes:
     bucket, object_name = parse_s3_url(s3_url)
-    loop = asyncio.get_running_loop()
-
-    data = await loop.run_in_executor(
-        None,
-        lambda: storage.get_object(bucket, object_name)
-    )
+    data = await storage.aio.get_object(bucket, object_name)
 
     if not isinstance(data, (bytes, bytearray)):
         raise TypeError(f"Expected bytes from storage.get_object, got {type(data)}")
 
-    return data
\ No newline at end of file
+    return data
+
+
+def llm_concurrency(model_name: str, override: int | None = None) -> int:
+    if override is not None:
+        return override
+    return LLM_PROVIDER_CONCURRENCY.get(model_name, DEFAULT_LLM_CONCURRENCY)
+
+
+async def bounded_as_completed(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    limit: int,
+) -> AsyncIterator[R]:
+    """Run `worker` over `items` with at most `limit` in flight, yielding results as they finish."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    pending = [asyncio.create_task(_run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        for task in pending:
+            task.cancel()
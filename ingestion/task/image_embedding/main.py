@@ -16,6 +16,7 @@ from core.clients.base import BaseServiceClient, BaseMilvusClient
 
 class ImageEmbeddingSettings(BaseModel):
     model_name: str
+    model_version: str | None = None
     device: Literal['cuda', 'cpu']
     batch_size: int
 
@@ -46,6 +47,8 @@ def encode_image_base64(
 class ImageEmbeddingTask(BaseTask[
     list[ImageArtifact], ImageEmbeddingArtifact, ImageEmbeddingSettings
 ]):
+    postprocess_concurrency = 8
+
     def __init__(
         self,
         artifact_visitor: ArtifactPersistentVisitor,
@@ -62,6 +65,7 @@ class ImageEmbeddingTask(BaseTask[
 
     async def preprocess(self, input_data: list[ImageArtifact]) -> list[ImageEmbeddingArtifact]:        
         result = []
+        provenance = self.provenance()
         for img_artifact in input_data:
             fps=img_artifact.related_video_fps
             timestamp = img_artifact.timestamp
@@ -74,7 +78,8 @@ class ImageEmbeddingTask(BaseTask[
                 image_minio_url=img_artifact.minio_url_path,
                 extension=img_artifact.extension,
                 image_id=img_artifact.artifact_id,
-                artifact_type=ImageEmbeddingArtifact.__name__
+                artifact_type=ImageEmbeddingArtifact.__name__,
+                provenance=provenance,
             )
             result.append(image_embedding_artifact)
         return result
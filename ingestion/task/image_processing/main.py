@@ -1,16 +1,22 @@
 import json
-from typing import AsyncIterator
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Literal
 from core.pipeline.base_task import BaseTask
 from core.clients.base import BaseServiceClient, BaseMilvusClient
 from core.artifact.persist import ArtifactPersistentVisitor 
 from core.artifact.schema import AutoshotArtifact, ImageArtifact
+from core.pipeline.tracker import ArtifactMetadata
 from io import BytesIO
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import asyncio
-from .util import get_segment_frame_indices, read_frame
+from .util import FrameSignature, SignatureIndex, compute_frame_change, get_segment_frame_indices, plan_adaptive_keyframes, read_frame_with_signature
 from task.common.util import fetch_object_from_s3 
 from core.config.logging import run_logger
 
+if TYPE_CHECKING:
+    from core.management.cleanup import ArtifactDeleter
+
 
 def frame_to_timecode(frame_index: int, fps: float) -> str:
     if fps <= 0:
@@ -25,8 +31,30 @@ def frame_to_timecode(frame_index: int, fps: float) -> str:
 
 class ImageProcessingSettings(BaseModel):
     num_img_per_segment: int
+    # 'uniform' spaces frames evenly; 'adaptive' places them at visual-change peaks within a per-video budget,
+    # at the cost of decoding the whole video once more to build the change signal.
+    sampling: Literal['uniform', 'adaptive'] = 'uniform'
+    frame_budget: int | None = Field(default=None, ge=1, description="Frames per video; None = num_img_per_segment x segments")
+    min_img_per_segment: int = Field(default=1, ge=0)
+    max_img_per_segment: int = Field(default=8, ge=1)
+    motion_stride: int = Field(default=2, ge=1, description="Analyse every n-th frame for the change signal")
+    # Drop frames that look like an already-kept frame of the same segment / video ('off' keeps all).
+    dedup_scope: Literal['off', 'segment', 'video'] = 'segment'
+    dedup_max_hamming: int = Field(default=6, ge=0, le=64, description="Max dHash bit distance for a duplicate")
+    dedup_min_hist_similarity: float = Field(default=0.9, ge=0.0, le=1.0, description="Min HSV histogram intersection for a duplicate")
+
+@dataclass
+class _VideoFrames:
+    images: list[ImageArtifact] = field(default_factory=list)
+    # Downloaded while planning adaptive frames; execute reads frames from it instead of fetching the video again.
+    local_video: str | None = None
+
 
 class ImageProcessingTask(BaseTask[list[AutoshotArtifact], ImageArtifact, ImageProcessingSettings]):
+    postprocess_concurrency = 8
+    # Removes frames an earlier run persisted that dedup now drops, with everything derived from them.
+    frame_deleter: "ArtifactDeleter | None" = None
+
     def __init__(
         self,
         artifact_visitor: ArtifactPersistentVisitor,
@@ -39,71 +67,185 @@ class ImageProcessingTask(BaseTask[list[AutoshotArtifact], ImageArtifact, ImageP
         )
 
 
-    async def preprocess(self, input_data: list[AutoshotArtifact]) -> dict[str, list[ImageArtifact]]:
+    async def preprocess(self, input_data: list[AutoshotArtifact]) -> dict[str, _VideoFrames]:
 
-        result: dict[str, list[ImageArtifact]] = {}
-        
-
-        for shot_artifact in input_data:
-            shot_art_url = shot_artifact.minio_url_path
-            segments_path = await fetch_object_from_s3(shot_art_url, self.visitor.minio_client, suffix='.json')
-            with open(segments_path, 'r', encoding='utf-8') as f:
-                segments = json.load(f)['segments']
-            run_logger.debug(f'{segments=}')
-            for i, (start,end) in enumerate(segments):
-                
-                indices = get_segment_frame_indices(start=start,end=end,n=self.config.num_img_per_segment)
-                list_images = []
-                for idx in indices:
-
-                    time_stamp = frame_to_timecode(frame_index=idx, fps=shot_artifact.related_video_fps)
-                    image_artifact = ImageArtifact(
-                        frame_index=idx,
-                        extension='.webp',
-                        related_video_id=shot_artifact.related_video_id,
-                        related_video_minio_url=shot_artifact.related_video_minio_url,
-                        related_video_extension=shot_artifact.related_video_extension,
-                        autoshot_artifact_id=shot_artifact.artifact_id,
-                        user_bucket=shot_artifact.user_bucket,
-                        metadata={},
-                        content_type="image/webp",
-                        artifact_type=ImageArtifact.__name__,
-                        timestamp=time_stamp,
-                        related_video_fps=shot_artifact.related_video_fps,
-                    ) 
-                    # exist =  await image_artifact.accept_check_exist(self.visitor)
-                    # if exist:
-                    #     continue
-
-                    list_images.append(image_artifact)
-                if shot_artifact.related_video_minio_url not in result:
-                    result[shot_artifact.related_video_minio_url] = []
-                result[shot_artifact.related_video_minio_url].extend(list_images)
-                run_logger.debug(f"Video: {shot_artifact.related_video_minio_url}, Images so far: {len(result[shot_artifact.related_video_minio_url])}")
+        result: dict[str, _VideoFrames] = {}
+        try:
+            for shot_artifact in input_data:
+                await self._preprocess_shot(shot_artifact, result)
+        except BaseException:
+            for video in result.values():
+                if video.local_video:
+                    os.remove(video.local_video)
+            raise
         return result
 
-    async def execute(self, input_data: dict[str, list[ImageArtifact]], client: BaseServiceClient | None| BaseMilvusClient ) -> AsyncIterator[tuple[ImageArtifact, bytes | None]]:
-        run_logger.debug(f"{input_data}")
-        for video_minio_path, img_artifacts in input_data.items():
-            if not img_artifacts:  
-                continue
+    async def _preprocess_shot(self, shot_artifact: AutoshotArtifact, result: dict[str, _VideoFrames]) -> None:
+        shot_art_url = shot_artifact.minio_url_path
+        segments_path = await fetch_object_from_s3(shot_art_url, self.visitor.minio_client, suffix='.json')
+        with open(segments_path, 'r', encoding='utf-8') as f:
+            segments = json.load(f)['segments']
+        run_logger.debug(f'{segments=}')
+        video = result.setdefault(shot_artifact.related_video_minio_url, _VideoFrames())
+        plan = await self._plan_frames(shot_artifact, segments, video)
+        for i, (start,end) in enumerate(segments):
             
-            not_process_images = []
+            indices = plan[i]
+            list_images = []
+            for idx in indices:
+
+                time_stamp = frame_to_timecode(frame_index=idx, fps=shot_artifact.related_video_fps)
+                image_artifact = ImageArtifact(
+                    frame_index=idx,
+                    extension='.webp',
+                    related_video_id=shot_artifact.related_video_id,
+                    related_video_minio_url=shot_artifact.related_video_minio_url,
+                    related_video_extension=shot_artifact.related_video_extension,
+                    autoshot_artifact_id=shot_artifact.artifact_id,
+                    user_bucket=shot_artifact.user_bucket,
+                    metadata={},
+                    content_type="image/webp",
+                    artifact_type=ImageArtifact.__name__,
+                    timestamp=time_stamp,
+                    related_video_fps=shot_artifact.related_video_fps,
+                    segment_index=i,
+                ) 
+                # exist =  await image_artifact.accept_check_exist(self.visitor)
+                # if exist:
+                #     continue
+
+                list_images.append(image_artifact)
+            video.images.extend(list_images)
+            run_logger.debug(f"Video: {shot_artifact.related_video_minio_url}, Images so far: {len(video.images)}")
+
+    async def _plan_frames(self, shot_artifact: AutoshotArtifact, segments: list[list[int]], video: _VideoFrames) -> list[list[int]]:
+        if self.config.sampling == 'uniform' or not segments:
+            return [get_segment_frame_indices(start=start, end=end, n=self.config.num_img_per_segment) for start, end in segments]
+
+        budget = self.config.frame_budget or self.config.num_img_per_segment * len(segments)
+        if video.local_video is None:
+            video.local_video = await fetch_object_from_s3(shot_artifact.related_video_minio_url, self.visitor.minio_client, suffix=shot_artifact.related_video_extension)
+        change = await compute_frame_change(video.local_video, self.config.motion_stride)
+        if change.size == 0 or not change.any():
+            run_logger.warning(f"Video {shot_artifact.related_video_minio_url}: no change signal, falling back to uniform sampling")
+            return [get_segment_frame_indices(start=start, end=end, n=self.config.num_img_per_segment) for start, end in segments]
+        plan = plan_adaptive_keyframes(
+            change,
+            [(start, end) for start, end in segments],
+            budget=budget,
+            min_per_segment=self.config.min_img_per_segment,
+            max_per_segment=self.config.max_img_per_segment,
+        )
+        run_logger.info(f"Video {shot_artifact.related_video_minio_url}: adaptive sampling picked {sum(map(len, plan))} frames (budget {budget}) over {len(segments)} segments")
+        return plan
+
+    async def execute(self, input_data: dict[str, _VideoFrames], client: BaseServiceClient | None| BaseMilvusClient ) -> AsyncIterator[tuple[ImageArtifact, bytes | None]]:
+        run_logger.debug(f"{input_data}")
+        for video_minio_path, video in input_data.items():
+            try:
+                async for output in self._execute_video(video_minio_path, video):
+                    yield output
+            finally:
+                if video.local_video:
+                    os.remove(video.local_video)
+                    video.local_video = None
 
+    async def _execute_video(self, video_minio_path: str, video: _VideoFrames) -> AsyncIterator[tuple[ImageArtifact, bytes | None]]:
+        img_artifacts = video.images
+        if not img_artifacts:  
+            return
+        
+        exists = [await artifact.accept_check_exist(self.visitor) for artifact in img_artifacts]
+        existing = {id(artifact) for artifact, exist in zip(img_artifacts, exists) if exist}
+        if self.config.dedup_scope == 'off':
             for artifact in img_artifacts:
-                exist =  await artifact.accept_check_exist(self.visitor)
-                if exist:
+                if id(artifact) in existing:
                     yield artifact, None
-                    continue
-                else:
-                    not_process_images.append(artifact)
-            
-            local_video = await fetch_object_from_s3(video_minio_path, self.visitor.minio_client, suffix=img_artifacts[0].related_video_extension) # group image comes from 1 video -> same video extension
-            tasks = [read_frame(local_video, artifact.frame_index) for artifact in not_process_images ]
-            frames = await asyncio.gather(*tasks)
-            for artifact, frame_byte in zip(img_artifacts, frames):
-                yield artifact, frame_byte
-            
+            to_dedup = [artifact for artifact in img_artifacts if id(artifact) not in existing]
+            rows: dict[str, ArtifactMetadata] = {}
+            stored: dict[int, FrameSignature] = {}
+        else:
+            # Frames persisted by an earlier run still take part in dedup so a rerun drops the same frames;
+            # their stored signatures stand in for decoding them again.
+            to_dedup = img_artifacts
+            rows = await self.visitor.tracker.get_artifacts(
+                [artifact.artifact_id for artifact in img_artifacts if id(artifact) in existing]
+            )
+            stored = {}
+            for artifact in img_artifacts:
+                row = rows.get(artifact.artifact_id)
+                if row is not None and (signature := FrameSignature.from_metadata(row.artifact_metadata.get('signature'))) is not None:
+                    stored[id(artifact)] = signature
+        to_read = [artifact for artifact in to_dedup if id(artifact) not in stored]
+
+        decoded: dict[int, tuple[bytes, FrameSignature]] = {}
+        if to_read:
+            if video.local_video is None:
+                video.local_video = await fetch_object_from_s3(video_minio_path, self.visitor.minio_client, suffix=img_artifacts[0].related_video_extension) # group image comes from 1 video -> same video extension
+            local_video = video.local_video
+            tasks = [read_frame_with_signature(local_video, artifact.frame_index) for artifact in to_read]
+            decoded = dict(zip(map(id, to_read), await asyncio.gather(*tasks)))
+        frames = [decoded[id(artifact)] if id(artifact) in decoded else (None, stored[id(artifact)]) for artifact in to_dedup]
+        kept = self._deduplicate(to_dedup, frames)
+        run_logger.info(f"Video {video_minio_path}: kept {len(kept)}/{len(to_dedup)} frames after dedup, decoded {len(to_read)}")
+
+        kept_ids = {id(artifact) for artifact, _ in kept}
+        dropped = [artifact for artifact in to_dedup if id(artifact) in existing and id(artifact) not in kept_ids]
+        if dropped:
+            await self._delete_dropped(dropped)
+        for artifact, frame_byte in kept:
+            if id(artifact) in existing:
+                await self._update_represented_frames(artifact, rows.get(artifact.artifact_id))
+                yield artifact, None
+                continue
+            artifact.signature = decoded[id(artifact)][1].to_metadata()
+            yield artifact, frame_byte
+
+    async def _update_represented_frames(self, artifact: ImageArtifact, row: ArtifactMetadata | None) -> None:
+        """Store the frames a persisted frame stands for when this run merged a different set into it."""
+        if row is None or row.artifact_metadata.get('represented_frames', []) == artifact.represented_frames:
+            return
+        await self.visitor.tracker.update_artifact_metadata(artifact.artifact_id, {'represented_frames': artifact.represented_frames})
+
+    async def _delete_dropped(self, dropped: list[ImageArtifact]) -> None:
+        """Remove persisted frames that dedup now drops, so they stop reaching captions, embeddings and search."""
+        video_id = dropped[0].related_video_id
+        if self.frame_deleter is None:
+            run_logger.warning(f"Video {video_id}: {len(dropped)} persisted frames are now duplicates; no deleter configured, leaving them")
+            return
+        result = await self.frame_deleter.delete_artifacts(video_id, [artifact.artifact_id for artifact in dropped])
+        run_logger.info(f"Video {video_id}: removed {len(dropped)} persisted duplicate frames ({result.metadata.get('deleted_artifacts', 0)} artifacts with descendants)")
+
+    def _deduplicate(self, artifacts: list[ImageArtifact], frames: list[tuple[bytes | None, FrameSignature]]) -> list[tuple[ImageArtifact, bytes | None]]:
+        """
+        Greedy near-duplicate suppression in frame order.
+
+        A frame is dropped when its dHash and colour histogram are both within
+        threshold of a frame already kept in the same scope; the kept frame
+        records the dropped frame's index and timestamp in `represented_frames`.
+        """
+        if self.config.dedup_scope == 'off':
+            return [(artifact, frame_byte) for artifact, (frame_byte, _) in zip(artifacts, frames)]
+
+        indexes: dict[int | None, SignatureIndex] = {}
+        kept_by_scope: dict[int | None, list[ImageArtifact]] = {}
+        kept: list[tuple[ImageArtifact, bytes | None]] = []
+        order = sorted(range(len(artifacts)), key=lambda k: artifacts[k].frame_index)
+        for k in order:
+            artifact, (frame_byte, signature) = artifacts[k], frames[k]
+            scope = artifact.segment_index if self.config.dedup_scope == 'segment' else None
+            index = indexes.setdefault(scope, SignatureIndex(self.config.dedup_max_hamming, self.config.dedup_min_hist_similarity))
+            match = index.match(signature)
+            if match is not None:
+                kept_by_scope[scope][match].represented_frames.append(
+                    {'frame_index': artifact.frame_index, 'timestamp': artifact.timestamp}
+                )
+                continue
+            index.add(signature)
+            kept_by_scope.setdefault(scope, []).append(artifact)
+            kept.append((artifact, frame_byte))
+        return kept
+
     async def postprocess(self, output_data: tuple[ImageArtifact, bytes | None]) -> ImageArtifact:
         artifact, image = output_data
         if image is None:
@@ -1,4 +1,6 @@
 import asyncio
+import heapq
+from dataclasses import dataclass
 import cv2
 import numpy as np
 from urllib.parse import urlparse
@@ -12,13 +14,124 @@ def get_segment_frame_indices(start: int, end: int, n: int) -> list[int]:
     return [start + (i + 1) * total // (n + 1) for i in range(n)]
 
 
+# Share of each segment's sampling mass spread uniformly, so static stretches still get frames
+# and samples do not all land on motion-blurred transition frames.
+_UNIFORM_MIX = 0.3
+
+
+def frame_change_signal(video_path: str, stride: int = 2, size: tuple[int, int] = (32, 18)) -> np.ndarray:
+    """
+    Blocking: per-frame visual change of a video from one sequential decode pass.
+
+    Every `stride`-th frame is decoded at `size` grayscale (the rest are only
+    grabbed) and compared with the previous analysed frame; the mean absolute
+    difference is spread over the frames it covers. Entry 0 is always 0.
+    """
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    change = np.zeros(max(total, 0), dtype=np.float32)
+    previous, previous_index = None, 0
+    index = 0
+    try:
+        while index < total:
+            if index % stride and index != total - 1:
+                if not cap.grab():
+                    break
+                index += 1
+                continue
+            ok, frame = cap.read()
+            if not ok:
+                break
+            small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), size, interpolation=cv2.INTER_AREA)
+            small = small.astype(np.float32)
+            if previous is not None:
+                change[previous_index + 1:index + 1] = np.abs(small - previous).mean() / (index - previous_index)
+            previous, previous_index = small, index
+            index += 1
+    finally:
+        cap.release()
+    return change
+
+
+def allocate_frame_budget(weights: list[float], capacities: list[int], budget: int, min_per_segment: int, max_per_segment: int) -> list[int]:
+    """
+    Split `budget` frames across segments in proportion to `weights` (D'Hondt
+    highest averages), giving each segment between `min_per_segment` and
+    `max_per_segment` frames and never more than its `capacities` entry.
+    The minimum wins over the budget when both cannot be met.
+    """
+    counts = [min(min_per_segment, max_per_segment, cap) for cap in capacities]
+    limits = [min(max_per_segment, cap) for cap in capacities]
+    remaining = budget - sum(counts)
+    heap = [(-w / (c + 1), i) for i, (w, c) in enumerate(zip(weights, counts)) if c < limits[i]]
+    heapq.heapify(heap)
+    while remaining > 0 and heap:
+        _, i = heapq.heappop(heap)
+        counts[i] += 1
+        remaining -= 1
+        if counts[i] < limits[i]:
+            heapq.heappush(heap, (-weights[i] / (counts[i] + 1), i))
+    return counts
+
+
+def select_change_frames(change: np.ndarray, start: int, end: int, n: int) -> list[int]:
+    """
+    Pick `n` frames in [start, end] at equal quantiles of accumulated visual change.
+
+    Each sample stands for an equal share of the segment's change, so samples
+    cluster where the picture moves or cuts and thin out where it is static.
+    """
+    end = min(end, len(change) - 1)
+    if n <= 0 or end < start:
+        return []
+    local = change[start:end + 1].astype(np.float64)
+    length = local.size
+    n = min(n, length)
+    mass = local.sum()
+    density = np.full(length, 1.0 / length)
+    if mass > 0:
+        density = (1 - _UNIFORM_MIX) * local / mass + _UNIFORM_MIX * density
+    cumulative = np.cumsum(density)
+    targets = (np.arange(n) + 0.5) / n
+    picks = np.minimum(np.searchsorted(cumulative, targets), length - 1)
+
+    taken: set[int] = set()
+    for pick in picks:
+        # Nearest free frame when two quantiles fall on one spike.
+        free = next(
+            int(c) for offset in range(length) for c in (pick + offset, pick - offset)
+            if 0 <= c < length and c not in taken
+        )
+        taken.add(free)
+    chosen = [start + k for k in taken]
+    return sorted(chosen)
+
+
+def plan_adaptive_keyframes(
+    change: np.ndarray,
+    segments: list[tuple[int, int]],
+    budget: int,
+    min_per_segment: int,
+    max_per_segment: int,
+) -> list[list[int]]:
+    """Frame indices per segment for a video, spending `budget` where the change signal is highest."""
+    mean_change = float(change.mean()) if change.size else 0.0
+    # A length-proportional floor so static segments compete on duration rather than getting nothing.
+    floor = _UNIFORM_MIX * (mean_change if mean_change > 0 else 1.0)
+    weights, capacities = [], []
+    for start, end in segments:
+        local = change[start:min(end, len(change) - 1) + 1]
+        capacities.append(int(local.size))
+        weights.append(float(local.sum()) + floor * local.size)
+    counts = allocate_frame_budget(weights, capacities, budget, min_per_segment, max_per_segment)
+    return [select_change_frames(change, start, end, n) for (start, end), n in zip(segments, counts)]
+
 
 def parse_s3_url(s3_url: str) -> tuple[str, str]:
     parsed = urlparse(s3_url)
     return parsed.netloc, parsed.path.lstrip("/")
 
-def read_frame_sync(video_path: str, frame_index: int) -> bytes:
-    """Blocking: read a specific frame from a video and return it encoded as WebP."""
+def _read_frame_array(video_path: str, frame_index: int) -> np.ndarray:
     cap = cv2.VideoCapture(video_path)
     total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
@@ -32,7 +145,10 @@ def read_frame_sync(video_path: str, frame_index: int) -> bytes:
 
     if not ok:
         raise RuntimeError(f"Failed to read frame at index {frame_index}")
+    return frame
+
 
+def _encode_webp(frame: np.ndarray, frame_index: int) -> bytes:
     success, img = cv2.imencode(".webp", frame, [cv2.IMWRITE_WEBP_QUALITY, 90])
     if not success:
         raise RuntimeError(f"Failed to encode frame {frame_index} as WebP")
@@ -40,12 +156,87 @@ def read_frame_sync(video_path: str, frame_index: int) -> bytes:
     return img.tobytes()
 
 
+def read_frame_sync(video_path: str, frame_index: int) -> bytes:
+    """Blocking: read a specific frame from a video and return it encoded as WebP."""
+    return _encode_webp(_read_frame_array(video_path, frame_index), frame_index)
+
+
+@dataclass(slots=True)
+class FrameSignature:
+    """Cheap visual fingerprint: 64-bit dHash of the grayscale frame plus a normalized HSV histogram."""
+    dhash: int
+    histogram: np.ndarray
+
+    def to_metadata(self) -> dict:
+        """JSON form stored with a persisted frame, so a rerun can deduplicate it without decoding the video."""
+        return {"dhash": f"{self.dhash:016x}", "histogram": [round(float(v), 5) for v in self.histogram]}
+
+    @classmethod
+    def from_metadata(cls, data: dict | None) -> "FrameSignature | None":
+        if not data:
+            return None
+        return cls(dhash=int(data["dhash"], 16), histogram=np.asarray(data["histogram"], dtype=np.float32))
+
+
+def frame_signature(frame: np.ndarray) -> FrameSignature:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    tiny = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = np.packbits((tiny[:, 1:] > tiny[:, :-1]).astype(np.uint8).ravel())
+    dhash = int.from_bytes(bits.tobytes(), "big")
+
+    hsv = cv2.cvtColor(cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1, 2], None, [8, 4, 4], [0, 180, 0, 256, 0, 256]).ravel()
+    return FrameSignature(dhash=dhash, histogram=hist / max(float(hist.sum()), 1.0))
+
+
+def read_frame_with_signature_sync(video_path: str, frame_index: int) -> tuple[bytes, FrameSignature]:
+    """Blocking: like `read_frame_sync`, also returning the frame's signature for deduplication."""
+    frame = _read_frame_array(video_path, frame_index)
+    return _encode_webp(frame, frame_index), frame_signature(frame)
+
+
+class SignatureIndex:
+    """Signatures of kept frames, matched in one vectorized pass per candidate."""
+
+    def __init__(self, max_hamming: int, min_hist_similarity: float):
+        self.max_hamming = max_hamming
+        self.min_hist_similarity = min_hist_similarity
+        self._dhash = np.zeros(0, dtype=np.uint64)
+        self._hist = np.zeros((0, 128), dtype=np.float32)
+
+    def match(self, signature: FrameSignature) -> int | None:
+        """Position of the closest kept frame within both thresholds, or None."""
+        if self._dhash.size == 0:
+            return None
+        hamming = np.bitwise_count(self._dhash ^ np.uint64(signature.dhash))
+        similarity = np.minimum(self._hist, signature.histogram).sum(axis=1)
+        close = np.flatnonzero((hamming <= self.max_hamming) & (similarity >= self.min_hist_similarity))
+        if close.size == 0:
+            return None
+        return int(close[np.argmin(hamming[close])])
+
+    def add(self, signature: FrameSignature) -> int:
+        self._dhash = np.append(self._dhash, np.uint64(signature.dhash))
+        self._hist = np.vstack([self._hist, signature.histogram.astype(np.float32)])
+        return self._dhash.size - 1
+
+
 async def read_frame(video_path: str, frame_index: int) -> bytes:
     """Async wrapper for frame extraction by frame index."""
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(None, read_frame_sync, video_path, frame_index)
 
 
+async def read_frame_with_signature(video_path: str, frame_index: int) -> tuple[bytes, FrameSignature]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, read_frame_with_signature_sync, video_path, frame_index)
+
+
+async def compute_frame_change(video_path: str, stride: int = 2) -> np.ndarray:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, frame_change_signal, video_path, stride)
+
+
 async def extract_frames_from_segments(
     video_path: str,
     segments: List[Tuple[int, int]],
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import BigInteger, DateTime, Integer, String, Text, Index, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Mapped, declarative_base, mapped_column
+
+from core.config.logging import run_logger
+from core.metrics import ingestion_metrics
+
+CacheBase = declarative_base()
+
+_UINT64 = 1 << 64
+
+
+def _to_signed(value: int) -> int:
+    return value - _UINT64 if value >= 1 << 63 else value
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class CaptionCacheSchema(CacheBase):
+    __tablename__ = "caption_cache_application"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    model_version: Mapped[str] = mapped_column(String(256), nullable=False)
+    prompt_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Unsigned 64-bit hashes stored two's-complement so they fit BIGINT on Postgres and SQLite.
+    phash: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    dhash: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    caption: Mapped[str] = mapped_column(Text, nullable=False)
+    source_artifact_id: Mapped[str] = mapped_column(String(128), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_caption_cache_key", "model_version", "prompt_hash", "id"),
+    )
+
+
+@dataclass
+class _Partition:
+    """In-memory mirror of the rows for one (model_version, prompt) key."""
+    last_id: int = 0
+    phash: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint64))
+    dhash: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint64))
+    captions: list[str] = field(default_factory=list)
+
+
+class CaptionCache:
+    """
+    Caption cache keyed by perceptual hash, prompt and model version.
+
+    A lookup hits when both the pHash and the dHash of an image are within
+    `max_distance` bits of a cached entry for the same prompt and model. Rows
+    live in Postgres (the tracker database by default) or a SQLite file;
+    each key's hashes are mirrored in memory, so a lookup is one incremental
+    `id > last_seen` query plus a vectorized XOR/popcount.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_distance: int = 4):
+        self.engine = engine
+        self.max_distance = max_distance
+        self._sessionmaker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        self._partitions: dict[tuple[str, str], _Partition] = {}
+        self._initialized = False
+        self._lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, database_url: str, max_distance: int = 4) -> "CaptionCache":
+        return cls(create_async_engine(database_url, echo=False, pool_pre_ping=True), max_distance)
+
+    async def initialize(self) -> None:
+        if self._initialized:
+            return
+        async with self._lock:
+            if self._initialized:
+                return
+            async with self.engine.begin() as conn:
+                await conn.run_sync(CacheBase.metadata.create_all)
+            self._initialized = True
+            run_logger.info("Caption cache initialized")
+
+    async def _refresh(self, model_version: str, prompt_hash: str) -> _Partition:
+        key = (model_version, prompt_hash)
+        partition = self._partitions.setdefault(key, _Partition())
+        async with self._refresh_lock, self._sessionmaker() as session:
+            rows = (await session.execute(
+                select(
+                    CaptionCacheSchema.id,
+                    CaptionCacheSchema.phash,
+                    CaptionCacheSchema.dhash,
+                    CaptionCacheSchema.caption,
+                )
+                .where(
+                    CaptionCacheSchema.model_version == model_version,
+                    CaptionCacheSchema.prompt_hash == prompt_hash,
+                    CaptionCacheSchema.id > partition.last_id,
+                )
+                .order_by(CaptionCacheSchema.id)
+            )).all()
+            if not rows:
+                return partition
+            partition.last_id = rows[-1].id
+            partition.phash = np.concatenate([partition.phash, np.array([r.phash for r in rows], dtype=np.int64).view(np.uint64)])
+            partition.dhash = np.concatenate([partition.dhash, np.array([r.dhash for r in rows], dtype=np.int64).view(np.uint64)])
+            partition.captions.extend(r.caption for r in rows)
+        return partition
+
+    async def lookup(self, hashes: tuple[int, int], prompt: str, model_version: str) -> str | None:
+        """Caption of the nearest cached image within `max_distance`, or None."""
+        await self.initialize()
+        partition = await self._refresh(model_version, prompt_fingerprint(prompt))
+        if not partition.captions:
+            ingestion_metrics.track_cache("caption", False)
+            return None
+
+        phash, dhash = (np.uint64(h) for h in hashes)
+        p_dist = np.bitwise_count(partition.phash ^ phash)
+        d_dist = np.bitwise_count(partition.dhash ^ dhash)
+        candidates = np.flatnonzero((p_dist <= self.max_distance) & (d_dist <= self.max_distance))
+        ingestion_metrics.track_cache("caption", candidates.size > 0)
+        if candidates.size == 0:
+            return None
+        best = candidates[np.argmin(p_dist[candidates].astype(np.int32) + d_dist[candidates])]
+        return partition.captions[int(best)]
+
+    async def store(
+        self,
+        hashes: tuple[int, int],
+        prompt: str,
+        model_version: str,
+        caption: str,
+        source_artifact_id: str | None = None,
+    ) -> None:
+        await self.initialize()
+        async with self._sessionmaker() as session:
+            session.add(CaptionCacheSchema(
+                model_version=model_version,
+                prompt_hash=prompt_fingerprint(prompt),
+                phash=_to_signed(hashes[0]),
+                dhash=_to_signed(hashes[1]),
+                caption=caption,
+                source_artifact_id=source_artifact_id,
+            ))
+            await session.commit()
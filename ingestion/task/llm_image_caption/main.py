@@ -1,29 +1,52 @@
 from __future__  import annotations
+import asyncio
+import os
+from contextlib import aclosing
+from dataclasses import dataclass
 from typing import  AsyncIterator, cast, Literal
 from prefect import task
 from core.pipeline.base_task import BaseTask
 from core.clients.base import BaseServiceClient, BaseMilvusClient
 from tqdm.asyncio import tqdm
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from core.artifact.persist import  ArtifactPersistentVisitor 
 from core.artifact.schema import ImageArtifact, ImageCaptionArtifact
 from prefect_agent.service_llm.schema import LLMRequest, LLMResponse
 
-from task.common.util import fetch_object_from_s3
+from task.common.util import bounded_as_completed, fetch_object_from_s3, llm_concurrency
 
-from .util import  encode_image_base64
-from .prompt import IMAGE_CAPTION
+from .cache import CaptionCache
+from .util import  encode_image_base64, image_hashes, parse_batch_captions
+from .prompt import IMAGE_CAPTION, IMAGE_CAPTION_BATCH
 from core.config.logging import run_logger
 
 
 class ImageCaptionSettings(BaseModel):
     model_name: str
+    model_version: str | None = None
     device: Literal['cpu', 'cuda']
+    max_concurrency: int | None = Field(default=None, ge=1, description="In-flight LLM requests; defaults per provider")
+    caption_batch_size: int = Field(default=1, ge=1, le=16, description="Images packed into one LLM request; 1 disables batching")
+    cache_enabled: bool = Field(default=True, description="Reuse captions of perceptually identical images")
+    cache_max_distance: int = Field(default=4, ge=0, le=64, description="Max pHash/dHash Hamming distance for a cache hit")
+    cache_database_url: str | None = Field(
+        default=None,
+        description="Caption cache database (e.g. sqlite+aiosqlite:///./caption_cache.db); defaults to the tracker database",
+    )
+
+
+@dataclass
+class _PendingImage:
+    artifact: ImageCaptionArtifact
+    local_path: str
+    hashes: tuple[int, int] | None
 
 
 class ImageCaptionLLMTask(BaseTask[
     list[ImageArtifact], ImageCaptionArtifact,ImageCaptionSettings,
 ]):
+    postprocess_concurrency = 8
+
     def __init__(
         self,
         artifact_visitor: ArtifactPersistentVisitor,
@@ -34,9 +57,33 @@ class ImageCaptionLLMTask(BaseTask[
             visitor=artifact_visitor,
             config=config
         )
+        self._cache: CaptionCache | None = None
+
+    @property
+    def cache(self) -> CaptionCache | None:
+        if not self.config.cache_enabled:
+            return None
+        if self._cache is None:
+            if self.config.cache_database_url:
+                self._cache = CaptionCache.from_url(self.config.cache_database_url, self.config.cache_max_distance)
+            else:
+                self._cache = CaptionCache(self.visitor.tracker.engine, self.config.cache_max_distance)
+        return self._cache
+
+    async def _model_version(self, client: BaseServiceClient) -> str:
+        """Provider model id actually serving requests, so a model swap invalidates cached captions."""
+        try:
+            models = await client.list_models()
+            loaded = (models or {}).get("loaded_model") or {}
+            if loaded.get("model_name"):
+                return f"{self.config.model_name}:{loaded['model_name']}"
+        except Exception as e:
+            run_logger.warning(f"Could not resolve loaded LLM model, caching under {self.config.model_name}: {e}")
+        return self.config.model_name
 
     async def preprocess(self, input_data: list[ImageArtifact]) -> list[ImageCaptionArtifact]:
         result = []
+        provenance = self.provenance()
         for img_artifact in input_data:
             fps = img_artifact.related_video_fps
             timestamp =img_artifact.timestamp
@@ -48,8 +95,9 @@ class ImageCaptionLLMTask(BaseTask[
                 image_minio_url=img_artifact.minio_url_path,
                 extension=img_artifact.extension,
                 image_id=img_artifact.artifact_id,
-                artifact_type=ImageArtifact.__name__,
-                related_video_id=img_artifact.related_video_id
+                artifact_type=ImageCaptionArtifact.__name__,
+                related_video_id=img_artifact.related_video_id,
+                provenance=provenance,
             )
             result.append(img_cap_artifact)
         
@@ -63,18 +111,15 @@ class ImageCaptionLLMTask(BaseTask[
 
 
 
-        for artifact in tqdm(input_data, desc="Processing data"):
-            exists = await artifact.accept_check_exist(self.visitor)
-            if exists:
-                yield artifact , None
-                continue
-        
-            prompt = IMAGE_CAPTION
-            local_video_path = await fetch_object_from_s3(artifact.image_minio_url, self.visitor.minio_client, suffix=artifact.extension)
-            image_encode = encode_image_base64(local_video_path)
+        cache = self.cache
+        model_version = await self._model_version(client) if cache is not None else self.config.model_name
+        batch_size = self.config.caption_batch_size
+        concurrency = llm_concurrency(self.config.model_name, self.config.max_concurrency)
+
+        async def _request(prompt: str, images: list[str]) -> str:
             request = LLMRequest(
                 prompt=prompt,
-                image_base64=[image_encode],
+                image_base64=images,
                 metadata={}
             )
             response = await client.make_request(
@@ -82,12 +127,125 @@ class ImageCaptionLLMTask(BaseTask[
                 endpoint=client.inference_endpoint,
                 request_data=request
             )
+            return LLMResponse.model_validate(response).answer
 
-            parse = LLMResponse.model_validate(response)
-            caption = parse.answer
+        async def _store(pending: _PendingImage, prompt: str, caption: str) -> None:
+            if cache is not None and pending.hashes is not None and caption:
+                await cache.store(pending.hashes, prompt, model_version, caption, source_artifact_id=pending.artifact.image_id)
+
+        async def _lookup(pending: _PendingImage, prompts: tuple[str, ...]) -> str | None:
+            if cache is None or pending.hashes is None:
+                return None
+            for prompt in prompts:
+                cached = await cache.lookup(pending.hashes, prompt, model_version)
+                if cached is not None:
+                    run_logger.debug(f"Caption cache hit for {pending.artifact.image_id}")
+                    return cached
+            return None
+
+        async def _prepare(artifact: ImageCaptionArtifact) -> tuple[ImageCaptionArtifact, _PendingImage | None]:
+            exists = await artifact.accept_check_exist(self.visitor)
+            if exists:
+                return artifact, None
+
+            local_image_path = await fetch_object_from_s3(artifact.image_minio_url, self.visitor.minio_client, suffix=artifact.extension)
+            hashes = await asyncio.to_thread(image_hashes, local_image_path) if cache is not None else None
+            return artifact, _PendingImage(artifact=artifact, local_path=local_image_path, hashes=hashes)
+
+        async def _encode(pending: _PendingImage) -> str:
+            try:
+                return await asyncio.to_thread(encode_image_base64, pending.local_path)
+            finally:
+                os.remove(pending.local_path)
+
+        async def _caption_one(artifact: ImageCaptionArtifact) -> tuple[ImageCaptionArtifact, str | None]:
+            _, pending = await _prepare(artifact)
+            if pending is None:
+                return artifact, None
+            cached = await _lookup(pending, (IMAGE_CAPTION,))
+            if cached is not None:
+                os.remove(pending.local_path)
+                return artifact, cached
+            caption = await _request(IMAGE_CAPTION, [await _encode(pending)])
+            await _store(pending, IMAGE_CAPTION, caption)
+            return artifact, caption
+
+        async def _caption_batch(batch: list[_PendingImage]) -> list[tuple[ImageCaptionArtifact, str | None]]:
+            # Looked up now rather than at preparation, so captions stored by earlier batches of this run hit.
+            captions: dict[int, str] = {}
+            for i, pending in enumerate(batch):
+                cached = await _lookup(pending, (IMAGE_CAPTION_BATCH, IMAGE_CAPTION))
+                if cached is not None:
+                    os.remove(pending.local_path)
+                    captions[i] = cached
+            missing = [i for i in range(len(batch)) if i not in captions]
+            images = dict(zip(missing, await asyncio.gather(*(_encode(batch[i]) for i in missing))))
+
+            # One packed request, then one more for whatever entries it left out.
+            for _ in range(2):
+                if len(missing) < 2:
+                    break
+                prompt = IMAGE_CAPTION_BATCH.format(num_images=len(missing), last_index=len(missing) - 1)
+                answer = await _request(prompt, [images[i] for i in missing])
+                try:
+                    parsed = parse_batch_captions(answer, len(missing))
+                except ValueError as e:
+                    run_logger.warning(f"Batched caption parse failed, falling back to single-image calls: {e}")
+                    break
+                for i, caption in parsed.items():
+                    captions[missing[i]] = caption
+                    await _store(batch[missing[i]], IMAGE_CAPTION_BATCH, caption)
+                missing = [i for i in missing if i not in captions]
+
+            for i in missing:
+                captions[i] = await _request(IMAGE_CAPTION, [images[i]])
+                await _store(batch[i], IMAGE_CAPTION, captions[i])
+
+            return [(pending.artifact, captions[i]) for i, pending in enumerate(batch)]
+
+        with tqdm(total=len(input_data), desc="Processing data") as progress:
+            if batch_size == 1:
+                async for result in bounded_as_completed(input_data, _caption_one, concurrency):
+                    progress.update(1)
+                    yield result
+                return
+
+            # Batches are formed as images become ready; at most `concurrency` are in flight, so
+            # only that many batches' base64 payloads are held at once.
+            in_flight: set[asyncio.Task[list[tuple[ImageCaptionArtifact, str | None]]]] = set()
+            batch: list[_PendingImage] = []
+
+            async def _drain(block_until: int) -> AsyncIterator[tuple[ImageCaptionArtifact, str | None]]:
+                nonlocal in_flight
+                while in_flight and (len(in_flight) > block_until or any(t.done() for t in in_flight)):
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        results = finished.result()
+                        progress.update(len(results))
+                        for result in results:
+                            yield result
+
+            try:
+                async with aclosing(bounded_as_completed(input_data, _prepare, concurrency)) as prepared:
+                    async for artifact, pending in prepared:
+                        if pending is None:
+                            progress.update(1)
+                            yield artifact, None
+                        else:
+                            batch.append(pending)
+                            if len(batch) == batch_size:
+                                in_flight.add(asyncio.create_task(_caption_batch(batch)))
+                                batch = []
+                        async for result in _drain(concurrency - 1):
+                            yield result
+                if batch:
+                    in_flight.add(asyncio.create_task(_caption_batch(batch)))
+                async for result in _drain(0):
+                    yield result
+            finally:
+                for pending_task in in_flight:
+                    pending_task.cancel()
 
-            yield artifact, caption
-    
     async def postprocess(self, output_data: tuple[ImageCaptionArtifact, str | None]) -> ImageCaptionArtifact:
 
         artifact, caption = output_data
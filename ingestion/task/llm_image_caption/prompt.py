@@ -6,4 +6,19 @@ Bạn là một hệ thống hiểu nội dung hình ảnh. Nhiệm vụ của b
 - Làm rõ bối cảnh (không gian, thời gian nếu suy ra được), đối tượng xuất hiện, hành động, cảm xúc, và mối quan hệ giữa các đối tượng (nếu có).
 - Mô tả một cách tự nhiên, trôi chảy như người kể chuyện, không chỉ liệt kê.
 - Giữ nguyên các chi tiết trực quan quan trọng để truyền tải đầy đủ sự kiện.
-"""
\ No newline at end of file
+"""
+
+IMAGE_CAPTION_BATCH = """
+Bạn là một hệ thống hiểu nội dung hình ảnh. Bạn sẽ nhận {num_images} hình ảnh độc lập, được đánh số từ 0 đến {last_index} theo đúng thứ tự gửi kèm. Với MỖI hình ảnh, hãy tạo ra một mô tả sự kiện (event caption) thật chi tiết, đầy đủ và tự nhiên chỉ dựa trên chính hình ảnh đó.
+
+# Yêu cầu cho từng mô tả:
+- Quan sát kỹ hình ảnh và mô tả những gì đang diễn ra như một câu chuyện có đầu  giữa - cuối.
+- Làm rõ bối cảnh (không gian, thời gian nếu suy ra được), đối tượng xuất hiện, hành động, cảm xúc, và mối quan hệ giữa các đối tượng (nếu có).
+- Mô tả một cách tự nhiên, trôi chảy như người kể chuyện, không chỉ liệt kê.
+- Giữ nguyên các chi tiết trực quan quan trọng để truyền tải đầy đủ sự kiện.
+- Không trộn lẫn nội dung giữa các hình ảnh.
+
+# Định dạng trả về:
+Chỉ trả về DUY NHẤT một mảng JSON hợp lệ, không kèm giải thích hay markdown, gồm đúng {num_images} phần tử:
+[{{"index": 0, "caption": "..."}}, {{"index": 1, "caption": "..."}}]
+"""
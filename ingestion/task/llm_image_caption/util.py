@@ -1,4 +1,5 @@
 import cv2
+import json
 import base64
 import numpy as np
 from typing import List
@@ -24,4 +25,74 @@ def encode_image_base64(
         image_bytes = f.read()
 
     encoded_str = base64.b64encode(image_bytes).decode("utf-8")
-    return encoded_str
\ No newline at end of file
+    return encoded_str
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def perceptual_hashes(image: np.ndarray) -> tuple[int, int]:
+    """
+    64-bit pHash and dHash of a grayscale image.
+
+    pHash thresholds the 8x8 low-frequency DCT block of a 32x32 downscale at
+    its median (DC term excluded); dHash compares horizontally adjacent pixels
+    of a 9x8 downscale. Both survive re-encoding, resizing and small overlays.
+    """
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float64)
+    low = (_DCT_32 @ small @ _DCT_32.T)[:8, :8]
+    phash = _bits_to_int(low > np.median(low.ravel()[1:]))
+
+    tiny = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    dhash = _bits_to_int(tiny[:, 1:] > tiny[:, :-1])
+    return phash, dhash
+
+
+def image_hashes(image_path: str) -> tuple[int, int]:
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError(f"Could not decode image: {image_path}")
+    return perceptual_hashes(image)
+
+
+def parse_batch_captions(answer: str, num_images: int) -> dict[int, str]:
+    """
+    Parse a batched caption answer of the form `[{"index": i, "caption": "..."}]`.
+
+    Entries with an out-of-range index or an empty caption are skipped, so the
+    caller can retry only the missing indices.
+
+    Raises:
+        ValueError: If the answer does not contain a JSON array.
+    """
+    start, end = answer.find("["), answer.rfind("]")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON array in batched caption answer")
+    try:
+        items = json.loads(answer[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Malformed JSON in batched caption answer: {e}") from e
+    if not isinstance(items, list):
+        raise ValueError("Batched caption answer is not a JSON array")
+
+    captions: dict[int, str] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index, caption = item.get("index"), item.get("caption")
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if isinstance(index, int) and 0 <= index < num_images and isinstance(caption, str) and caption.strip():
+            captions.setdefault(index, caption.strip())
+    return captions
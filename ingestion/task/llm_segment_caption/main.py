@@ -1,14 +1,15 @@
 from __future__  import annotations
+import asyncio
 from tqdm.asyncio import tqdm
-from typing import AsyncIterator, cast
+from typing import Any, AsyncIterator, cast
 import json
 from core.pipeline.base_task import BaseTask
 from core.clients.base import BaseServiceClient, BaseMilvusClient
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from core.artifact.persist import  ArtifactPersistentVisitor 
 from core.artifact.schema import AutoshotArtifact, ASRArtifact, SegmentCaptionArtifact
 from prefect_agent.service_llm.schema import LLMRequest, LLMResponse
-from task.common.util import fetch_object_from_s3
+from task.common.util import bounded_as_completed, fetch_object_from_s3, llm_concurrency
 
 from .util import extract_images, return_related_asr_with_shot
 from .prompt import SEGMENT_CAPTION_PROMPT
@@ -18,8 +19,10 @@ from core.config.logging import run_logger
 
 class LLMCaptionSettings(BaseModel):
     model_name: str
+    model_version: str | None = None
     device: Literal['cuda', 'cpu']
     image_per_segments: int
+    max_concurrency: int | None = Field(default=None, ge=1, description="In-flight LLM requests; defaults per provider")
 
 
 class ShotASRInput(BaseModel):
@@ -43,6 +46,8 @@ def frame_to_timecode(frame_index: int, fps: float) -> str:
 class SegmentCaptionLLMTask(BaseTask[
     ShotASRInput, SegmentCaptionArtifact,LLMCaptionSettings,
 ]):
+    postprocess_concurrency = 8
+
     def __init__(
         self,
         artifact_visitor: ArtifactPersistentVisitor,
@@ -53,13 +58,30 @@ class SegmentCaptionLLMTask(BaseTask[
             visitor=artifact_visitor,
             config=config
         )
-    
+
+    def input_video_ids(self, input_data: ShotASRInput) -> list[str]:
+        return list(dict.fromkeys(asr.related_video_id for asr in input_data.list_asrs))
+
+    def select_inputs(self, input_data: ShotASRInput, video_ids: set[str]) -> ShotASRInput:
+        pairs = [
+            (asr, shot) for asr, shot in zip(input_data.list_asrs, input_data.lists_autoshots)
+            if asr.related_video_id in video_ids
+        ]
+        return ShotASRInput(list_asrs=[asr for asr, _ in pairs], lists_autoshots=[shot for _, shot in pairs])
+
+    def inputs_by_video(self, input_data: ShotASRInput) -> dict[str, list[Any]]:
+        grouped: dict[str, list[Any]] = {}
+        for asr, shot in zip(input_data.list_asrs, input_data.lists_autoshots):
+            grouped.setdefault(asr.related_video_id, []).extend((asr, shot))
+        return grouped
+
     async def preprocess(self, input_data: ShotASRInput) -> list[SegmentCaptionArtifact]:
         list_asr, list_autoshot = input_data.list_asrs, input_data.lists_autoshots        
         assert len(list_asr) == len(list_autoshot), "Not equal error"
        
 
         result = []
+        provenance = self.provenance()
         for asr, shot in zip(list_asr, list_autoshot):
             asr_dict_path = await fetch_object_from_s3(asr.minio_url_path, self.visitor.minio_client, suffix='.json')
             autoshot_dict_path = await fetch_object_from_s3(shot.minio_url_path, self.visitor.minio_client, suffix='.json')
@@ -94,7 +116,8 @@ class SegmentCaptionLLMTask(BaseTask[
                     related_video_extension=shot.related_video_extension,
                     autoshot_artifact_id=shot.artifact_id,
                     artifact_type=SegmentCaptionArtifact.__name__,
-                    related_video_id=shot.related_video_id
+                    related_video_id=shot.related_video_id,
+                    provenance=provenance,
                 )
                 result.append(artifact)
 
@@ -108,21 +131,20 @@ class SegmentCaptionLLMTask(BaseTask[
         run_logger.info("Before execute")
         
         
-        for artifact in tqdm(input_data, desc="Processing segments"):
-            run_logger.info("Before execute")
+        async def _caption(artifact: SegmentCaptionArtifact) -> tuple[SegmentCaptionArtifact, str | None]:
             exist = await artifact.accept_check_exist(self.visitor) 
             run_logger.debug(f"Exists: {exist}")
             if exist:
-                yield artifact , None
-                continue
-
+                return artifact, None
 
             prompt = SEGMENT_CAPTION_PROMPT.format(
                 asr=artifact.related_asr
             )
             local_video_path = await fetch_object_from_s3(artifact.related_video_minio_url, self.visitor.minio_client, suffix=artifact.related_video_extension)
 
-            image_encode = extract_images(local_video_path, artifact.start_frame, artifact.end_frame, self.config.image_per_segments)
+            image_encode = await asyncio.to_thread(
+                extract_images, local_video_path, artifact.start_frame, artifact.end_frame, self.config.image_per_segments
+            )
 
             request = LLMRequest(
                 prompt=prompt,
@@ -138,7 +160,13 @@ class SegmentCaptionLLMTask(BaseTask[
             parsed = LLMResponse.model_validate(response)
             caption = parsed.answer
             run_logger.info(f"Response: {caption}")
-            yield artifact, caption
+            return artifact, caption
+
+        concurrency = llm_concurrency(self.config.model_name, self.config.max_concurrency)
+        with tqdm(total=len(input_data), desc="Processing segments") as progress:
+            async for result in bounded_as_completed(input_data, _caption, concurrency):
+                progress.update(1)
+                yield result
     
     async def postprocess(self, output_data: tuple[SegmentCaptionArtifact, str | None]) -> SegmentCaptionArtifact:
 
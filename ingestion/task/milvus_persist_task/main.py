@@ -65,7 +65,8 @@ class ImageEmbeddingMilvusTask(
             exists = await client.exists(  # type: ignore[attr-defined]
                 id_= artifact.artifact_id,
                 related_video_id=artifact.related_video_id,
-                user_bucket=artifact.user_bucket
+                user_bucket=artifact.user_bucket,
+                legacy_ids=artifact.legacy_artifact_ids
             )
 
             if exists:
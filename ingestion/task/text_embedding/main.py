@@ -15,6 +15,7 @@ from core.config.logging import run_logger
 
 class TextEmbeddingSettings(BaseModel):
     model_name: str
+    model_version: str | None = None
     device: Literal['cuda', 'cpu'] 
     batch_size: int
 
@@ -23,6 +24,8 @@ class TextEmbeddingSettings(BaseModel):
 class TextImageCaptionEmbeddingTask(BaseTask[
     list[ImageCaptionArtifact], TextCaptionEmbeddingArtifact, TextEmbeddingSettings
 ]):
+    postprocess_concurrency = 8
+
     def __init__(
         self,
         artifact_visitor: ArtifactPersistentVisitor,
@@ -39,6 +42,7 @@ class TextImageCaptionEmbeddingTask(BaseTask[
         input_data: list[ImageCaptionArtifact]
     ) -> list[TextCaptionEmbeddingArtifact]:
         result = []
+        provenance = self.provenance()
         for img_artifact in input_data:
             fps = img_artifact.related_video_fps
             timestamp = img_artifact.time_stamp
@@ -51,7 +55,8 @@ class TextImageCaptionEmbeddingTask(BaseTask[
                 caption_id=img_artifact.artifact_id,
                 artifact_type=TextCaptionEmbeddingArtifact.__name__,
                 related_video_id=img_artifact.related_video_id,
-                image_minio_url=img_artifact.artifact_id
+                image_minio_url=img_artifact.artifact_id,
+                provenance=provenance,
             )
             result.append(text_embed_art)
         return result
@@ -130,6 +135,8 @@ class TextCaptionSegmentEmbeddingTask(
         list[SegmentCaptionArtifact], TextCapSegmentEmbedArtifact,TextEmbeddingSettings
     ]
 ):
+    postprocess_concurrency = 8
+
     def __init__(
         self,
         artifact_visitor: ArtifactPersistentVisitor,
@@ -146,6 +153,7 @@ class TextCaptionSegmentEmbeddingTask(
         input_data:list[SegmentCaptionArtifact]
     ) -> list[TextCapSegmentEmbedArtifact]:
         result = []
+        provenance = self.provenance()
         for seg_artifact in input_data:
             text_embed_art = TextCapSegmentEmbedArtifact(
                 related_video_fps=seg_artifact.related_video_fps,
@@ -157,7 +165,8 @@ class TextCaptionSegmentEmbeddingTask(
                 user_bucket=seg_artifact.user_bucket,
                 segment_cap_id=seg_artifact.artifact_id,
                 artifact_type=TextCapSegmentEmbedArtifact.__name__,
-                related_video_id=seg_artifact.related_video_id
+                related_video_id=seg_artifact.related_video_id,
+                provenance=provenance,
             )
             result.append(text_embed_art)
         return result
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.fixture
+def object_store(tmp_path):
+    """A directory-backed stand-in for MinIO; assign it to `StorageClient.client`."""
+    pytest.importorskip("minio")
+    pytest.importorskip("pymilvus")
+    from local_backends import LocalObjectStore
+
+    return LocalObjectStore(tmp_path / "store")
+
+
+@pytest.fixture
+def tiny_asr_processor():
+    """An `ASRProcessor` over a small, seeded, untrained ChunkFormer on CPU, with a 12-letter vocabulary."""
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("torchaudio")
+    from service_asr.model.asr_core import ASRProcessor
+    from service_asr.model.chunkformer.asr_model import ASRModel
+    from service_asr.model.chunkformer.ctc import CTC
+    from service_asr.model.chunkformer.encoder import ChunkFormerEncoder
+
+    vocab_size = 12
+    torch.manual_seed(0)
+    encoder = ChunkFormerEncoder(
+        80,
+        output_size=32,
+        attention_heads=2,
+        linear_units=64,
+        num_blocks=3,
+        cnn_module_kernel=15,
+        pos_enc_layer_type="stream_rel_pos",
+        cnn_module_norm="layer_norm",
+        dropout_rate=0.0,
+        positional_dropout_rate=0.0,
+        use_dynamic_conv=True,
+    )
+    model = ASRModel(vocab_size=vocab_size, encoder=encoder, ctc=CTC(vocab_size, 32))
+    model.eval()
+
+    processor = ASRProcessor.__new__(ASRProcessor)
+    processor.device = torch.device("cpu")
+    processor.model = model
+    processor.char_dict = {i: chr(ord("a") + i) for i in range(vocab_size)}
+    return processor
@@ -0,0 +1,343 @@
+"""
+Local stand-ins for MinIO and Milvus, shared by the tests and the benchmarks.
+
+`LocalObjectStore` implements the slice of the `minio.Minio` API that
+`core.storage.StorageClient` calls, on a directory, so the real
+StorageClient code runs unchanged. `InMemoryMilvus` implements the slice
+of `pymilvus.AsyncMilvusClient` that `BaseMilvusClient` and the agent's
+search clients call; tests and the benchmark harnesses swap it in for
+the driver class. Search is exact, so it measures everything around the
+index but not the index itself. Both count operations so the reports can
+show how many storage / vector round trips a run made.
+"""
+from __future__ import annotations
+
+import io
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+import numpy as np
+from minio.deleteobjects import DeleteError
+from minio.error import S3Error
+from pymilvus import MilvusException
+from pymilvus.client.search_result import Hit
+
+
+class _Counted:
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, op: str) -> None:
+        with self._lock:
+            self.calls[op] += 1
+
+
+class _ObjectResponse(io.BytesIO):
+    def release_conn(self) -> None:
+        pass
+
+
+class _ObjectStat:
+    def __init__(self, object_name: str, size: int):
+        self.object_name = object_name
+        self.size = size
+
+
+class _Bucket:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class LocalObjectStore(_Counted):
+    """`bucket/object` -> `<root>/bucket/object`."""
+
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, bucket: str, object_name: str) -> Path:
+        return self.root / bucket / object_name
+
+    def _missing(self, code: str, bucket: str, object_name: str | None = None) -> S3Error:
+        return S3Error(None, code, f"{bucket}/{object_name or ''} not found", object_name or bucket,  # type: ignore[arg-type]
+                       None, None, bucket_name=bucket, object_name=object_name)
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        self._count("bucket_exists")
+        return (self.root / bucket_name).is_dir()
+
+    def make_bucket(self, bucket_name: str) -> None:
+        self._count("make_bucket")
+        (self.root / bucket_name).mkdir(parents=True, exist_ok=True)
+
+    def list_buckets(self) -> list[_Bucket]:
+        self._count("list_buckets")
+        return [_Bucket(p.name) for p in self.root.iterdir() if p.is_dir()]
+
+    def put_object(self, bucket_name: str, object_name: str, data: BinaryIO, length: int = -1, **_: Any) -> None:
+        self._count("put_object")
+        path = self._path(bucket_name, object_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data.read() if length < 0 else data.read(length))
+        tmp.replace(path)
+
+    def get_object(self, bucket_name: str, object_name: str, offset: int = 0, length: int = 0, **_: Any) -> _ObjectResponse:
+        self._count("get_object")
+        path = self._path(bucket_name, object_name)
+        if not path.is_file():
+            raise self._missing("NoSuchKey", bucket_name, object_name)
+        with path.open("rb") as fh:
+            fh.seek(offset)
+            return _ObjectResponse(fh.read(length) if length else fh.read())
+
+    def stat_object(self, bucket_name: str, object_name: str, **_: Any) -> _ObjectStat:
+        self._count("stat_object")
+        path = self._path(bucket_name, object_name)
+        if not path.is_file():
+            raise self._missing("NoSuchKey", bucket_name, object_name)
+        return _ObjectStat(object_name, path.stat().st_size)
+
+    def list_objects(self, bucket_name: str, prefix: str = "", recursive: bool = False, **_: Any) -> Iterable[_ObjectStat]:
+        self._count("list_objects")
+        bucket = self.root / bucket_name
+        for path in sorted(bucket.rglob("*")) if bucket.is_dir() else []:
+            name = path.relative_to(bucket).as_posix()
+            if path.is_file() and not path.name.startswith(".") and name.startswith(prefix):
+                yield _ObjectStat(name, path.stat().st_size)
+
+    def remove_objects(self, bucket_name: str, delete_object_list: Iterable[Any], **_: Any) -> Iterable[DeleteError]:
+        self._count("remove_objects")
+        if not (self.root / bucket_name).is_dir():
+            raise self._missing("NoSuchBucket", bucket_name)
+        for obj in delete_object_list:
+            self._path(bucket_name, obj._name).unlink(missing_ok=True)
+        return iter(())
+
+    def presigned_get_object(self, bucket_name: str, object_name: str, **_: Any) -> str:
+        self._count("presigned_get_object")
+        return self._path(bucket_name, object_name).resolve().as_uri()
+
+
+_CLAUSE = re.compile(r'^\s*(\w+)\s*(==|!=)\s*("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?)\s*$')
+_IN_CLAUSE = re.compile(r'^\s*(\w+)\s+(not\s+in|in)\s+\[(.*)\]\s*$', re.IGNORECASE)
+
+
+def _literal(token: str) -> Any:
+    token = token.strip()
+    if token.startswith('"'):
+        return token[1:-1]
+    return float(token) if "." in token else int(token)
+
+
+def compile_filter(expr: str | None):
+    """Predicate for the boolean expressions the ingestion code sends: `and`-joined ==, != and in clauses."""
+    if not expr or not expr.strip():
+        return lambda row: True
+    checks = []
+    for clause in re.split(r"\s+and\s+", expr.strip(), flags=re.IGNORECASE):
+        if match := _CLAUSE.match(clause):
+            field, op, value = match.group(1), match.group(2), _literal(match.group(3))
+            checks.append(lambda row, f=field, v=value, eq=(op == "=="): (row.get(f) == v) == eq)
+        elif match := _IN_CLAUSE.match(clause):
+            field, negate = match.group(1), match.group(2).lower() != "in"
+            values = {_literal(v) for v in re.findall(r'"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?', match.group(3))}
+            checks.append(lambda row, f=field, vs=values, n=negate: (row.get(f) in vs) != n)
+        else:
+            raise MilvusException(message=f"Unsupported filter clause in local vector store: {clause!r}")
+    return lambda row: all(check(row) for check in checks)
+
+
+class _IndexParams(list):
+    def add_index(self, field_name: str, **kwargs: Any) -> None:
+        self.append({"field_name": field_name, **kwargs})
+
+
+class InMemoryMilvus(_Counted):
+    """
+    Collections keyed by (uri, db_name), shared by every instance in the
+    process, since the flow opens a new client per task on its own thread.
+    """
+
+    _databases: dict[tuple[str, str], dict[str, Any]] = {}
+    _shared_lock = threading.Lock()
+    instances: list["InMemoryMilvus"] = []
+
+    def __init__(self, uri: str = "", user: str = "", password: str = "", db_name: str = "default", **_: Any):
+        super().__init__()
+        with self._shared_lock:
+            db = self._databases.setdefault((uri, db_name), {"collections": {}, "aliases": {}, "fields": {}})
+            self.instances.append(self)
+        self._collections: dict[str, dict[str, dict]] = db["collections"]
+        self._aliases: dict[str, str] = db["aliases"]
+        # Field names from the schema given at creation; empty when created without one.
+        self._fields: dict[str, set[str]] = db["fields"]
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._shared_lock:
+            cls._databases.clear()
+            cls.instances.clear()
+
+    @classmethod
+    def totals(cls) -> dict[str, Any]:
+        calls: Counter[str] = Counter()
+        for instance in cls.instances:
+            calls.update(instance.calls)
+        rows = {
+            name: len(rows)
+            for db in cls._databases.values() for name, rows in db["collections"].items()
+        }
+        return {"calls": dict(calls), "rows": rows}
+
+    def _rows(self, collection_name: str) -> dict[str, dict]:
+        name = self._aliases.get(collection_name, collection_name)
+        if name not in self._collections:
+            raise MilvusException(message=f"collection not found[collection={collection_name}]")
+        return self._collections[name]
+
+    async def close(self) -> None:
+        pass
+
+    async def has_collection(self, collection_name: str, **_: Any) -> bool:
+        self._count("has_collection")
+        return collection_name in self._collections or collection_name in self._aliases
+
+    async def create_collection(self, collection_name: str, schema: Any = None, **_: Any) -> None:
+        self._count("create_collection")
+        with self._shared_lock:
+            self._collections.setdefault(collection_name, {})
+            self._fields[collection_name] = {field.name for field in schema.fields} if schema is not None else set()
+
+    def prepare_index_params(self) -> _IndexParams:
+        return _IndexParams()
+
+    async def create_index(self, collection_name: str, index_params: Any = None, **_: Any) -> None:
+        self._count("create_index")
+        self._rows(collection_name)
+
+    async def flush(self, collection_name: str, **_: Any) -> None:
+        self._count("flush")
+        self._rows(collection_name)
+
+    async def load_collection(self, collection_name: str, **_: Any) -> None:
+        self._count("load_collection")
+        self._rows(collection_name)
+
+    async def drop_collection(self, collection_name: str, **_: Any) -> None:
+        self._count("drop_collection")
+        with self._shared_lock:
+            self._collections.pop(collection_name, None)
+            self._fields.pop(collection_name, None)
+
+    async def insert(self, collection_name: str, data: list[dict[str, Any]], **_: Any) -> dict[str, Any]:
+        self._count("insert")
+        rows = self._rows(collection_name)
+        with self._shared_lock:
+            for row in data:
+                rows[row["id"]] = dict(row)
+        return {"insert_count": len(data), "ids": [row["id"] for row in data]}
+
+    async def query(
+        self,
+        collection_name: str,
+        filter: str = "",
+        output_fields: list[str] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        **_: Any,
+    ) -> list[dict[str, Any]]:
+        self._count("query")
+        predicate = compile_filter(filter)
+        with self._shared_lock:
+            matched = [row for row in self._rows(collection_name).values() if predicate(row)]
+        if output_fields == ["count(*)"]:
+            return [{"count(*)": len(matched)}]
+        matched = matched[offset:offset + limit] if limit is not None else matched[offset:]
+        if not output_fields or "*" in output_fields:
+            return [dict(row) for row in matched]
+        return [{field: row.get(field) for field in {"id", *output_fields}} for row in matched]
+
+    async def search(
+        self,
+        collection_name: str,
+        data: list[list[float]],
+        anns_field: str = "embedding",
+        limit: int = 10,
+        output_fields: list[str] | None = None,
+        filter: str = "",
+        search_params: dict[str, Any] | None = None,
+        **_: Any,
+    ) -> list[list[Hit]]:
+        """Exact top-`limit` per query vector under `search_params["metric_type"]`."""
+        self._count("search")
+        name = self._aliases.get(collection_name, collection_name)
+        known = self._fields.get(name)
+        if known and (unknown := [f for f in output_fields or [] if f not in known]):
+            raise MilvusException(message=f"field {unknown[0]} not exist[collection={collection_name}]")
+        metric = (search_params or {}).get("metric_type", "COSINE").upper()
+        predicate = compile_filter(filter)
+        with self._shared_lock:
+            matched = [row for row in self._rows(collection_name).values() if predicate(row)]
+        if not matched:
+            return [[] for _ in data]
+
+        vectors = np.asarray([row[anns_field] for row in matched], dtype=np.float32)
+        queries = np.asarray(data, dtype=np.float32)
+        if metric == "L2":
+            scores = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+            order = np.argsort(scores, axis=1)
+        else:
+            if metric == "COSINE":
+                vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+                queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+            scores = queries @ vectors.T
+            order = np.argsort(-scores, axis=1)
+
+        fields = [f for f in output_fields or [] if f != anns_field]
+        return [
+            [
+                Hit({"id": matched[j]["id"], "distance": float(scores[q, j]),
+                     "entity": {f: matched[j].get(f) for f in fields}}, pk_name="id")
+                for j in order[q, :limit]
+            ]
+            for q in range(len(queries))
+        ]
+
+    async def delete(self, collection_name: str, ids: list[str] | None = None, filter: str = "", **_: Any) -> dict[str, int]:
+        self._count("delete")
+        rows = self._rows(collection_name)
+        with self._shared_lock:
+            if ids is not None:
+                doomed = [i for i in ids if i in rows]
+            else:
+                predicate = compile_filter(filter)
+                doomed = [i for i, row in rows.items() if predicate(row)]
+            for i in doomed:
+                del rows[i]
+        return {"delete_count": len(doomed)}
+
+    async def get_collection_stats(self, collection_name: str, **_: Any) -> dict[str, int]:
+        self._count("get_collection_stats")
+        return {"row_count": len(self._rows(collection_name))}
+
+    async def describe_alias(self, alias: str, **_: Any) -> dict[str, str]:
+        if alias not in self._aliases:
+            raise MilvusException(message=f"alias not found[alias={alias}]")
+        return {"alias": alias, "collection_name": self._aliases[alias]}
+
+    async def create_alias(self, collection_name: str, alias: str, **_: Any) -> None:
+        self._aliases[alias] = collection_name
+
+    async def alter_alias(self, collection_name: str, alias: str, **_: Any) -> None:
+        self._aliases[alias] = collection_name
+
+    async def rename_collection(self, old_name: str, new_name: str, **_: Any) -> None:
+        with self._shared_lock:
+            self._collections[new_name] = self._collections.pop(old_name)
+            self._fields[new_name] = self._fields.pop(old_name, set())
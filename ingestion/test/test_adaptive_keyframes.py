@@ -0,0 +1,138 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from task.image_processing.util import (  # noqa: E402
+    allocate_frame_budget,
+    frame_change_signal,
+    get_segment_frame_indices,
+    plan_adaptive_keyframes,
+    select_change_frames,
+)
+
+
+def _write_video(path: Path) -> list[tuple[int, int]]:
+    """60 static frames, then 60 frames of a moving box, then 30 frames of another static shot."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 90))
+    if not writer.isOpened():
+        pytest.skip("no MJPG encoder available")
+    for i in range(150):
+        frame = np.full((90, 160, 3), 40, dtype=np.uint8)
+        if i < 60:
+            cv2.rectangle(frame, (20, 20), (60, 60), (200, 200, 200), -1)
+        elif i < 120:
+            x = 2 * (i - 60)
+            cv2.rectangle(frame, (x, 20), (x + 40, 60), (0, 200, 255), -1)
+        else:
+            frame[:] = (180, 60, 20)
+        writer.write(frame)
+    writer.release()
+    return [(0, 59), (60, 119), (120, 149)]
+
+
+def test_change_signal_follows_motion_and_cuts(tmp_path):
+    video = tmp_path / "clip.avi"
+    _write_video(video)
+
+    change = frame_change_signal(str(video), stride=2)
+
+    assert change.shape == (150,)
+    assert change[1:58].max() < 0.5
+    assert change[62:118].mean() > 5 * change[1:58].mean() + 0.1
+    assert change[119:122].max() == change.max()
+
+
+def test_budget_follows_weights_within_bounds():
+    counts = allocate_frame_budget([1.0, 10.0, 0.0, 5.0], [100, 100, 100, 2], budget=12,
+                                   min_per_segment=1, max_per_segment=6)
+    assert counts[2] == 1 and counts[3] == 2
+    assert counts[1] == 6
+    assert sum(counts) == 12
+
+    # The minimum wins when the budget cannot cover it.
+    assert allocate_frame_budget([1.0] * 4, [10] * 4, budget=2, min_per_segment=1, max_per_segment=3) == [1] * 4
+
+
+def test_frames_cluster_on_change_and_stay_distinct():
+    change = np.zeros(100)
+    change[70] = 50.0
+    picks = select_change_frames(change, 0, 99, 4)
+    assert len(set(picks)) == 4
+    assert sum(65 <= p <= 75 for p in picks) >= 2
+
+    static = select_change_frames(np.zeros(100), 0, 99, 4)
+    assert static == sorted(static) and len(set(static)) == 4
+
+
+def test_adaptive_plan_moves_frames_to_motion_without_raising_total(tmp_path):
+    video = tmp_path / "clip.avi"
+    segments = _write_video(video)
+    change = frame_change_signal(str(video), stride=2)
+
+    uniform = [get_segment_frame_indices(start, end, 3) for start, end in segments]
+    plan = plan_adaptive_keyframes(change, segments, budget=9, min_per_segment=1, max_per_segment=6)
+
+    assert sum(map(len, plan)) == sum(map(len, uniform)) == 9
+    assert len(plan[1]) > len(plan[0])
+    for (start, end), frames in zip(segments, plan):
+        assert frames and all(start <= f <= end for f in frames)
+
+
+def test_adaptive_task_downloads_each_video_once(tmp_path, object_store, monkeypatch):
+    pytest.importorskip("minio")
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("prefect")
+    import asyncio
+    import io
+    import json
+    import os
+    from types import SimpleNamespace
+
+    for name, value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                        "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+        os.environ.setdefault(name, value)
+    from core.artifact.schema import AutoshotArtifact
+    from core.config.storage import MinioSettings
+    from core.storage import StorageClient
+    from task.image_processing import main as image_main
+
+    video = tmp_path / "clip.avi"
+    segments = _write_video(video)
+    storage = StorageClient(MinioSettings(host="localhost", port="9000", user="u", password="p"))
+    storage.client = object_store
+    storage.upload_fileobj("u", "videos/v.avi", io.BytesIO(video.read_bytes()))
+    storage.upload_fileobj("u", "autoshot/v.json", io.BytesIO(json.dumps({"segments": segments}).encode()))
+
+    fetched: list[tuple[str, str]] = []
+    original_fetch = image_main.fetch_object_from_s3
+
+    async def recording_fetch(url, client, suffix):
+        path = await original_fetch(url, client, suffix)
+        fetched.append((url, path))
+        return path
+
+    async def _missing(*_args, **_kwargs):
+        return False
+
+    monkeypatch.setattr(image_main, "fetch_object_from_s3", recording_fetch)
+    visitor = SimpleNamespace(minio_client=storage, _check_exist=_missing)
+    task = image_main.ImageProcessingTask(visitor, image_main.ImageProcessingSettings(  # type: ignore[arg-type]
+        num_img_per_segment=3, sampling="adaptive", dedup_scope="off",
+    ))
+    shot = AutoshotArtifact(artifact_type="AutoshotArtifact", related_video_id="v", related_video_minio_url="s3://u/videos/v.avi",
+                            related_video_extension=".avi", related_video_fps=25.0, task_name="autoshot", user_bucket="u")
+
+    async def run():
+        preprocessed = await task.preprocess([shot])
+        return [artifact async for artifact, _ in task.execute(preprocessed, None)]
+
+    images = asyncio.run(run())
+    video_fetches = [path for url, path in fetched if url == shot.related_video_minio_url]
+    assert len(images) == 9
+    assert len(video_fetches) == 1 and not os.path.exists(video_fetches[0])
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("prefect")
+pytest.importorskip("minio")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from core.artifact.persist import ArtifactPersistentVisitor  # noqa: E402
+from core.artifact.schema import ImageCaptionArtifact, ImageEmbeddingArtifact, VideoArtifact  # noqa: E402
+from core.pipeline.tracker import ArtifactMetadata, ArtifactTracker  # noqa: E402
+
+
+def _video() -> VideoArtifact:
+    return VideoArtifact(
+        artifact_type="VideoArtifact", task_name="upload", video_id="v1", video_minio_url="s3://u/videos/v1.mp4",
+        video_extension=".mp4", user_bucket="u", fps=25.0,
+    )
+
+
+def _embedding() -> ImageEmbeddingArtifact:
+    return ImageEmbeddingArtifact(
+        artifact_type="ImageEmbeddingArtifact", time_stamp="0", frame_index=3, related_video_id="v1",
+        related_video_fps=25.0, user_bucket="u", image_minio_url="s3://u/img.webp", extension=".webp", image_id="img",
+    )
+
+
+def _caption() -> ImageCaptionArtifact:
+    return ImageCaptionArtifact(
+        artifact_type="ImageCaptionArtifact", frame_index=3, extension=".json", related_video_id="v1",
+        related_video_fps=25.0, user_bucket="u", image_minio_url="s3://u/img.webp", image_id="img", time_stamp="0",
+    )
+
+
+def _row(artifact_id: str, artifact_type: str) -> ArtifactMetadata:
+    return ArtifactMetadata(
+        artifact_id=artifact_id, artifact_type=artifact_type, user_id="u", minio_url="s3://u/x",
+        parent_artifact_id=None, task_name="t", artifact_metadata={}, related_video_id="v1",
+    )
+
+
+def test_video_artifact_url_and_existence_check_do_not_need_an_object_key(tmp_path):
+    async def run():
+        tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 'tracker.db'}")
+        await tracker.initialize()
+        visitor = ArtifactPersistentVisitor(minio_client=None, tracker=tracker)  # type: ignore[arg-type]
+        video = _video()
+        before = await video.accept_check_exist(visitor)
+        await tracker.save_artifact(ArtifactMetadata(
+            artifact_id=video.artifact_id, artifact_type="VideoArtifact", user_id="u",
+            minio_url=video.minio_url_path, parent_artifact_id=None, task_name="upload", artifact_metadata={},
+        ))
+        after = await video.accept_check_exist(visitor)
+        await tracker.close()
+        return before, after
+
+    assert _video().minio_url_path == "s3://u/videos/v1.mp4"
+    assert asyncio.run(run()) == (False, True)
+
+
+def test_embedding_id_differs_from_caption_but_legacy_rows_still_count(tmp_path):
+    embedding, caption = _embedding(), _caption()
+    (legacy_id,) = embedding.legacy_artifact_ids
+    assert embedding.artifact_id != caption.artifact_id
+    assert legacy_id == caption.artifact_id
+
+    async def exists(rows):
+        tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / f'{len(rows)}-{rows[0][1]}.db'}")
+        await tracker.initialize()
+        for artifact_id, artifact_type in rows:
+            await tracker.save_artifact(_row(artifact_id, artifact_type))
+        visitor = ArtifactPersistentVisitor(minio_client=None, tracker=tracker)  # type: ignore[arg-type]
+        found = await visitor._lookup_exist(embedding, "u", check_minio=False)
+        with visitor.assume_committed({"v1": {artifact_id for artifact_id, _ in rows}}):
+            committed = await visitor._lookup_exist(embedding, "u", check_minio=False)
+        await tracker.close()
+        return found, committed
+
+    # An embedding stored before the id was typed is still found under its old id.
+    assert asyncio.run(exists([(legacy_id, "ImageEmbeddingArtifact")])) == (True, True)
+    # A caption that took the shared id does not hide the missing embedding.
+    assert asyncio.run(exists([(legacy_id, "ImageCaptionArtifact")]))[0] is False
+
+
+def test_image_milvus_exists_matches_legacy_primary_keys(monkeypatch):
+    from local_backends import InMemoryMilvus
+    from core.clients import base as client_base
+    from core.clients.base import MilvusCollectionConfig
+    from core.clients.milvus_client import ImageEmbeddingMilvusClient
+
+    monkeypatch.setattr(client_base, "AsyncMilvusClient", InMemoryMilvus)
+    InMemoryMilvus.reset()
+    embedding = _embedding()
+
+    async def run():
+        async with ImageEmbeddingMilvusClient(MilvusCollectionConfig(collection_name="images", dimension=4), "h", 1) as client:
+            await client.create_collection_if_not_exists()
+            await client.insert_vectors([{
+                "id": embedding.legacy_artifact_ids[0], "embedding": [0.0] * 4, "related_video_id": "v1",
+                "minio_url": "s3://u/x", "user_bucket": "u", "frame_index": 3, "timestamp": "0",
+            }])
+            args = dict(id_=embedding.artifact_id, related_video_id="v1", user_bucket="u")
+            return await client.exists(**args), await client.exists(**args, legacy_ids=embedding.legacy_artifact_ids)
+
+    assert asyncio.run(run()) == (False, True)
@@ -0,0 +1,122 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+pytest.importorskip("cv2")
+pytest.importorskip("ffmpeg")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "prefect_agent"))
+
+from service_asr.core.schema import ASRConfig  # noqa: E402
+from service_asr.model.asr_core import ASRProcessor  # noqa: E402
+from service_asr.model.chunkformer.utils.ctc_utils import (  # noqa: E402
+    StreamingTimestampDecoder,
+    get_output_with_timestamps,
+)
+
+VOCAB_SIZE = 12
+CHAR_DICT = {i: chr(ord("a") + i) for i in range(VOCAB_SIZE)}
+
+
+def _random_splits(n: int, generator: torch.Generator) -> list[int]:
+    bounds = sorted(set(torch.randint(0, n + 1, (6,), generator=generator).tolist()) | {0, n})
+    return bounds
+
+
+def _synthetic_audio(seconds: float, seed: int = 0) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    t = torch.arange(int(seconds * 16000)) / 16000.0
+    sweep = torch.sin(2 * torch.pi * (200 + 300 * t) * t)
+    bursts = (torch.sin(2 * torch.pi * 0.7 * t) > 0.3).float()
+    noise = torch.randn(t.shape, generator=generator) * 0.05
+    return ((sweep * bursts + noise) * 8000).to(torch.float32)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streaming_decoder_matches_batch(seed: int):
+    generator = torch.Generator().manual_seed(seed)
+    # Mostly blanks with sparse bursts so segments open and close many times.
+    hyp = torch.randint(1, VOCAB_SIZE, (600,), generator=generator)
+    hyp[torch.rand(600, generator=generator) < 0.85] = 0
+
+    expected = get_output_with_timestamps([hyp], CHAR_DICT)[0]
+
+    decoder = StreamingTimestampDecoder(CHAR_DICT)
+    got = []
+    bounds = _random_splits(hyp.numel(), generator)
+    for lo, hi in zip(bounds, bounds[1:]):
+        got.extend(decoder.feed(hyp[lo:hi]))
+    got.extend(decoder.flush())
+
+    assert got == expected
+
+
+def test_stream_fbank_matches_full_signal():
+    audio = _synthetic_audio(3.3)
+    expected = ASRProcessor.compute_fbank(audio.unsqueeze(0))
+
+    generator = torch.Generator().manual_seed(1)
+    bounds = _random_splits(audio.numel(), generator)
+    blocks = [audio[lo:hi].numpy() for lo, hi in zip(bounds, bounds[1:])]
+    got = torch.cat(list(ASRProcessor.stream_fbank(blocks)))
+
+    assert got.shape == expected.shape
+    assert torch.allclose(got, expected, atol=1e-3)
+
+
+@pytest.mark.parametrize("seconds", [2.0, 9.7, 21.3])
+def test_iter_transcribe_matches_batch_path(seconds: float, tiny_asr_processor):
+    processor = tiny_asr_processor
+    config = ASRConfig(
+        chunk_size=8,
+        left_context_size=16,
+        right_context_size=8,
+        total_batch_duration=8,
+        stream_window_duration=8,
+    )
+    audio = _synthetic_audio(seconds, seed=2)
+
+    with torch.no_grad():
+        feats = ASRProcessor.compute_fbank(audio.unsqueeze(0))
+        hyp = torch.cat(list(processor._encode_blocks([feats], config, config.total_batch_duration)))
+    expected = processor._to_timestamped_tokens(
+        get_output_with_timestamps([hyp], processor.char_dict)[0], fps=25.0
+    )
+
+    blocks = [audio[i:i + 12345].numpy() for i in range(0, audio.numel(), 12345)]
+    got = list(processor.iter_transcribe(blocks, config, fps=25.0))
+
+    assert got == expected
+
+
+def test_encode_blocks_covers_every_frame(tiny_asr_processor):
+    processor = tiny_asr_processor
+    config = ASRConfig(chunk_size=8, left_context_size=16, right_context_size=8, total_batch_duration=8)
+    feats = ASRProcessor.compute_fbank(_synthetic_audio(21.3).unsqueeze(0))
+
+    with torch.no_grad():
+        hyp = torch.cat(list(processor._encode_blocks([feats], config, config.total_batch_duration)))
+
+    subsampling = processor.model.encoder.embed.subsampling_factor
+    # Every window after the first used to be dropped; all frames must now be decoded.
+    assert abs(hyp.numel() - feats.shape[0] // subsampling) <= 1
+
+
+def test_encode_blocks_is_independent_of_feature_splits(tiny_asr_processor):
+    processor = tiny_asr_processor
+    config = ASRConfig(chunk_size=8, left_context_size=16, right_context_size=8, total_batch_duration=8)
+    audio = _synthetic_audio(17.9, seed=3)
+    blocks = [audio[i:i + 7001].numpy() for i in range(0, audio.numel(), 7001)]
+
+    with torch.no_grad():
+        whole = torch.cat(list(processor._encode_blocks(
+            [ASRProcessor.compute_fbank(audio.unsqueeze(0))], config, config.total_batch_duration
+        )))
+        streamed = torch.cat(list(processor._encode_blocks(
+            ASRProcessor.stream_fbank(blocks), config, config.total_batch_duration
+        )))
+
+    assert torch.equal(whole, streamed)
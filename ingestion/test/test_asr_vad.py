@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchaudio")
+pytest.importorskip("cv2")
+pytest.importorskip("ffmpeg")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "prefect_agent"))
+
+from service_asr.core.schema import ASRConfig  # noqa: E402
+from service_asr.model.asr_core import ASRProcessor, detect_speech_spans  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def _voiced(seconds: float) -> torch.Tensor:
+    t = torch.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    harmonics = sum(torch.sin(2 * torch.pi * f * t) / (i + 1) for i, f in enumerate((220, 660, 1300)))
+    return harmonics * (0.6 + 0.4 * torch.sin(2 * torch.pi * 3 * t)) * 6000
+
+
+def _silence(seconds: float, generator: torch.Generator) -> torch.Tensor:
+    return torch.randn(int(seconds * SAMPLE_RATE), generator=generator) * 30
+
+
+def _program(generator: torch.Generator) -> tuple[torch.Tensor, list[tuple[float, float]]]:
+    parts = [(_silence(5, generator), False), (_voiced(3), True), (_silence(0.3, generator), False),
+             (_voiced(2), True), (_silence(8, generator), False), (_voiced(4), True), (_silence(6, generator), False)]
+    speech, cursor = [], 0.0
+    for audio, is_speech in parts:
+        seconds = audio.numel() / SAMPLE_RATE
+        if is_speech:
+            speech.append((cursor, cursor + seconds))
+        cursor += seconds
+    return torch.cat([audio for audio, _ in parts]), speech
+
+
+def test_spans_cover_speech_and_skip_silence():
+    audio, speech = _program(torch.Generator().manual_seed(0))
+    feats = ASRProcessor.compute_fbank(audio.unsqueeze(0))
+
+    spans = detect_speech_spans(feats, padding_ms=300, min_silence_ms=600, align=8)
+
+    frames = torch.zeros(feats.shape[0], dtype=torch.bool)
+    for start, end in spans:
+        assert start % 8 == 0
+        frames[start:end] = True
+    for begin, end in speech:
+        assert frames[int(begin * 100):int(end * 100)].all()
+    # The 5 s lead-in, 8 s gap and 6 s tail are mostly skipped; the 0.3 s gap is bridged.
+    assert len(spans) == 2
+    assert frames.float().mean() < 0.6
+
+
+def test_broadband_noise_is_not_speech():
+    generator = torch.Generator().manual_seed(1)
+    audio = torch.cat([_silence(3, generator), torch.randn(10 * SAMPLE_RATE, generator=generator) * 3000,
+                       _silence(3, generator), _voiced(2)])
+    feats = ASRProcessor.compute_fbank(audio.unsqueeze(0))
+
+    spans = detect_speech_spans(feats, align=8)
+
+    assert spans and all(start >= 1600 - 40 for start, _ in spans)
+
+
+def test_flat_audio_is_kept_whole():
+    feats = ASRProcessor.compute_fbank(_voiced(4).unsqueeze(0))
+    assert detect_speech_spans(feats) == [(0, feats.shape[0])]
+
+
+def test_span_hyps_land_on_original_timeline(tiny_asr_processor):
+    processor = tiny_asr_processor
+    config = ASRConfig(chunk_size=8, left_context_size=16, right_context_size=8, total_batch_duration=8)
+    audio, _ = _program(torch.Generator().manual_seed(0))
+    feats = ASRProcessor.compute_fbank(audio.unsqueeze(0))
+    spans = detect_speech_spans(feats, padding_ms=config.vad_padding_ms,
+                                min_silence_ms=config.vad_min_silence_ms, align=8)
+
+    with torch.no_grad():
+        hyp = processor._encode_speech_spans(feats, config)
+        assert hyp.numel() == feats.shape[0] // 8
+
+        covered = torch.zeros_like(hyp, dtype=torch.bool)
+        for start, end in spans:
+            span_hyp = torch.cat(list(processor._encode_blocks([feats[start:end]], config, 8)))
+            offset = start // 8
+            assert torch.equal(hyp[offset:offset + span_hyp.numel()], span_hyp)
+            covered[offset:offset + span_hyp.numel()] = True
+
+    assert (hyp[~covered] == 0).all()
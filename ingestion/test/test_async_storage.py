@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("minio")
+pytest.importorskip("pymilvus")
+pytest.importorskip("pydantic_settings")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from core.config.storage import MinioSettings  # noqa: E402
+from core.storage import StorageClient, StorageError  # noqa: E402
+from local_backends import LocalObjectStore  # noqa: E402
+
+
+class _SlowStore(LocalObjectStore):
+    """Holds every put for a moment and records how many overlapped."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.in_flight = 0
+        self.peak = 0
+        self._gauge = threading.Lock()
+
+    def put_object(self, *args, **kwargs):
+        with self._gauge:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(0.02)
+            return super().put_object(*args, **kwargs)
+        finally:
+            with self._gauge:
+                self.in_flight -= 1
+
+
+def _storage(store, max_concurrency=4):
+    storage = StorageClient(MinioSettings(host="localhost", port="9000", user="u", password="p",
+                                          max_concurrency=max_concurrency))
+    storage.client = store
+    return storage
+
+
+def test_put_many_and_get_many_keep_order_and_check_the_bucket_once(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    storage = _storage(store)
+    objects = {f"frames/{i:03d}.webp": bytes([i]) * (i + 1) for i in range(20)}
+
+    async def run():
+        uris = await storage.aio.put_many("user", objects)
+        fetched = await storage.aio.get_many("user", [*objects, "frames/missing.webp"])
+        return uris, fetched
+
+    uris, fetched = asyncio.run(run())
+    assert uris == [f"s3://user/{name}" for name in objects]
+    assert fetched == [*objects.values(), None]
+    assert store.calls["bucket_exists"] == 1
+    storage.aio.close()
+
+
+def test_concurrent_puts_are_bounded(tmp_path):
+    store = _SlowStore(tmp_path)
+    storage = _storage(store, max_concurrency=8)
+    objects = {f"e/{i}.json": b"[0.1]" for i in range(24)}
+
+    asyncio.run(storage.aio.put_many("user", objects, concurrency=3))
+    assert 1 < store.peak <= 3
+
+    store.peak = 0
+    asyncio.run(storage.aio.put_many("user", objects))
+    assert 3 < store.peak <= 8
+    storage.aio.close()
+
+
+def test_postprocess_window_overlaps_calls_and_keeps_order():
+    pytest.importorskip("prefect")
+    from core.pipeline.base_task import BaseTask
+
+    class _Item(BaseModel):
+        related_video_id: str
+        index: int
+
+    class _Settings(BaseModel):
+        pass
+
+    class _Upload(BaseTask[list[_Item], _Item, _Settings]):
+        postprocess_concurrency = 4
+
+        def __init__(self):
+            super().__init__(name="Upload", visitor=None, config=_Settings())  # type: ignore[arg-type]
+            self.in_flight = 0
+            self.peak = 0
+
+        async def preprocess(self, input_data):
+            return input_data
+
+        async def execute(self, input_data, client):
+            for item in input_data:
+                yield item
+
+        async def postprocess(self, output_data):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.001 * (7 - output_data.index % 7))
+            self.in_flight -= 1
+            return output_data
+
+    task = _Upload()
+    items = [_Item(related_video_id="v", index=i) for i in range(30)]
+    assert [item.index for item in asyncio.run(task.run(items))] == list(range(30))
+    assert task.peak == 4
+
+
+def test_streaming_ranged_and_downloaded_reads(tmp_path):
+    store = LocalObjectStore(tmp_path / "store")
+    storage = _storage(store)
+    payload = bytes(range(256)) * 40
+    storage.upload_fileobj("videos", "v.mp4", BytesIO(payload))
+
+    chunks = list(storage.iter_object("videos", "v.mp4", chunk_size=1000))
+    assert [len(c) for c in chunks] == [1000] * 10 + [240]
+    assert b"".join(chunks) == payload
+    assert b"".join(storage.iter_object("videos", "v.mp4", 7, offset=300, length=50)) == payload[300:350]
+    assert storage.get_range("videos", "v.mp4", 5000, 16) == payload[5000:5016]
+    assert storage.get_range("videos", "missing.mp4", 0, 16) is None
+
+    target = tmp_path / "out" / "v.mp4"
+    target.parent.mkdir()
+    target.write_bytes(b"old")
+    with pytest.raises(StorageError):
+        storage.download_to_path("videos", "missing.mp4", target)
+    assert target.read_bytes() == b"old"
+
+    assert asyncio.run(storage.aio.download_to_path("videos", "v.mp4", target, chunk_size=999)) == str(target)
+    assert target.read_bytes() == payload
+    assert [p.name for p in target.parent.iterdir()] == ["v.mp4"]
+    storage.aio.close()
+
+
+def test_fetch_object_from_s3_streams_to_a_temp_file(tmp_path):
+    from task.common.util import fetch_object_from_s3
+
+    storage = _storage(LocalObjectStore(tmp_path))
+    storage.put_json("user", "asr/v.json", {"tokens": []})
+
+    path = asyncio.run(fetch_object_from_s3("s3://user/asr/v.json", storage, suffix=".json"))
+    assert path.endswith(".json") and Path(path).read_bytes() == b'{"tokens":[]}'
+    os.remove(path)
+    with pytest.raises(StorageError):
+        asyncio.run(fetch_object_from_s3("s3://user/asr/missing.json", storage, suffix=".json"))
+    storage.aio.close()
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("prefect")
+pytest.importorskip("minio")
+pytest.importorskip("pymilvus")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from core.management.cleanup import ArtifactDeleter  # noqa: E402
+from core.pipeline.tracker import ArtifactMetadata, ArtifactTracker, DeletionTombstoneSchema  # noqa: E402
+
+
+class _Storage:
+    """Object store double recording bulk-delete requests."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.objects: set[tuple[str, str]] = set()
+        self.requests = 0
+        self.fail = fail
+
+    def remove_objects(self, bucket: str, names, batch_size: int = 1000) -> list[str]:
+        names = list(names)
+        self.requests += -(-len(names) // batch_size)
+        if self.fail:
+            return [f"{bucket}/{names[0]}: InternalError"]
+        for name in names:
+            self.objects.discard((bucket, name))
+        return []
+
+
+class _Milvus:
+    def __init__(self, ids: set[str]) -> None:
+        self.ids = ids
+        self._client = object()
+        self.calls: list[str] = []
+
+    async def has_user_collection(self) -> bool:
+        return True
+
+    async def delete_by_ids(self, ids: list[str], chunk_size: int = 1000) -> int:
+        self.calls.append(f"ids:{len(ids)}")
+        before = len(self.ids)
+        self.ids -= set(ids)
+        return before - len(self.ids)
+
+    async def delete_by_filter(self, filter_expr: str) -> int:
+        self.calls.append(filter_expr)
+        deleted = len(self.ids)
+        self.ids.clear()
+        return deleted
+
+
+async def _seed(tracker: ArtifactTracker, storage: _Storage, milvus: dict[str, _Milvus], images: int) -> None:
+    async def save(artifact_id: str, artifact_type: str, parent: str | None) -> None:
+        await tracker.save_artifact(ArtifactMetadata(
+            artifact_id=artifact_id, artifact_type=artifact_type, user_id="u", minio_url=f"s3://bucket/{artifact_id}",
+            parent_artifact_id=parent, task_name="t", artifact_metadata={}, related_video_id="v",
+        ))
+        storage.objects.add(("bucket", artifact_id))
+
+    await save("v", "VideoArtifact", None)
+    await save("shot", "AutoshotArtifact", "v")
+    for i in range(images):
+        await save(f"img{i}", "ImageArtifact", "shot")
+        await save(f"img{i}-emb", "ImageEmbeddingArtifact", f"img{i}")
+        await save(f"img{i}-cap", "ImageCaptionArtifact", f"img{i}")
+        await save(f"img{i}-cap-emb", "TextCaptionEmbeddingArtifact", f"img{i}-cap")
+        milvus["image_embedding"].ids.add(f"img{i}-emb")
+        milvus["text_caption_embedding"].ids.add(f"img{i}-cap-emb")
+
+
+def _deleter(tracker, storage, milvus) -> ArtifactDeleter:
+    return ArtifactDeleter(tracker, storage, milvus["image_embedding"], milvus["text_caption_embedding"],
+                           milvus["segment_caption_embedding"], object_batch_size=10)
+
+
+def _milvus() -> dict[str, _Milvus]:
+    return {name: _Milvus(set()) for name in ("image_embedding", "text_caption_embedding", "segment_caption_embedding")}
+
+
+def test_stage_delete_removes_only_that_subtree(tmp_path):
+    async def run():
+        tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 't.db'}")
+        await tracker.initialize()
+        storage, milvus = _Storage(), _milvus()
+        await _seed(tracker, storage, milvus, images=25)
+
+        result = await _deleter(tracker, storage, milvus).delete_stage_artifacts("v", "ImageCaptionArtifact")
+        counters = await tracker.get_stage_counters("v")
+        await tracker.close()
+        return result, storage, milvus, counters
+
+    result, storage, milvus, counters = asyncio.run(run())
+    assert result.success and result.metadata["deleted_artifacts"] == 50
+    assert storage.requests == 5  # 50 keys in batches of 10
+    assert not any(name.endswith("-cap") or name.endswith("-cap-emb") for _, name in storage.objects)
+    assert milvus["text_caption_embedding"].ids == set() and len(milvus["image_embedding"].ids) == 25
+    assert milvus["image_embedding"].calls == ["ids:0"]
+    assert "ImageCaptionArtifact" not in counters and counters["ImageArtifact"][0] == 25
+
+
+def test_failed_delete_keeps_tombstone_and_resumes(tmp_path):
+    async def run():
+        tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 't.db'}")
+        await tracker.initialize()
+        storage, milvus = _Storage(fail=True), _milvus()
+        await _seed(tracker, storage, milvus, images=5)
+        deleter = _deleter(tracker, storage, milvus)
+
+        first = await deleter.delete_video_cascade("v")
+        async with tracker.get_session() as session:
+            pending = (await session.execute(DeletionTombstoneSchema.__table__.select())).all()
+        video_row = await tracker.get_artifact("v")
+
+        storage.fail = False
+        resumed = await deleter.resume_pending()
+        async with tracker.get_session() as session:
+            left = (await session.execute(DeletionTombstoneSchema.__table__.select())).all()
+        await tracker.close()
+        return first, pending, video_row, resumed, left, storage, milvus
+
+    first, pending, video_row, resumed, left, storage, milvus = asyncio.run(run())
+    assert not first.success and first.metadata["deleted_artifacts"] == 22
+    assert len(pending) == 1 and video_row is None
+    assert [r.success for r in resumed] == [True]
+    assert left == [] and storage.objects == set()
+    assert milvus["image_embedding"].calls[-1] == 'related_video_id == "v"'
+
+
+def test_selected_artifact_delete_removes_their_subtrees_and_keeps_checkpoints(tmp_path):
+    from core.pipeline.checkpoint import StageCheckpointStore, StageFingerprint
+
+    async def run():
+        tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 't.db'}")
+        await tracker.initialize()
+        storage, milvus = _Storage(), _milvus()
+        await _seed(tracker, storage, milvus, images=3)
+        checkpoints = StageCheckpointStore(tracker)
+        fingerprint = StageFingerprint(config_hash="c", model_version="frames")
+        await checkpoints.record_progress("ImageProcessingTask", {"v": 1}, fingerprint)
+
+        result = await _deleter(tracker, storage, milvus).delete_artifacts("v", ["img0", "img2"])
+        rows = {a: await tracker.get_artifact(a) for a in ("img0", "img0-cap-emb", "img1", "img1-emb", "img2-emb")}
+        checkpoint = (await checkpoints.load("ImageProcessingTask", ["v"])).get("v")
+        await tracker.close()
+        return result, rows, checkpoint, milvus
+
+    result, rows, checkpoint, milvus = asyncio.run(run())
+    assert result.success and result.metadata["deleted_artifacts"] == 8
+    assert rows["img1"] is not None and rows["img1-emb"] is not None
+    assert rows["img0"] is None and rows["img0-cap-emb"] is None and rows["img2-emb"] is None
+    assert milvus["image_embedding"].ids == {"img1-emb"}
+    assert checkpoint is not None
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from task.llm_image_caption.prompt import IMAGE_CAPTION_BATCH  # noqa: E402
+from task.llm_image_caption.util import parse_batch_captions  # noqa: E402
+
+
+def test_batch_prompt_formats_with_literal_json_example():
+    prompt = IMAGE_CAPTION_BATCH.format(num_images=3, last_index=2)
+    assert "từ 0 đến 2" in prompt
+    assert '[{"index": 0, "caption": "..."}' in prompt
+
+
+def test_parses_fenced_array_and_keeps_valid_entries():
+    answer = """```json
+    [{"index": 0, "caption": " a red bus "}, {"index": "2", "caption": "a slide"},
+     {"index": 7, "caption": "out of range"}, {"index": 1, "caption": ""}, "noise"]
+    ```"""
+    assert parse_batch_captions(answer, 3) == {0: "a red bus", 2: "a slide"}
+
+
+def test_first_caption_wins_on_duplicate_index():
+    assert parse_batch_captions('[{"index": 0, "caption": "x"}, {"index": 0, "caption": "y"}]', 1) == {0: "x"}
+
+
+@pytest.mark.parametrize("answer", ["Sorry, I cannot help.", '{"index": 0}', "[{'index': 0,}]"])
+def test_non_array_answers_raise(answer):
+    with pytest.raises(ValueError):
+        parse_batch_captions(answer, 2)
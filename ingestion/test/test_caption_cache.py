@@ -0,0 +1,152 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from task.llm_image_caption.util import perceptual_hashes  # noqa: E402
+
+
+def _slide(title: str, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = np.full((720, 1280, 3), 245, dtype=np.uint8)
+    cv2.rectangle(image, (0, 0), (1280, 120), (90, 40, 20), -1)
+    cv2.putText(image, title, (60, 85), cv2.FONT_HERSHEY_SIMPLEX, 2.2, (255, 255, 255), 4)
+    for row in range(5):
+        width = int(rng.integers(500, 1100))
+        cv2.rectangle(image, (80, 200 + row * 90), (80 + width, 230 + row * 90), (60, 60, 60), -1)
+    return image
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _reencode(image: np.ndarray, quality: int = 40) -> np.ndarray:
+    ok, buf = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    assert ok
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+
+def _distance(a: tuple[int, int], b: tuple[int, int]) -> tuple[int, int]:
+    return (a[0] ^ b[0]).bit_count(), (a[1] ^ b[1]).bit_count()
+
+
+def test_hash_survives_reencoding_resizing_and_cursor():
+    slide = _slide("Lecture 3: Gradient Descent")
+    variant = cv2.resize(_reencode(slide), (960, 540), interpolation=cv2.INTER_AREA)
+    cv2.circle(variant, (700, 400), 6, (0, 0, 255), -1)
+
+    p_dist, d_dist = _distance(perceptual_hashes(_gray(slide)), perceptual_hashes(_gray(variant)))
+    assert p_dist <= 4 and d_dist <= 4
+
+
+def test_different_slides_are_far_apart():
+    a = perceptual_hashes(_gray(_slide("Lecture 3: Gradient Descent", seed=0)))
+    b = perceptual_hashes(_gray(_slide("Backpropagation", seed=1)))
+
+    p_dist, d_dist = _distance(a, b)
+    assert p_dist > 4 or d_dist > 4
+
+
+def test_cache_hits_near_duplicates_per_prompt_and_model(tmp_path):
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("prefect")
+    from task.llm_image_caption.cache import CaptionCache
+
+    slide = perceptual_hashes(_gray(_slide("Intro")))
+    near = perceptual_hashes(_gray(_reencode(_slide("Intro"))))
+    other = perceptual_hashes(_gray(_slide("Summary and Q&A", seed=3)))
+
+    async def scenario():
+        cache = CaptionCache.from_url(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}", max_distance=4)
+        await cache.store(slide, "prompt", "openrouter_api:model-a", "An intro slide")
+        return (
+            await cache.lookup(near, "prompt", "openrouter_api:model-a"),
+            await cache.lookup(other, "prompt", "openrouter_api:model-a"),
+            await cache.lookup(near, "another prompt", "openrouter_api:model-a"),
+            await cache.lookup(near, "prompt", "openrouter_api:model-b"),
+        )
+
+    hit, miss_image, miss_prompt, miss_model = asyncio.run(scenario())
+    assert hit == "An intro slide"
+    assert miss_image is None and miss_prompt is None and miss_model is None
+
+
+def test_batched_captioning_stores_each_caption_before_the_next_batch(tmp_path, object_store):
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("prefect")
+    pytest.importorskip("minio")
+    pytest.importorskip("pymilvus")
+    from types import SimpleNamespace
+
+    for name, value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                        "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+        os.environ.setdefault(name, value)
+    from core.artifact.schema import ImageCaptionArtifact
+    from core.clients.llm_client import LLMClient
+    from core.config.storage import MinioSettings
+    from core.storage import StorageClient
+    from task.llm_image_caption.main import ImageCaptionLLMTask, ImageCaptionSettings
+    from task.llm_image_caption.prompt import IMAGE_CAPTION
+
+    storage = StorageClient(MinioSettings(host="localhost", port="9000", user="u", password="p"))
+    storage.client = object_store
+    slides = {"a": _slide("Intro"), "b": _slide("Backpropagation", seed=1),
+              "a2": _reencode(_slide("Intro")), "c": _slide("Summary and Q&A", seed=3)}
+    labels = {}
+    for name, image in slides.items():
+        ok, buf = cv2.imencode(".png", image)
+        storage.upload_fileobj("user", f"frames/{name}.png", io.BytesIO(buf.tobytes()))
+        labels[base64.b64encode(buf.tobytes()).decode()] = name
+
+    requests = []
+
+    class _FakeLLM(LLMClient):
+        async def list_models(self):
+            return {"loaded_model": {"model_name": "fake"}}
+
+        async def make_request(self, method, endpoint, request_data):
+            names = [labels[image] for image in request_data.image_base64]
+            requests.append((request_data.prompt, names))
+            if len(names) == 1:
+                return {"answer": f"caption {names[0]}", "model_name": "fake"}
+            return {"answer": json.dumps([{"index": i, "caption": f"caption {n}"} for i, n in enumerate(names)]),
+                    "model_name": "fake"}
+
+    async def _missing(*_args, **_kwargs):
+        return False
+
+    visitor = SimpleNamespace(minio_client=storage, _check_exist=_missing)
+    task = ImageCaptionLLMTask(visitor, ImageCaptionSettings(  # type: ignore[arg-type]
+        model_name="fake_api", device="cpu", max_concurrency=1, caption_batch_size=2,
+        cache_database_url=f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}",
+    ))
+    artifacts = [
+        ImageCaptionArtifact(artifact_type="ImageCaptionArtifact", frame_index=i, time_stamp="00:00:00.000",
+                             related_video_id="v", related_video_fps=25.0, extension=".png", user_bucket="user",
+                             image_minio_url=f"s3://user/frames/{name}.png", image_id=name)
+        for i, name in enumerate(slides)
+    ]
+    client = _FakeLLM(None)  # type: ignore[arg-type]
+
+    async def run():
+        results = [(artifact.image_id, caption) async for artifact, caption in task.execute(artifacts, client)]
+        c_hashes = perceptual_hashes(_gray(slides["c"]))
+        return results, await task.cache.lookup(c_hashes, IMAGE_CAPTION, "fake_api:fake")
+
+    results, c_cached = asyncio.run(run())
+    assert dict(results) == {"a": "caption a", "b": "caption b", "a2": "caption a", "c": "caption c"}
+    assert [names for _, names in requests] == [["a", "b"], ["c"]]
+    assert requests[1][0] == IMAGE_CAPTION
+    assert c_cached == "caption c"
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT.parent))
+
+from benchmarks.chat.stub_agent import StreamShape, chunk_sequence, stub_agent_app  # noqa: E402
+
+
+async def _read_stream(shape):
+    """Parse the stub's stream the way `handle_stream_chat` in backend/app/api/socket.py does."""
+    transport = httpx.ASGITransport(app=stub_agent_app(shape, seed=1))
+    chunks = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+        async with client.stream("POST", "/api/agent/stream", json={"text": "hi"}) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                if line.strip() == "[DONE]":
+                    break
+                data = json.loads(line.replace("data:", "").strip())
+                chunks.append((data["msg_type"], data["chunk"]))
+    return chunks
+
+
+def test_stub_stream_is_numbered_and_complete():
+    shape = StreamShape(tokens=12, first_token_ms=0, token_interval_ms=0, image_every=4, words_per_token=2)
+    chunks = asyncio.run(_read_stream(shape))
+
+    assert len(chunks) == shape.chunks == 15
+    assert [chunk_sequence(chunk) for _, chunk in chunks] == list(range(15))
+    assert [kind for kind, _ in chunks].count("image") == 3
+    assert chunks[0] == ("text", "#0000 lorem lorem ")
+    assert isinstance(chunks[4][1], list)
+
+
+def test_chunk_sequence_ignores_foreign_events():
+    assert chunk_sequence("#0042 word ") == 42
+    assert chunk_sequence(["https://x/#0003.webp"]) == 3
+    assert chunk_sequence("plain text") is None
+    assert chunk_sequence([]) is None
+
+
+def test_message_trace_counts_drops_duplicates_and_reordering():
+    pytest.importorskip("socketio")
+    from benchmarks.chat.users import MessageTrace
+
+    trace = MessageTrace(sent=0.0)
+    for now, seq in enumerate([0, 1, 3, 2, 3, 5], start=1):
+        trace.on_chunk(f"#{seq:04d} w ", now / 10)
+
+    assert trace.first_chunk == pytest.approx(0.1)
+    assert len(trace.gaps_ms) == 5
+    assert trace.duplicates == 1
+    assert trace.out_of_order == 1
+    assert trace.dropped(7) == 2
@@ -0,0 +1,116 @@
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "prefect_agent"))
+
+from service_asr.model.chunkformer.utils.common import remove_duplicates_and_blank  # noqa: E402
+from service_asr.model.chunkformer.utils.ctc_utils import (  # noqa: E402
+    StreamingTimestampDecoder,
+    class2str,
+    get_output_with_timestamps,
+    milliseconds_to_hhmmssms,
+)
+
+VOCAB_SIZE = 9
+CHAR_DICT = {i: chr(ord("a") + i) for i in range(VOCAB_SIZE)}
+
+
+def _reference_output_with_timestamps(hyps, char_dict):
+    """Token-by-token implementation the vectorized decoder replaced."""
+    decodes = []
+    max_silence = 20
+    for tokens in hyps:
+        tokens = tokens.cpu()
+        start = -1
+        end = -1
+        prev_end = -1
+        silence_cum = 0
+        decode_per_time = []
+        decode = []
+        for time_stamp, token in enumerate(tokens):
+            if token == 0:
+                silence_cum += 1
+            else:
+                if (start == -1) and (end == -1):
+                    if prev_end != -1:
+                        start = math.ceil((time_stamp + prev_end)/2)
+                    else:
+                        start = max(time_stamp - int(max_silence/2), 0)
+                silence_cum = 0
+                decode_per_time.append(token)
+
+            if (silence_cum == max_silence) and (start != -1):
+                end = time_stamp
+                prev_end = end
+                decode.append({
+                    "decode": class2str(remove_duplicates_and_blank(decode_per_time), char_dict),
+                    "start": milliseconds_to_hhmmssms(start * 8 * 10),
+                    "end": milliseconds_to_hhmmssms(end * 8 * 10)
+                })
+                decode_per_time = []
+                start = -1
+                end = -1
+                silence_cum = 0
+
+        if (start != -1) and (end == -1) and (len(decode_per_time) > 0):
+            decode.append({
+                "decode": class2str(remove_duplicates_and_blank(decode_per_time), char_dict),
+                "start": milliseconds_to_hhmmssms(start * 8 * 10),
+                "end": milliseconds_to_hhmmssms(time_stamp * 8 * 10)
+            })
+        decodes.append(decode)
+
+    return decodes
+
+
+def _random_hyp(seed: int) -> torch.Tensor:
+    generator = torch.Generator().manual_seed(seed)
+    length = int(torch.randint(0, 900, (1,), generator=generator))
+    logits = torch.randn(length, VOCAB_SIZE, generator=generator)
+    # Vary the blank bias so sequences range from dense speech to long silences,
+    # and smooth over time so repeated tokens and runs of blanks both occur.
+    logits[:, 0] += float(torch.rand(1, generator=generator)) * 6.0 - 1.0
+    logits = torch.nn.functional.avg_pool1d(logits.T.unsqueeze(0), 3, 1, 1).squeeze(0).T if length else logits
+    return logits.argmax(dim=-1)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_vectorized_matches_reference(seed: int):
+    hyp = _random_hyp(seed)
+    assert get_output_with_timestamps([hyp], CHAR_DICT) == _reference_output_with_timestamps([hyp], CHAR_DICT)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_streaming_matches_reference(seed: int):
+    hyp = _random_hyp(seed)
+    generator = torch.Generator().manual_seed(seed + 1000)
+    cuts = sorted(torch.randint(0, hyp.numel() + 1, (8,), generator=generator).tolist())
+
+    decoder = StreamingTimestampDecoder(CHAR_DICT)
+    got = []
+    for lo, hi in zip([0] + cuts, cuts + [hyp.numel()]):
+        got.extend(decoder.feed(hyp[lo:hi]))
+    got.extend(decoder.flush())
+
+    assert got == _reference_output_with_timestamps([hyp], CHAR_DICT)[0]
+
+
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        [],
+        [0] * 50,
+        [3],
+        [3, 3, 0, 3, 4, 4],
+        [0] * 5 + [2] + [0] * 20 + [2] + [0] * 19,
+        [1] + [0] * 19 + [1] + [0] * 20 + [5, 5, 0, 6],
+    ],
+)
+def test_edge_cases_match_reference(tokens):
+    hyp = torch.tensor(tokens, dtype=torch.long)
+    assert get_output_with_timestamps([hyp], CHAR_DICT) == _reference_output_with_timestamps([hyp], CHAR_DICT)
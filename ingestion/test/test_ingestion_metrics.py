@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("prometheus_client")
+pytest.importorskip("pydantic_settings")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from prometheus_client import CollectorRegistry  # noqa: E402
+
+from core.metrics import IngestionMetrics, ingestion_metrics  # noqa: E402
+
+
+def _value(metrics, name, **labels):
+    return metrics.registry.get_sample_value(name, labels) or 0.0
+
+
+def test_timer_records_latency_and_errors():
+    metrics = IngestionMetrics(CollectorRegistry(), video_labels=False)
+    with metrics.timed("minio", "get_object"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.timed("minio", "get_object"):
+            raise RuntimeError("down")
+
+    labels = {"backend": "minio", "operation": "get_object"}
+    assert _value(metrics, "ingestion_backend_operation_duration_seconds_count", **labels) == 2
+    assert _value(metrics, "ingestion_backend_operation_errors_total", **labels) == 1
+    assert b"ingestion_backend_operation_duration_seconds_bucket" in metrics.get_metrics()
+
+
+def test_video_label_is_opt_in():
+    off = IngestionMetrics(CollectorRegistry(), video_labels=False)
+    on = IngestionMetrics(CollectorRegistry(), video_labels=True)
+    for metrics in (off, on):
+        metrics.track_stage("ASR", 1.5, "success", {"v1": 3, "v2": 1}, outputs=4, restored=2)
+        metrics.track_cache("caption", True, 3)
+        metrics.track_cache("caption", False, 0)
+
+        assert _value(metrics, "ingestion_stage_outputs_total", stage="ASR") == 4
+        assert _value(metrics, "ingestion_stage_videos_total", stage="ASR", outcome="processed") == 2
+        assert _value(metrics, "ingestion_stage_videos_total", stage="ASR", outcome="restored") == 2
+        assert _value(metrics, "ingestion_cache_lookups_total", cache="caption", result="hit") == 3
+        assert metrics.registry.get_sample_value(
+            "ingestion_cache_lookups_total", {"cache": "caption", "result": "miss"}) is None
+
+    assert _value(off, "ingestion_video_stage_outputs_total", stage="ASR", video_id="v1") == 0
+    assert _value(on, "ingestion_video_stage_outputs_total", stage="ASR", video_id="v1") == 3
+
+
+def test_base_task_run_records_stage_throughput():
+    pytest.importorskip("prefect")
+    pytest.importorskip("minio")
+    pytest.importorskip("pymilvus")
+    from core.pipeline.base_task import BaseTask
+
+    class _Item(BaseModel):
+        related_video_id: str
+
+    class _Settings(BaseModel):
+        pass
+
+    class _Task(BaseTask[list[_Item], _Item, _Settings]):
+        fail = False
+
+        async def preprocess(self, input_data):
+            return input_data
+
+        async def execute(self, input_data, client):
+            for item in input_data:
+                if self.fail:
+                    raise ValueError("boom")
+                yield item
+
+        async def postprocess(self, output_data):
+            return output_data
+
+    task = _Task(name="MetricsProbe", visitor=None, config=_Settings())  # type: ignore[arg-type]
+    asyncio.run(task.run([_Item(related_video_id=v) for v in ("a", "a", "b")]))
+    task.fail = True
+    with pytest.raises(ValueError):
+        asyncio.run(task.run([_Item(related_video_id="c")]))
+
+    stage = {"stage": "MetricsProbe"}
+    assert _value(ingestion_metrics, "ingestion_stage_outputs_total", **stage) == 3
+    assert _value(ingestion_metrics, "ingestion_stage_videos_total", outcome="processed", **stage) == 2
+    assert _value(ingestion_metrics, "ingestion_stage_runs_total", status="success", **stage) == 1
+    assert _value(ingestion_metrics, "ingestion_stage_runs_total", status="error", **stage) == 1
+    assert _value(ingestion_metrics, "ingestion_stage_duration_seconds_count", **stage) == 2
+
+
+def test_queue_status_counts(tmp_path):
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("prefect")
+    from core.pipeline.job_queue import JobQueue
+    from core.pipeline.tracker import ArtifactTracker
+
+    async def run():
+        tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+        await tracker.initialize()
+        queue = JobQueue(tracker.engine)
+        for user in ("a", "b", "c"):
+            await queue.enqueue(user, {"videos": []})
+        await queue.claim("w")
+        counts = await queue.status_counts()
+        await tracker.close()
+        return counts
+
+    counts = asyncio.run(run())
+    assert counts == {"queued": 2, "running": 1, "succeeded": 0, "failed": 0, "cancelled": 0}
+    metrics = IngestionMetrics(CollectorRegistry(), video_labels=False)
+    metrics.update_queue(counts)
+    assert _value(metrics, "ingestion_queue_jobs", status="queued") == 2
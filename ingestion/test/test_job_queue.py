@@ -0,0 +1,212 @@
+import asyncio
+import sys
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("prefect")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.pipeline.job_queue import (  # noqa: E402
+    JobQueue, JobStatus, JobWorker, raise_if_cancelled, run_job_in_thread,
+)
+from core.pipeline.tracker import ArtifactTracker  # noqa: E402
+
+
+async def _queue(tmp_path, **kwargs) -> tuple[ArtifactTracker, JobQueue]:
+    tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    await tracker.initialize()
+    return tracker, JobQueue(tracker.engine, **kwargs)
+
+
+def test_claim_is_fair_across_users_then_by_priority(tmp_path):
+    async def run():
+        tracker, queue = await _queue(tmp_path, max_running=4)
+        for i in range(5):
+            await queue.enqueue("bulk", {"videos": [[f"b{i}", "s3://x"]]})
+        low = await queue.enqueue("alice", {"videos": []}, priority=1)
+        high = await queue.enqueue("alice", {"videos": []}, priority=5)
+        claimed = [await queue.claim("w") for _ in range(5)]
+        await tracker.close()
+        return claimed, low, high
+
+    claimed, low, high = asyncio.run(run())
+    owners = [job.user_id if job else None for job in claimed]
+    assert owners == ["alice", "bulk", "alice", "bulk", None]
+    assert claimed[0].job_id == high.job_id and claimed[2].job_id == low.job_id
+    assert claimed[1].payload == {"videos": [["b0", "s3://x"]]}
+
+
+def test_per_user_cap_and_cancellation(tmp_path):
+    async def run():
+        tracker, queue = await _queue(tmp_path, max_running=5, max_running_per_user=1)
+        first = await queue.enqueue("u", {"videos": []})
+        second = await queue.enqueue("u", {"videos": []})
+        running = await queue.claim("w")
+        blocked = await queue.claim("w")
+        cancelled = await queue.cancel(second.job_id)
+        flagged = await queue.cancel(first.job_id)
+        to_cancel = await queue.heartbeat([first.job_id])
+        missing = await queue.cancel("nope")
+        await tracker.close()
+        return first, running, blocked, cancelled, flagged, to_cancel, missing
+
+    first, running, blocked, cancelled, flagged, to_cancel, missing = asyncio.run(run())
+    assert running.job_id == first.job_id and blocked is None
+    assert cancelled.status is JobStatus.CANCELLED
+    assert flagged.status is JobStatus.RUNNING and flagged.cancel_requested
+    assert to_cancel == {first.job_id} and missing is None
+
+
+def test_stale_running_jobs_are_requeued(tmp_path):
+    async def run():
+        tracker, queue = await _queue(tmp_path)
+        job = await queue.enqueue("u", {"videos": []})
+        await queue.claim("dead-worker")
+        fresh = await queue.requeue_stale(timedelta(minutes=5))
+        stale = await queue.requeue_stale(timedelta(seconds=-1))
+        again = await queue.claim("w")
+        await tracker.close()
+        return job, fresh, stale, again
+
+    job, fresh, stale, again = asyncio.run(run())
+    assert (fresh, stale) == (0, 1)
+    assert again.job_id == job.job_id and again.attempts == 2 and again.worker_id == "w"
+
+
+def test_running_worker_reclaims_jobs_of_a_dead_worker(tmp_path):
+    async def run():
+        tracker, queue = await _queue(tmp_path)
+        job = await queue.enqueue("u", {"videos": []})
+        await queue.claim("dead-worker")
+        ran: list[str] = []
+
+        async def runner(job):
+            ran.append(job.job_id)
+
+        worker = JobWorker(queue, runner, poll_interval=0.01, heartbeat_seconds=0.01, stale_after_seconds=0.2)
+        await worker.start()
+        at_start = await queue.get(job.job_id)
+        for _ in range(300):
+            if (await queue.get(job.job_id)).finished_at:
+                break
+            await asyncio.sleep(0.01)
+        finished = await queue.get(job.job_id)
+        await worker.stop()
+        await tracker.close()
+        return job, at_start, finished, ran, worker.worker_id
+
+    job, at_start, finished, ran, worker_id = asyncio.run(run())
+    # Still heartbeating-fresh when the worker started, so only the periodic re-queue can have picked it up.
+    assert at_start.worker_id == "dead-worker"
+    assert ran == [job.job_id]
+    assert finished.status is JobStatus.SUCCEEDED and finished.worker_id == worker_id and finished.attempts == 2
+
+
+def test_worker_respects_global_cap_and_records_outcomes(tmp_path):
+    async def run():
+        tracker, queue = await _queue(tmp_path, max_running=2)
+        in_flight, peak = 0, 0
+        release = asyncio.Event()
+
+        async def runner(job):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                if job.payload.get("block"):
+                    await release.wait()
+                if job.payload.get("fail"):
+                    raise RuntimeError("boom")
+                await asyncio.sleep(0.01)
+            finally:
+                in_flight -= 1
+
+        jobs = [await queue.enqueue("u", {"videos": []}) for _ in range(4)]
+        failing = await queue.enqueue("u", {"fail": True}, priority=-1)
+        blocking = await queue.enqueue("v", {"block": True}, priority=-2)
+        worker = JobWorker(queue, runner, concurrency=2, poll_interval=0.01, heartbeat_seconds=0.01)
+        await worker.start()
+        for _ in range(200):
+            if (await queue.get(blocking.job_id)).status is JobStatus.RUNNING:
+                break
+            await asyncio.sleep(0.01)
+        await queue.cancel(blocking.job_id)
+        for _ in range(300):
+            statuses = {j.job_id: await queue.get(j.job_id) for j in [*jobs, failing, blocking]}
+            if all(job.finished_at for job in statuses.values()):
+                break
+            await asyncio.sleep(0.01)
+        await worker.stop()
+        await tracker.close()
+        return jobs, failing, blocking, statuses, peak
+
+    jobs, failing, blocking, statuses, peak = asyncio.run(run())
+    assert peak <= 2
+    assert all(statuses[j.job_id].status is JobStatus.SUCCEEDED for j in jobs)
+    assert statuses[failing.job_id].status is JobStatus.FAILED and statuses[failing.job_id].error == "boom"
+    assert statuses[blocking.job_id].status is JobStatus.CANCELLED
+
+
+def test_concurrent_claims_from_several_workers_respect_both_caps(tmp_path):
+    async def run():
+        tracker, _ = await _queue(tmp_path)
+        workers = [ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}") for _ in range(4)]
+        queues = [JobQueue(w.engine, max_running=3, max_running_per_user=2) for w in workers]
+        for user in ("u", "u", "u", "v", "v", "v"):
+            await queues[0].enqueue(user, {"videos": []})
+        claimed = await asyncio.gather(*(queue.claim(f"w{i}") for i, queue in enumerate(queues * 3)))
+        for engine_owner in (tracker, *workers):
+            await engine_owner.close()
+        return [job for job in claimed if job is not None]
+
+    claimed = asyncio.run(run())
+    assert len(claimed) == 3
+    assert max(sum(job.user_id == user for job in claimed) for user in ("u", "v")) == 2
+
+
+def test_cancelled_thread_job_keeps_its_slot_until_the_thread_stops(tmp_path):
+    async def run():
+        tracker, queue = await _queue(tmp_path, max_running=1)
+        stopped = threading.Event()
+        started: list[str] = []
+
+        def blocking_flow(job_id):
+            started.append(job_id)
+            try:
+                for _ in range(200):
+                    raise_if_cancelled(job_id)  # a stage boundary
+                    time.sleep(0.01)
+            finally:
+                stopped.set()
+
+        async def runner(job):
+            if job.payload.get("flow"):
+                return await run_job_in_thread(job.job_id, blocking_flow, job.job_id)
+
+        slow = await queue.enqueue("u", {"flow": True})
+        worker = JobWorker(queue, runner, concurrency=1, poll_interval=0.01, heartbeat_seconds=0.01)
+        await worker.start()
+        while not started:
+            await asyncio.sleep(0.01)
+        nxt = await queue.enqueue("v", {})
+        await queue.cancel(slow.job_id)
+        while not stopped.is_set():
+            assert (await queue.get(nxt.job_id)).status is JobStatus.QUEUED
+            await asyncio.sleep(0.005)
+        for _ in range(300):
+            if (await queue.get(nxt.job_id)).status is JobStatus.SUCCEEDED:
+                break
+            await asyncio.sleep(0.01)
+        statuses = (await queue.get(slow.job_id)).status, (await queue.get(nxt.job_id)).status
+        await worker.stop()
+        await tracker.close()
+        return statuses
+
+    assert asyncio.run(run()) == (JobStatus.CANCELLED, JobStatus.SUCCEEDED)
@@ -0,0 +1,194 @@
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from task.image_processing.util import SignatureIndex, frame_signature  # noqa: E402
+
+
+def _scene(color: tuple[int, int, int], shift: int = 0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = np.full((360, 640, 3), color, dtype=np.uint8)
+    for _ in range(6):
+        x, y = (int(v) for v in rng.integers(0, 500, size=2))
+        shade = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        cv2.rectangle(image, (x + shift, y % 300), (x + shift + 120, y % 300 + 60), shade, -1)
+    return image
+
+
+def _noisy(image: np.ndarray, seed: int) -> np.ndarray:
+    noise = np.random.default_rng(seed).normal(0, 3, image.shape)
+    return np.clip(image.astype(np.float64) + noise, 0, 255).astype(np.uint8)
+
+
+def test_static_shot_matches_and_new_scene_does_not():
+    index = SignatureIndex(max_hamming=6, min_hist_similarity=0.9)
+    first = _scene((30, 120, 200))
+    assert index.match(frame_signature(first)) is None
+    index.add(frame_signature(first))
+
+    assert index.match(frame_signature(_noisy(first, seed=1))) == 0
+    assert index.match(frame_signature(_scene((200, 40, 40), seed=5))) is None
+
+
+def test_same_layout_with_different_colours_is_kept():
+    index = SignatureIndex(max_hamming=64, min_hist_similarity=0.9)
+    index.add(frame_signature(_scene((30, 120, 200))))
+    assert index.match(frame_signature(_scene((200, 120, 30)))) is None
+
+
+def test_duplicates_are_dropped_per_segment_with_lineage():
+    pytest.importorskip("minio")
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("prefect")
+    for name, value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                        "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+        os.environ.setdefault(name, value)
+    from core.artifact.schema import ImageArtifact
+    from task.image_processing.main import ImageProcessingSettings, ImageProcessingTask
+
+    still, cut = _scene((30, 120, 200)), _scene((200, 40, 40), seed=5)
+    # Segment 0 is a static shot; segment 1 returns to the same shot, then cuts.
+    layout = [(0, 0, still), (10, 0, _noisy(still, 1)), (20, 0, _noisy(still, 2)),
+              (30, 1, _noisy(still, 3)), (40, 1, cut)]
+
+    def artifact(frame_index: int, segment: int) -> ImageArtifact:
+        return ImageArtifact(
+            artifact_type="ImageArtifact", frame_index=frame_index, extension=".webp",
+            related_video_id="v", related_video_minio_url="s3://b/v.mp4", related_video_extension=".mp4",
+            related_video_fps=10.0, timestamp=f"t{frame_index}", autoshot_artifact_id="a",
+            user_bucket="b", metadata={}, content_type="image/webp", segment_index=segment,
+        )
+
+    artifacts = [artifact(idx, seg) for idx, seg, _ in layout]
+    frames = [(b"%d" % idx, frame_signature(image)) for idx, _, image in layout]
+
+    def run(scope: str) -> list[ImageArtifact]:
+        for a in artifacts:
+            a.represented_frames.clear()
+        task = ImageProcessingTask.__new__(ImageProcessingTask)
+        task.config = ImageProcessingSettings(num_img_per_segment=3, dedup_scope=scope)
+        return [a for a, _ in task._deduplicate(artifacts, frames)]
+
+    kept = run("segment")
+    assert [a.frame_index for a in kept] == [0, 30, 40]
+    assert kept[0].represented_frames == [{"frame_index": 10, "timestamp": "t10"},
+                                          {"frame_index": 20, "timestamp": "t20"}]
+
+    kept = run("video")
+    assert [a.frame_index for a in kept] == [0, 40]
+    assert [f["frame_index"] for f in kept[0].represented_frames] == [10, 20, 30]
+
+    assert len(run("off")) == len(layout)
+
+
+def test_rerun_dedups_persisted_frames_from_stored_signatures_and_persists_merges(tmp_path, object_store, monkeypatch):
+    pytest.importorskip("minio")
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("prefect")
+    import asyncio
+    from types import SimpleNamespace
+
+    for name, value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                        "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+        os.environ.setdefault(name, value)
+    from core.artifact.persist import ArtifactPersistentVisitor
+    from core.artifact.schema import ImageArtifact
+    from core.config.storage import MinioSettings
+    from core.pipeline.tracker import ArtifactTracker
+    from core.storage import StorageClient
+    from task.image_processing import main as image_main
+
+    still, cut = _scene((30, 120, 200)), _scene((200, 40, 40), seed=5)
+    video = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), 10, (640, 360))
+    if not writer.isOpened():
+        pytest.skip("no MJPG encoder available")
+    for i in range(50):
+        writer.write(_noisy(still, i) if i < 40 else cut)
+    writer.release()
+
+    storage = StorageClient(MinioSettings(host="localhost", port="9000", user="u", password="p"))
+    storage.client = object_store
+    storage.upload_fileobj("b", "videos/v.avi", io.BytesIO(video.read_bytes()))
+    fetches: list[str] = []
+    original_fetch = image_main.fetch_object_from_s3
+
+    async def counting_fetch(url, client, suffix):
+        fetches.append(url)
+        return await original_fetch(url, client, suffix)
+
+    monkeypatch.setattr(image_main, "fetch_object_from_s3", counting_fetch)
+
+    deleted: list[str] = []
+
+    class _Deleter:
+        async def delete_artifacts(self, video_id, artifact_ids):
+            deleted.extend(artifact_ids)
+            return SimpleNamespace(metadata={"deleted_artifacts": len(artifact_ids)})
+
+    def frames() -> list[ImageArtifact]:
+        return [
+            ImageArtifact(
+                artifact_type="ImageArtifact", frame_index=idx, extension=".webp", related_video_id="v",
+                related_video_minio_url="s3://b/videos/v.avi", related_video_extension=".avi", related_video_fps=10.0,
+                timestamp=f"t{idx}", autoshot_artifact_id="shot", user_bucket="b", metadata={},
+                content_type="image/webp", segment_index=segment,
+            )
+            for idx, segment in [(0, 0), (10, 0), (20, 0), (30, 1), (40, 1)]
+        ]
+
+    async def run(visitor, scope: str) -> list[tuple[int, bool]]:
+        task = image_main.ImageProcessingTask(visitor, image_main.ImageProcessingSettings(num_img_per_segment=3, dedup_scope=scope))
+        task.frame_deleter = _Deleter()
+        outputs = [output async for output in task.execute({"s3://b/videos/v.avi": image_main._VideoFrames(frames())}, None)]
+        for output in outputs:
+            await task.postprocess(output)
+        return [(artifact.frame_index, frame is not None) for artifact, frame in outputs]
+
+    class _CountingTracker(ArtifactTracker):
+        lookups: list[str] = []
+
+        async def get_artifact(self, artifact_id):
+            self.lookups.append("one")
+            return await super().get_artifact(artifact_id)
+
+        async def get_artifacts(self, artifact_ids):
+            self.lookups.append("many")
+            return await super().get_artifacts(artifact_ids)
+
+    async def scenario():
+        tracker = _CountingTracker(f"sqlite+aiosqlite:///{tmp_path / 'tracker.db'}")
+        await tracker.initialize()
+        visitor = ArtifactPersistentVisitor(storage, tracker)
+        first = await run(visitor, "off")
+        first_fetches = len(fetches)
+        tracker.lookups.clear()
+        second = await run(visitor, "segment")
+        lookups = list(tracker.lookups)
+        kept = await tracker.get_artifacts([a.artifact_id for a in frames() if a.frame_index in (0, 30)])
+        await tracker.close()
+        return first, first_fetches, second, lookups, kept
+
+    first, first_fetches, second, lookups, kept = asyncio.run(scenario())
+    assert first == [(0, True), (10, True), (20, True), (30, True), (40, True)] and first_fetches == 1
+    # Every frame was persisted with its signature, so the rerun decodes nothing.
+    assert len(fetches) == 1
+    assert second == [(0, False), (30, False), (40, False)]
+    assert deleted == [a.artifact_id for a in frames() if a.frame_index in (10, 20)]
+    # One existence check per frame, then all stored signatures in a single query.
+    assert lookups.count("one") == 5 and lookups.count("many") == 1
+    # The frames merged into an already-persisted frame are recorded on its tracker row.
+    ids = {a.frame_index: a.artifact_id for a in frames()}
+    assert kept[ids[0]].artifact_metadata["represented_frames"] == [
+        {"frame_index": 10, "timestamp": "t10"}, {"frame_index": 20, "timestamp": "t20"},
+    ]
+    assert "represented_frames" not in kept[ids[30]].artifact_metadata
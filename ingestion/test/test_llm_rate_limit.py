@@ -0,0 +1,197 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+uvicorn = pytest.importorskip("uvicorn")
+fastapi = pytest.importorskip("fastapi")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "prefect_agent"))
+
+os.environ.setdefault("SERVICE_NAME", "service-llm-test")
+os.environ.setdefault("PORT", "0")
+os.environ.setdefault("CPU_FALLBACK", "true")
+
+from service_llm.core.config import LLMServiceConfig  # noqa: E402
+from service_llm.model.openrouter import OpenRouterAPIHandler  # noqa: E402
+from shared.rate_limit import RateLimitedError, RateLimiter, call_with_rate_limit  # noqa: E402
+
+
+class FakeProvider:
+    """OpenRouter-shaped chat completions server with latency and scripted 429s."""
+
+    def __init__(self, latency: float = 0.2, reject_first: int = 0, retry_after: str = "0.1") -> None:
+        self.latency = latency
+        self.reject_first = reject_first
+        self.retry_after = retry_after
+        self.calls = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = fastapi.FastAPI()
+        self.app.post("/v1/chat/completions")(self._complete)
+
+    async def _complete(self, body: dict):
+        self.calls += 1
+        if self.rejected < self.reject_first:
+            self.rejected += 1
+            return fastapi.responses.JSONResponse(
+                {"error": "rate limited"}, status_code=429, headers={"Retry-After": self.retry_after}
+            )
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        text = body["messages"][0]["content"][0]["text"]
+        return {
+            "choices": [{"message": {"content": f"caption:{text}"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+        }
+
+
+@pytest.fixture
+def provider_factory():
+    servers = []
+
+    def _start(**kwargs) -> tuple[FakeProvider, str]:
+        provider = FakeProvider(**kwargs)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(provider.app, host="127.0.0.1", port=port, log_level="error"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        deadline = time.time() + 10
+        while not server.started and time.time() < deadline:
+            time.sleep(0.02)
+        servers.append((server, thread))
+        return provider, f"http://127.0.0.1:{port}/v1/chat/completions"
+
+    yield _start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def _handler(endpoint: str, **overrides) -> OpenRouterAPIHandler:
+    config = LLMServiceConfig(
+        openrouter_api_key="test-key",
+        openrouter_base_url=endpoint,
+        **overrides,
+    )
+    return OpenRouterAPIHandler("openrouter_api", config)
+
+
+async def _run_many(handler: OpenRouterAPIHandler, n: int) -> list[dict]:
+    await handler.load_model_impl("cpu")
+    try:
+        return await asyncio.gather(*(
+            handler.run_inference({"prompt": f"p{i}", "image_base64": None, "metadata": {}})
+            for i in range(n)
+        ))
+    finally:
+        await handler.unload_model_impl()
+
+
+def test_requests_run_concurrently_over_the_pool(provider_factory):
+    provider, endpoint = provider_factory(latency=0.2)
+    handler = _handler(endpoint)
+
+    started = time.perf_counter()
+    results = asyncio.run(_run_many(handler, 16))
+    elapsed = time.perf_counter() - started
+
+    assert [r["answer"] for r in results] == [f"caption:p{i}" for i in range(16)]
+    assert provider.max_in_flight > 4
+    assert elapsed < 16 * 0.2 / 4
+
+
+def test_429_is_retried_after_retry_after(provider_factory):
+    provider, endpoint = provider_factory(latency=0.0, reject_first=3, retry_after="0.2")
+    handler = _handler(endpoint, rate_limit_max_retries=5)
+
+    started = time.perf_counter()
+    results = asyncio.run(_run_many(handler, 4))
+
+    assert all(r["answer"].startswith("caption:") for r in results)
+    assert provider.rejected == 3
+    # The backoff is shared, so the limiter held everyone for at least one Retry-After.
+    assert time.perf_counter() - started >= 0.2
+
+
+def test_429_gives_up_after_max_retries(provider_factory):
+    _, endpoint = provider_factory(latency=0.0, reject_first=100, retry_after="0")
+    handler = _handler(endpoint, rate_limit_max_retries=2)
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(_run_many(handler, 1))
+
+
+def test_rpm_limit_paces_requests(provider_factory):
+    provider, endpoint = provider_factory(latency=0.0)
+    handler = _handler(endpoint, rate_limit_rpm=120)  # burst of 120, then 2 per second
+    handler._limiter._requests.available = 2
+
+    started = time.perf_counter()
+    asyncio.run(_run_many(handler, 4))
+
+    assert provider.calls == 4
+    assert time.perf_counter() - started >= 0.9
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_token_bucket_waits_for_tokens_and_settles_usage():
+    clock = _FakeClock()
+    limiter = RateLimiter(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+    async def scenario() -> list[float]:
+        admitted = []
+        for _ in range(3):
+            await limiter.acquire(400)
+            admitted.append(clock.now)
+        return admitted
+
+    admitted = asyncio.run(scenario())
+    # 600 tokens of burst, then 10 tokens/s: the second call waits for 200 more, the third for 400.
+    assert admitted == pytest.approx([0.0, 20.0, 60.0])
+
+    limiter.settle(estimated_tokens=400, actual_tokens=100)
+    assert limiter._tokens.available == pytest.approx(300.0)
+
+
+def test_call_with_rate_limit_backs_off_exponentially_without_retry_after():
+    clock = _FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    attempts = []
+
+    async def flaky() -> str:
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise RateLimitedError()
+        return "ok"
+
+    assert asyncio.run(call_with_rate_limit(limiter, flaky, min_wait=1.0)) == "ok"
+    # Jittered 1 s then 2 s waits (each at least half the nominal delay).
+    assert attempts[1] - attempts[0] >= 0.5
+    assert attempts[2] - attempts[1] >= 1.0
+
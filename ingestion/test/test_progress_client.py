@@ -0,0 +1,86 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("prefect")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.clients.progress_client import ProcessingStage, ProgressClient  # noqa: E402
+
+
+class _Receiver:
+    """Status endpoint stand-in recording every posted body, optionally slow or failing."""
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0) -> None:
+        self.latency = latency
+        self.fail_first = fail_first
+        self.bodies: list[dict] = []
+        self._lock = threading.Lock()
+        self.transport = httpx.MockTransport(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.latency)
+        with self._lock:
+            if self.fail_first:
+                self.fail_first -= 1
+                return httpx.Response(503)
+            self.bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"ok": True})
+
+
+def test_updates_do_not_block_and_are_coalesced():
+    receiver = _Receiver(latency=0.05)
+    client = ProgressClient("http://status", "/status/{video_id}", flush_interval_ms=50,
+                            transport=receiver.transport)
+
+    async def run() -> float:
+        await client.start_video("v1")
+        started = time.perf_counter()
+        for _ in range(5000):
+            client.update_state_progress("v1", ProcessingStage.IMAGE_EXTRACTION)
+            await client.stream_progress("v1")
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    client.finish_video("v1")
+    client.close()
+
+    assert elapsed < 1.0
+    assert len(receiver.bodies) < 20
+    final = receiver.bodies[-1]
+    assert final["status"] == 100.0 and final["end_time"] is not None
+    assert final["stage_counts"] == {"image_extraction": 5000}
+
+
+def test_final_states_are_retried_and_delivered_in_order():
+    receiver = _Receiver(fail_first=2)
+    client = ProgressClient("http://status", "/status/{video_id}", flush_interval_ms=10,
+                            max_retries=3, transport=receiver.transport)
+
+    asyncio.run(client.start_video("a"))
+    asyncio.run(client.start_video("b"))
+    client.update_state_progress("a", ProcessingStage.ASR_TRANSCRIPTION)
+    client.finish_video("a")
+    client.finish_video("b", errors="boom")
+    client.close()
+
+    finals = [body for body in receiver.bodies if body["end_time"] is not None]
+    assert [(body["video_id"], body["errors"]) for body in finals] == [("a", None), ("b", "boom")]
+
+
+def test_disabled_client_keeps_progress_in_memory():
+    client = ProgressClient(base_url="", endpoint="")
+    asyncio.run(client.start_video("v"))
+    client.update_state_progress("v", ProcessingStage.AUTOSHOT_SEGMENTATION, count=3)
+
+    progress = client.get_progress("v")
+    assert progress is not None and progress.stage_counts == {ProcessingStage.AUTOSHOT_SEGMENTATION: 3}
+    assert client._sender is None
+    client.close()
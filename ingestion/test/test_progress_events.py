@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("prefect")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.clients.progress_client import ProcessingStage, ProgressClient  # noqa: E402
+from core.management.events import ProgressEventBus  # noqa: E402
+
+
+async def _take(stream, n: int) -> list:
+    items = []
+    async for item in stream:
+        items.append(item)
+        if len(items) == n:
+            break
+    return items
+
+
+def test_resume_replays_only_missed_events_for_the_video():
+    bus = ProgressEventBus(capacity=10)
+    for i in range(4):
+        bus.publish("a", "progress", data={"i": i})
+        bus.publish("b", "progress", data={"i": i})
+
+    async def run():
+        stream = bus.subscribe("a", last_event_id=3)
+        replayed = await _take(stream, 2)
+        bus.publish("a", "final")
+        live = await _take(stream, 1)
+        await stream.aclose()
+        return replayed + live
+
+    events = asyncio.run(run())
+    assert [(e.id, e.data.get("i")) for e in events[:2]] == [(5, 2), (7, 3)]
+    assert events[2].event == "final" and events[2].id == 9
+    assert not bus._subscribers
+
+
+def test_resume_outside_buffer_sends_reset_then_everything_kept():
+    bus = ProgressEventBus(capacity=3)
+    for i in range(6):
+        bus.publish("a", "progress", data={"i": i})
+
+    async def run():
+        stream = bus.subscribe("a", last_event_id=1)
+        events = await _take(stream, 4)
+        await stream.aclose()
+        return events
+
+    events = asyncio.run(run())
+    assert events[0].event == "reset" and events[0].data["oldest_available_id"] == 4
+    assert [e.id for e in events[1:]] == [4, 5, 6]
+
+
+def test_publish_from_other_threads_and_drop_slow_subscriber():
+    bus = ProgressEventBus(queue_size=5)
+
+    async def run():
+        fast = bus.subscribe("a")
+        slow = bus.subscribe("a")
+        # Prime both generators so they are registered before publishing.
+        fast_task = asyncio.ensure_future(_take(fast, 3))
+        slow_first = asyncio.ensure_future(slow.__anext__())
+        await asyncio.sleep(0)
+        threading.Thread(target=lambda: [bus.publish("a", "progress", data={"i": i}) for i in range(3)]).start()
+        got = await fast_task
+        first = await slow_first
+        # The slow subscriber stops reading while 10 more events arrive.
+        await asyncio.to_thread(lambda: [bus.publish("a", "progress") for _ in range(10)])
+        await asyncio.sleep(0.05)
+        rest = [e async for e in slow]
+        return got, first, rest
+
+    got, first, rest = asyncio.run(run())
+    assert [e.data["i"] for e in got] == [0, 1, 2]
+    assert first.id == 1
+    assert rest == []  # disconnected; the client resumes from its Last-Event-ID
+
+
+def test_progress_client_and_tracker_feed_the_bus():
+    bus = ProgressEventBus()
+    client = ProgressClient(base_url="", endpoint="", flush_interval_ms=20, event_bus=bus)
+    from core.pipeline.tracker import ArtifactMetadata
+
+    asyncio.run(client.start_video("v"))
+    for _ in range(200):
+        client.update_state_progress("v", ProcessingStage.IMAGE_EXTRACTION)
+        client.record_artifact(ArtifactMetadata(
+            artifact_id="x", artifact_type="ImageArtifact", user_id="u", minio_url="s3://b/x",
+            task_name="image processing", artifact_metadata={}, related_video_id="v",
+        ))
+    client.finish_video("v")
+    client.close()
+
+    events = bus.replay(0, "v")
+    assert events[0].event == "started" and events[-1].event == "final"
+    assert len(events) < 20
+    assert events[-1].data["artifact_counts"] == {"ImageArtifact": 200}
+    assert events[-1].data["stage_counts"] == {"image_extraction": 200}
+
+
+@pytest.fixture
+def management_app():
+    uvicorn = pytest.importorskip("uvicorn")
+    fastapi = pytest.importorskip("fastapi")
+    pytest.importorskip("minio")
+    for name, value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                        "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+        os.environ.setdefault(name, value)
+    from api.management import router
+
+    app = fastapi.FastAPI()
+    app.include_router(router)
+    app.state.event_bus = ProgressEventBus()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.02)
+    yield app, f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+def _read_sse(url: str, headers: dict, n: int) -> list[dict]:
+    events = []
+    with httpx.stream("GET", url, headers=headers, timeout=5) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+                if len(events) == n:
+                    break
+    return events
+
+
+def test_sse_endpoint_resumes_from_last_event_id(management_app):
+    app, base = management_app
+    bus = app.state.event_bus
+    for i in range(3):
+        bus.publish("v", "progress", stage="asr_transcription", data={"i": i})
+    bus.publish("other", "progress")
+
+    events = _read_sse(f"{base}/management/videos/v/events", {"Last-Event-ID": "1"}, 2)
+    assert [(e["id"], e["data"]["i"]) for e in events] == [(2, 1), (3, 2)]
+
+    threading.Timer(0.2, lambda: bus.publish("v", "final")).start()
+    events = _read_sse(f"{base}/management/events?video_id=v", {"Last-Event-ID": "3"}, 1)
+    assert events[0]["event"] == "final"
+
+
+def test_websocket_endpoint_streams_events(management_app):
+    app, _ = management_app
+    from fastapi.testclient import TestClient
+
+    bus = app.state.event_bus
+    bus.publish("v", "started")
+    with TestClient(app) as client, client.websocket_connect("/management/ws/progress/v?last_event_id=0") as ws:
+        assert ws.receive_json()["event"] == "started"
+        bus.publish("v", "progress", stage="image_extraction")
+        event = ws.receive_json()
+        assert (event["event"], event["stage"]) == ("progress", "image_extraction")
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("prefect")
+pytest.importorskip("minio")
+pytest.importorskip("pymilvus")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from pymilvus import MilvusException  # noqa: E402
+
+from core.clients.base import MilvusCollectionConfig  # noqa: E402
+from core.clients.milvus_client import ImageEmbeddingMilvusClient  # noqa: E402
+from core.management.reindex import Reindexer  # noqa: E402
+from core.pipeline.checkpoint import StageCheckpointStore, StageFingerprint  # noqa: E402
+from core.pipeline.tracker import ArtifactMetadata, ArtifactTracker  # noqa: E402
+
+
+class _Cfg(BaseModel):
+    model_name: str
+    model_version: str | None = None
+    device: str = "cpu"
+
+
+def _state():
+    def task(name, **config):
+        return SimpleNamespace(name=name, config=_Cfg(**config))
+
+    return SimpleNamespace(
+        asr_task=task("ASR", model_name="asr"),
+        autoshot_task=task("Autoshot", model_name="shot"),
+        image_processing_task=task("ImageProcessing", model_name="frames"),
+        segment_caption_llm_task=task("SegmentCaption", model_name="llm"),
+        image_caption_llm_task=task("ImageCaption", model_name="llm"),
+        text_caption_segment_embedding_task=task("SegmentEmbed", model_name="text", model_version="2"),
+        text_image_caption_embedding_task=task("CaptionEmbed", model_name="text", model_version="2"),
+        image_embedding_task=task("ImageEmbed", model_name="clip", model_version="2"),
+        text_segment_caption_milvus_config=SimpleNamespace(collection_name="segments"),
+        text_image_caption_milvus_config=SimpleNamespace(collection_name="captions"),
+        image_embedding_milvus_config=SimpleNamespace(collection_name="images"),
+    )
+
+
+async def _setup(tmp_path):
+    tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 'tracker.db'}")
+    await tracker.initialize()
+    state = _state()
+    current = {
+        kind: StageFingerprint.of(getattr(state, attr).config).provenance(getattr(state, attr).config.model_name)
+        for kind, attr in [("ImageCaptionArtifact", "image_caption_llm_task"),
+                           ("TextCaptionEmbeddingArtifact", "text_image_caption_embedding_task"),
+                           ("ImageEmbeddingArtifact", "image_embedding_task")]
+    }
+    outdated = StageFingerprint.of(_Cfg(model_name="clip", model_version="1")).provenance("clip")
+
+    async def save(artifact_id, artifact_type, parent, video, metadata):
+        await tracker.save_artifact(ArtifactMetadata(
+            artifact_id=artifact_id, artifact_type=artifact_type, user_id="u", minio_url=f"s3://u/{artifact_id}",
+            parent_artifact_id=parent, task_name="t", artifact_metadata=metadata, related_video_id=video,
+        ))
+
+    for video in ("a", "b"):
+        await save(video, "VideoArtifact", None, video, {})
+    # a: captions current, image embedding from an older model. b: caption indexed before provenance existed.
+    await save("cap-a", "ImageCaptionArtifact", "a", "a", current["ImageCaptionArtifact"])
+    await save("emb-a", "TextCaptionEmbeddingArtifact", "cap-a", "a", current["TextCaptionEmbeddingArtifact"])
+    await save("img-a", "ImageEmbeddingArtifact", "a", "a", outdated)
+    await save("cap-b", "ImageCaptionArtifact", "b", "b", {})
+    await save("emb-b", "TextCaptionEmbeddingArtifact", "cap-b", "b", current["TextCaptionEmbeddingArtifact"])
+
+    checkpoints = StageCheckpointStore(tracker)
+    await checkpoints.complete("ImageProcessing", {"a": []}, StageFingerprint.of(state.image_processing_task.config))
+    return tracker, Reindexer(tracker, checkpoints, state)
+
+
+def test_plan_marks_stale_stages_and_propagates_downstream(tmp_path):
+    async def run():
+        tracker, reindexer = await _setup(tmp_path)
+        strict = await reindexer.plan()
+        lenient = await reindexer.plan(assume_legacy_current=True)
+        await tracker.close()
+        return strict, lenient
+
+    strict, lenient = asyncio.run(run())
+    assert {(s.artifact_type, s.stale_artifacts, tuple(s.videos)) for s in strict.stages} == {
+        ("ImageCaptionArtifact", 1, ("b",)),
+        ("TextCaptionEmbeddingArtifact", 0, ("b",)),
+        ("ImageEmbeddingArtifact", 1, ("a",)),
+    }
+    assert sorted(strict.collections) == ["captions", "images"]
+    assert strict.collection_videos["text_image_caption_milvus_config"] == ["a", "b"]
+    assert strict.blocked_videos == {"b": ["ImageProcessing"]}
+    assert sorted(strict.stale_ids) == ["cap-b", "img-a"]
+
+    assert [(s.artifact_type, s.videos) for s in lenient.stages] == [("ImageEmbeddingArtifact", ["a"])]
+    assert lenient.collections == ["images"] and lenient.blocked_videos == {}
+
+
+class _FakeMilvus:
+    def __init__(self, aliases, collections):
+        self.aliases, self.collections, self.calls = aliases, collections, []
+
+    async def describe_alias(self, alias):
+        if alias not in self.aliases:
+            raise MilvusException(message="alias not found")
+        return {"alias": alias, "collection_name": self.aliases[alias]}
+
+    async def has_collection(self, name):
+        return name in self.collections
+
+    async def rename_collection(self, old_name, new_name):
+        self.calls.append(("rename", old_name))
+        self.collections = [new_name if c == old_name else c for c in self.collections]
+
+    async def create_alias(self, collection_name, alias):
+        self.calls.append(("create", alias))
+        self.aliases[alias] = collection_name
+
+    async def alter_alias(self, collection_name, alias):
+        self.calls.append(("alter", alias))
+        self.aliases[alias] = collection_name
+
+
+def test_point_alias_renames_plain_collection_once_then_alters():
+    async def run():
+        fake = _FakeMilvus({}, ["images", "images__new"])
+        client = ImageEmbeddingMilvusClient(MilvusCollectionConfig(collection_name="images__new", dimension=4), "h", 1)
+        client._client = fake  # type: ignore[assignment]
+        first = await client.point_alias("images")
+        client.config = MilvusCollectionConfig(collection_name="images__newer", dimension=4)
+        second = await client.point_alias("images")
+        return fake, first, second
+
+    fake, first, second = asyncio.run(run())
+    assert first.startswith("images__legacy_") and second == "images__new"
+    assert [call for call, _ in fake.calls] == ["rename", "create", "alter"]
+    assert fake.aliases == {"images": "images__newer"}
+
+
+def test_failed_reindex_restores_tracker_rows_checkpoints_and_counters(tmp_path):
+    class _Client:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return None
+
+    async def run():
+        tracker, reindexer = await _setup(tmp_path)
+        plan = await reindexer.plan(assume_legacy_current=True)
+        old = StageFingerprint.of(_Cfg(model_name="clip", model_version="1"))
+        await reindexer.checkpoints.complete("ImageEmbed", {"a": []}, old)
+        await tracker.refresh_stage_counters("a")
+        counters_before = await tracker.get_stage_counters("a")
+
+        async def run_stage(stage, videos, produced):
+            task = reindexer._task(stage.task_attr)
+            await reindexer.checkpoints.invalidate(videos, [task.name])
+            for artifact_id in ("img-a", "img-a-extra"):
+                await tracker.save_artifact(ArtifactMetadata(
+                    artifact_id=artifact_id, artifact_type="ImageEmbeddingArtifact", user_id="u",
+                    minio_url=f"s3://u/{artifact_id}", parent_artifact_id="a", task_name="t",
+                    artifact_metadata={"config_hash": "new"}, related_video_id="a",
+                ))
+            produced[stage.task_attr] = {"a": [SimpleNamespace(artifact_id="img-a"), SimpleNamespace(artifact_id="img-a-extra")]}
+            await reindexer.checkpoints.complete(task.name, {"a": []}, StageFingerprint.of(task.config))
+
+        async def build_shadow(*args):
+            raise RuntimeError("Shadow holds 1 rows, expected 2")
+
+        reindexer._run_stage = run_stage
+        reindexer._milvus_client = lambda *args: _Client()
+        state = reindexer.state
+        reindexer._task = lambda attr: getattr(state, attr, SimpleNamespace(name="Milvus", config=_Cfg(model_name="clip")))
+        reindexer.build_shadow = build_shadow
+        with pytest.raises(RuntimeError, match="expected 2"):
+            await reindexer.execute(plan)
+        rows = {a: await tracker.get_artifact(a) for a in ("img-a", "img-a-extra", "cap-a")}
+        lineage = await tracker.count_descendants_by_type("a")
+        counters = await tracker.get_stage_counters("a")
+        checkpoint = (await reindexer.checkpoints.load("ImageEmbed", ["a"]))["a"]
+        await tracker.close()
+        return rows, lineage, counters_before, counters, checkpoint, old
+
+    rows, lineage, counters_before, counters, checkpoint, old = asyncio.run(run())
+    assert rows["img-a-extra"] is None
+    assert rows["img-a"] is not None and rows["img-a"].artifact_metadata.get("config_hash") != "new"
+    assert lineage["ImageEmbeddingArtifact"][0] == 1
+    assert {t: c for t, (c, _) in counters.items()} == {t: c for t, (c, _) in counters_before.items()}
+    assert checkpoint.fingerprint.config_hash == old.config_hash
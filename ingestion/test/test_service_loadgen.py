@@ -0,0 +1,123 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("cv2")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT.parent))
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "prefect_agent"))
+
+for name in ("CHUNKFORMER_MODEL_PATH", "AUTOSHOT_MODEL_PATH", "BEIT3_MODEL_CHECKPOINT",
+             "BEIT3_TOKENIZER_CHECKPOINT", "OPEN_CLIP_MODEL_NAME", "OPEN_CLIP_PRETRAINED"):
+    os.environ.setdefault(name, "-")
+os.environ.setdefault("SERVICE_NAME", "service-loadgen-test")
+os.environ.setdefault("PORT", "0")
+os.environ.setdefault("CPU_FALLBACK", "true")
+
+from benchmarks.services import dummy  # noqa: E402
+from benchmarks.services.loadgen import (  # noqa: E402
+    LatencyHistogram,
+    LoadGenerator,
+    LoadProfile,
+    Payload,
+    make_client,
+    metrics_delta,
+)
+from benchmarks.services.targets import TARGETS, default_mix  # noqa: E402
+from shared.config import LogConfig, LogLevel  # noqa: E402
+
+
+def _run(kind, profile, tmp_path):
+    target = TARGETS[kind]
+    app = target.build_app(LogConfig(log_level=LogLevel.WARNING, log_format="console",
+                                     log_file=str(tmp_path / f"{kind}.log")))
+
+    async def go():
+        async with make_client(app, profile.concurrency) as client:
+            await target.load_model(client)
+            return await LoadGenerator(client, profile).run()
+
+    return asyncio.run(go())
+
+
+@pytest.fixture
+def fast_models(monkeypatch):
+    for kind in dummy.costs:
+        monkeypatch.setitem(dummy.costs, kind, dummy.DummyCost(fixed_ms=1.0, per_item_ms=0.0))
+
+
+@pytest.mark.parametrize("kind", sorted(TARGETS))
+def test_closed_loop_counts_every_request_and_the_service_agrees(kind, tmp_path, fast_models):
+    profile = LoadProfile(mix=default_mix(kind), concurrency=4, duration_seconds=30, max_requests=24,
+                          warmup_requests=2)
+
+    report = _run(kind, profile, tmp_path)
+
+    assert report["requests"] == 24
+    assert report["error_rate"] == 0.0
+    assert report["latency_ms"]["count"] == 24
+    assert sum(report["latency_ms"]["buckets"].values()) == 24
+    assert sum(p["requests"] for p in report["by_payload"].values()) == 24
+    # Warm-up requests land before the first scrape, so the service saw exactly the measured ones.
+    successes = [v for k, v in report["service_metrics"]["counters"].items()
+                 if k.startswith("service_requests_total") and 'status="success"' in k]
+    assert successes == [24.0]
+
+
+def test_open_loop_counts_queueing_behind_a_saturated_service(tmp_path, monkeypatch):
+    # One request in flight at a time, each taking 20 ms, offered at 200/s: the backlog grows.
+    monkeypatch.setitem(dummy.costs, "text_embedding", dummy.DummyCost(fixed_ms=20.0, per_item_ms=0.0, mode="async"))
+    mix = [Payload("query", TARGETS["text_embedding"].infer_path, {"texts": ["a dog"]})]
+    profile = LoadProfile(mix=mix, concurrency=1, mode="open", rate=200.0, duration_seconds=0.25, seed=1)
+
+    report = _run("text_embedding", profile, tmp_path)
+
+    assert report["requests"] > 20
+    assert report["error_rate"] == 0.0
+    assert report["throughput_rps"] < 60
+    # Measured from the intended send time, the wait for the busy service is part of the latency.
+    assert report["latency_ms"]["p50"] > 5 * 20
+    assert report["latency_ms"]["max"] > report["requests"] * 20 / 2
+
+
+def test_rejected_payloads_are_reported_as_errors(tmp_path, fast_models):
+    path = TARGETS["text_embedding"].infer_path
+    mix = [Payload("ok", path, {"texts": ["a dog"]}), Payload("empty", path, {"texts": []})]
+    profile = LoadProfile(mix=mix, concurrency=2, duration_seconds=30, max_requests=40, seed=3)
+
+    report = _run("text_embedding", profile, tmp_path)
+
+    assert report["by_payload"]["empty"]["errors"] == report["by_payload"]["empty"]["requests"] > 0
+    assert report["by_payload"]["ok"]["errors"] == 0
+    assert report["errors"] == {"HTTP 422": report["by_payload"]["empty"]["requests"]}
+    assert report["error_rate"] == pytest.approx(report["by_payload"]["empty"]["requests"] / 40)
+
+
+def test_latency_histogram_buckets_are_upper_bounds():
+    hist = LatencyHistogram(buckets_ms=(10, 100))
+    for value in (1, 10, 11, 100, 1000):
+        hist.observe(value)
+
+    report = hist.report()
+
+    assert report["buckets"] == {"<=10": 2, "<=100": 2, "+Inf": 1}
+    assert report["count"] == 5 and report["max"] == 1000
+
+
+def test_metrics_delta_keeps_changed_counters_and_final_gauges():
+    before = {"req_total": ("counter", 3.0), "idle_total": ("counter", 5.0), "mem": ("gauge", 10.0)}
+    after = {"req_total": ("counter", 8.0), "idle_total": ("counter", 5.0), "mem": ("gauge", 12.0),
+             "new_total": ("counter", 1.0)}
+
+    assert metrics_delta(before, after) == {
+        "counters": {"new_total": 1.0, "req_total": 5.0},
+        "gauges": {"mem": 12.0},
+    }
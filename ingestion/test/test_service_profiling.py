@@ -0,0 +1,82 @@
+import asyncio
+import os
+import pstats
+import sys
+from pathlib import Path
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+pytest.importorskip("prometheus_client")
+pytest.importorskip("cv2")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT.parent))
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "prefect_agent"))
+
+for name in ("CHUNKFORMER_MODEL_PATH", "AUTOSHOT_MODEL_PATH", "BEIT3_MODEL_CHECKPOINT",
+             "BEIT3_TOKENIZER_CHECKPOINT", "OPEN_CLIP_MODEL_NAME", "OPEN_CLIP_PRETRAINED"):
+    os.environ.setdefault(name, "-")
+os.environ.setdefault("SERVICE_NAME", "service-profiling-test")
+os.environ.setdefault("PORT", "0")
+os.environ.setdefault("CPU_FALLBACK", "true")
+
+from benchmarks.services import dummy  # noqa: E402,F401  (registers the dummy handlers)
+from benchmarks.services.targets import TARGETS  # noqa: E402
+from shared.config import LogConfig, LogLevel  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    return TARGETS["text_embedding"].build_app(
+        LogConfig(log_level=LogLevel.WARNING, log_format="console", log_file=str(tmp_path / "svc.log"))
+    )
+
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://svc")
+
+
+def _sample(text, name):
+    return next(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(name))
+
+
+def test_infer_records_phases_batch_size_and_payload_bytes(app):
+    texts = ["a red car", "hai người đang nói chuyện"] * 8
+
+    async def run():
+        async with _client(app) as client:
+            await TARGETS["text_embedding"].load_model(client)
+            response = await client.post("/text-embedding/infer", json={"texts": texts})
+            response.raise_for_status()
+            return (await client.get("/metrics")).text
+
+    text = asyncio.run(run())
+    for phase in ("preprocess", "inference", "postprocess"):
+        assert _sample(text, f'service_infer_phase_duration_seconds_count{{phase="{phase}"') == 1
+    assert _sample(text, "service_infer_batch_size_sum") == 16
+    assert _sample(text, "service_infer_payload_bytes_sum") == sum(len(t.encode()) for t in texts)
+
+
+def test_profile_endpoint_is_token_gated_and_returns_a_capture(app, tmp_path):
+    async def run():
+        async with _client(app) as client:
+            disabled = await client.post("/admin/profile", params={"seconds": 0.1})
+            app.state.service.service_config.admin_token = "secret"
+            wrong = await client.post("/admin/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": "nope"})
+            too_long = await client.post("/admin/profile", params={"seconds": 10_000},
+                                         headers={"X-Admin-Token": "secret"})
+            captured = await client.post("/admin/profile", params={"seconds": 0.2, "mode": "cprofile"},
+                                         headers={"X-Admin-Token": "secret"})
+            return disabled, wrong, too_long, captured
+
+    disabled, wrong, too_long, captured = asyncio.run(run())
+    assert (disabled.status_code, wrong.status_code, too_long.status_code) == (404, 403, 400)
+    assert captured.status_code == 200
+    assert captured.headers["content-disposition"].endswith('.pstats"')
+
+    stats_file = tmp_path / "capture.pstats"
+    stats_file.write_bytes(captured.content)
+    assert pstats.Stats(str(stats_file)).total_calls > 0
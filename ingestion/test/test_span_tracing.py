@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("pydantic_settings")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from prefect_agent.shared import tracing  # noqa: E402
+
+
+class _Collect(tracing.SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def named(self, name):
+        return [span for span in self.spans if span.name == name]
+
+
+@pytest.fixture
+def exported():
+    exporter = _Collect()
+    tracing.configure_tracing("test", exporter)
+    yield exporter
+    tracing.configure_tracing("test", tracing.NoopExporter())
+
+
+def test_disabled_tracer_records_and_propagates_nothing():
+    tracing.configure_tracing("test", tracing.NoopExporter())
+    with tracing.span("work", video_id="v") as span:
+        span.set_attribute("ignored", 1)
+        assert tracing.inject() == {}
+    assert span.attributes == {}
+
+
+def test_traceparent_round_trip_and_video_trace_ids():
+    context = tracing.SpanContext("ab" * 16, "cd" * 8)
+    assert tracing.SpanContext.from_traceparent(context.to_traceparent()) == context
+    assert tracing.SpanContext.from_traceparent("00-short-cd-01") is None
+    assert tracing.trace_id_for_video("v1") == tracing.trace_id_for_video("v1") != tracing.trace_id_for_video("v2")
+    assert len(tracing.trace_id_for_video("v1")) == 32
+
+
+def test_nested_spans_and_video_trace(exported):
+    with tracing.span("batch") as batch:
+        with tracing.span("child"):
+            pass
+        with tracing.span("per_video", video_id="v1"):
+            with tracing.span("grandchild"):
+                pass
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("boom")
+
+    child, per_video, grandchild = exported.named("child")[0], exported.named("per_video")[0], exported.named("grandchild")[0]
+    assert child.parent_id == batch.context.span_id and child.context.trace_id == batch.context.trace_id
+    assert per_video.context.trace_id == tracing.trace_id_for_video("v1")
+    assert per_video.parent_id is None and per_video.links == [batch.context]
+    assert grandchild.parent_id == per_video.context.span_id
+    assert exported.named("failing")[0].error == "ValueError: boom"
+
+
+def test_http_propagation_through_middleware(exported):
+    httpx = pytest.importorskip("httpx")
+    fastapi = pytest.importorskip("fastapi")
+
+    app = fastapi.FastAPI()
+    app.add_middleware(tracing.TraceContextMiddleware)
+
+    @app.post("/infer")
+    async def infer():
+        with tracing.span("service.infer"):
+            return {"ok": True}
+
+    async def call():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://svc") as client:
+            with tracing.span("client.attempt", video_id="v9") as attempt:
+                await client.post("/infer", headers=tracing.inject())
+            await client.post("/infer")
+        return attempt
+
+    attempt = asyncio.run(call())
+    traced, untraced = exported.named("service.infer")
+    assert traced.context.trace_id == tracing.trace_id_for_video("v9")
+    assert traced.parent_id == attempt.context.span_id
+    assert untraced.parent_id is None and untraced.context.trace_id != traced.context.trace_id
+
+
+def test_otlp_file_export_and_video_timeline(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = tracing.OTLPJsonFileExporter(path, flush_every=1000)
+    tracing.configure_tracing("ingestion", exporter)
+    try:
+        with tracing.span("stage.Batch", videos=2) as batch:
+            with tracing.span("client.text-embedding", endpoint="/infer"):
+                pass
+        for video_id in ("a", "b"):
+            tracing.emit("stage.Batch", batch.start_ns, batch.end_ns, video_id=video_id, links=[batch.context])
+        with tracing.span("milvus.insert", video_id="a", rows=3):
+            pass
+        exporter.flush()
+    finally:
+        tracing.configure_tracing("test", tracing.NoopExporter())
+
+    line = json.loads(path.read_text().splitlines()[0])
+    resource = line["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0]["value"]["stringValue"] == "ingestion"
+    assert {span["name"] for span in resource["scopeSpans"][0]["spans"]} >= {"stage.Batch", "milvus.insert"}
+
+    timeline = tracing.video_timeline(tracing.read_spans(path), "a")
+    assert [(row["name"], row["depth"]) for row in timeline] == [
+        ("stage.Batch", 0), ("stage.Batch", 1), ("client.text-embedding", 2), ("milvus.insert", 0),
+    ]
+    assert timeline[-1]["attributes"]["rows"] == 3
+
+
+def test_base_task_links_each_video_to_the_batch_stage(exported):
+    pytest.importorskip("prefect")
+    pytest.importorskip("minio")
+    pytest.importorskip("pymilvus")
+    from core.pipeline.base_task import BaseTask
+
+    class _Item(BaseModel):
+        related_video_id: str
+
+    class _Settings(BaseModel):
+        pass
+
+    class _Task(BaseTask[list[_Item], _Item, _Settings]):
+        async def preprocess(self, input_data):
+            return input_data
+
+        async def execute(self, input_data, client):
+            for item in input_data:
+                with tracing.span("storage.get_object"):
+                    pass
+                yield item
+
+        async def postprocess(self, output_data):
+            return output_data
+
+    task = _Task(name="Frames", visitor=None, config=_Settings())  # type: ignore[arg-type]
+    items = [_Item(related_video_id=v) for v in ("a", "a", "b")]
+    assert asyncio.run(task.run(items)) == items
+
+    batch = next(span for span in exported.named("stage.Frames") if span.attributes.get("videos") == 2)
+    per_video = {span.attributes["video_id"]: span for span in exported.named("stage.Frames") if span is not batch}
+    assert per_video["a"].context.trace_id == tracing.trace_id_for_video("a")
+    assert per_video["a"].links == [batch.context] and per_video["a"].attributes["outputs"] == 2
+    assert per_video["b"].end_ns <= batch.end_ns
+    execute = exported.named("stage.execute")[0]
+    assert execute.parent_id == batch.context.span_id and execute.attributes["outputs"] == 3
+    assert all(span.parent_id == execute.context.span_id for span in exported.named("storage.get_object"))
+
+    exported.spans.clear()
+    asyncio.run(task.run(items[:2]))
+    (single,) = exported.named("stage.Frames")
+    assert single.context.trace_id == tracing.trace_id_for_video("a")
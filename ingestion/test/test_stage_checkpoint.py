@@ -0,0 +1,214 @@
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("prefect")
+pytest.importorskip("minio")
+pytest.importorskip("pymilvus")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+for _name, _value in {"MINIO_HOST": "localhost", "MINIO_PORT": "9000", "MINIO_USER": "u",
+                      "MINIO_PASSWORD": "p", "POSTGRE_DATABASE_URL": "sqlite+aiosqlite://"}.items():
+    os.environ.setdefault(_name, _value)
+
+from core.artifact.persist import ArtifactPersistentVisitor  # noqa: E402
+from core.artifact.schema import ImageArtifact  # noqa: E402
+from core.pipeline.base_task import BaseTask  # noqa: E402
+from core.pipeline.checkpoint import COMPLETED, RUNNING, StageCheckpointStore  # noqa: E402
+from core.pipeline.tracker import ArtifactMetadata, ArtifactTracker  # noqa: E402
+
+
+class _Settings(BaseModel):
+    model_name: str = "frames-v1"
+    frames: int = 5
+
+
+class _Frame(BaseModel):
+    video_id: str
+    related_video_id: str
+
+
+class _FrameTask(BaseTask[list[_Frame], ImageArtifact, _Settings]):
+    """Emits `frames` images per video, saving each to the tracker; optionally dies after `crash_after` new ones."""
+
+    def __init__(self, visitor, config, crash_after: int | None = None):
+        super().__init__(name="FrameTask", visitor=visitor, config=config)
+        self.crash_after = crash_after
+        self.preprocessed_videos: list[str] = []
+        self.generated: list[int] = []
+
+    async def preprocess(self, input_data):
+        self.preprocessed_videos += [item.related_video_id for item in input_data]
+        return [
+            ImageArtifact(
+                artifact_type="ImageArtifact", frame_index=i, extension=".webp", related_video_id=item.related_video_id,
+                related_video_minio_url="s3://b/v.mp4", related_video_extension=".mp4", related_video_fps=25.0,
+                timestamp="0", autoshot_artifact_id="shot", user_bucket="b", metadata={}, content_type="image/webp",
+            )
+            for item in input_data for i in range(self.config.frames)
+        ]
+
+    async def execute(self, input_data, client):
+        for artifact in input_data:
+            if await artifact.accept_check_exist(self.visitor):
+                yield artifact, False
+                continue
+            if self.crash_after is not None and len(self.generated) == self.crash_after:
+                raise RuntimeError("worker died")
+            self.generated.append(artifact.frame_index)
+            yield artifact, True
+
+    async def postprocess(self, output_data):
+        artifact, new = output_data
+        if new:
+            await self.visitor.tracker.save_artifact(ArtifactMetadata(
+                artifact_id=artifact.artifact_id, artifact_type="ImageArtifact", user_id="b",
+                minio_url=artifact.minio_url_path, parent_artifact_id=artifact.related_video_id, task_name=self.name,
+                artifact_metadata={}, related_video_id=artifact.related_video_id,
+            ))
+        return artifact
+
+
+class _CountingTracker(ArtifactTracker):
+    lookups = 0
+
+    async def get_artifact(self, artifact_id):
+        type(self).lookups += 1
+        return await super().get_artifact(artifact_id)
+
+
+async def _setup(tmp_path):
+    tracker = _CountingTracker(f"sqlite+aiosqlite:///{tmp_path / 'tracker.db'}")
+    await tracker.initialize()
+    for video in ("a", "b"):
+        await tracker.save_artifact(ArtifactMetadata(
+            artifact_id=video, artifact_type="VideoArtifact", user_id="b", minio_url=f"s3://b/{video}.mp4",
+            task_name="video", artifact_metadata={}, related_video_id=video,
+        ))
+    return tracker, ArtifactPersistentVisitor(minio_client=None, tracker=tracker), StageCheckpointStore(tracker)  # type: ignore[arg-type]
+
+
+_INPUT = [_Frame(video_id="a", related_video_id="a"), _Frame(video_id="b", related_video_id="b")]
+
+
+def test_completed_stage_is_skipped_without_preprocess_or_prepare(tmp_path):
+    prepared = []
+
+    @asynccontextmanager
+    async def prepare():
+        prepared.append(True)
+        yield
+
+    async def run():
+        tracker, visitor, store = await _setup(tmp_path)
+        first_task = _FrameTask(visitor, _Settings())
+        first = await first_task.run(_INPUT, checkpoints=store, prepare=prepare)
+        second_task = _FrameTask(visitor, _Settings())
+        second = await second_task.run(_INPUT, checkpoints=store, prepare=prepare)
+        changed_task = _FrameTask(visitor, _Settings(model_name="frames-v2"))
+        await changed_task.run(_INPUT[:1], checkpoints=store, prepare=prepare)
+        manifest = await store.load("FrameTask", ["a", "b"])
+        await tracker.close()
+        return first, second, second_task, changed_task, manifest
+
+    first, second, second_task, changed_task, manifest = asyncio.run(run())
+    assert [a.artifact_id for a in second] == [a.artifact_id for a in first] and len(first) == 10
+    assert second[0] == first[0]
+    assert second_task.preprocessed_videos == [] and len(prepared) == 2
+    assert changed_task.preprocessed_videos == ["a"] and changed_task.generated == []
+    assert manifest["a"].fingerprint.model_version == "frames-v2" and manifest["b"].artifact_count == 5
+    assert {m.status for m in manifest.values()} == {COMPLETED}
+
+
+def test_interrupted_stage_resumes_from_committed_artifacts(tmp_path):
+    async def run():
+        tracker, visitor, store = await _setup(tmp_path)
+        crashing = _FrameTask(visitor, _Settings(frames=50), crash_after=30)
+        with pytest.raises(RuntimeError):
+            await crashing.run(_INPUT, checkpoints=store, checkpoint_every=10)
+        partial = await store.load("FrameTask", ["a", "b"])
+
+        _CountingTracker.lookups = 0
+        resumed = _FrameTask(visitor, _Settings(frames=50))
+        outputs = await resumed.run(_INPUT, checkpoints=store)
+        lookups = _CountingTracker.lookups
+        await tracker.close()
+        return partial, resumed, outputs, lookups
+
+    partial, resumed, outputs, lookups = asyncio.run(run())
+    assert partial["a"].status == RUNNING and partial["a"].artifact_count == 30
+    assert partial["b"].status == RUNNING and partial["b"].artifact_count == 0
+    assert len(resumed.generated) == 70 and len(outputs) == 100
+    assert lookups == 0
+
+
+def test_changed_input_artifacts_rerun_the_stage_for_that_video(tmp_path):
+    async def run():
+        tracker, visitor, store = await _setup(tmp_path)
+        await _FrameTask(visitor, _Settings()).run(_INPUT, checkpoints=store)
+        # Same config, but an upstream stage now hands video "a" different input.
+        changed = [_Frame(video_id="a-resampled", related_video_id="a"), _INPUT[1]]
+        rerun = _FrameTask(visitor, _Settings())
+        await rerun.run(changed, checkpoints=store)
+        manifest = await store.load("FrameTask", ["a", "b"])
+        await tracker.close()
+        return rerun, manifest
+
+    rerun, manifest = asyncio.run(run())
+    assert rerun.preprocessed_videos == ["a"]
+    assert manifest["a"].fingerprint.input_hash != manifest["b"].fingerprint.input_hash
+    assert {m.status for m in manifest.values()} == {COMPLETED}
+
+
+def test_grouped_model_input_is_checkpointed_per_video(tmp_path):
+    from core.artifact.schema import ASRArtifact, AutoshotArtifact
+    from task.llm_segment_caption.main import LLMCaptionSettings, SegmentCaptionLLMTask, ShotASRInput
+
+    class _SegmentTask(SegmentCaptionLLMTask):
+        """The real input handling of the segment-caption stage, with one frame standing in for its captions."""
+
+        def __init__(self, visitor):
+            super().__init__(visitor, LLMCaptionSettings(model_name="llm", device="cpu", image_per_segments=1))
+            self.frames = _FrameTask(visitor, _Settings(frames=1))
+            self.preprocessed_videos: list[str] = []
+
+        async def preprocess(self, input_data):
+            videos = [asr.related_video_id for asr in input_data.list_asrs]
+            self.preprocessed_videos += videos
+            return await self.frames.preprocess([_Frame(video_id=v, related_video_id=v) for v in videos])
+
+        def execute(self, input_data, client):
+            return self.frames.execute(input_data, client)
+
+        async def postprocess(self, output_data):
+            return await self.frames.postprocess(output_data)
+
+    def shot_input(videos: list[str]) -> ShotASRInput:
+        common = dict(related_video_minio_url="s3://b/v.mp4", related_video_extension=".mp4", related_video_fps=25.0, user_bucket="b")
+        return ShotASRInput(
+            list_asrs=[ASRArtifact(artifact_type="ASRArtifact", related_video_id=v, task_name="asr", **common) for v in videos],
+            lists_autoshots=[AutoshotArtifact(artifact_type="AutoshotArtifact", related_video_id=v, task_name="shot", **common) for v in videos],
+        )
+
+    async def run():
+        tracker, visitor, store = await _setup(tmp_path)
+        first = await _SegmentTask(visitor).run(shot_input(["a", "b"]), checkpoints=store)
+        second_task = _SegmentTask(visitor)
+        second = await second_task.run(shot_input(["a", "b"]), checkpoints=store)
+        manifest = await store.load("SegmentCaptionLLMTask", ["a", "b"])
+        await tracker.close()
+        return first, second, second_task, manifest
+
+    first, second, second_task, manifest = asyncio.run(run())
+    assert [a.related_video_id for a in first] == ["a", "b"]
+    assert [a.artifact_id for a in second] == [a.artifact_id for a in first]
+    assert second_task.preprocessed_videos == []
+    assert {m.status for m in manifest.values()} == {COMPLETED}
+    assert manifest["a"].fingerprint.input_hash != manifest["b"].fingerprint.input_hash
@@ -0,0 +1,135 @@
+import asyncio
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("prefect")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.pipeline.tracker import (  # noqa: E402
+    ArtifactLineageSchema,
+    ArtifactMetadata,
+    ArtifactSchema,
+    ArtifactTracker,
+)
+
+
+def _metadata(artifact_id: str, artifact_type: str, parent: str | None, video: str) -> ArtifactMetadata:
+    return ArtifactMetadata(
+        artifact_id=artifact_id, artifact_type=artifact_type, user_id="u", minio_url=f"s3://b/{artifact_id}",
+        parent_artifact_id=parent, task_name="t", artifact_metadata={}, related_video_id=video,
+    )
+
+
+async def _tracker(tmp_path) -> ArtifactTracker:
+    tracker = ArtifactTracker(f"sqlite+aiosqlite:///{tmp_path / 'tracker.db'}")
+    await tracker.initialize()
+    return tracker
+
+
+async def _bulk_video(tracker: ArtifactTracker, video: str, images: int) -> None:
+    """video -> autoshot -> images -> (caption -> caption embedding, image embedding)."""
+    now = datetime.now()
+    rows, lineage = [ArtifactSchema(artifact_id=video, artifact_type="VideoArtifact", minio_url=f"s3://b/{video}.mp4",
+                                    user_id="u", task_name="t", created_at=now)], []
+
+    def add(artifact_id: str, artifact_type: str, parent: str) -> None:
+        rows.append(ArtifactSchema(artifact_id=artifact_id, artifact_type=artifact_type, minio_url=f"s3://b/{artifact_id}",
+                                   user_id="u", parent_artifact_id=parent, task_name="t", created_at=now))
+        lineage.append(ArtifactLineageSchema(parent_artifact_id=parent, child_artifact_id=artifact_id, transformation_type="t"))
+
+    add(f"{video}-shot", "AutoshotArtifact", video)
+    for i in range(images):
+        image = f"{video}-img{i}"
+        add(image, "ImageArtifact", f"{video}-shot")
+        add(f"{image}-cap", "ImageCaptionArtifact", image)
+        add(f"{image}-cap-emb", "TextCaptionEmbeddingArtifact", f"{image}-cap")
+        add(f"{image}-emb", "ImageEmbeddingArtifact", image)
+    async with tracker.get_session() as session:
+        session.add_all(rows)
+        await session.flush()
+        session.add_all(lineage)
+        await session.commit()
+
+
+def test_descendant_counts_in_one_query_for_large_video(tmp_path):
+    async def run():
+        tracker = await _tracker(tmp_path)
+        await _bulk_video(tracker, "v1", images=5000)
+        await _bulk_video(tracker, "v2", images=10)
+
+        started = time.perf_counter()
+        counts = await tracker.count_descendants_by_type("v1")
+        cte_seconds = time.perf_counter() - started
+
+        await tracker.refresh_stage_counters("v1")
+        started = time.perf_counter()
+        counters = await tracker.get_stage_counters("v1")
+        counter_seconds = time.perf_counter() - started
+        await tracker.close()
+        return counts, cte_seconds, counters, counter_seconds
+
+    counts, cte_seconds, counters, counter_seconds = asyncio.run(run())
+    assert {t: c for t, (c, _) in counts.items()} == {
+        "VideoArtifact": 1, "AutoshotArtifact": 1, "ImageArtifact": 5000, "ImageCaptionArtifact": 5000,
+        "TextCaptionEmbeddingArtifact": 5000, "ImageEmbeddingArtifact": 5000,
+    }
+    assert {t: c for t, (c, _) in counters.items()} == {t: c for t, (c, _) in counts.items()}
+    assert cte_seconds < 2.0
+    assert counter_seconds < 0.05
+
+
+def test_counters_follow_saves_and_refresh_after_deletes(tmp_path):
+    async def run():
+        tracker = await _tracker(tmp_path)
+        await tracker.save_artifact(_metadata("v", "VideoArtifact", None, "v"))
+        await tracker.save_artifact(_metadata("shot", "AutoshotArtifact", "v", "v"))
+        for i in range(3):
+            await tracker.save_artifact(_metadata(f"img{i}", "ImageArtifact", "shot", "v"))
+        with pytest.raises(Exception):
+            await tracker.save_artifact(_metadata("img0", "ImageArtifact", "shot", "v"))
+        saved = await tracker.get_stage_counters("v")
+
+        async with tracker.get_session() as session:
+            await session.execute(ArtifactLineageSchema.__table__.delete().where(
+                ArtifactLineageSchema.child_artifact_id == "img2"))
+            await session.execute(ArtifactSchema.__table__.delete().where(ArtifactSchema.artifact_id == "img2"))
+            await session.commit()
+        refreshed = await tracker.refresh_stage_counters("v")
+        await tracker.close()
+        return saved, refreshed
+
+    saved, refreshed = asyncio.run(run())
+    assert {t: c for t, (c, _) in saved.items()} == {"VideoArtifact": 1, "AutoshotArtifact": 1, "ImageArtifact": 3}
+    assert refreshed["ImageArtifact"][0] == 2
+
+
+def test_startup_backfill_counts_videos_saved_before_counters_existed(tmp_path):
+    async def run():
+        tracker = await _tracker(tmp_path)
+        await _bulk_video(tracker, "old", images=3)
+        # The old video gets one more artifact after counters exist, so it has a counter row but not all of them.
+        await tracker.save_artifact(_metadata("old-img3", "ImageArtifact", "old-shot", "old"))
+        await tracker.save_artifact(_metadata("new", "VideoArtifact", None, "new"))
+        await tracker.save_artifact(_metadata("new-shot", "AutoshotArtifact", "new", "new"))
+        before = await tracker.get_stage_counters("old")
+        backfilled = await tracker.backfill_stage_counters()
+        again = await tracker.backfill_stage_counters()
+        old, new = await tracker.get_stage_counters("old"), await tracker.get_stage_counters("new")
+        await tracker.close()
+        return before, backfilled, again, old, new
+
+    before, backfilled, again, old, new = asyncio.run(run())
+    assert {t: c for t, (c, _) in before.items()} == {"ImageArtifact": 1}
+    assert backfilled == ["old"] and again == []
+    assert {t: c for t, (c, _) in old.items()} == {
+        "VideoArtifact": 1, "AutoshotArtifact": 1, "ImageArtifact": 4, "ImageCaptionArtifact": 3,
+        "TextCaptionEmbeddingArtifact": 3, "ImageEmbeddingArtifact": 3,
+    }
+    assert {t: c for t, (c, _) in new.items()} == {"VideoArtifact": 1, "AutoshotArtifact": 1}